@@ -0,0 +1,168 @@
+"""
+Caché en memoria con expiración (TTL) y desalojo LRU, con backend compartido opcional.
+
+Sin configuración extra cada proceso tiene su propia copia. Si se define
+CACHE_REDIS_URL (y está instalado `redis`) las entradas también se guardan en Redis,
+de modo que varios workers comparten los valores y las invalidaciones.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.logger import logger
+
+try:
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover - dependencia opcional
+    redis = None
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+# Con backend compartido la copia local vive poco, para que las invalidaciones
+# hechas por otro proceso se vean pronto.
+CACHE_TTL_LOCAL_COMPARTIDO = int(os.getenv("CACHE_TTL_LOCAL_COMPARTIDO", 30))
+
+_FALTA = object()
+
+
+class BackendRedis:
+    """Backend compartido: guarda los valores serializados con pickle bajo un prefijo."""
+
+    def __init__(self, url: str, prefijo: str):
+        self.cliente = redis.Redis.from_url(url)  # type: ignore[union-attr]
+        self.prefijo = f"commuconnect:{prefijo}:"
+
+    def get(self, clave: Hashable) -> Any:
+        crudo = self.cliente.get(self.prefijo + str(clave))
+        return _FALTA if crudo is None else pickle.loads(crudo)
+
+    def set(self, clave: Hashable, valor: Any, ttl: int) -> None:
+        self.cliente.set(self.prefijo + str(clave), pickle.dumps(valor), ex=ttl)
+
+    def delete(self, clave: Hashable) -> None:
+        self.cliente.delete(self.prefijo + str(clave))
+
+    def clear(self) -> None:
+        for clave in self.cliente.scan_iter(f"{self.prefijo}*"):
+            self.cliente.delete(clave)
+
+
+def hay_backend_compartido() -> bool:
+    """True si las cachés comparten valores e invalidaciones entre procesos (Redis)."""
+    return bool(CACHE_REDIS_URL) and redis is not None
+
+
+def _backend_por_defecto(nombre: str) -> Optional[BackendRedis]:
+    if not CACHE_REDIS_URL:
+        return None
+    if redis is None:
+        logger.warning("CACHE_REDIS_URL definido pero el paquete 'redis' no está instalado; se usa solo memoria local")
+        return None
+    return BackendRedis(CACHE_REDIS_URL, nombre)
+
+
+class CacheTTL:
+    """
+    Diccionario acotado a `max_items` entradas que expiran a los `ttl` segundos.
+    Es seguro entre hilos y lleva la cuenta de aciertos y fallos.
+    """
+
+    def __init__(self, nombre: str, max_items: int = 1024, ttl: int = 300, backend: Any = _FALTA):
+        self.nombre = nombre
+        self.max_items = max_items
+        self.ttl = ttl
+        self.backend = _backend_por_defecto(nombre) if backend is _FALTA else backend
+        self.ttl_local = min(ttl, CACHE_TTL_LOCAL_COMPARTIDO) if self.backend else ttl
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        caches_registradas[nombre] = self
+
+    def get(self, clave: Hashable, defecto: Any = None) -> Any:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                if entrada[1] > ahora:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[0]
+                del self._datos[clave]
+
+        if self.backend is not None:
+            valor = self._backend_get(clave)
+            if valor is not _FALTA:
+                self._guardar_local(clave, valor)
+                with self._lock:
+                    self.aciertos += 1
+                return valor
+
+        with self._lock:
+            self.fallos += 1
+        return defecto
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[int] = None) -> None:
+        self._guardar_local(clave, valor, ttl)
+        if self.backend is not None:
+            try:
+                self.backend.set(clave, valor, ttl or self.ttl)
+            except Exception as e:
+                logger.warning(f"Caché {self.nombre}: no se pudo escribir en el backend compartido: {e}")
+
+    def delete(self, clave: Hashable) -> None:
+        with self._lock:
+            self._datos.pop(clave, None)
+        if self.backend is not None:
+            try:
+                self.backend.delete(clave)
+            except Exception as e:
+                logger.warning(f"Caché {self.nombre}: no se pudo invalidar en el backend compartido: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+        if self.backend is not None:
+            try:
+                self.backend.clear()
+            except Exception as e:
+                logger.warning(f"Caché {self.nombre}: no se pudo vaciar el backend compartido: {e}")
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "max_items": self.max_items,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "ratio_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+                "backend": type(self.backend).__name__ if self.backend else None,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._datos)
+
+    def _guardar_local(self, clave: Hashable, valor: Any, ttl: Optional[int] = None) -> None:
+        vence = time.monotonic() + min(ttl or self.ttl, self.ttl_local)
+        with self._lock:
+            self._datos[clave] = (valor, vence)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+
+    def _backend_get(self, clave: Hashable) -> Any:
+        try:
+            return self.backend.get(clave)  # type: ignore[union-attr]
+        except Exception as e:
+            logger.warning(f"Caché {self.nombre}: backend compartido no disponible: {e}")
+            return _FALTA
+
+
+# Todas las cachés creadas, por nombre (para exponer estadísticas)
+caches_registradas: Dict[str, CacheTTL] = {}
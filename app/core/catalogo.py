@@ -0,0 +1,138 @@
+"""
+Caché de lectura del catálogo (comunidades, servicios, planes).
+
+Estas listas se leen en casi todas las pantallas y solo cambian cuando un
+administrador las edita. `cache_catalogo(*modelos)` decora la función que arma la
+respuesta: la primera llamada consulta la BD y las siguientes salen de memoria
+(CacheTTL, con Redis si CACHE_REDIS_URL está definido).
+
+La invalidación sigue a las escrituras: cada flush anota las tablas tocadas y, al
+hacer commit, se vacían solo las cachés que dependen de esas tablas. Así cualquier
+camino de escritura (endpoints de admin, cargas masivas, scripts con Session) la
+mantiene al día sin llamadas explícitas. El TTL queda como red de seguridad para
+cambios hechos fuera de la aplicación.
+
+Uso:
+    @cache_catalogo(Plan, ComunidadXPlan)
+    def listar_planes_por_comunidad_catalogo(session, id_comunidad) -> List[PlanOut]: ...
+"""
+import inspect
+import os
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+
+from app.core.cache import CacheTTL
+
+CATALOGO_CACHE_TTL = int(os.getenv("CATALOGO_CACHE_TTL", 600))
+CATALOGO_CACHE_MAX = int(os.getenv("CATALOGO_CACHE_MAX", 256))
+
+_FALTA = object()
+
+# tabla -> cachés que dependen de ella
+_dependientes: Dict[str, List[CacheTTL]] = defaultdict(list)
+caches_catalogo: Dict[str, CacheTTL] = {}
+# Aumenta con cada invalidación: una lectura que empezó antes no guarda su resultado
+_generaciones: Dict[str, int] = defaultdict(int)
+
+
+def cache_catalogo(*modelos, ttl: int = CATALOGO_CACHE_TTL, max_items: int = CATALOGO_CACHE_MAX):
+    """
+    Decora `funcion(session, *args)`; la clave es `args`. Lo que devuelve debe ser
+    independiente de la sesión (esquemas o dicts, no objetos ORM) y no debe mutarse.
+    Acepta funciones async (AsyncSession).
+    """
+    tablas = {m.__table__.name for m in modelos}
+
+    def decorador(funcion: Callable) -> Callable:
+        cache = CacheTTL(f"catalogo.{funcion.__name__}", max_items=max_items, ttl=ttl)
+        caches_catalogo[cache.nombre] = cache
+        for tabla in tablas:
+            _dependientes[tabla].append(cache)
+
+        if inspect.iscoroutinefunction(funcion):
+            @wraps(funcion)
+            async def envoltura_async(session, *args):
+                valor = cache.get(args, _FALTA)
+                if valor is _FALTA:
+                    generacion = _generaciones[cache.nombre]
+                    valor = await funcion(session, *args)
+                    if generacion == _generaciones[cache.nombre]:
+                        cache.set(args, valor)
+                return valor
+            envoltura_async.cache = cache  # type: ignore[attr-defined]
+            return envoltura_async
+
+        @wraps(funcion)
+        def envoltura(session, *args):
+            valor = cache.get(args, _FALTA)
+            if valor is _FALTA:
+                generacion = _generaciones[cache.nombre]
+                valor = funcion(session, *args)
+                if generacion == _generaciones[cache.nombre]:
+                    cache.set(args, valor)
+            return valor
+        envoltura.cache = cache  # type: ignore[attr-defined]
+        return envoltura
+
+    return decorador
+
+
+def invalidar_tablas(tablas: Set[str]) -> None:
+    vaciadas = set()
+    for tabla in tablas:
+        for cache in _dependientes.get(tabla, ()):
+            if cache.nombre not in vaciadas:
+                _generaciones[cache.nombre] += 1
+                cache.clear()
+                vaciadas.add(cache.nombre)
+
+
+def limpiar_catalogo() -> None:
+    for cache in caches_catalogo.values():
+        _generaciones[cache.nombre] += 1
+        cache.clear()
+
+
+def estadisticas_catalogo() -> List[Dict[str, Any]]:
+    return [cache.estadisticas() for cache in caches_catalogo.values()]
+
+
+# Invalidación automática: tablas anotadas en cada flush, vaciado recién en el commit
+_CLAVE_PENDIENTES = "catalogo_tablas_modificadas"
+
+
+def _anotar(session, tabla: str) -> None:
+    if tabla in _dependientes:
+        session.info.setdefault(_CLAVE_PENDIENTES, set()).add(tabla)
+
+
+@event.listens_for(SASession, "after_flush")
+def _anotar_tablas_modificadas(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tabla = getattr(type(obj), "__table__", None)
+        if tabla is not None:
+            _anotar(session, tabla.name)
+
+
+@event.listens_for(SASession, "do_orm_execute")
+def _anotar_escritura_masiva(orm_execute_state):
+    # INSERT/UPDATE/DELETE masivos (session.exec(update(Plan)...), insert(Servicio)...)
+    es_escritura = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if es_escritura and orm_execute_state.bind_mapper is not None:
+        _anotar(orm_execute_state.session, orm_execute_state.bind_mapper.local_table.name)
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidar_catalogo(session):
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+    if pendientes:
+        invalidar_tablas(pendientes)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
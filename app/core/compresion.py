@@ -0,0 +1,131 @@
+"""
+Compresión de respuestas negociada con Accept-Encoding.
+
+Los listados grandes (comunidades con servicios, clientes...) son JSON muy
+repetitivo y comprimen 5-10x. MiddlewareCompresion elige brotli si el cliente lo
+acepta y el paquete `brotli` está instalado, si no gzip, y solo comprime cuerpos de
+al menos COMPRESION_MINIMO bytes. No toca lo que ya viene comprimido (imágenes del
+almacén de media) ni los eventos SSE.
+
+Al comprimir, el ETag fuerte pasa a débil (W/"..."): los bytes enviados ya no son
+los mismos que se hashearon. app/core/etag.py compara en forma débil, así que la
+revalidación con If-None-Match sigue funcionando.
+"""
+import os
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+COMPRESION_MINIMO = int(os.getenv("COMPRESION_MINIMO", 1024))
+COMPRESION_NIVEL_GZIP = int(os.getenv("COMPRESION_NIVEL_GZIP", 6))
+COMPRESION_NIVEL_BROTLI = int(os.getenv("COMPRESION_NIVEL_BROTLI", 4))
+
+# Formatos ya comprimidos o que se envían de a poco
+TIPOS_SIN_COMPRESION = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def codificaciones_aceptadas(accept_encoding: str) -> Dict[str, float]:
+    """{"gzip": 1.0, "br": 0.8, ...} a partir del header Accept-Encoding (q=0 = no aceptada)."""
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip()] = calidad
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding: str, brotli_disponible: bool = brotli is not None) -> Optional[str]:
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    comodin = aceptadas.get("*", 0.0)
+    candidatas = (["br"] if brotli_disponible else []) + ["gzip"]
+    # Ante igual calidad gana brotli (comprime más a velocidad parecida)
+    mejor, calidad_mejor = None, 0.0
+    for nombre in candidatas:
+        calidad = aceptadas.get(nombre, comodin)
+        if calidad > calidad_mejor:
+            mejor, calidad_mejor = nombre, calidad
+    return mejor
+
+
+class _AjustesCompresion:
+    """Excluye tipos ya comprimidos y debilita el ETag cuando el cuerpo sale comprimido."""
+
+    content_encoding: str
+
+    async def __call__(self, scope, receive, send):
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                cabeceras = MutableHeaders(raw=mensaje["headers"])
+                etag = cabeceras.get("etag")
+                if etag and not etag.startswith("W/") and cabeceras.get("content-encoding") == self.content_encoding:
+                    cabeceras["ETag"] = f"W/{etag}"
+            await send(mensaje)
+
+        await super().__call__(scope, receive, enviar)  # type: ignore[misc]
+
+    async def send_with_compression(self, message):
+        if message["type"] == "http.response.start":
+            tipo = Headers(raw=message["headers"]).get("content-type", "")
+            await super().send_with_compression(message)  # type: ignore[misc]
+            self.content_type_is_excluded = self.content_type_is_excluded or tipo.startswith(TIPOS_SIN_COMPRESION)
+            return
+        await super().send_with_compression(message)  # type: ignore[misc]
+
+
+class RespondedorGzip(_AjustesCompresion, GZipResponder):
+    pass
+
+
+class RespondedorBrotli(_AjustesCompresion, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, calidad: int = COMPRESION_NIVEL_BROTLI) -> None:
+        super().__init__(app, minimum_size)
+        self.compresor = brotli.Compressor(quality=calidad)  # type: ignore[union-attr]
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        salida = self.compresor.process(body)
+        # En streaming se vacía el buffer en cada parte para no retrasar el envío
+        return salida + (self.compresor.flush() if more_body else self.compresor.finish())
+
+
+class MiddlewareCompresion:
+    def __init__(
+        self,
+        app,
+        minimo: int = COMPRESION_MINIMO,
+        nivel_gzip: int = COMPRESION_NIVEL_GZIP,
+        nivel_brotli: int = COMPRESION_NIVEL_BROTLI,
+    ):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion == "br":
+            respondedor = RespondedorBrotli(self.app, self.minimo, calidad=self.nivel_brotli)
+        elif codificacion == "gzip":
+            respondedor = RespondedorGzip(self.app, self.minimo, compresslevel=self.nivel_gzip)
+        else:
+            respondedor = IdentityResponder(self.app, self.minimo)
+        await respondedor(scope, receive, send)
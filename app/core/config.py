@@ -0,0 +1,105 @@
+"""
+Configuración por perfil (dev / prod / test).
+
+El perfil se elige con APP_ENV y fija los valores por defecto del motor de BD,
+del nivel de logs y del modo debug. Cada valor se puede sobrescribir con su
+variable de entorno (DB_POOL_SIZE, DB_ECHO, LOG_LEVEL, SCHEDULER_ACTIVO, ...).
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Cargar el archivo .env desde la raíz del proyecto
+dotenv_path = Path(__file__).resolve().parents[2] / ".env"
+load_dotenv(dotenv_path)
+
+PERFILES = {
+    "dev": {
+        "debug": True,
+        "log_level": "DEBUG",
+        "log_muestreo_debug": 1.0,
+        "db_echo": False,
+        "db_pool_size": 5,
+        "db_max_overflow": 10,
+        "db_pool_timeout": 30,
+        "db_pool_recycle": 1800,
+        "db_pool_pre_ping": True,
+        "scheduler_activo": True,
+    },
+    "prod": {
+        "debug": False,
+        "log_level": "INFO",
+        "log_muestreo_debug": 0.05,
+        "db_echo": False,
+        "db_pool_size": 10,
+        "db_max_overflow": 20,
+        "db_pool_timeout": 30,
+        "db_pool_recycle": 1800,
+        "db_pool_pre_ping": True,
+        "scheduler_activo": True,
+    },
+    "test": {
+        "debug": True,
+        "log_level": "WARNING",
+        "log_muestreo_debug": 1.0,
+        "db_echo": False,
+        "db_pool_size": 5,
+        "db_max_overflow": 5,
+        "db_pool_timeout": 10,
+        "db_pool_recycle": 1800,
+        "db_pool_pre_ping": False,
+        "scheduler_activo": False,
+    },
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    entorno: str
+    debug: bool
+    log_level: str
+    log_muestreo_debug: float   # fracción de eventos DEBUG que se registran
+    db_echo: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: int
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    scheduler_activo: bool      # tareas en segundo plano (app/core/scheduler.py)
+
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def _env_int(nombre: str, defecto: int) -> int:
+    valor = os.getenv(nombre)
+    return int(valor) if valor not in (None, "") else defecto
+
+
+def cargar_settings(entorno: str | None = None) -> Settings:
+    entorno = (entorno or os.getenv("APP_ENV", "dev")).lower()
+    if entorno not in PERFILES:
+        raise RuntimeError(f"APP_ENV inválido: '{entorno}' (use {', '.join(PERFILES)})")
+    base = PERFILES[entorno]
+    return Settings(
+        entorno=entorno,
+        debug=_env_bool("DEBUG", base["debug"]),
+        log_level=os.getenv("LOG_LEVEL", base["log_level"]).upper(),
+        log_muestreo_debug=float(os.getenv("LOG_MUESTREO_DEBUG", base["log_muestreo_debug"])),
+        db_echo=_env_bool("DB_ECHO", base["db_echo"]),
+        db_pool_size=_env_int("DB_POOL_SIZE", base["db_pool_size"]),
+        db_max_overflow=_env_int("DB_MAX_OVERFLOW", base["db_max_overflow"]),
+        db_pool_timeout=_env_int("DB_POOL_TIMEOUT", base["db_pool_timeout"]),
+        db_pool_recycle=_env_int("DB_POOL_RECYCLE", base["db_pool_recycle"]),
+        db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", base["db_pool_pre_ping"]),
+        scheduler_activo=_env_bool("SCHEDULER_ACTIVO", base["scheduler_activo"]),
+    )
+
+
+settings = cargar_settings()
@@ -1,30 +1,107 @@
 from sqlmodel import SQLModel, Session, create_engine
-from sqlalchemy.pool import QueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declared_attr, deferred, undefer_group
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
-from dotenv import load_dotenv
-from pathlib import Path
 
-# Cargar el archivo .env desde la raíz del proyecto
-dotenv_path = Path(__file__).resolve().parents[2] / ".env"
-load_dotenv(dotenv_path)
+from app.core.config import settings
+from app.core.instrumentacion import instrumentar_engine
+from app.core.metricas_pool import clase_pool_medida, metricas_pools
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-print(f"DATABASE_URL cargada: {DATABASE_URL}")
-
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL no se encontró en el archivo .env")
 
+def _opciones_pool() -> dict:
+    """Parámetros del pool según el perfil activo (APP_ENV) y sus overrides por variable de entorno."""
+    return {
+        "echo": settings.db_echo,
+        "pool_size": settings.db_pool_size,          # conexiones persistentes
+        "max_overflow": settings.db_max_overflow,    # conexiones adicionales temporales si el pool se llena
+        "pool_timeout": settings.db_pool_timeout,    # segundos para esperar una conexión antes de error
+        "pool_recycle": settings.db_pool_recycle,    # segundos para reciclar conexiones y evitar expiración
+        "pool_pre_ping": settings.db_pool_pre_ping,  # valida la conexión antes de entregarla
+    }
+
 engine = create_engine(
     DATABASE_URL,
-    echo=True,
-    poolclass=QueuePool,
-    pool_size=10,         # número máximo de conexiones persistentes
-    max_overflow=20,      # conexiones adicionales temporales si el pool se llena
-    pool_timeout=30,      # segundos para esperar una conexión antes de error
-    pool_recycle=1800     # segundos para reciclar conexiones y evitar expiración
+    poolclass=clase_pool_medida(QueuePool, "sync"),
+    **_opciones_pool(),
 )
+instrumentar_engine(engine)
+
+# Grupo de carga para las columnas BLOB (imágenes y archivos adjuntos)
+GRUPO_BLOBS = "blobs"
+
+def columnas_diferidas(*nombres: str):
+    """
+    Se asigna a `__mapper_args__` de un modelo para que las columnas indicadas
+    no se incluyan en los SELECT. Solo se cargan al acceder al atributo o con `cargar_blobs()`.
+    """
+    def __mapper_args__(cls):
+        return {
+            "properties": {
+                nombre: deferred(cls.__table__.c[nombre], group=GRUPO_BLOBS)
+                for nombre in nombres
+            }
+        }
+    return declared_attr(__mapper_args__)
+
+def cargar_blobs():
+    """Opción de consulta para traer explícitamente las columnas diferidas en el mismo SELECT."""
+    return undefer_group(GRUPO_BLOBS)
+
+# ---------------------------------------------------------------------------
+# Motor asíncrono (aiomysql/asyncmy) para las rutas de lectura más concurridas
+# ---------------------------------------------------------------------------
+# Driver async a usar con MySQL: "aiomysql" o "asyncmy"
+ASYNC_DB_DRIVER = os.getenv("ASYNC_DB_DRIVER", "aiomysql")
+# Routers que atienden sus lecturas con el motor async, p. ej. "reservations,communities"
+ASYNC_DB_ROUTERS = {r.strip() for r in os.getenv("ASYNC_DB_ROUTERS", "").split(",") if r.strip()}
+
+_DRIVERS_ASYNC = {"mysql": ASYNC_DB_DRIVER, "sqlite": "aiosqlite"}
+
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker | None = None
+
+def async_database_url() -> str:
+    """ASYNC_DATABASE_URL si está definida; si no, DATABASE_URL con el driver async equivalente."""
+    explicita = os.getenv("ASYNC_DATABASE_URL")
+    if explicita:
+        return explicita
+    url = make_url(DATABASE_URL)  # type: ignore[arg-type]
+    backend = url.get_backend_name()
+    if backend not in _DRIVERS_ASYNC:
+        raise RuntimeError(f"No hay driver async configurado para '{backend}'")
+    return url.set(drivername=f"{backend}+{_DRIVERS_ASYNC[backend]}").render_as_string(hide_password=False)
+
+def get_async_engine() -> AsyncEngine:
+    """Crea el motor async la primera vez que se usa (el driver solo se importa si hace falta)."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(),
+            poolclass=clase_pool_medida(AsyncAdaptedQueuePool, "async"),
+            **_opciones_pool(),
+        )
+        instrumentar_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_engine
+
+def usa_db_async(nombre_router: str) -> bool:
+    """Indica si un router debe registrar sus variantes async (según ASYNC_DB_ROUTERS)."""
+    return "*" in ASYNC_DB_ROUTERS or nombre_router in ASYNC_DB_ROUTERS
+
+def resumen_pools() -> list:
+    """Métricas de los pools sync y async (este último solo si ya se creó)."""
+    resumen = [metricas_pools["sync"].resumen(engine.pool)]
+    if _async_engine is not None:
+        resumen.append(metricas_pools["async"].resumen(_async_engine.pool))
+    return resumen
 
 def init_db():
     SQLModel.metadata.create_all(engine)
@@ -33,4 +110,7 @@ def get_session():
     with Session(engine) as session:
         yield session
 
-
+async def get_async_session():
+    get_async_engine()
+    async with _async_sessionmaker() as session:  # type: ignore[misc]
+        yield session
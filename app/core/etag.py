@@ -0,0 +1,140 @@
+"""
+Peticiones condicionales (ETag / If-None-Match) para los GET de lectura frecuente.
+
+- RutaConEtag (route_class de los routers): a toda respuesta GET 200 le calcula un
+  ETag fuerte con el hash del cuerpo ya serializado; si el cliente manda ese ETag en
+  If-None-Match responde 304 sin cuerpo. Ahorra transferencia en cualquier endpoint.
+- respuesta_json(request, datos, modelo): para datos que salen de una caché (mismo
+  objeto en cada acierto) guarda los bytes y el ETag junto al objeto, así un acierto
+  no vuelve a serializar ni a hashear. La ruta respeta el ETag que ya trae la respuesta.
+- respuesta_con_etag(request, contenido, etag): para bytes ya preparados (geografía).
+
+El ETag depende solo del contenido, así que es el mismo en todos los workers.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.instrumentacion import RutaInstrumentada
+from app.core.respuestas import a_json as serializar
+
+ETAG_MEMO_MAX = int(os.getenv("ETAG_MEMO_MAX", 256))
+
+# El cliente puede guardar la respuesta pero debe revalidarla (barato gracias al 304)
+CACHE_CONTROL_REVALIDAR = "private, no-cache"
+
+
+def etag_de(contenido: bytes) -> str:
+    return f'"{hashlib.sha256(contenido).hexdigest()[:32]}"'
+
+
+def coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): se ignora el prefijo W/."""
+    if not if_none_match:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return etag.removeprefix("W/") in etiquetas or "*" in etiquetas
+
+
+# ---------------------------------------------------------------------------
+# Estadísticas: cuántas respuestas se resolvieron con 304 y cuántos bytes no se enviaron
+# ---------------------------------------------------------------------------
+_lock_estadisticas = threading.Lock()
+_estadisticas = {"respuestas_304": 0, "bytes_ahorrados": 0}
+
+
+def estadisticas_etag() -> Dict[str, int]:
+    with _lock_estadisticas:
+        return dict(_estadisticas)
+
+
+def reiniciar_estadisticas_etag() -> None:
+    with _lock_estadisticas:
+        for clave in _estadisticas:
+            _estadisticas[clave] = 0
+
+
+def _no_modificado(etag: str, cache_control: str, bytes_ahorrados: int) -> Response:
+    with _lock_estadisticas:
+        _estadisticas["respuestas_304"] += 1
+        _estadisticas["bytes_ahorrados"] += bytes_ahorrados
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def respuesta_con_etag(
+    request: Request,
+    contenido: bytes,
+    etag: str,
+    cache_control: str = CACHE_CONTROL_REVALIDAR,
+    media_type: str = "application/json",
+) -> Response:
+    if coincide(request.headers.get("if-none-match"), etag):
+        return _no_modificado(etag, cache_control, len(contenido))
+    return Response(content=contenido, media_type=media_type, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+# ---------------------------------------------------------------------------
+# Serialización memorizada por identidad del objeto (datos de caché)
+# ---------------------------------------------------------------------------
+_memo: "OrderedDict[int, Tuple[Any, bytes, str]]" = OrderedDict()
+_lock_memo = threading.Lock()
+
+
+def serializar_con_etag(datos: Any, modelo=None) -> Tuple[bytes, str]:
+    clave = id(datos)
+    with _lock_memo:
+        entrada = _memo.get(clave)
+        # La entrada guarda una referencia a `datos`, así que su id no se reutiliza mientras viva
+        if entrada is not None and entrada[0] is datos:
+            _memo.move_to_end(clave)
+            return entrada[1], entrada[2]
+
+    contenido = serializar(datos, modelo)
+    etag = etag_de(contenido)
+    with _lock_memo:
+        _memo[clave] = (datos, contenido, etag)
+        _memo.move_to_end(clave)
+        while len(_memo) > ETAG_MEMO_MAX:
+            _memo.popitem(last=False)
+    return contenido, etag
+
+
+def respuesta_json(request: Request, datos: Any, modelo=None, cache_control: str = CACHE_CONTROL_REVALIDAR) -> Response:
+    """
+    Para endpoints que devuelven objetos cacheados (p. ej. funciones con @cache_catalogo).
+    `modelo` es el mismo tipo del `response_model` de la ruta.
+    """
+    contenido, etag = serializar_con_etag(datos, modelo)
+    return respuesta_con_etag(request, contenido, etag, cache_control)
+
+
+# ---------------------------------------------------------------------------
+# Route class
+# ---------------------------------------------------------------------------
+class RutaConEtag(RutaInstrumentada):
+    """RutaInstrumentada que agrega ETag a los GET y responde 304 si el cliente ya tiene el contenido."""
+
+    def get_route_handler(self):
+        original = super().get_route_handler()
+        if "GET" not in self.methods:
+            return original
+
+        async def handler(request):
+            respuesta = await original(request)
+            cuerpo = getattr(respuesta, "body", None)
+            # Errores, streaming y respuestas que ya traen su ETag (respuesta_json) pasan tal cual
+            if respuesta.status_code != 200 or not isinstance(cuerpo, bytes) or "etag" in respuesta.headers:
+                return respuesta
+
+            etag = etag_de(cuerpo)
+            respuesta.headers["ETag"] = etag
+            cache_control = respuesta.headers.setdefault("Cache-Control", CACHE_CONTROL_REVALIDAR)
+            if coincide(request.headers.get("if-none-match"), etag):
+                return _no_modificado(etag, cache_control, len(cuerpo))
+            return respuesta
+
+        return handler
@@ -0,0 +1,423 @@
+"""
+Motor de las cargas masivas (Excel y CSV).
+
+Cada importador valida el archivo completo con operaciones de pandas, precarga en
+pocas consultas IN todo lo que las filas referencian (ids, emails, num_doc, sesiones
+existentes), detecta repetidos y cruces dentro del mismo archivo en memoria y escribe
+las filas aceptadas con INSERT masivos, en transacciones de IMPORTACION_LOTE filas.
+
+Si un lote falla al escribirse, se reintenta fila por fila para reportar el error en
+la fila que corresponde. El resumen conserva el formato de siempre:
+{"insertados", "omitidos", "errores": ["Fila n: ..."]}.
+
+El archivo se lee por partes de IMPORTACION_PARTE filas (LectorFilas: openpyxl en modo
+solo lectura o read_csv por bloques) y cada parte pasa por procesar(), así la memoria
+no depende del tamaño del archivo.
+
+Los endpoints de carga masiva no procesan dentro de la petición: encolar_importacion
+guarda el archivo y crea un trabajo (app.core.trabajos) que publica el avance.
+"""
+import os
+import shutil
+import tempfile
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import openpyxl
+import pandas as pd
+from fastapi import HTTPException, UploadFile
+from sqlmodel import Session, select
+
+from app.core.logger import logger
+from app.core.trabajos import Trabajo, gestor_trabajos
+
+IMPORTACION_LOTE = int(os.getenv("IMPORTACION_LOTE", "500"))    # filas por transacción
+IMPORTACION_MAX_IN = int(os.getenv("IMPORTACION_MAX_IN", "1000"))  # valores por consulta IN
+IMPORTACION_PARTE = int(os.getenv("IMPORTACION_PARTE", "5000"))  # filas leídas y validadas a la vez
+IMPORTACION_CSV_ENCODING = os.getenv("IMPORTACION_CSV_ENCODING", "utf-8-sig")
+
+# Primera fila de datos en Excel (la 1 es la cabecera)
+PRIMERA_FILA = 2
+
+
+class LectorFilas:
+    """
+    Lee un XLSX o un CSV en DataFrames de como máximo `tamano` filas, con las mismas
+    columnas en todos (la cabecera es la primera fila). Siempre entrega al menos uno,
+    aunque el archivo no tenga datos, para que se validen las columnas.
+
+    Como pd.read_excel, conserva las filas vacías intermedias (para que la numeración
+    de "Fila n" coincida con el Excel) y descarta las del final.
+    """
+
+    def __init__(self, origen: Union[str, BinaryIO], nombre: str = "", tamano: int = IMPORTACION_PARTE):
+        self.origen = origen
+        self.nombre = nombre or (origen if isinstance(origen, str) else "")
+        self.tamano = max(tamano, 1)
+        # Filas de datos según el archivo (solo XLSX, puede sobrestimar por filas vacías)
+        self.total: Optional[int] = None
+
+    @property
+    def es_csv(self) -> bool:
+        if self.nombre:
+            return self.nombre.lower().endswith(".csv")
+        # Sin nombre: un XLSX es un zip
+        return self._leer_inicio(4) != b"PK\x03\x04"
+
+    def _leer_inicio(self, n: int) -> bytes:
+        if isinstance(self.origen, str):
+            with open(self.origen, "rb") as f:
+                return f.read(n)
+        posicion = self.origen.tell()
+        inicio = self.origen.read(n)
+        self.origen.seek(posicion)
+        return inicio
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        return self._leer_csv() if self.es_csv else self._leer_xlsx()
+
+    def _leer_xlsx(self) -> Iterator[pd.DataFrame]:
+        libro = openpyxl.load_workbook(self.origen, read_only=True, data_only=True)
+        try:
+            hoja = libro.active
+            self.total = max(hoja.max_row - 1, 0) if hoja.max_row else None
+            filas = hoja.iter_rows(values_only=True)
+            cabecera = next(filas, ())
+            columnas = [
+                c.strip() if isinstance(c, str) else (f"Unnamed: {i}" if c is None else c)
+                for i, c in enumerate(cabecera)
+            ]
+            bloque: List[tuple] = []
+            vacias = 0  # vacías pendientes: solo se agregan si después hay datos
+            entregado = False
+            for fila in filas:
+                fila = tuple(fila[:len(columnas)]) + (None,) * (len(columnas) - len(fila))
+                if all(v is None or (isinstance(v, str) and not v.strip()) for v in fila):
+                    vacias += 1
+                    continue
+                bloque.extend([(None,) * len(columnas)] * vacias)
+                vacias = 0
+                bloque.append(fila)
+                while len(bloque) >= self.tamano:
+                    yield pd.DataFrame.from_records(bloque[:self.tamano], columns=columnas)
+                    bloque = bloque[self.tamano:]
+                    entregado = True
+            if bloque or not entregado:
+                yield pd.DataFrame.from_records(bloque, columns=columnas)
+        finally:
+            libro.close()
+
+    def _leer_csv(self) -> Iterator[pd.DataFrame]:
+        # Excel en español exporta CSV con ";"
+        primera = self._leer_inicio(64 * 1024).split(b"\n", 1)[0]
+        separador = ";" if primera.count(b";") > primera.count(b",") else ","
+        if not primera.strip():
+            yield pd.DataFrame()
+            return
+        # Texto tal cual: los importadores convierten cada columna (como_numero, como_texto...)
+        partes = pd.read_csv(
+            self.origen, sep=separador, dtype=str, encoding=IMPORTACION_CSV_ENCODING,
+            skipinitialspace=True, chunksize=self.tamano,
+        )
+        entregado = False
+        with partes:
+            for df in partes:
+                df.columns = [str(c).strip() for c in df.columns]
+                entregado = True
+                yield df
+        if not entregado:
+            yield pd.DataFrame()
+
+
+def en_bloques(valores: Iterable[Any], tamano: int = IMPORTACION_MAX_IN) -> Iterator[List[Any]]:
+    """Parte los valores en listas de como máximo `tamano` (para consultas IN)."""
+    bloque: List[Any] = []
+    for valor in valores:
+        bloque.append(valor)
+        if len(bloque) == tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def como_texto(serie: pd.Series) -> pd.Series:
+    """Texto sin espacios extremos; vacíos a None. 12345678.0 (Excel) pasa a '12345678'."""
+    def convertir(valor):
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return None
+        if isinstance(valor, float) and valor.is_integer():
+            valor = int(valor)
+        texto = str(valor).strip()
+        return texto or None
+    return serie.map(convertir).astype(object)
+
+
+def como_numero(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Devuelve (números, inválidos): inválido es un valor presente que no es numérico."""
+    numeros = pd.to_numeric(serie, errors="coerce")
+    return numeros, serie.notna() & numeros.isna()
+
+
+def como_fecha_hora(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Devuelve (fechas, inválidos) con la misma convención que como_numero."""
+    fechas = pd.to_datetime(serie, errors="coerce")
+    return fechas, serie.notna() & fechas.isna()
+
+
+def local_a_utc(serie: pd.Series, zona: str = "America/Lima") -> pd.Series:
+    """Fechas locales (naive) a UTC naive, como las guarda la BD."""
+    if serie.dt.tz is None:
+        serie = serie.dt.tz_localize(zona, ambiguous="NaT", nonexistent="NaT")
+    return serie.dt.tz_convert("UTC").dt.tz_localize(None)
+
+
+def valor(dato: Any) -> Any:
+    """Valor de pandas a tipo de Python para la BD (NaN/NaT -> None, Timestamp -> datetime)."""
+    if dato is None:
+        return None
+    if isinstance(dato, pd.Timestamp):
+        return None if pd.isna(dato) else dato.to_pydatetime()
+    if not isinstance(dato, str) and pd.isna(dato):
+        return None
+    if hasattr(dato, "item"):  # escalares de numpy
+        return dato.item()
+    return dato
+
+
+class Agenda:
+    """
+    Intervalos [inicio, fin) ya ocupados, para detectar cruces en memoria. Los que se
+    solapan entre sí se fusionan, así basta mirar el vecino anterior con bisect.
+    """
+
+    def __init__(self, intervalos: Iterable[Tuple[datetime, datetime]] = ()):
+        self._inicios: List[datetime] = []
+        self._fines: List[datetime] = []
+        for inicio, fin in sorted(intervalos):
+            if self._fines and inicio < self._fines[-1]:
+                self._fines[-1] = max(self._fines[-1], fin)
+            else:
+                self._inicios.append(inicio)
+                self._fines.append(fin)
+
+    def cruza(self, inicio: datetime, fin: datetime) -> bool:
+        posicion = bisect_left(self._inicios, fin)  # intervalos que empiezan antes de `fin`
+        return posicion > 0 and self._fines[posicion - 1] > inicio
+
+    def agregar(self, inicio: datetime, fin: datetime) -> None:
+        """Agrega un intervalo que no cruza con los existentes."""
+        posicion = bisect_left(self._inicios, inicio)
+        self._inicios.insert(posicion, inicio)
+        self._fines.insert(posicion, fin)
+
+
+class Importador:
+    """
+    Base de los importadores. Las subclases definen:
+
+    - columnas: cabeceras obligatorias del Excel
+    - preparar(df): normaliza tipos de forma vectorizada
+    - validar(df): reglas por columna con rechazar(...)
+    - validar_contra_bd(df): precarga con IN y reglas que dependen de la BD o de filas previas
+    - insertar(lote): INSERT masivo de las filas aceptadas (sin commit)
+    """
+
+    columnas: Sequence[str] = ()
+    # Prefijo de los errores al escribir (p. ej. "No se insertó por error inesperado: ")
+    prefijo_error_escritura = ""
+
+    def __init__(self, db: Session, creado_por: str, tamano_lote: int = IMPORTACION_LOTE):
+        self.db = db
+        self.creado_por = creado_por
+        self.tamano_lote = max(tamano_lote, 1)
+        self.resumen: Dict[str, Any] = {"insertados": 0, "omitidos": 0, "errores": []}
+        self._errores: List[Tuple[int, str]] = []
+        self._pendientes: pd.Series = pd.Series(dtype=bool)
+        self.filas_procesadas = 0
+        # Se llama con progreso() después de validar y de cada lote escrito
+        self.al_avanzar: Optional[Callable[[Dict[str, int]], None]] = None
+
+    # -- hooks ---------------------------------------------------------------
+
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df
+
+    def validar(self, df: pd.DataFrame) -> None:
+        pass
+
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        pass
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    # -- utilidades para las subclases ---------------------------------------
+
+    def pendientes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filas que aún no fueron rechazadas."""
+        return df[self._pendientes.reindex(df.index, fill_value=False)]
+
+    def rechazar(
+        self,
+        df: pd.DataFrame,
+        mascara: pd.Series,
+        mensaje: Callable[[int, pd.Series], str],
+        omitir: bool = True,
+    ) -> None:
+        """
+        Rechaza las filas pendientes donde `mascara` es verdadera. `mensaje(fila, datos)`
+        arma el texto (sin el prefijo "Fila n: "); solo se evalúa para las rechazadas.
+        """
+        mascara = mascara.reindex(df.index, fill_value=False).fillna(False).astype(bool)
+        mascara &= self._pendientes.reindex(df.index, fill_value=False)
+        if not mascara.any():
+            return
+        for fila, datos in df[mascara].iterrows():
+            self._registrar_error(int(fila), mensaje(int(fila), datos), omitir)  # type: ignore[arg-type]
+        self._pendientes[mascara[mascara].index] = False
+
+    def rechazar_fila(self, fila: int, mensaje: str, omitir: bool = True) -> None:
+        if self._pendientes.get(fila, False):
+            self._registrar_error(fila, mensaje, omitir)
+            self._pendientes[fila] = False
+
+    def progreso(self) -> Dict[str, int]:
+        return {
+            "filas_procesadas": self.filas_procesadas,
+            "insertados": self.resumen["insertados"],
+            "omitidos": self.resumen["omitidos"],
+            "errores": len(self.resumen["errores"]) + len(self._errores),
+        }
+
+    def _avisar(self) -> None:
+        if self.al_avanzar is not None:
+            self.al_avanzar(self.progreso())
+
+    def _registrar_error(self, fila: int, mensaje: str, omitir: bool) -> None:
+        if mensaje:
+            self._errores.append((fila, f"Fila {fila}: {mensaje}"))
+        if omitir:
+            self.resumen["omitidos"] += 1
+
+    # -- ejecución -----------------------------------------------------------
+
+    def procesar(self, df: pd.DataFrame, desplazamiento: int = 0) -> Dict[str, Any]:
+        """
+        Procesa un DataFrame leído del Excel. `desplazamiento` es la cantidad de filas de
+        datos anteriores a este DataFrame (para numerar bien las filas al leer por partes).
+        """
+        faltantes = [c for c in self.columnas if c not in df.columns]
+        if faltantes:
+            raise HTTPException(status_code=400, detail=f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+        df = df.copy()
+        df.index = pd.RangeIndex(PRIMERA_FILA + desplazamiento, PRIMERA_FILA + desplazamiento + len(df))
+        df = self.preparar(df)
+        self._pendientes = pd.Series(True, index=df.index)
+
+        self.validar(df)
+        if self._pendientes.any():
+            self.validar_contra_bd(self.pendientes(df))
+
+        aceptadas = self.pendientes(df)
+        self.filas_procesadas += len(df) - len(aceptadas)
+        self._avisar()
+        for inicio in range(0, len(aceptadas), self.tamano_lote):
+            lote = aceptadas.iloc[inicio:inicio + self.tamano_lote]
+            self._escribir(lote)
+            self.filas_procesadas += len(lote)
+            self._avisar()
+
+        self._errores.sort(key=lambda e: e[0])
+        self.resumen["errores"].extend(mensaje for _, mensaje in self._errores)
+        self._errores = []
+        return self.resumen
+
+    def _escribir(self, lote: pd.DataFrame) -> None:
+        try:
+            self.insertar(lote)
+            self.db.commit()
+            self.resumen["insertados"] += len(lote)
+            return
+        except Exception as e:
+            self.db.rollback()
+            if len(lote) == 1:
+                self._errores.append((int(lote.index[0]), f"Fila {lote.index[0]}: {self.prefijo_error_escritura}{e}"))
+                return
+            logger.warning(f"Lote de importación con error, se reintenta fila por fila: {e}")
+
+        for posicion in range(len(lote)):
+            self._escribir(lote.iloc[posicion:posicion + 1])
+
+
+def procesar_por_partes(importador: Importador, lector: LectorFilas) -> Dict[str, Any]:
+    desplazamiento = 0
+    for df in lector:
+        importador.procesar(df, desplazamiento)
+        desplazamiento += len(df)
+    return importador.resumen
+
+
+def ejecutar_importador(importador: Importador, archivo: UploadFile) -> Dict[str, Any]:
+    return procesar_por_partes(importador, LectorFilas(archivo.file, archivo.filename or ""))
+
+
+def _guardar_temporal(archivo: UploadFile) -> str:
+    """Copia el archivo subido a disco: el UploadFile se cierra al terminar la petición."""
+    sufijo = os.path.splitext(archivo.filename or "")[1] or ".xlsx"
+    with tempfile.NamedTemporaryFile(prefix="carga_masiva_", suffix=sufijo, delete=False) as destino:
+        shutil.copyfileobj(archivo.file, destino)
+    return destino.name
+
+
+def encolar_importacion(
+    tipo: str,
+    archivo: UploadFile,
+    creado_por: str,
+    crear_importador: Callable[[Session], Importador],
+) -> Trabajo:
+    """
+    Encola la importación y devuelve el trabajo. `crear_importador(db)` construye el
+    importador con la Session del trabajo.
+    """
+    ruta = _guardar_temporal(archivo)
+
+    def ejecutar(db: Session, trabajo: Trabajo) -> Dict[str, Any]:
+        lector = LectorFilas(ruta)
+        importador = crear_importador(db)
+
+        def al_avanzar(progreso: Dict[str, int]) -> None:
+            trabajo.avanzar(filas_totales=lector.total, **progreso)
+
+        importador.al_avanzar = al_avanzar
+        resumen = procesar_por_partes(importador, lector)
+        trabajo.avanzar(filas_totales=importador.filas_procesadas)
+        return resumen
+
+    def borrar_temporal() -> None:
+        # También si el trabajo se cancela antes de empezar (servidor detenido)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    return gestor_trabajos.encolar(tipo, creado_por, ejecutar, al_terminar=borrar_temporal)
+
+
+def respuesta_trabajo(trabajo: Trabajo) -> Dict[str, Any]:
+    """Respuesta 202 de los endpoints de carga masiva."""
+    return {
+        "mensaje": "Carga masiva en proceso",
+        "id_trabajo": trabajo.id,
+        "estado": trabajo.estado,
+        "url_estado": f"/api/importaciones/{trabajo.id}",
+    }
+
+
+def claves_existentes(db: Session, columna, valores: Iterable[Any], *condiciones) -> Set[Any]:
+    """Valores de `columna` que ya existen en la BD (en bloques de IMPORTACION_MAX_IN)."""
+    existentes: Set[Any] = set()
+    unicos = {v for v in valores if v is not None}
+    for bloque in en_bloques(unicos):
+        existentes.update(db.exec(select(columna).where(columna.in_(bloque), *condiciones)).all())
+    return existentes
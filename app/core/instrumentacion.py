@@ -0,0 +1,289 @@
+"""
+Instrumentación por petición: cantidad de sentencias SQL, tiempo en BD, tiempo de
+serialización y latencia total, agregados por ruta.
+
+- MiddlewareMetricas abre una medición por petición y agrega el header Server-Timing.
+- instrumentar_engine() engancha los eventos de SQLAlchemy que cuentan y cronometran sentencias.
+- RutaInstrumentada (route_class de los routers) separa el tiempo del endpoint del de serialización.
+- exportar_prometheus() devuelve todo en formato de texto de Prometheus.
+"""
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites (segundos) del histograma de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class MedicionPeticion:
+    inicio: float = field(default_factory=time.perf_counter)
+    consultas: int = 0
+    tiempo_db: float = 0.0
+    tiempo_serializacion: float = 0.0
+    fin_endpoint: Optional[float] = None
+
+    @property
+    def transcurrido(self) -> float:
+        return time.perf_counter() - self.inicio
+
+
+_medicion_ctx: ContextVar[Optional[MedicionPeticion]] = ContextVar("medicion_peticion", default=None)
+
+
+def medicion_actual() -> Optional[MedicionPeticion]:
+    return _medicion_ctx.get()
+
+
+# ---------------------------------------------------------------------------
+# Eventos de SQLAlchemy
+# ---------------------------------------------------------------------------
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_instrumentacion = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion_ctx.get()
+    if medicion is None:
+        return
+    medicion.consultas += 1
+    inicio = getattr(context, "_inicio_instrumentacion", None)
+    if inicio is not None:
+        medicion.tiempo_db += time.perf_counter() - inicio
+
+
+def instrumentar_engine(engine: Engine) -> None:
+    """Cuenta y cronometra las sentencias del engine dentro de la petición en curso."""
+    if not event.contains(engine, "after_cursor_execute", _despues_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+
+# ---------------------------------------------------------------------------
+# Ruta instrumentada: tiempo de serialización
+# ---------------------------------------------------------------------------
+def _marcar_fin_endpoint() -> None:
+    medicion = _medicion_ctx.get()
+    if medicion is not None:
+        medicion.fin_endpoint = time.perf_counter()
+
+
+def _envolver_endpoint(endpoint: Callable) -> Callable:
+    # Mantiene firma y tipo (sync/async) para que FastAPI resuelva las dependencias igual
+    if asyncio.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def envuelto_async(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _marcar_fin_endpoint()
+        return envuelto_async
+
+    @wraps(endpoint)
+    def envuelto(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _marcar_fin_endpoint()
+    return envuelto
+
+
+class RutaInstrumentada(APIRoute):
+    """APIRoute que mide cuánto tarda la validación + serialización de la respuesta."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _envolver_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        original = super().get_route_handler()
+
+        async def handler(request):
+            respuesta = await original(request)
+            medicion = _medicion_ctx.get()
+            if medicion is not None and medicion.fin_endpoint is not None:
+                medicion.tiempo_serializacion += time.perf_counter() - medicion.fin_endpoint
+            return respuesta
+
+        return handler
+
+
+# ---------------------------------------------------------------------------
+# Agregado por ruta
+# ---------------------------------------------------------------------------
+@dataclass
+class EstadisticaRuta:
+    peticiones: int = 0
+    consultas: int = 0
+    consultas_max: int = 0
+    tiempo_db: float = 0.0
+    tiempo_serializacion: float = 0.0
+    latencia: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS_LATENCIA))
+    por_estado: Dict[int, int] = field(default_factory=dict)
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rutas: Dict[Tuple[str, str], EstadisticaRuta] = {}
+
+    def registrar(self, metodo: str, ruta: str, estado: int, medicion: MedicionPeticion, latencia: float) -> None:
+        with self._lock:
+            est = self.rutas.setdefault((metodo, ruta), EstadisticaRuta())
+            est.peticiones += 1
+            est.consultas += medicion.consultas
+            est.consultas_max = max(est.consultas_max, medicion.consultas)
+            est.tiempo_db += medicion.tiempo_db
+            est.tiempo_serializacion += medicion.tiempo_serializacion
+            est.latencia += latencia
+            est.por_estado[estado] = est.por_estado.get(estado, 0) + 1
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if latencia <= limite:
+                    est.buckets[i] += 1
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.rutas.clear()
+
+    def copia(self) -> Dict[Tuple[str, str], EstadisticaRuta]:
+        with self._lock:
+            return {
+                clave: EstadisticaRuta(
+                    e.peticiones, e.consultas, e.consultas_max, e.tiempo_db, e.tiempo_serializacion,
+                    e.latencia, list(e.buckets), dict(e.por_estado),
+                )
+                for clave, e in self.rutas.items()
+            }
+
+
+registro_metricas = RegistroMetricas()
+
+# Funciones llamadas al terminar cada petición: (metodo, ruta, estado, medicion)
+_observadores: List[Callable[[str, str, int, MedicionPeticion], None]] = []
+
+
+def agregar_observador(funcion: Callable[[str, str, int, MedicionPeticion], None]) -> None:
+    _observadores.append(funcion)
+
+
+def quitar_observador(funcion: Callable[[str, str, int, MedicionPeticion], None]) -> None:
+    if funcion in _observadores:
+        _observadores.remove(funcion)
+
+
+def _plantilla_ruta(scope) -> str:
+    # La plantilla (/api/x/{id}) y no la URL real, para no disparar la cardinalidad
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or "sin_ruta"
+
+
+def _server_timing(medicion: MedicionPeticion) -> bytes:
+    return (
+        f'db;dur={medicion.tiempo_db * 1000:.2f};desc="{medicion.consultas} consultas", '
+        f"ser;dur={medicion.tiempo_serializacion * 1000:.2f}, "
+        f"total;dur={medicion.transcurrido * 1000:.2f}"
+    ).encode("latin-1")
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: mide cada petición, agrega Server-Timing y la registra por ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = MedicionPeticion()
+        token = _medicion_ctx.set(medicion)
+        estado = 500
+
+        async def send_con_timing(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [(b"server-timing", _server_timing(medicion))]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_timing)
+        finally:
+            _medicion_ctx.reset(token)
+            metodo, ruta = scope["method"], _plantilla_ruta(scope)
+            registro_metricas.registrar(metodo, ruta, estado, medicion, medicion.transcurrido)
+            for observador in list(_observadores):
+                observador(metodo, ruta, estado, medicion)
+
+
+# ---------------------------------------------------------------------------
+# Exposición en formato Prometheus
+# ---------------------------------------------------------------------------
+def _etiquetas(**valores) -> str:
+    partes = []
+    for clave, valor in valores.items():
+        texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+        partes.append(f'{clave}="{texto}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def exportar_prometheus() -> str:
+    from app.core.db import resumen_pools  # import diferido: db importa este módulo
+
+    lineas: List[str] = []
+
+    def metrica(nombre: str, tipo: str, ayuda: str) -> None:
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+
+    rutas = registro_metricas.copia()
+
+    metrica("commuconnect_http_peticiones_total", "counter", "Peticiones atendidas por ruta y estado")
+    for (metodo, ruta), e in rutas.items():
+        for estado, cantidad in sorted(e.por_estado.items()):
+            lineas.append(f"commuconnect_http_peticiones_total{_etiquetas(metodo=metodo, ruta=ruta, estado=estado)} {cantidad}")
+
+    metrica("commuconnect_http_latencia_segundos", "histogram", "Latencia total por ruta")
+    for (metodo, ruta), e in rutas.items():
+        for limite, cantidad in zip(BUCKETS_LATENCIA, e.buckets):
+            lineas.append(f"commuconnect_http_latencia_segundos_bucket{_etiquetas(metodo=metodo, ruta=ruta, le=limite)} {cantidad}")
+        lineas.append(f"commuconnect_http_latencia_segundos_bucket{_etiquetas(metodo=metodo, ruta=ruta, le='+Inf')} {e.peticiones}")
+        lineas.append(f"commuconnect_http_latencia_segundos_sum{_etiquetas(metodo=metodo, ruta=ruta)} {e.latencia:.6f}")
+        lineas.append(f"commuconnect_http_latencia_segundos_count{_etiquetas(metodo=metodo, ruta=ruta)} {e.peticiones}")
+
+    por_ruta = (
+        ("commuconnect_db_consultas_total", "counter", "Sentencias SQL emitidas por ruta", lambda e: e.consultas),
+        ("commuconnect_db_consultas_max", "gauge", "Máximo de sentencias SQL en una petición", lambda e: e.consultas_max),
+        ("commuconnect_db_tiempo_segundos_total", "counter", "Tiempo en BD por ruta", lambda e: round(e.tiempo_db, 6)),
+        ("commuconnect_serializacion_segundos_total", "counter", "Tiempo de validación y serialización de la respuesta", lambda e: round(e.tiempo_serializacion, 6)),
+    )
+    for nombre, tipo, ayuda, valor in por_ruta:
+        metrica(nombre, tipo, ayuda)
+        for (metodo, ruta), e in rutas.items():
+            lineas.append(f"{nombre}{_etiquetas(metodo=metodo, ruta=ruta)} {valor(e)}")
+
+    pools = resumen_pools()
+    por_pool = (
+        ("commuconnect_db_pool_checkouts_total", "counter", "Conexiones entregadas por el pool", "checkouts"),
+        ("commuconnect_db_pool_timeouts_total", "counter", "Esperas por conexión que terminaron en timeout", "timeouts"),
+        ("commuconnect_db_pool_espera_ms_total", "counter", "Tiempo total esperando una conexión (ms)", "espera_total_ms"),
+        ("commuconnect_db_pool_en_uso", "gauge", "Conexiones en uso", "conexiones_en_uso"),
+        ("commuconnect_db_pool_overflow", "gauge", "Conexiones de overflow abiertas", "overflow_actual"),
+    )
+    for nombre, tipo, ayuda, clave in por_pool:
+        metrica(nombre, tipo, ayuda)
+        for pool in pools:
+            if clave in pool:
+                lineas.append(f"{nombre}{_etiquetas(pool=pool['pool'])} {pool[clave]}")
+
+    return "\n".join(lineas) + "\n"
@@ -1,16 +1,173 @@
 # app/core/logger.py
+"""
+Logging estructurado y no bloqueante.
 
+Los módulos solo encolan el registro (QueueHandler); un hilo aparte (QueueListener)
+lo formatea y lo escribe en logs/sistema.log y en stdout. Cada registro lleva el
+request_id de la petición en curso, y los eventos DEBUG de alto volumen se muestrean.
+
+Uso:
+    from app.core.logger import logger
+    logger.info("Reserva creada", extra={"id_reserva": reserva.id_reserva})
+"""
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
 
 # Asegúrate de que la carpeta 'logs' exista
 os.makedirs("logs", exist_ok=True)
 
-# Configura el logger
-logging.basicConfig(
-    filename="logs/sistema.log",
-    level=logging.INFO,  # Puedes usar DEBUG, WARNING o ERROR según necesidad
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+LOG_FILE = os.getenv("LOG_FILE", "logs/sistema.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" o "texto"
+HEADER_REQUEST_ID = "X-Request-ID"
+_HEADER_REQUEST_ID = HEADER_REQUEST_ID.lower().encode("latin-1")
+
+# request_id de la petición en curso (lo fija MiddlewareRequestId)
+request_id_ctx: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Atributos propios de LogRecord: lo que no esté aquí se considera un campo extra
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class FiltroRequestId(logging.Filter):
+    """Copia el request_id del contexto al registro (se ejecuta en el hilo que loguea)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_ctx.get()
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Deja pasar solo una fracción de los DEBUG. Un registro puede pedir su propia tasa
+    con extra={"muestreo": 0.01}; WARNING y superiores nunca se descartan.
+    """
+
+    def __init__(self, tasa_debug: float):
+        super().__init__()
+        self.tasa_debug = tasa_debug
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        tasa = getattr(record, "muestreo", self.tasa_debug if record.levelno <= logging.DEBUG else 1.0)
+        return tasa >= 1.0 or random.random() < tasa
+
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD and clave != "muestreo":
+                datos[clave] = valor
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def _formatter() -> logging.Formatter:
+    if LOG_FORMAT == "texto":
+        return logging.Formatter("%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s")
+    return FormatoJSON()
+
+
+class _QueueHandlerEstructurado(QueueHandler):
+    """Como QueueHandler, pero deja el formato final (con los campos extra) al hilo del listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # La traza se serializa aquí: el objeto excepción no debe cruzar al otro hilo
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def crear_pipeline(*handlers: logging.Handler, tasa_debug: float = 1.0) -> tuple[QueueHandler, QueueListener]:
+    """QueueHandler (con muestreo y request_id) + QueueListener que escribe en `handlers`."""
+    cola: queue.SimpleQueue = queue.SimpleQueue()
+    handler_cola = _QueueHandlerEstructurado(cola)
+    handler_cola.addFilter(FiltroMuestreo(tasa_debug))
+    handler_cola.addFilter(FiltroRequestId())
+    return handler_cola, QueueListener(cola, *handlers, respect_handler_level=True)
+
+
+def configurar_logging() -> QueueListener:
+    """Instala el QueueHandler en el logger raíz y arranca el hilo que escribe."""
+    formato = _formatter()
+    archivo = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    archivo.setFormatter(formato)
+    consola = logging.StreamHandler(sys.stdout)
+    consola.setFormatter(formato)
+
+    handler_cola, listener = crear_pipeline(archivo, consola, tasa_debug=settings.log_muestreo_debug)
+
+    raiz = logging.getLogger()
+    raiz.handlers = [h for h in raiz.handlers if not isinstance(h, QueueHandler)]
+    raiz.addHandler(handler_cola)
+    raiz.setLevel(settings.log_level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def nuevo_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class MiddlewareRequestId:
+    """
+    Middleware ASGI: toma X-Request-ID de la petición (o genera uno), lo deja en el
+    contexto para los logs y lo devuelve en la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = nuevo_request_id()
+        for nombre, valor in scope.get("headers", []):
+            if nombre == _HEADER_REQUEST_ID and valor:
+                request_id = valor.decode("latin-1")[:64]
+                break
+        token = request_id_ctx.set(request_id)
+
+        async def send_con_request_id(mensaje):
+            if mensaje["type"] == "http.response.start":
+                mensaje.setdefault("headers", [])
+                mensaje["headers"] = list(mensaje["headers"]) + [(_HEADER_REQUEST_ID, request_id.encode("latin-1"))]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, send_con_request_id)
+        finally:
+            request_id_ctx.reset(token)
+
+
+listener = configurar_logging()
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,100 @@
+"""
+Métricas del pool de conexiones: checkouts, tiempo de espera y uso del overflow.
+Sirven para dimensionar pool_size / max_overflow con datos reales.
+"""
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+
+class MetricasPool:
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+            self.checkouts_en_overflow = 0
+            self.overflow_max = 0
+
+    def registrar_checkout(self, espera: float, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+            if overflow > 0:
+                self.checkouts_en_overflow += 1
+                self.overflow_max = max(self.overflow_max, overflow)
+
+    def registrar_timeout(self, espera: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+    def resumen(self, pool: Pool | None = None) -> Dict:
+        with self._lock:
+            datos = {
+                "pool": self.nombre,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_media_ms": round(self.espera_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+                "checkouts_en_overflow": self.checkouts_en_overflow,
+                "overflow_max_usado": self.overflow_max,
+            }
+        if pool is not None and hasattr(pool, "size"):
+            # Estado instantáneo del QueuePool
+            datos.update({
+                "pool_size": pool.size(),
+                "conexiones_libres": pool.checkedin(),  # type: ignore[attr-defined]
+                "conexiones_en_uso": pool.checkedout(),  # type: ignore[attr-defined]
+                "overflow_actual": max(pool.overflow(), 0),  # type: ignore[attr-defined]
+                "max_overflow": pool._max_overflow,  # type: ignore[attr-defined]
+            })
+        return datos
+
+
+# Métricas de cada pool medido, por nombre
+metricas_pools: Dict[str, MetricasPool] = {}
+
+
+class _PoolMedidoMixin:
+    """Mide cuánto tarda `_do_get` (esperar una conexión libre o abrir una nueva)."""
+    nombre_metricas = "default"
+
+    def _do_get(self):
+        metricas = metricas_pools[self.nombre_metricas]
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()  # type: ignore[misc]
+        except PoolTimeoutError:
+            metricas.registrar_timeout(time.perf_counter() - inicio)
+            raise
+        metricas.registrar_checkout(time.perf_counter() - inicio, self.overflow())  # type: ignore[attr-defined]
+        return conexion
+
+
+def clase_pool_medida(base: type, nombre: str) -> type:
+    """
+    Devuelve una subclase de `base` (QueuePool o AsyncAdaptedQueuePool) que registra
+    sus métricas bajo `nombre`. Al recrear el pool (engine.dispose) se conserva la clase.
+
+    SQLAlchemy nombra el logger del pool con el módulo de la clase: se conserva el de
+    `base` para que siga bajo "sqlalchemy" (en WARNING) y no llene el log de checkouts.
+    """
+    metricas_pools.setdefault(nombre, MetricasPool(nombre))
+    return type(
+        f"{base.__name__}Medido",
+        (_PoolMedidoMixin, base),
+        {"nombre_metricas": nombre, "__module__": base.__module__},
+    )
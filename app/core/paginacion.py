@@ -0,0 +1,207 @@
+"""
+Paginación por cursor (keyset) para los listados que antes devolvían tablas enteras.
+
+En vez de OFFSET (que recorre y descarta todas las filas anteriores) cada página
+pide "las siguientes N filas después de la última que viste", con una condición
+sobre (columna de orden, clave primaria) que usa el índice. El costo de una página
+no crece con la tabla ni con lo lejos que esté la página.
+
+- parametros_pagina: dependencia con ?cursor=&limite=&orden= (orden=-campo es descendente).
+- paginar / paginar_async: aplican el cursor a un select y devuelven Pagina(items, siguiente).
+- agregar_cabeceras_pagina: el cuerpo sigue siendo la lista; el cursor de la página
+  siguiente va en X-Siguiente-Cursor y en Link rel="next" (como X-Total-Count en el
+  resto de listados paginados).
+
+El cursor es opaco para el cliente (base64 de los valores de la última fila) y solo
+vale para el mismo orden con el que se generó.
+
+Uso:
+    pagina = paginar(session, select(Usuario).where(...), params, Usuario.id_usuario,
+                     ordenes={"nombre": Usuario.nombre})
+"""
+import base64
+import binascii
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import Row, and_, or_
+
+PAGINACION_LIMITE = int(os.getenv("PAGINACION_LIMITE", 50))
+PAGINACION_LIMITE_MAX = int(os.getenv("PAGINACION_LIMITE_MAX", 200))
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ParametrosPagina:
+    cursor: Optional[str] = None
+    limite: int = PAGINACION_LIMITE
+    orden: Optional[str] = None
+
+
+def parametros_pagina(
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Siguiente-Cursor por la página anterior"),
+    limite: int = Query(PAGINACION_LIMITE, ge=1, le=PAGINACION_LIMITE_MAX),
+    orden: Optional[str] = Query(None, description="Campo de orden; con '-' delante es descendente"),
+) -> ParametrosPagina:
+    return ParametrosPagina(cursor=cursor, limite=limite, orden=orden)
+
+
+@dataclass(frozen=True)
+class Pagina(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    siguiente: Optional[str] = None
+
+
+# ---------------------------------------------------------------------------
+# Cursor
+# ---------------------------------------------------------------------------
+def _a_json(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date, time, Decimal)):
+        return str(valor)
+    return valor
+
+
+def _desde_json(valor: Any, columna) -> Any:
+    if valor is None:
+        return None
+    if isinstance(valor, (list, dict)):
+        raise TypeError("El cursor solo guarda valores escalares")
+    try:
+        tipo = columna.type.python_type
+    except (AttributeError, NotImplementedError):
+        return valor
+    if tipo in (datetime, date, time):
+        return tipo.fromisoformat(valor)
+    if isinstance(valor, tipo):
+        return valor
+    return tipo(valor)
+
+
+def codificar_cursor(orden: str, valor: Any, clave: Any) -> str:
+    contenido = json.dumps({"o": orden, "v": [_a_json(valor), _a_json(clave)]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(contenido.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, orden: str, columna=None, clave=None) -> Tuple[Any, Any]:
+    """
+    Devuelve (valor, clave) de la última fila vista. Con `columna`/`clave` los convierte
+    al tipo de Python de cada columna; un valor que no se puede convertir es un 400.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valor, valor_clave = datos["v"]
+        orden_cursor = datos["o"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    if orden_cursor != orden:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde al orden pedido")
+    try:
+        if columna is not None:
+            valor = _desde_json(valor, columna)
+        if clave is not None:
+            valor_clave = _desde_json(valor_clave, clave)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    # La clave es la PK: nunca es NULL
+    if clave is not None and valor_clave is None:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    return valor, valor_clave
+
+
+# ---------------------------------------------------------------------------
+# Aplicación al SELECT
+# ---------------------------------------------------------------------------
+def _resolver_orden(orden: Optional[str], ordenes: Optional[Dict[str, Any]]):
+    if not orden:
+        return None, False
+    descendente = orden.startswith("-")
+    nombre = orden.lstrip("-")
+    if not ordenes or nombre not in ordenes:
+        permitidos = ", ".join(sorted(ordenes or {})) or "ninguno"
+        raise HTTPException(status_code=400, detail=f"No se puede ordenar por '{nombre}'. Campos permitidos: {permitidos}")
+    return ordenes[nombre], descendente
+
+
+def _despues_de(columna, clave, valor, valor_clave, descendente: bool):
+    """
+    Filas posteriores a (valor, valor_clave) en el orden (columna, clave).
+    Los NULL de la columna van primero en ASC y al final en DESC (como en MySQL).
+    """
+    if columna is None:
+        return clave < valor_clave if descendente else clave > valor_clave
+    if descendente:
+        if valor is None:
+            return and_(columna.is_(None), clave < valor_clave)
+        return or_(columna < valor, and_(columna == valor, clave < valor_clave), columna.is_(None))
+    if valor is None:
+        return or_(columna.is_not(None), and_(columna.is_(None), clave > valor_clave))
+    return or_(columna > valor, and_(columna == valor, clave > valor_clave))
+
+
+def _preparar(consulta, params: ParametrosPagina, clave, ordenes):
+    columna, descendente = _resolver_orden(params.orden, ordenes)
+    if columna is not None and columna is clave:
+        columna = None
+    orden = params.orden or ""
+
+    if params.cursor:
+        valor, valor_clave = decodificar_cursor(params.cursor, orden, columna, clave)
+        if columna is None:
+            valor = None
+        consulta = consulta.where(_despues_de(columna, clave, valor, valor_clave, descendente))
+
+    criterios = [] if columna is None else [columna.desc() if descendente else columna]
+    criterios.append(clave.desc() if descendente else clave)
+    limite = min(params.limite, PAGINACION_LIMITE_MAX)
+    # Se pide una fila de más para saber si hay página siguiente
+    return consulta.order_by(*criterios).limit(limite + 1), columna, orden, limite
+
+
+def _valor(fila, atributo) -> Any:
+    """Valor de un atributo ORM (Usuario.nombre) en una fila: entidad sola o Row de entidades."""
+    entidades = tuple(fila) if isinstance(fila, Row) else (fila,)
+    for entidad in entidades:
+        if isinstance(entidad, atributo.class_):
+            return getattr(entidad, atributo.key)
+    raise ValueError(f"La fila no contiene {atributo}")
+
+
+def _armar_pagina(filas: Sequence, columna, clave, orden: str, limite: int) -> Pagina:
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        valor = _valor(ultima, columna) if columna is not None else None
+        siguiente = codificar_cursor(orden, valor, _valor(ultima, clave))
+    return Pagina(items=list(filas), siguiente=siguiente)
+
+
+def paginar(session, consulta, params: ParametrosPagina, clave, ordenes: Optional[Dict[str, Any]] = None) -> Pagina:
+    """
+    `clave` debe ser la PK (atributo ORM, p. ej. Usuario.id_usuario) y `ordenes` los
+    atributos por los que el cliente puede ordenar. Los items son las filas del select
+    original (la entidad o el Row de entidades).
+    """
+    consulta, columna, orden, limite = _preparar(consulta, params, clave, ordenes)
+    return _armar_pagina(session.exec(consulta).all(), columna, clave, orden, limite)
+
+
+async def paginar_async(session, consulta, params: ParametrosPagina, clave, ordenes: Optional[Dict[str, Any]] = None) -> Pagina:
+    consulta, columna, orden, limite = _preparar(consulta, params, clave, ordenes)
+    resultado = await session.exec(consulta)
+    return _armar_pagina(resultado.all(), columna, clave, orden, limite)
+
+
+def agregar_cabeceras_pagina(response: Response, request: Request, pagina: Pagina) -> Response:
+    if pagina.siguiente:
+        response.headers["X-Siguiente-Cursor"] = pagina.siguiente
+        url = request.url.include_query_params(cursor=pagina.siguiente)
+        response.headers["Link"] = f'<{url}>; rel="next"'
+    return response
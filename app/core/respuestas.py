@@ -0,0 +1,61 @@
+"""
+Serialización rápida de respuestas JSON.
+
+- RespuestaJSON es la response class por defecto de la app: usa orjson si está
+  instalado (varias veces más rápido que json.dumps) y si no, json estándar con
+  la misma salida compacta.
+- a_json(datos, modelo) convierte directo a bytes con el serializador de pydantic
+  (en Rust), sin el camino de FastAPI para `response_model`, que vuelve a
+  convertir el modelo en dict, lo valida de nuevo, lo pasa a tipos JSON y recién
+  ahí lo serializa.
+- respuesta_modelo(datos, modelo) arma la Response con esos bytes. Con
+  `validar=True` acepta objetos ORM (valida una sola vez con from_attributes).
+"""
+import json
+from functools import lru_cache
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def dumps(datos: Any) -> bytes:
+    """JSON compacto en UTF-8; lo que orjson no conoce (modelos, Decimal...) pasa por jsonable_encoder."""
+    if orjson is not None:
+        return orjson.dumps(datos, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(jsonable_encoder(datos), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def adaptador(modelo) -> TypeAdapter:
+    return TypeAdapter(modelo)
+
+
+def a_json(datos: Any, modelo=None, validar: bool = False) -> bytes:
+    """
+    JSON equivalente al que arma FastAPI con `response_model=modelo`.
+    `validar=True` cuando `datos` no son instancias del modelo (objetos ORM, dicts).
+    """
+    if modelo is None:
+        return dumps(datos)
+    tipo = adaptador(modelo)
+    if validar:
+        datos = tipo.validate_python(datos, from_attributes=True)
+    return tipo.dump_json(datos, by_alias=True)
+
+
+def respuesta_modelo(datos: Any, modelo, validar: bool = False, status_code: int = 200) -> Response:
+    return Response(content=a_json(datos, modelo, validar), status_code=status_code, media_type="application/json")
@@ -0,0 +1,187 @@
+"""
+Programador de tareas en segundo plano dentro del proceso.
+
+Cada tarea se ejecuta en un hilo propio del programador. Antes de cada corrida se
+toma un lease en la tabla `lease_tarea`: con varios workers de uvicorn (o varias
+instancias) solo el que tiene el lease vigente ejecuta la tarea.
+
+Una tarea recibe una Session y puede devolver en cuántos segundos quiere volver a
+correr (p. ej. el instante de la próxima transición); si no devuelve nada se usa su
+intervalo. `despertar()` adelanta la siguiente corrida cuando un endpoint cambia
+datos que la tarea debe procesar.
+
+Uso:
+    from app.core.scheduler import programador
+    programador.registrar("mi_tarea", funcion, intervalo=60)
+    programador.iniciar()
+"""
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Field, Session, SQLModel
+
+from app.core.logger import logger
+
+# Segundos que dura un lease; se renueva en cada corrida
+SCHEDULER_LEASE_SEGUNDOS = int(os.getenv("SCHEDULER_LEASE_SEGUNDOS", "120"))
+# Espera mínima entre corridas, para no girar en vacío si una tarea pide 0 segundos
+SCHEDULER_ESPERA_MINIMA = float(os.getenv("SCHEDULER_ESPERA_MINIMA", "1"))
+
+
+class LeaseTarea(SQLModel, table=True):
+    __tablename__ = "lease_tarea"  # type: ignore
+
+    nombre: str = Field(primary_key=True, max_length=100)
+    propietario: str = Field(max_length=100)
+    expira: datetime
+
+
+@dataclass
+class Tarea:
+    nombre: str
+    funcion: Callable[[Session], Optional[float]]
+    intervalo: float
+    despertar: threading.Event = field(default_factory=threading.Event)
+    corridas: int = 0
+    errores: int = 0
+    ultima_corrida: Optional[datetime] = None
+    proxima_corrida: Optional[datetime] = None
+
+
+class Programador:
+    def __init__(self, engine=None, duracion_lease: int = SCHEDULER_LEASE_SEGUNDOS):
+        self._engine = engine
+        self.duracion_lease = duracion_lease
+        self.id_instancia = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.tareas: Dict[str, Tarea] = {}
+        self._hilos: Dict[str, threading.Thread] = {}
+        self._detener = threading.Event()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.core.db import engine  # import diferido: db importa la configuración
+            self._engine = engine
+        return self._engine
+
+    def registrar(self, nombre: str, funcion: Callable[[Session], Optional[float]], intervalo: float) -> None:
+        self.tareas[nombre] = Tarea(nombre, funcion, intervalo)
+
+    # -- lease ---------------------------------------------------------------
+    def tomar_lease(self, nombre: str) -> bool:
+        """Toma (o renueva) el lease de la tarea. False si otro proceso lo tiene vigente."""
+        ahora = datetime.utcnow()
+        expira = ahora + timedelta(seconds=self.duracion_lease)
+        with Session(self.engine) as session:
+            resultado = session.exec(
+                update(LeaseTarea)
+                .where(
+                    LeaseTarea.nombre == nombre,
+                    or_(LeaseTarea.propietario == self.id_instancia, LeaseTarea.expira < ahora),
+                )
+                .values(propietario=self.id_instancia, expira=expira)
+            )
+            if resultado.rowcount == 1:
+                session.commit()
+                return True
+            try:
+                session.add(LeaseTarea(nombre=nombre, propietario=self.id_instancia, expira=expira))
+                session.commit()
+                return True
+            except IntegrityError:
+                # Ya existe y lo tiene otro proceso
+                session.rollback()
+                return False
+
+    def liberar_lease(self, nombre: str) -> None:
+        with Session(self.engine) as session:
+            session.exec(
+                update(LeaseTarea)
+                .where(LeaseTarea.nombre == nombre, LeaseTarea.propietario == self.id_instancia)
+                .values(expira=datetime.utcnow())
+            )
+            session.commit()
+
+    # -- ejecución -------------------------------------------------------------
+    def ejecutar(self, nombre: str) -> Optional[float]:
+        """
+        Corre la tarea una vez si se obtiene el lease. Devuelve los segundos hasta la
+        siguiente corrida (None si no había lease o la tarea falló).
+        """
+        tarea = self.tareas[nombre]
+        if not self.tomar_lease(nombre):
+            return None
+        try:
+            with Session(self.engine) as session:
+                espera = tarea.funcion(session)
+            tarea.corridas += 1
+            return espera
+        except Exception:
+            tarea.errores += 1
+            logger.exception(f"Error en la tarea programada '{nombre}'")
+            return None
+        finally:
+            tarea.ultima_corrida = datetime.utcnow()
+
+    def _bucle(self, tarea: Tarea) -> None:
+        while not self._detener.is_set():
+            espera = self.ejecutar(tarea.nombre)
+            espera = tarea.intervalo if espera is None else min(espera, tarea.intervalo)
+            # Quien no tiene el lease reintenta antes de que venza el del otro proceso
+            espera = max(SCHEDULER_ESPERA_MINIMA, min(espera, self.duracion_lease / 2))
+            tarea.proxima_corrida = datetime.utcnow() + timedelta(seconds=espera)
+            tarea.despertar.wait(espera)
+            tarea.despertar.clear()
+
+    def despertar(self, nombre: str) -> None:
+        """Adelanta la próxima corrida de la tarea (en este proceso)."""
+        tarea = self.tareas.get(nombre)
+        if tarea is not None:
+            tarea.despertar.set()
+
+    def iniciar(self) -> None:
+        self._detener.clear()
+        for nombre, tarea in self.tareas.items():
+            if nombre in self._hilos and self._hilos[nombre].is_alive():
+                continue
+            hilo = threading.Thread(target=self._bucle, args=(tarea,), name=f"programador-{nombre}", daemon=True)
+            self._hilos[nombre] = hilo
+            hilo.start()
+        logger.info(f"Programador iniciado ({self.id_instancia}): {', '.join(self.tareas) or 'sin tareas'}")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        for tarea in self.tareas.values():
+            tarea.despertar.set()
+        for hilo in self._hilos.values():
+            hilo.join(timeout)
+        for nombre in list(self._hilos):
+            try:
+                self.liberar_lease(nombre)
+            except Exception:
+                logger.exception(f"No se pudo liberar el lease de '{nombre}'")
+        self._hilos.clear()
+
+    def estado(self) -> list:
+        return [
+            {
+                "tarea": t.nombre,
+                "intervalo_s": t.intervalo,
+                "corridas": t.corridas,
+                "errores": t.errores,
+                "ultima_corrida": t.ultima_corrida,
+                "proxima_corrida": t.proxima_corrida,
+                "activa": t.nombre in self._hilos and self._hilos[t.nombre].is_alive(),
+            }
+            for t in self.tareas.values()
+        ]
+
+
+programador = Programador()
@@ -1,8 +1,13 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
+import multiprocessing
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple
 
 # Carga de secretos
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -10,15 +15,98 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 CONFIRM_TOKEN_EXPIRE_HOURS  = int(os.getenv("CONFIRM_TOKEN_EXPIRE_HOURS", 24))
 
+# Costo de bcrypt: el normal y el de las cuentas creadas por carga masiva. Un hash con
+# menos rondas que BCRYPT_ROUNDS queda marcado para rehash en el siguiente login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+IMPORTACION_BCRYPT_ROUNDS = int(os.getenv("IMPORTACION_BCRYPT_ROUNDS", 10))
+# Procesos para hashear en carga masiva (0 = uno por núcleo)
+HASH_PROCESOS = int(os.getenv("HASH_PROCESOS", 0))
+
 # Contexto bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica la contraseña y, si el hash quedó con menos rondas de las configuradas
+    (p. ej. cuentas de carga masiva), devuelve el hash nuevo para guardarlo.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+
+# ---------------------------------------------------------------------------
+# Hash en paralelo para cargas masivas
+# ---------------------------------------------------------------------------
+# bcrypt es CPU puro y retiene el GIL en passlib: los hilos no escalan, los procesos sí.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_procesos = 0
+_pool_lock = threading.Lock()
+
+
+def procesos_hash() -> int:
+    return HASH_PROCESOS or os.cpu_count() or 1
+
+
+def _hashear_bloque(passwords: List[str], rounds: int) -> List[str]:
+    handler = bcrypt.using(rounds=rounds)
+    return [handler.hash(p) for p in passwords]
+
+
+def _obtener_pool(procesos: int) -> ProcessPoolExecutor:
+    global _pool, _pool_procesos
+    with _pool_lock:
+        if _pool is None or _pool_procesos != procesos:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: no hereda hilos ni conexiones abiertas del proceso del servidor
+            _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+            _pool_procesos = procesos
+        return _pool
+
+
+def cerrar_pool_hash() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def hash_passwords(
+    passwords: List[str],
+    rounds: int = IMPORTACION_BCRYPT_ROUNDS,
+    procesos: Optional[int] = None,
+) -> List[str]:
+    """
+    Hashea una lista de contraseñas repartiéndola entre `procesos` (por defecto uno por
+    núcleo). Devuelve los hashes en el mismo orden. Con un solo proceso, o si el pool
+    no está disponible, hashea en el proceso actual.
+    """
+    procesos = min(procesos or procesos_hash(), len(passwords))
+    if procesos <= 1:
+        return _hashear_bloque(passwords, rounds)
+
+    tamano = -(-len(passwords) // procesos)
+    bloques = [passwords[i:i + tamano] for i in range(0, len(passwords), tamano)]
+    try:
+        pool = _obtener_pool(procesos)
+        resultados = pool.map(_hashear_bloque, bloques, [rounds] * len(bloques))
+        return [hash_ for bloque in resultados for hash_ in bloque]
+    except (BrokenProcessPool, OSError) as e:
+        # import local: los procesos del pool importan este módulo y no necesitan el logger
+        from app.core.logger import logger
+        logger.warning(f"Pool de hash no disponible, se hashea en el proceso actual: {e}")
+        cerrar_pool_hash()
+        return _hashear_bloque(passwords, rounds)
+
 def create_access_token(subject: str,extra_claims: Optional[Dict[str, Any]] = None, expires_delta: Optional[timedelta] = None) -> str:
     """
     Crea un JWT con:
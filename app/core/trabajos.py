@@ -0,0 +1,231 @@
+"""
+Trabajos en segundo plano con progreso consultable (cargas masivas).
+
+El endpoint encola el trabajo y responde de inmediato con su id; un pool de hilos del
+proceso que recibió el archivo lo ejecuta con una Session propia y el trabajo va
+publicando su avance (filas procesadas, insertados, omitidos, errores) en la tabla
+`trabajo`. El estado se consulta desde la tabla, así que cualquier worker de uvicorn
+(o instancia) puede responder la consulta o el SSE. Los trabajos terminados se
+conservan TRABAJOS_RETENCION segundos.
+
+Uso:
+    from app.core.trabajos import gestor_trabajos
+    trabajo = gestor_trabajos.encolar("clientes", admin.email, funcion)  # funcion(session, trabajo)
+    gestor_trabajos.obtener(trabajo.id)
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import JSON, Column, Index, Text, delete
+from sqlmodel import Field, Session, SQLModel, select
+
+from app.core.logger import logger
+
+TRABAJOS_HILOS = int(os.getenv("TRABAJOS_HILOS", "2"))
+TRABAJOS_RETENCION = int(os.getenv("TRABAJOS_RETENCION", "3600"))
+
+PENDIENTE = "pendiente"
+PROCESANDO = "procesando"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+
+
+class RegistroTrabajo(SQLModel, table=True):
+    __tablename__ = "trabajo"  # type: ignore
+    __table_args__ = (
+        Index("ix_trabajo_creado_por_creado", "creado_por", "creado"),
+    )
+
+    id: str = Field(primary_key=True, max_length=32)
+    tipo: str = Field(max_length=50)
+    creado_por: str = Field(max_length=255)
+    estado: str = Field(default=PENDIENTE, max_length=20)
+    filas_totales: Optional[int] = None
+    filas_procesadas: int = 0
+    insertados: int = 0
+    omitidos: int = 0
+    errores: int = 0
+    resumen: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    detalle: Optional[str] = Field(default=None, sa_column=Column(Text))
+    creado: datetime = Field(default_factory=datetime.utcnow)
+    iniciado: Optional[datetime] = None
+    terminado: Optional[datetime] = None
+    version: int = 0
+
+
+@dataclass
+class Trabajo:
+    id: str
+    tipo: str
+    creado_por: str
+    estado: str = PENDIENTE
+    filas_totales: Optional[int] = None
+    filas_procesadas: int = 0
+    insertados: int = 0
+    omitidos: int = 0
+    errores: int = 0
+    resumen: Optional[Dict[str, Any]] = None
+    detalle: Optional[str] = None
+    creado: datetime = field(default_factory=datetime.utcnow)
+    iniciado: Optional[datetime] = None
+    terminado: Optional[datetime] = None
+    # Aumenta con cada cambio; quien sigue el trabajo solo reenvía si cambió
+    version: int = 0
+    # El gestor lo usa para guardar cada cambio en la tabla
+    al_cambiar: Optional[Callable[["Trabajo"], None]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in (COMPLETADO, FALLIDO)
+
+    def avanzar(self, **campos: Any) -> None:
+        for nombre, valor in campos.items():
+            setattr(self, nombre, valor)
+        self.version += 1
+        if self.al_cambiar is not None:
+            self.al_cambiar(self)
+
+    def a_registro(self) -> RegistroTrabajo:
+        return RegistroTrabajo(
+            id=self.id, tipo=self.tipo, creado_por=self.creado_por, estado=self.estado,
+            filas_totales=self.filas_totales, filas_procesadas=self.filas_procesadas,
+            insertados=self.insertados, omitidos=self.omitidos, errores=self.errores,
+            resumen=self.resumen, detalle=self.detalle, creado=self.creado,
+            iniciado=self.iniciado, terminado=self.terminado, version=self.version,
+        )
+
+    @classmethod
+    def desde_registro(cls, registro: RegistroTrabajo) -> "Trabajo":
+        return cls(
+            id=registro.id, tipo=registro.tipo, creado_por=registro.creado_por, estado=registro.estado,
+            filas_totales=registro.filas_totales, filas_procesadas=registro.filas_procesadas,
+            insertados=registro.insertados, omitidos=registro.omitidos, errores=registro.errores,
+            resumen=registro.resumen, detalle=registro.detalle, creado=registro.creado,
+            iniciado=registro.iniciado, terminado=registro.terminado, version=registro.version,
+        )
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            "id_trabajo": self.id,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "filas_totales": self.filas_totales,
+            "filas_procesadas": self.filas_procesadas,
+            "insertados": self.insertados,
+            "omitidos": self.omitidos,
+            "errores": self.errores,
+            "detalle": self.detalle,
+            "resumen": self.resumen,
+            "creado_por": self.creado_por,
+            "creado": self.creado,
+            "iniciado": self.iniciado,
+            "terminado": self.terminado,
+        }
+
+
+class GestorTrabajos:
+    def __init__(self, engine=None, hilos: int = TRABAJOS_HILOS, retencion: int = TRABAJOS_RETENCION):
+        self._engine = engine
+        self.hilos = hilos
+        self.retencion = retencion
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.core.db import engine  # import diferido: db importa la configuración
+            self._engine = engine
+        return self._engine
+
+    def _obtener_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="trabajos")
+        return self._pool
+
+    def encolar(
+        self,
+        tipo: str,
+        creado_por: str,
+        funcion: Callable[[Session, Trabajo], Optional[Dict[str, Any]]],
+        al_terminar: Optional[Callable[[], None]] = None,
+    ) -> Trabajo:
+        """
+        `al_terminar` (p. ej. borrar el archivo temporal) se ejecuta siempre: al terminar
+        el trabajo o si se cancela antes de empezar porque el servidor se detiene.
+        """
+        trabajo = Trabajo(id=uuid.uuid4().hex, tipo=tipo, creado_por=creado_por, al_cambiar=self._guardar)
+        self._purgar()
+        self._guardar(trabajo)
+        with self._lock:
+            futuro = self._obtener_pool().submit(self._ejecutar, trabajo, funcion)
+        futuro.add_done_callback(lambda f: self._finalizar(trabajo, f, al_terminar))
+        logger.info(f"Trabajo '{tipo}' encolado", extra={"id_trabajo": trabajo.id})
+        return trabajo
+
+    def _ejecutar(self, trabajo: Trabajo, funcion) -> None:
+        trabajo.avanzar(estado=PROCESANDO, iniciado=datetime.utcnow())
+        try:
+            with Session(self.engine) as session:
+                resumen = funcion(session, trabajo)
+            trabajo.avanzar(estado=COMPLETADO, resumen=resumen, terminado=datetime.utcnow())
+        except HTTPException as e:
+            # Errores de validación del archivo (columnas faltantes, servicio inexistente...)
+            trabajo.avanzar(estado=FALLIDO, detalle=str(e.detail), terminado=datetime.utcnow())
+        except Exception as e:
+            logger.exception(f"Error en el trabajo '{trabajo.tipo}'", extra={"id_trabajo": trabajo.id})
+            trabajo.avanzar(estado=FALLIDO, detalle=str(e), terminado=datetime.utcnow())
+
+    def _finalizar(self, trabajo: Trabajo, futuro: Future, al_terminar: Optional[Callable[[], None]]) -> None:
+        if futuro.cancelled():
+            trabajo.avanzar(estado=FALLIDO, detalle="Cancelado: el servidor se detuvo antes de procesarlo",
+                            terminado=datetime.utcnow())
+            logger.warning(f"Trabajo '{trabajo.tipo}' cancelado al detener el servidor", extra={"id_trabajo": trabajo.id})
+        if al_terminar is not None:
+            try:
+                al_terminar()
+            except Exception:
+                logger.exception(f"Error al limpiar el trabajo '{trabajo.tipo}'", extra={"id_trabajo": trabajo.id})
+
+    def _guardar(self, trabajo: Trabajo) -> None:
+        # Un fallo al publicar el avance no debe interrumpir la importación
+        try:
+            with Session(self.engine) as session:
+                session.merge(trabajo.a_registro())
+                session.commit()
+        except Exception:
+            logger.exception(f"No se pudo guardar el estado del trabajo '{trabajo.tipo}'", extra={"id_trabajo": trabajo.id})
+
+    def _purgar(self) -> None:
+        limite = datetime.utcnow() - timedelta(seconds=self.retencion)
+        with Session(self.engine) as session:
+            session.exec(delete(RegistroTrabajo).where(RegistroTrabajo.terminado < limite))  # type: ignore[call-overload]
+            session.commit()
+
+    def obtener(self, id_trabajo: str) -> Optional[Trabajo]:
+        with Session(self.engine) as session:
+            registro = session.get(RegistroTrabajo, id_trabajo)
+        return Trabajo.desde_registro(registro) if registro is not None else None
+
+    def listar(self, creado_por: Optional[str] = None) -> List[Trabajo]:
+        self._purgar()
+        consulta = select(RegistroTrabajo).order_by(RegistroTrabajo.creado.desc())  # type: ignore[attr-defined]
+        if creado_por is not None:
+            consulta = consulta.where(RegistroTrabajo.creado_por == creado_por)
+        with Session(self.engine) as session:
+            return [Trabajo.desde_registro(r) for r in session.exec(consulta).all()]
+
+    def detener(self, esperar: bool = False) -> None:
+        """Los trabajos que aún no empezaron se cancelan y quedan como fallidos."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=esperar, cancel_futures=True)
+            self._pool = None
+
+
+gestor_trabajos = GestorTrabajos()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
 from fastapi.openapi.utils import get_openapi
+from app.core.config import settings
 from app.core.db import init_db
 from app.modules.auth.routers import router as auth_router
 from app.modules.communities.routers import router as comunidades_router
@@ -9,13 +10,24 @@ from app.modules.billing.routers import router as billing_router
 from app.modules.services.routers import router as  services_router
 from app.modules.reservations.routers import router as  reservations_router
 from app.modules.geography.routers import router as geography_router
+from app.modules.media.routers import router as media_router
+from app.modules.monitoring.routers import router as monitoring_router
+from app.modules.importaciones.routers import router as importaciones_router
 from fastapi.middleware.cors import CORSMiddleware
-import logging
+from app.core.compresion import MiddlewareCompresion
+from app.core.instrumentacion import MiddlewareMetricas
+from app.core.respuestas import RespuestaJSON
+from app.core.logger import MiddlewareRequestId, logger
+from app.core.scheduler import programador
+from app.core.security import cerrar_pool_hash
+from app.core.trabajos import gestor_trabajos
+from app.modules.billing.services import TAREA_TRANSICIONES_MEMBRESIA, tarea_transiciones_membresia
+from app.modules.geography.services import recargar_geografia
+from app.modules.reservations.services import TAREA_RECONCILIAR_CONTADORES, tarea_reconciliar_contadores
+import os
 
-logging.basicConfig(level=logging.DEBUG)
-
-
-app = FastAPI(debug=True)
+# Modo debug según el perfil (APP_ENV=dev/prod/test); el nivel de logs lo fija app/core/logger.py
+app = FastAPI(debug=settings.debug, default_response_class=RespuestaJSON)
 
 origins = [
     "cheerful-manatee-789591.netlify.app"
@@ -24,6 +36,9 @@ origins = [
     #"http://commuconnect-frontend-v1.s3-website-us-east-1.amazonaws.com"
 ]
 
+# gzip/brotli para respuestas grandes (COMPRESION_MINIMO); queda dentro de las métricas
+app.add_middleware(MiddlewareCompresion)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://cheerful-manatee-789591.netlify.app"],
@@ -31,14 +46,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Metadatos de paginación que el frontend necesita leer
+    expose_headers=["X-Total-Count", "X-Siguiente-Cursor", "Link"],
 )
 
+# Consultas SQL, tiempo en BD y latencia por ruta (+ header Server-Timing)
+app.add_middleware(MiddlewareMetricas)
+
+# Correlación de logs: X-Request-ID en contexto y en la respuesta
+app.add_middleware(MiddlewareRequestId)
+
 
 security = HTTPBearer()
 
+# Congelar/reactivar membresías y vencer detalles en el instante que corresponde
+programador.registrar(
+    TAREA_TRANSICIONES_MEMBRESIA,
+    tarea_transiciones_membresia,
+    intervalo=float(os.getenv("TRANSICIONES_MEMBRESIA_INTERVALO", "300")),
+)
+
+# Red de seguridad del contador reservas_confirmadas de sesion_presencial
+programador.registrar(
+    TAREA_RECONCILIAR_CONTADORES,
+    tarea_reconciliar_contadores,
+    intervalo=float(os.getenv("RECONCILIAR_CONTADORES_INTERVALO", "3600")),
+)
+
 @app.on_event("startup")
 def on_startup():
     init_db()
+    try:
+        recargar_geografia()
+    except Exception as e:
+        # Sin geografía precargada la primera petición vuelve a intentarlo
+        logger.warning(f"No se pudo precargar la geografía: {e}")
+    if settings.scheduler_activo:
+        programador.iniciar()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    programador.detener()
+    gestor_trabajos.detener()
+    cerrar_pool_hash()
 
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 app.include_router(comunidades_router, prefix="/api/comunidades", tags=["Comunidades"])
@@ -47,6 +97,9 @@ app.include_router(billing_router, prefix="/api/billing", tags=["Billing"])
 app.include_router(services_router, prefix="/api/services", tags=["Services"])
 app.include_router(reservations_router, prefix="/api/reservations", tags=["Reservations"])
 app.include_router(geography_router, prefix="/api/geography", tags=["Geography"])
+app.include_router(media_router, prefix="/api/media", tags=["Media"])
+app.include_router(monitoring_router, prefix="/api/monitoring", tags=["Monitoring"])
+app.include_router(importaciones_router, prefix="/api/importaciones", tags=["Importaciones"])
 
 def custom_openapi():
     if app.openapi_schema:
@@ -5,13 +5,14 @@ from app.modules.auth.dependencies import get_current_cliente_id, get_current_us
 from app.modules.communities.models import ClienteXComunidad
 from app.modules.users.models import Usuario
 from app.modules.auth.schemas import CambioPasswordIn, LoginRequest, TokenResponse
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password, verify_password, verify_and_update_password, create_access_token
 from app.core.db import engine, get_session
 from app.modules.auth.services import pwd_context, hash_password
 from app.core.enums import TipoUsuario
 from app.modules.users.models import Cliente
+from app.core.instrumentacion import RutaInstrumentada
 
-router = APIRouter()
+router = APIRouter(route_class=RutaInstrumentada)
 '''
 @router.post("/login", response_model=TokenResponse)
 def login(data: LoginRequest):
@@ -44,10 +45,17 @@ def login(data: LoginRequest):
 def login(data: LoginRequest):
     with Session(engine) as session:
         user = session.exec(select(Usuario).where(Usuario.email == data.email)).first()
-        if not user or not verify_password(data.password, user.password):
+        valida, nuevo_hash = verify_and_update_password(data.password, user.password) if user else (False, None)
+        if not user or not valida:
             raise HTTPException(status_code=401, detail="Credenciales inválidas")
-        
-        token = create_access_token(str(user.id_usuario))
+
+        # Cuentas de carga masiva (menos rondas de bcrypt): se rehashean con el costo normal
+        if nuevo_hash:
+            user.password = nuevo_hash
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+
         user_rol = user.tipo.value if isinstance(user.tipo, TipoUsuario) else user.tipo
 
         if user_rol == "Cliente":
@@ -56,7 +64,13 @@ def login(data: LoginRequest):
             ).first()
             if not cliente:
                 raise HTTPException(status_code=404, detail="Cliente no encontrado")
-            
+
+            # rol e id_cliente van en el token solo como información para el frontend: el backend
+            # no confía en ellos y resuelve el usuario con resolver_principal (y su caché) en cada petición
+            token = create_access_token(
+                str(user.id_usuario),
+                extra_claims={"rol": user_rol, "id_cliente": cliente.id_cliente}
+            )
             return TokenResponse(
                 access_token=token,
                 token_type="bearer",
@@ -65,6 +79,7 @@ def login(data: LoginRequest):
             )
         else:
             # No incluir id_cliente si no es cliente
+            token = create_access_token(str(user.id_usuario), extra_claims={"rol": user_rol})
             return TokenResponse(
                 access_token=token,
                 token_type="bearer",
@@ -1,11 +1,129 @@
 #from app.modules.auth.models import Usuario
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.cache import CacheTTL, hay_backend_compartido
 from app.core.db import engine
 from app.core.enums import TipoUsuario
-from passlib.context import CryptContext
-from sqlmodel import Session
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES, hash_password, pwd_context  # noqa: F401 (reexportados)
+from app.modules.users.models import Administrador, Cliente, Usuario
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session as SASession, make_transient_to_detached
+from sqlmodel import Session, select
 from datetime import datetime
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ---------------------------------------------------------------------------
+# Caché de principales (usuario autenticado + id_cliente + flag de administrador)
+# ---------------------------------------------------------------------------
+# La invalidación al hacer commit solo limpia la caché del proceso que escribió.
+# Con Redis las demás copias locales viven CACHE_TTL_LOCAL_COMPARTIDO y el principal
+# puede durar lo mismo que un token; sin backend compartido cada worker guarda su
+# copia poco tiempo, para que un usuario borrado o que dejó de ser admin pierda el
+# acceso en todos los workers en segundos y no al vencer su token.
+PRINCIPAL_CACHE_TTL_LOCAL = int(os.getenv("PRINCIPAL_CACHE_TTL_LOCAL", 60))
+
+cache_principales = CacheTTL(
+    "principales",
+    max_items=int(os.getenv("PRINCIPAL_CACHE_MAX", 5000)),
+    ttl=int(os.getenv(
+        "PRINCIPAL_CACHE_TTL",
+        ACCESS_TOKEN_EXPIRE_MINUTES * 60 if hay_backend_compartido() else PRINCIPAL_CACHE_TTL_LOCAL,
+    )),
+)
+
+# El hash de la contraseña no se cachea (ni en memoria ni en Redis); se carga solo si se usa
+_COLUMNAS_USUARIO = [attr.key for attr in sa_inspect(Usuario).column_attrs if attr.key != "password"]
+
+
+@dataclass(frozen=True)
+class Principal:
+    datos_usuario: Dict[str, Any]
+    id_cliente: Optional[int]
+    es_admin: bool
+
+    @property
+    def id_usuario(self) -> int:
+        return self.datos_usuario["id_usuario"]
+
+    def usuario_en(self, session: Session) -> Usuario:
+        """
+        Reconstruye el Usuario y lo asocia a la sesión sin volver a consultarlo.
+        `password` queda expirado: se consulta recién si alguien lo lee.
+        """
+        usuario = Usuario(**self.datos_usuario)
+        make_transient_to_detached(usuario)
+        usuario = session.merge(usuario, load=False)
+        session.expire(usuario, ["password"])
+        return usuario
+
+
+def resolver_principal(session: Session, id_usuario: int) -> Optional[Principal]:
+    """Devuelve el principal desde la caché o lo arma con una sola consulta."""
+    principal = cache_principales.get(id_usuario)
+    if principal is not None:
+        return principal
+
+    fila = session.exec(
+        select(Usuario, Cliente.id_cliente, Administrador.id_administrador)
+        .outerjoin(Cliente, Cliente.id_usuario == Usuario.id_usuario)  # type: ignore
+        .outerjoin(Administrador, Administrador.id_usuario == Usuario.id_usuario)  # type: ignore
+        .where(Usuario.id_usuario == id_usuario)
+    ).first()
+    if fila is None:
+        return None
+
+    usuario, id_cliente, id_administrador = fila
+    principal = Principal(
+        datos_usuario={c: getattr(usuario, c) for c in _COLUMNAS_USUARIO},
+        id_cliente=id_cliente,
+        es_admin=id_administrador is not None,
+    )
+    cache_principales.set(id_usuario, principal)
+    return principal
+
+
+def invalidar_principal(id_usuario: Optional[int] = None) -> None:
+    """Invalida un principal (o todos si no se indica id)."""
+    if id_usuario is None:
+        cache_principales.clear()
+    else:
+        cache_principales.delete(id_usuario)
+
+
+# Invalidación automática: se anotan los usuarios tocados en cada flush y se
+# descartan de la caché recién cuando la transacción hace commit.
+_CLAVE_PENDIENTES = "principales_invalidados"
+_TABLAS_PRINCIPAL = {Usuario.__table__, Cliente.__table__, Administrador.__table__}  # type: ignore
+
+
+@event.listens_for(SASession, "after_flush")
+def _anotar_principales_modificados(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Usuario, Cliente, Administrador)) and obj.id_usuario is not None:
+            session.info.setdefault(_CLAVE_PENDIENTES, set()).add(obj.id_usuario)
+
+
+@event.listens_for(SASession, "do_orm_execute")
+def _anotar_actualizacion_masiva(orm_execute_state):
+    # UPDATE/DELETE masivos: no se sabe qué usuarios cambiaron, se invalida todo
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if orm_execute_state.bind_mapper.local_table in _TABLAS_PRINCIPAL:
+            orm_execute_state.session.info.setdefault(_CLAVE_PENDIENTES, set()).add(None)
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidar_principales(session):
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+    if not pendientes:
+        return
+    if None in pendientes:
+        invalidar_principal()
+        return
+    for id_usuario in pendientes:
+        invalidar_principal(id_usuario)
+
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+@event.listens_for(SASession, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
@@ -5,7 +5,9 @@ from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
 from sqlalchemy import DECIMAL, Column
 from sqlalchemy import Integer
+from sqlalchemy import Index
 from app.core.enums import MetodoPago
+from app.core.db import columnas_diferidas
 
 class Plan(SQLModel, table=True):
     id_plan: Optional[int] = Field(default=None, primary_key=True)
@@ -32,6 +34,10 @@ class Pago(SQLModel, table=True):
     estado: int = 0  # 0 = pendiente, 1 = pagado
 
 class Inscripcion(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_inscripcion_cliente_comunidad_estado", "id_cliente", "id_comunidad", "estado"),
+    )
+
     id_inscripcion: Optional[int] = Field(default=None, primary_key=True)
     id_plan: Optional[int] = Field(default=None, foreign_key="plan.id_plan")
     id_comunidad: int = Field(foreign_key="comunidad.id_comunidad")
@@ -61,6 +67,10 @@ class DetalleInscripcion(SQLModel, table=True):
 
 class Suspension(SQLModel, table=True):
         __tablename__ = "suspension" # type: ignore
+        __mapper_args__ = columnas_diferidas("archivo")
+        __table_args__ = (
+            Index("ix_suspension_inscripcion_estado_fechas", "id_inscripcion", "estado", "fecha_inicio", "fecha_fin"),
+        )
         id_suspension: int = Field(default=None, primary_key=True)
         id_cliente: int
         id_inscripcion: int
@@ -1,14 +1,15 @@
 from datetime import date
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlmodel import Session, select
-from app.core.db import get_session
+from app.core.db import cargar_blobs, get_session
 from app.modules.auth.dependencies import get_current_cliente_id, get_current_user
 from app.modules.billing.models import DetalleInscripcion, Inscripcion, Pago, Plan, Suspension
 from app.modules.communities.models import Comunidad, ComunidadXPlan
 from app.modules.users.models import Cliente, Usuario
 from utils.email_brevo import send_membership_activated_email, send_membership_cancelled_email, send_suspension_accepted_email
-from .services import actualizar_plan, agregar_plan_a_comunidad_serv, crear_inscripcion, crear_pago_pendiente, crear_plan, eliminar_plan_logico, get_planes, obtener_planes_no_asociados, obtener_planes_por_comunidad, pagar_pendiente
+from utils.email_templates import ContextoMembresiaActiva, ContextoMembresiaCancelada, ContextoSuspension
+from .services import actualizar_plan, agregar_plan_a_comunidad_serv, crear_inscripcion, crear_pago_pendiente, crear_plan, eliminar_plan_logico, listar_planes_catalogo, listar_planes_por_comunidad_catalogo, obtener_planes_no_asociados, pagar_pendiente
 from .schemas import ComunidadXPlanCreate, DetalleInscripcionOut, DetalleInscripcionPagoOut, InscripcionResumenOut, PlanOut, InfoInscripcionOut, SuspensionEstadoOut, PlanCreate, PlanUpdate
 from typing import List, Optional
 from app.modules.billing.services import tiene_membresia_asociada
@@ -19,7 +20,11 @@ from app.modules.billing.services import tiene_topes_disponibles
 from datetime import datetime
 from sqlalchemy import desc
 from app.modules.users.dependencies import get_current_admin
-from app.modules.billing.services import obtener_detalles_suspension_completos
+from app.modules.billing.services import listar_suspensiones_admin, obtener_detalles_suspension_completos
+from app.modules.billing.services import listar_historial_membresias, obtener_membresia_con_pago
+from app.core.logger import logger
+from app.core.scheduler import programador
+from app.modules.billing.services import TAREA_TRANSICIONES_MEMBRESIA
 
 def nombre(self):
     raise NotImplementedError
@@ -27,18 +32,25 @@ def nombre(self):
 from app.modules.billing.schemas import TieneTopesOut
 from app.modules.billing.services import es_plan_con_topes
 from app.modules.billing.schemas import EsPlanConTopesOut
+from app.core.etag import RutaConEtag, respuesta_json
+from app.core.paginacion import ParametrosPagina, agregar_cabeceras_pagina, paginar, parametros_pagina
+from app.core.respuestas import respuesta_modelo
 
-router = APIRouter()
+router = APIRouter(route_class=RutaConEtag)
 
 #Lista los 4 planes disponibles
 @router.get("/planes", response_model=List[PlanOut])
-def listar_planes(session: Session = Depends(get_session)):
-    planes = get_planes(session)
-    return [PlanOut.from_orm(plan) for plan in planes]
+def listar_planes(
+    request: Request,
+    session: Session = Depends(get_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
+):
+    pagina = listar_planes_catalogo(session, params)
+    return agregar_cabeceras_pagina(respuesta_json(request, pagina.items, List[PlanOut]), request, pagina)
 
 @router.get("/por-comunidad/{id_comunidad}", response_model=list[PlanOut])
-def listar_planes_por_comunidad(id_comunidad: int, db: Session = Depends(get_session)):
-    return obtener_planes_por_comunidad(db, id_comunidad)
+def listar_planes_por_comunidad(id_comunidad: int, request: Request, db: Session = Depends(get_session)):
+    return respuesta_json(request, listar_planes_por_comunidad_catalogo(db, id_comunidad), list[PlanOut])
 
 
 #Endpoint para registrar una inscripcion, necesita el id de la comunidad y opcionalmente el id del plan y del pago
@@ -100,19 +112,19 @@ def pagar_comunidad(
     ).first() if inscripcion else None
 
     if usuario and plan and comunidad and detalle:
-        details = {
-            "nombre_usuario": usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
-            "nombre_plan": plan.titulo,
-            "nombre_comunidad": comunidad.nombre,
-            "fecha_inicio": detalle.fecha_inicio.strftime("%Y-%m-%d") if detalle.fecha_inicio else "",
-            "fecha_fin": detalle.fecha_fin.strftime("%Y-%m-%d") if detalle.fecha_fin else "",
-            "precio": float(plan.precio),
-        }
+        contexto = ContextoMembresiaActiva(
+            nombre_usuario=usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
+            nombre_plan=plan.titulo,
+            nombre_comunidad=comunidad.nombre,
+            fecha_inicio=detalle.fecha_inicio,
+            fecha_fin=detalle.fecha_fin,
+            precio=plan.precio,
+        )
         try:
-            send_membership_activated_email(usuario.email, details)
-            print("Correo de membresía activa enviado a:", usuario.email)
+            send_membership_activated_email(usuario.email, contexto)
+            logger.info(f"Correo de membresía activa encolado para: {usuario.email}")
         except Exception as e:
-            print("Error enviando correo de membresía activa:", e)
+            logger.error(f"Error enviando correo de membresía activa: {e}")
 
     return {"ok": True, "message": "Pago realizado exitosamente"}
 
@@ -244,18 +256,18 @@ def cancelar_membresia(
     ).first()
 
     if usuario and plan and comunidad and detalle:
-        details = {
-            "nombre_usuario": usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
-            "nombre_plan": plan.titulo,
-            "nombre_comunidad": comunidad.nombre,
-            "fecha_inicio": detalle.fecha_inicio.strftime("%Y-%m-%d") if detalle.fecha_inicio else "",
-            "fecha_cancelacion": inscripcion.fecha_modificacion.strftime("%Y-%m-%d") if inscripcion.fecha_modificacion else "",
-        }
+        contexto = ContextoMembresiaCancelada(
+            nombre_usuario=usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
+            nombre_plan=plan.titulo,
+            nombre_comunidad=comunidad.nombre,
+            fecha_inicio=detalle.fecha_inicio,
+            fecha_cancelacion=inscripcion.fecha_modificacion,
+        )
         try:
-            send_membership_cancelled_email(usuario.email, details)
-            print("Correo de cancelación de membresía enviado a:", usuario.email)
+            send_membership_cancelled_email(usuario.email, contexto)
+            logger.info(f"Correo de cancelación de membresía encolado para: {usuario.email}")
         except Exception as e:
-            print("Error enviando correo de cancelación de membresía:", e)
+            logger.error(f"Error enviando correo de cancelación de membresía: {e}")
 
 
     return {"ok": True, "message": "Membresía cancelada, ahora está pendiente de pago", "inscripcion_id": inscripcion.id_inscripcion}
@@ -331,34 +343,32 @@ def listar_planes_no_asociados(id_comunidad: int, db: Session = Depends(get_sess
 
 @router.get("/usuario/inscripciones", response_model=List[InscripcionResumenOut])
 def historial_membresias(
+    response: Response,
+    desde: Optional[date] = Query(None, description="Inicio de membresía desde (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Inicio de membresía hasta (YYYY-MM-DD)"),
+    pagina: int = Query(1, ge=1),
+    tamano_pagina: int = Query(50, ge=1, le=200),
     session: Session = Depends(get_session),
     id_cliente: int = Depends(get_current_cliente_id),
 ):
-    from sqlmodel import select
-    from .services import Inscripcion, DetalleInscripcion
-    from app.modules.billing.models import Plan
-
-    inscripciones = session.exec(
-        select(Inscripcion).where(Inscripcion.id_cliente == id_cliente)
-    ).all()
+    """
+    Historial de membresías del cliente (una sola consulta por página).
+    El total sin paginar se devuelve en el header X-Total-Count.
+    """
+    filas, total = listar_historial_membresias(session, id_cliente, desde, hasta, pagina, tamano_pagina)
+    response.headers["X-Total-Count"] = str(total)
 
     resultado = []
-    for inscripcion in inscripciones:
-        plan = session.get(Plan, inscripcion.id_plan)
-        detalle = session.exec(
-            select(DetalleInscripcion).where(
-                DetalleInscripcion.id_inscripcion == inscripcion.id_inscripcion
-            )
-        ).first()
+    for fila in filas:
         fecha_inicio = None
-        if detalle and detalle.fecha_inicio:
-            fecha_inicio = detalle.fecha_inicio.astimezone(ZoneInfo("America/Lima")).isoformat()
+        if fila.fecha_inicio:
+            fecha_inicio = fila.fecha_inicio.astimezone(ZoneInfo("America/Lima")).isoformat()
         resultado.append(
             InscripcionResumenOut(
-                id_inscripcion=inscripcion.id_inscripcion, # type: ignore
+                id_inscripcion=fila.id_inscripcion,
                 fecha_inicio=fecha_inicio,
-                titulo_plan=plan.titulo if plan else "",
-                precio=float(plan.precio) if plan else 0.0,
+                titulo_plan=fila.titulo_plan or "",
+                precio=float(fila.precio) if fila.precio is not None else 0.0,
             )
         )
     return resultado
@@ -369,25 +379,22 @@ def ver_detalle_pago(
     id_inscripcion: int,
     session: Session = Depends(get_session)
 ):
-    inscripcion = session.get(Inscripcion, id_inscripcion)
-    if not inscripcion:
+    fila = obtener_membresia_con_pago(session, id_inscripcion)
+    if not fila:
         raise HTTPException(status_code=404, detail="Inscripción no encontrada")
 
-    plan = session.get(Plan, inscripcion.id_plan)
-    pago = session.get(Pago, inscripcion.id_pago) if inscripcion.id_pago else None
-
     fecha_pago = None
     hora_pago = None
-    if pago and pago.fecha_pago:
-        fecha_pago_peru = pago.fecha_pago.astimezone(ZoneInfo("America/Lima"))
+    if fila.fecha_pago:
+        fecha_pago_peru = fila.fecha_pago.astimezone(ZoneInfo("America/Lima"))
         fecha_pago = fecha_pago_peru.date().isoformat()
         hora_pago = fecha_pago_peru.time().isoformat(timespec="seconds")
 
     return DetalleInscripcionPagoOut(
-        nombre_membresia=plan.titulo if plan else "",
+        nombre_membresia=fila.titulo_plan or "",
         fecha_pago=fecha_pago,
         hora_pago=hora_pago,
-        id_pago=pago.id_pago if pago else None,
+        id_pago=fila.id_pago,
         tarjeta="**** 1234"
     )
 
@@ -459,32 +466,33 @@ def aceptar_suspension(
         inscripcion.modificado_por = current_user.email
         inscripcion.fecha_modificacion = datetime.utcnow()
         session.add(inscripcion)
-        print(f"🔄 Membresía congelada inmediatamente - suspensión activa HOY")
+        logger.info(f"🔄 Membresía congelada inmediatamente - suspensión activa HOY")
     else:
-        print(f"🔄 Suspensión aceptada pero NO congelada - empieza el {suspension.fecha_inicio}")
+        logger.info(f"🔄 Suspensión aceptada pero NO congelada - empieza el {suspension.fecha_inicio}")
         # La membresía seguirá activa hasta que llegue la fecha_inicio
-        # El sistema la congelará automáticamente mediante tiene_membresia_activa()
+        # La tarea programada de transiciones la congelará en ese instante
 
     session.commit()
+    # Recalcula la próxima transición con las fechas de esta suspensión
+    programador.despertar(TAREA_TRANSICIONES_MEMBRESIA)
 
     # ... después de session.commit()
-    print("Antes de buscar usuario")
     cliente = session.get(Cliente, inscripcion.id_cliente)
     usuario = session.get(Usuario, cliente.id_usuario) if cliente else None
-    print("Después de buscar usuario:", usuario)
+    logger.debug(f"Usuario a notificar: {usuario.email if usuario else None}")
     if usuario:
-        details = {
-            "nombre_usuario": usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
-            "motivo": suspension.motivo,
-            "fecha_inicio": suspension.fecha_inicio.strftime("%Y-%m-%d"),
-            "fecha_fin": suspension.fecha_fin.strftime("%Y-%m-%d"),
-        }
-        print("Intentando enviar correo a:", usuario.email)
+        contexto = ContextoSuspension(
+            nombre_usuario=usuario.nombre if hasattr(usuario, "nombre") else usuario.email,
+            motivo=suspension.motivo,
+            fecha_inicio=suspension.fecha_inicio,
+            fecha_fin=suspension.fecha_fin,
+        )
+        logger.debug(f"Intentando encolar correo para: {usuario.email}")
         try:
-            send_suspension_accepted_email(usuario.email, details)
-            print("Correo enviado exitosamente a:", usuario.email)
+            send_suspension_accepted_email(usuario.email, contexto)
+            logger.info(f"Correo de suspensión aceptada encolado para: {usuario.email}")
         except Exception as e:
-            print("Error enviando correo:", e)
+            logger.error(f"Error enviando correo: {e}")
 
     # Mensaje dinámico dependiendo de si se congeló o no
     if suspension.fecha_inicio <= ahora <= suspension.fecha_fin:
@@ -522,16 +530,24 @@ def rechazar_suspension(
 def listar_suspensiones_pendientes(
     session: Session = Depends(get_session)
 ):
+    # La respuesta incluye el archivo, así que se carga en el mismo SELECT
     suspensiones = session.exec(
-        select(Suspension).where(Suspension.estado == 2)
+        select(Suspension).where(Suspension.estado == 2).options(cargar_blobs())
     ).all()
     return suspensiones
 
 @router.get("/suspensiones/todas", response_model=List[SuspensionEstadoOut])
 def listar_todas_suspensiones(
-    session: Session = Depends(get_session)
+    request: Request,
+    session: Session = Depends(get_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
 ):
-    suspensiones = session.exec(select(Suspension)).all()
+    pagina = paginar(session, select(Suspension), params, Suspension.id_suspension, ordenes={
+        "fecha_inicio": Suspension.fecha_inicio,
+        "fecha_fin": Suspension.fecha_fin,
+        "fecha_creacion": Suspension.fecha_creacion,
+    })
+    suspensiones = pagina.items
     estado_map = {0: "Rechazada", 1: "Aceptada", 2: "Pendiente", 3:"Completada"}
     resultado = []
     for s in suspensiones:
@@ -544,7 +560,7 @@ def listar_todas_suspensiones(
             fecha_fin=s.fecha_fin.isoformat() if s.fecha_fin else "",
             estado=estado_map.get(s.estado, "Desconocido")
         ))
-    return resultado
+    return agregar_cabeceras_pagina(respuesta_modelo(resultado, List[SuspensionEstadoOut]), request, pagina)
 
 
 @router.post("/planes", response_model=PlanOut)
@@ -599,7 +615,7 @@ def obtener_detalles_suspension(
     - Información del cliente asociado
     """
     # Buscar la suspensión
-    suspension = session.get(Suspension, id_suspension)
+    suspension = session.get(Suspension, id_suspension, options=[cargar_blobs()])
     if not suspension:
         raise HTTPException(status_code=404, detail="Suspensión no encontrada")
     
@@ -632,36 +648,23 @@ def obtener_detalles_suspension(
 
 @router.get("/suspensiones/todas-con-estado", response_model=List[dict])
 def listar_suspensiones_con_estado_calculado(
+    response: Response,
+    estado_visual: Optional[str] = Query(None, description="Pendiente, Vencida, Por vencer, Rechazada, Programada, En curso, Por terminar, Completada..."),
+    id_comunidad: Optional[int] = Query(None),
+    desde: Optional[date] = Query(None, description="Suspensiones vigentes desde (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Suspensiones vigentes hasta (YYYY-MM-DD)"),
+    pagina: int = Query(1, ge=1),
+    tamano_pagina: int = Query(50, ge=1, le=200),
     current_user: dict = Depends(get_current_admin),
     session: Session = Depends(get_session)
 ):
     """
-    Lista todas las suspensiones con su estado calculado para la tabla de administración
+    Lista las suspensiones con su estado calculado para la tabla de administración.
+    Una sola consulta por página; el total sin paginar va en el header X-Total-Count.
+    El archivo no se incluye (`tiene_archivo` indica si existe; ver /suspension/{id}/detalles).
     """
-    suspensiones = session.exec(select(Suspension)).all()
-    
-    resultado = []
-    for suspension in suspensiones:
-        detalles = obtener_detalles_suspension_completos(suspension)
-        
-        # Obtener información adicional para la tabla
-        from app.modules.users.models import Cliente, Usuario
-        cliente = session.get(Cliente, suspension.id_cliente)
-        if cliente:
-            usuario = session.get(Usuario, cliente.id_usuario)
-            if usuario:
-                detalles["nombres"] = usuario.nombre
-                detalles["apellidos"] = usuario.apellido
-                detalles["email"] = usuario.email
-        
-        # Obtener información de la comunidad
-        inscripcion = session.get(Inscripcion, suspension.id_inscripcion)
-        if inscripcion:
-            from app.modules.communities.models import Comunidad
-            comunidad = session.get(Comunidad, inscripcion.id_comunidad)
-            if comunidad:
-                detalles["comunidad"] = comunidad.nombre
-        
-        resultado.append(detalles)
-    
-    return resultado
\ No newline at end of file
+    resultado, total = listar_suspensiones_admin(
+        session, estado_visual, id_comunidad, desde, hasta, pagina, tamano_pagina
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return resultado
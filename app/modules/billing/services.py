@@ -1,22 +1,33 @@
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import HTTPException
 from sqlmodel import Session, select
-from sqlalchemy import text
+from sqlalchemy import case, exists, func, or_, text, update
+from sqlalchemy.orm import aliased
 from utils.datetime_utils import convert_utc_to_local
 
 from app.modules.communities.models import ClienteXComunidad, Comunidad, ComunidadXPlan
-from .schemas import ComunidadXPlanCreate, DetalleInscripcionCreate, PlanCreate, PlanUpdate
+from .schemas import ComunidadXPlanCreate, DetalleInscripcionCreate, PlanCreate, PlanOut, PlanUpdate
 from datetime import datetime
 
+from app.core.catalogo import cache_catalogo
+from app.core.paginacion import Pagina, ParametrosPagina, paginar
 from app.core.enums import MetodoPago
-from .models import Inscripcion, Pago, Plan, DetalleInscripcion
+from app.core.logger import logger
+from .models import Inscripcion, Pago, Plan, DetalleInscripcion, Suspension
 
 from sqlalchemy import and_
 
 def get_planes(session: Session):
     return session.exec(select(Plan)).all()
 
+ORDENES_PLANES = {"titulo": Plan.titulo, "precio": Plan.precio, "duracion": Plan.duracion}
+
+@cache_catalogo(Plan)
+def listar_planes_catalogo(session: Session, params: ParametrosPagina = ParametrosPagina()) -> Pagina[PlanOut]:
+    pagina = paginar(session, select(Plan), params, Plan.id_plan, ordenes=ORDENES_PLANES)
+    return Pagina(items=[PlanOut.from_orm(plan) for plan in pagina.items], siguiente=pagina.siguiente)
+
 def crear_pago_pendiente(session: Session, id_plan: int, creado_por: str):
     plan = session.get(Plan, id_plan)
     if not plan:
@@ -161,15 +172,17 @@ def pagar_pendiente(
             detail = e.orig.args[1] # type: ignore
         raise HTTPException(status_code=400, detail=detail)
 
-def obtener_inscripcion_activa(session: Session, id_cliente: int, id_comunidad: int) -> Inscripcion:
-    query = select(Inscripcion).where(
+def _consulta_inscripcion_activa(id_cliente: int, id_comunidad: int):
+    return select(Inscripcion).where(
         and_(
             Inscripcion.id_cliente == id_cliente,
             Inscripcion.id_comunidad == id_comunidad,
             Inscripcion.estado == 1  # Solo inscripciones activas
         )
     )
-    inscripcion = session.exec(query).first()
+
+def obtener_inscripcion_activa(session: Session, id_cliente: int, id_comunidad: int) -> Inscripcion:
+    inscripcion = session.exec(_consulta_inscripcion_activa(id_cliente, id_comunidad)).first()
 
     if not inscripcion:
         raise HTTPException(
@@ -180,20 +193,18 @@ def obtener_inscripcion_activa(session: Session, id_cliente: int, id_comunidad:
     return inscripcion
 
 
-def es_plan_con_topes(session: Session, id_inscripcion: int) -> bool:
-    query = select(DetalleInscripcion).where(
+def _consulta_detalle_inscripcion(id_inscripcion: int):
+    return select(DetalleInscripcion).where(
         DetalleInscripcion.id_inscripcion == id_inscripcion
     )
-    resultado = session.exec(query).first()
+
+def es_plan_con_topes(session: Session, id_inscripcion: int) -> bool:
+    resultado = session.exec(_consulta_detalle_inscripcion(id_inscripcion)).first()
 
     return resultado is not None
 
 def obtener_detalle_topes(session: Session, id_inscripcion: int) -> dict:
-    detalle = session.exec(
-        select(DetalleInscripcion).where(
-            DetalleInscripcion.id_inscripcion == id_inscripcion
-        )
-    ).first()
+    detalle = session.exec(_consulta_detalle_inscripcion(id_inscripcion)).first()
 
     if not detalle:
         raise HTTPException(
@@ -323,6 +334,10 @@ def obtener_planes_por_comunidad(db: Session, id_comunidad: int) -> list[Plan]:
     )
     return db.exec(query).all() # type: ignore
 
+@cache_catalogo(Plan, ComunidadXPlan)
+def listar_planes_por_comunidad_catalogo(db: Session, id_comunidad: int) -> List[PlanOut]:
+    return [PlanOut.from_orm(plan) for plan in obtener_planes_por_comunidad(db, id_comunidad)]
+
 def agregar_plan_a_comunidad_serv(
     db: Session,
     data: ComunidadXPlanCreate,
@@ -402,21 +417,26 @@ def actualizar_plan(session: Session, id_plan: int, plan_data: 'PlanUpdate', mod
     session.refresh(plan)
     return plan
 
-def calcular_estado_suspension(suspension) -> Dict[str, Any]:
+def ahora_lima() -> datetime:
+    """Hora actual de Lima como datetime naive (así se guardan las fechas de suspensión)."""
+    import pytz
+    return datetime.now(pytz.timezone("America/Lima")).replace(tzinfo=None)
+
+def calcular_estado_suspension(suspension, ahora: Optional[datetime] = None) -> Dict[str, Any]:
     """
     Calcula el estado visual de una suspensión EN TIEMPO REAL basándose en:
     - Estado de la base de datos
     - Fechas de inicio y fin
-    - Fecha actual
+    - Fecha actual (`ahora`, por defecto la hora de Lima)
+
+    Debe coincidir con estado_visual_suspension_sql().
     
     Returns:
         Dict con estado_visual, color, y acciones_disponibles
     """
-    import pytz
-    
     # 🔄 Usar zona horaria de Lima para comparaciones consistentes
-    lima_tz = pytz.timezone("America/Lima")
-    ahora = datetime.now(lima_tz).replace(tzinfo=None)  # Convertir a naive datetime para comparar
+    if ahora is None:
+        ahora = ahora_lima()
     
     estado_bd = suspension.estado
     fecha_inicio = suspension.fecha_inicio
@@ -540,12 +560,18 @@ def calcular_estado_suspension(suspension) -> Dict[str, Any]:
             "puede_modificar": False
         }
 
-def obtener_detalles_suspension_completos(suspension):
+def obtener_detalles_suspension_completos(suspension, ahora: Optional[datetime] = None):
     """
     Obtiene los detalles completos de una suspensión incluyendo estado calculado
     ✅ CORREGIDO: Convierte fechas UTC a hora local de Lima para mostrar al usuario
     """
-    estado_info = calcular_estado_suspension(suspension)
+    detalles = _detalles_suspension(suspension, ahora)
+    detalles["archivo"] = suspension.archivo
+    return detalles
+
+def _detalles_suspension(suspension, ahora: Optional[datetime] = None) -> Dict[str, Any]:
+    """Detalles de la suspensión sin el archivo (acepta el modelo o una fila de consulta)."""
+    estado_info = calcular_estado_suspension(suspension, ahora)
     
     # ✅ Convertir fechas UTC a hora local de Lima para mostrar al usuario
     fecha_creacion_lima = convert_utc_to_local(suspension.fecha_creacion) if suspension.fecha_creacion else None
@@ -558,7 +584,6 @@ def obtener_detalles_suspension_completos(suspension):
         "motivo": suspension.motivo,
         "fecha_inicio": suspension.fecha_inicio,        # Ya está en Lima local
         "fecha_fin": suspension.fecha_fin,              # Ya está en Lima local
-        "archivo": suspension.archivo,
         "fecha_creacion": fecha_creacion_lima,          # ✅ Convertida de UTC a Lima
         "creado_por": suspension.creado_por,
         "fecha_modificacion": fecha_modificacion_lima,  # ✅ Convertida de UTC a Lima
@@ -570,4 +595,270 @@ def obtener_detalles_suspension_completos(suspension):
         "puede_modificar": estado_info["puede_modificar"],
         "dias_restantes": estado_info.get("dias_restantes"),
         "mensaje": estado_info.get("mensaje")
-    }
\ No newline at end of file
+    }
+
+# ---------------------------------------------------------------------------
+# Transiciones de estado de membresías (tarea programada)
+# ---------------------------------------------------------------------------
+TAREA_TRANSICIONES_MEMBRESIA = "transiciones_membresia"
+
+def _suspension_aceptada(*condiciones):
+    return exists().where(
+        Suspension.id_inscripcion == Inscripcion.id_inscripcion,
+        Suspension.estado == 1,  # Aceptada
+        *condiciones,
+    )
+
+def aplicar_transiciones_membresia(
+    session: Session,
+    ahora: Optional[datetime] = None,
+    ahora_utc: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """
+    Aplica en bloque los cambios de estado que dependen de la fecha:
+    - congela (0) las inscripciones activas con una suspensión aceptada en curso
+    - reactiva (1) las congeladas cuya suspensión aceptada ya terminó y no tienen otra en curso
+    - vence (0) los detalles de inscripción activos cuya fecha_fin ya pasó
+
+    Las fechas de suspensión están en hora local de Lima (`ahora`) y las de
+    detalle_inscripcion en UTC (`ahora_utc`). Devuelve las filas afectadas por cada cambio.
+    """
+    ahora = ahora or ahora_lima()
+    ahora_utc = ahora_utc or datetime.utcnow()
+    en_curso = _suspension_aceptada(Suspension.fecha_inicio <= ahora, Suspension.fecha_fin > ahora)
+    auditoria = {"modificado_por": "sistema_auto", "fecha_modificacion": ahora_utc}
+
+    congeladas = session.exec(
+        update(Inscripcion)
+        .where(Inscripcion.estado == 1, en_curso)
+        .values(estado=0, **auditoria)
+    ).rowcount
+    reactivadas = session.exec(
+        update(Inscripcion)
+        .where(Inscripcion.estado == 0, _suspension_aceptada(Suspension.fecha_fin <= ahora), ~en_curso)
+        .values(estado=1, **auditoria)
+    ).rowcount
+    vencidos = session.exec(
+        update(DetalleInscripcion)
+        .where(DetalleInscripcion.estado == 1, DetalleInscripcion.fecha_fin <= ahora_utc)
+        .values(estado=0, **auditoria)
+    ).rowcount
+    session.commit()
+
+    cambios = {"congeladas": congeladas, "reactivadas": reactivadas, "detalles_vencidos": vencidos}
+    if any(cambios.values()):
+        logger.info("Transiciones de membresía aplicadas", extra=cambios)
+    return cambios
+
+def segundos_hasta_proxima_transicion(
+    session: Session,
+    ahora: Optional[datetime] = None,
+    ahora_utc: Optional[datetime] = None,
+) -> Optional[float]:
+    """Segundos hasta el próximo inicio/fin de suspensión aceptada o vencimiento de detalle."""
+    ahora = ahora or ahora_lima()
+    ahora_utc = ahora_utc or datetime.utcnow()
+    proximo_inicio, proximo_fin = session.exec(
+        select(
+            func.min(case((Suspension.fecha_inicio > ahora, Suspension.fecha_inicio))),
+            func.min(case((Suspension.fecha_fin > ahora, Suspension.fecha_fin))),
+        ).where(Suspension.estado == 1)
+    ).one()
+    proximo_vencimiento = session.exec(
+        select(func.min(DetalleInscripcion.fecha_fin))
+        .where(DetalleInscripcion.estado == 1, DetalleInscripcion.fecha_fin > ahora_utc)
+    ).one()
+
+    esperas = [(f - ahora).total_seconds() for f in (proximo_inicio, proximo_fin) if f is not None]
+    if proximo_vencimiento is not None:
+        esperas.append((proximo_vencimiento - ahora_utc).total_seconds())
+    return min(esperas) if esperas else None
+
+def tarea_transiciones_membresia(session: Session) -> Optional[float]:
+    """Tarea del programador: aplica las transiciones y pide volver a correr en la siguiente."""
+    aplicar_transiciones_membresia(session)
+    return segundos_hasta_proxima_transicion(session)
+
+# ---------------------------------------------------------------------------
+# Tablero de suspensiones (administración)
+# ---------------------------------------------------------------------------
+def estado_visual_suspension_sql(ahora: datetime):
+    """
+    Misma clasificación que calcular_estado_suspension(), como expresión SQL, para
+    poder filtrar y paginar por estado visual en la base de datos.
+    """
+    # (fecha - ahora).days <= 7  equivale a  fecha < ahora + 8 días
+    limite_aviso = ahora + timedelta(days=8)
+    pendiente = Suspension.estado == 2
+    aceptada = Suspension.estado == 1
+    return case(
+        (and_(pendiente, Suspension.fecha_inicio.is_(None)), "Pendiente"),
+        (and_(pendiente, Suspension.fecha_inicio < ahora), "Vencida"),
+        (and_(pendiente, Suspension.fecha_inicio < limite_aviso), "Por vencer"),
+        (pendiente, "Pendiente"),
+        (Suspension.estado == 0, "Rechazada"),
+        (and_(aceptada, or_(Suspension.fecha_inicio.is_(None), Suspension.fecha_fin.is_(None))), "Aceptada"),
+        (and_(aceptada, Suspension.fecha_inicio > ahora), "Programada"),
+        (and_(aceptada, Suspension.fecha_fin < ahora), "Completada"),
+        (and_(aceptada, Suspension.fecha_fin < limite_aviso), "Por terminar"),
+        (aceptada, "En curso"),
+        else_="Desconocido",
+    )
+
+def listar_suspensiones_admin(
+    session: Session,
+    estado_visual: Optional[str] = None,
+    id_comunidad: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: int = 1,
+    tamano_pagina: int = 50,
+    ahora: Optional[datetime] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Suspensiones con cliente, comunidad y estado visual en una sola consulta (sin el archivo).
+    El rango de fechas filtra las suspensiones cuyo periodo se cruza con [desde, hasta].
+    Devuelve (filas de la página, total sin paginar).
+    """
+    from app.modules.users.models import Cliente, Usuario
+
+    ahora = ahora or ahora_lima()
+    estado_sql = estado_visual_suspension_sql(ahora)
+    stmt = (
+        select(
+            Suspension.id_suspension,
+            Suspension.id_cliente,
+            Suspension.id_inscripcion,
+            Suspension.motivo,
+            Suspension.fecha_inicio,
+            Suspension.fecha_fin,
+            Suspension.fecha_creacion,
+            Suspension.creado_por,
+            Suspension.fecha_modificacion,
+            Suspension.modificado_por,
+            Suspension.estado,
+            Suspension.archivo.is_not(None).label("tiene_archivo"),  # type: ignore
+            Usuario.nombre.label("nombres"),
+            Usuario.apellido.label("apellidos"),
+            Usuario.email,
+            Inscripcion.id_comunidad,
+            Comunidad.nombre.label("comunidad"),
+            estado_sql.label("estado_visual"),
+            func.count().over().label("total"),
+        )
+        .outerjoin(Cliente, Cliente.id_cliente == Suspension.id_cliente)
+        .outerjoin(Usuario, Usuario.id_usuario == Cliente.id_usuario)
+        .outerjoin(Inscripcion, Inscripcion.id_inscripcion == Suspension.id_inscripcion)
+        .outerjoin(Comunidad, Comunidad.id_comunidad == Inscripcion.id_comunidad)
+    )
+    if estado_visual:
+        stmt = stmt.where(estado_sql == estado_visual)
+    if id_comunidad is not None:
+        stmt = stmt.where(Inscripcion.id_comunidad == id_comunidad)
+    if desde:
+        stmt = stmt.where(Suspension.fecha_fin >= datetime.combine(desde, time.min))
+    if hasta:
+        stmt = stmt.where(Suspension.fecha_inicio < datetime.combine(hasta + timedelta(days=1), time.min))
+
+    filas = session.exec(
+        stmt.order_by(Suspension.id_suspension)
+        .offset((pagina - 1) * tamano_pagina)
+        .limit(tamano_pagina)
+    ).all()
+    if filas:
+        total = filas[0].total
+    elif pagina == 1:
+        total = 0
+    else:
+        # Página fuera de rango: el conteo no vino en las filas
+        total = session.exec(select(func.count()).select_from(stmt.subquery())).one()
+
+    # Una pasada sobre la página: color, acciones y mensajes con el mismo `ahora` de la consulta
+    resultado = []
+    for fila in filas:
+        detalles = _detalles_suspension(fila, ahora)
+        detalles.update(
+            tiene_archivo=bool(fila.tiene_archivo),
+            nombres=fila.nombres,
+            apellidos=fila.apellidos,
+            email=fila.email,
+            id_comunidad=fila.id_comunidad,
+            comunidad=fila.comunidad,
+        )
+        resultado.append(detalles)
+    return resultado, total
+
+# ---------------------------------------------------------------------------
+# Modelo de lectura del historial de membresías
+# ---------------------------------------------------------------------------
+def _consulta_historial_membresias():
+    """
+    Inscripción + plan + primer detalle + pago en una sola sentencia.
+    `total` (función ventana) trae el conteo sin paginar en la misma consulta.
+    """
+    otro_detalle = aliased(DetalleInscripcion)
+    # Subconsulta correlacionada: usa el índice de detalle_inscripcion.id_inscripcion por fila
+    id_primer_detalle = (
+        select(func.min(otro_detalle.id_registros_inscripcion))
+        .where(otro_detalle.id_inscripcion == Inscripcion.id_inscripcion)
+        .correlate(Inscripcion)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Inscripcion.id_inscripcion,
+            Inscripcion.id_comunidad,
+            Inscripcion.estado,
+            Inscripcion.fecha_creacion,
+            Plan.titulo.label("titulo_plan"),
+            Plan.precio,
+            DetalleInscripcion.fecha_inicio,
+            DetalleInscripcion.fecha_fin,
+            Pago.id_pago,
+            Pago.fecha_pago,
+            Pago.monto,
+            func.count().over().label("total"),
+        )
+        .outerjoin(Plan, Plan.id_plan == Inscripcion.id_plan)
+        .outerjoin(DetalleInscripcion, DetalleInscripcion.id_registros_inscripcion == id_primer_detalle)
+        .outerjoin(Pago, Pago.id_pago == Inscripcion.id_pago)
+    )
+
+def listar_historial_membresias(
+    session: Session,
+    id_cliente: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: int = 1,
+    tamano_pagina: int = 50,
+) -> Tuple[List[Any], int]:
+    """
+    Historial paginado de inscripciones de un cliente. Las fechas filtran por el inicio
+    de la membresía (o la creación de la inscripción si aún no tiene detalle).
+    Devuelve (filas, total).
+    """
+    stmt = _consulta_historial_membresias().where(Inscripcion.id_cliente == id_cliente)
+    fecha_referencia = func.coalesce(DetalleInscripcion.fecha_inicio, Inscripcion.fecha_creacion)
+    if desde:
+        stmt = stmt.where(fecha_referencia >= datetime.combine(desde, time.min))
+    if hasta:
+        stmt = stmt.where(fecha_referencia < datetime.combine(hasta + timedelta(days=1), time.min))
+
+    filas = session.exec(
+        stmt.order_by(Inscripcion.id_inscripcion)
+        .offset((pagina - 1) * tamano_pagina)
+        .limit(tamano_pagina)
+    ).all()
+    if filas:
+        return filas, filas[0].total
+    if pagina == 1:
+        return [], 0
+    # Página fuera de rango: el conteo no vino en las filas
+    total = session.exec(select(func.count()).select_from(stmt.subquery())).one()
+    return [], total
+
+def obtener_membresia_con_pago(session: Session, id_inscripcion: int):
+    """Una inscripción con su plan, detalle y pago (misma forma que el historial)."""
+    return session.exec(
+        _consulta_historial_membresias().where(Inscripcion.id_inscripcion == id_inscripcion)
+    ).first()
@@ -2,12 +2,16 @@ from __future__ import annotations
 from typing import Optional, ClassVar, TYPE_CHECKING, List
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
+from app.core.db import columnas_diferidas
 
 class Comunidad(SQLModel, table=True):
+    __mapper_args__ = columnas_diferidas("imagen")
+
     id_comunidad: Optional[int] = Field(default=None, primary_key=True)
     nombre: str = Field(max_length=100)
     slogan: Optional[str] = Field(default=None, max_length=350)
-    imagen: Optional[bytes] = None
+    imagen: Optional[bytes] = None  # Legado: las imágenes nuevas van al almacén de media
+    imagen_hash: Optional[str] = Field(default=None, max_length=64)
     fecha_creacion: datetime = Field(default_factory=datetime.utcnow)
     creado_por: str = Field(max_length=50)
     fecha_modificacion: Optional[datetime] = Field(default=None)
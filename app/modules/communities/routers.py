@@ -1,7 +1,7 @@
-import traceback
-from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Form, Request, UploadFile, File
 from sqlmodel import Session, select
-from app.core.db import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.db import get_async_session, get_session, usa_db_async
 from app.modules.auth.dependencies import get_current_cliente_id
 from app.modules.billing.models import Inscripcion
 from app.modules.communities.models import Comunidad
@@ -9,12 +9,15 @@ from app.modules.communities.schemas import ComunidadOut, ComunidadRead
 from typing import List, Optional
 from datetime import datetime
 from app.modules.users.dependencies import get_current_admin
-import base64
 from app.core.logger import logger 
+from app.modules.media.services import guardar_media_opcional, url_media
+from app.modules.communities.services import listar_comunidades_catalogo, listar_comunidades_catalogo_async
 from app.modules.communities.services import eliminar_comunidad_service, get_comunidades_con_servicios, get_comunidades_con_servicios_sin_imagen
 from app.modules.communities.services import editar_comunidad_service
+from app.core.etag import RutaConEtag, respuesta_json
+from app.core.paginacion import ParametrosPagina, agregar_cabeceras_pagina, parametros_pagina
 
-router = APIRouter()
+router = APIRouter(route_class=RutaConEtag)
 
 @router.post("/crear_comunidad", response_model=ComunidadOut)
 async def crear_comunidad(
@@ -25,12 +28,12 @@ async def crear_comunidad(
     current_admin=Depends(get_current_admin),
 ):
     try:
-        imagen_bytes = await imagen.read() if imagen else None
+        imagen_hash = guardar_media_opcional(await imagen.read()) if imagen else None
 
         nueva_comunidad = Comunidad(
             nombre=nombre,
             slogan=slogan,
-            imagen=imagen_bytes,
+            imagen_hash=imagen_hash,
             creado_por=current_admin.email,
             fecha_creacion=datetime.utcnow(),        
             modificado_por=current_admin.email,
@@ -45,9 +48,7 @@ async def crear_comunidad(
         logger.info(f"✅ Comunidad creada: '{nombre}' por {current_admin.email}")
 
         comunidad_dict = nueva_comunidad.__dict__.copy()
-
-        if comunidad_dict.get("imagen"):
-            comunidad_dict["imagen"] = base64.b64encode(comunidad_dict["imagen"]).decode("utf-8")
+        comunidad_dict["imagen"] = url_media(nueva_comunidad.imagen_hash)
 
         return ComunidadOut(**comunidad_dict)
 
@@ -56,17 +57,44 @@ async def crear_comunidad(
         raise HTTPException(status_code=500, detail="Error al crear comunidad")
 
 #Endpoint para listar comunidades activas
-@router.get("/listar_comunidad", response_model=List[ComunidadRead])
-def listar_comunidades(session: Session = Depends(get_session)):
+def listar_comunidades(
+    request: Request,
+    session: Session = Depends(get_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
+):
     try:
-        comunidades = session.exec(select(Comunidad).where(Comunidad.estado == True)).all()
-        response = [ComunidadRead.from_orm_with_base64(c) for c in comunidades]
-        logger.info(f"📄 Se listaron {len(response)} comunidades activas")
-        return response
+        pagina = listar_comunidades_catalogo(session, params)
+        logger.info(f"📄 Se listaron {len(pagina.items)} comunidades activas")
+        return agregar_cabeceras_pagina(respuesta_json(request, pagina.items, List[ComunidadRead]), request, pagina)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error al listar comunidades: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al obtener comunidades")
+
+async def listar_comunidades_async(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
+):
+    try:
+        pagina = await listar_comunidades_catalogo_async(session, params)
+        logger.info(f"📄 Se listaron {len(pagina.items)} comunidades activas")
+        return agregar_cabeceras_pagina(respuesta_json(request, pagina.items, List[ComunidadRead]), request, pagina)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error al listar comunidades: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al obtener comunidades")
 
+# Con ASYNC_DB_ROUTERS=communities el listado se atiende con el motor async
+router.add_api_route(
+    "/listar_comunidad",
+    listar_comunidades_async if usa_db_async("communities") else listar_comunidades,
+    methods=["GET"],
+    response_model=List[ComunidadRead],
+)
+
 from fastapi import HTTPException
 
 @router.delete("/eliminar_comunidad/{id_comunidad}")
@@ -106,19 +134,18 @@ async def editar_comunidad(
     except HTTPException as e:
         raise e
     except Exception as e:
-        traceback.print_exc()
-        logger.error(f"❌ Error al editar comunidad ID {id_comunidad}: {str(e)}")
+        logger.exception(f"❌ Error al editar comunidad ID {id_comunidad}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al editar comunidad")
 
 #Endpoint para llamar a las comunidades con sus servicios asociados  
 @router.get("/comunidades-con-servicios")
-def comunidades_con_servicios(session: Session = Depends(get_session)):
-    return get_comunidades_con_servicios(session)
+def comunidades_con_servicios(request: Request, session: Session = Depends(get_session)):
+    return respuesta_json(request, get_comunidades_con_servicios(session))
 
 #Endpoint para llamar a las comunidades con sus servicios asociados, pero sin imagen
 @router.get("/comunidades-con-servicios_sinImagen")
-def comunidades_con_servicios_sinImagen(session: Session = Depends(get_session)):
-    return get_comunidades_con_servicios_sin_imagen(session)
+def comunidades_con_servicios_sinImagen(request: Request, session: Session = Depends(get_session)):
+    return respuesta_json(request, get_comunidades_con_servicios_sin_imagen(session))
 
 #Endpoint para obtener una comunidad por ID
 @router.get("/comunidad/{id_comunidad}", response_model=ComunidadOut)
@@ -135,8 +162,7 @@ def obtener_comunidad_por_id(
         raise HTTPException(status_code=404, detail="Comunidad no encontrada o inactiva")
 
     comunidad_dict = comunidad.__dict__.copy()
-    if comunidad_dict.get("imagen"):
-        comunidad_dict["imagen"] = base64.b64encode(comunidad_dict["imagen"]).decode("utf-8")
+    comunidad_dict["imagen"] = url_media(comunidad.imagen_hash)
 
     return ComunidadOut(**comunidad_dict)
 
@@ -1,4 +1,3 @@
-import base64
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, ConfigDict, validator
@@ -6,6 +5,8 @@ from app.modules.services.schemas import ServicioResumen
 from typing import List, Optional
 from app.modules.services.schemas import ServicioOut
 from utils.datetime_utils import convert_utc_to_local
+from app.modules.media.services import url_media
+from app.core.logger import logger
 
 class ComunidadCreate(BaseModel):
     nombre: str
@@ -34,9 +35,9 @@ class ComunidadRead(BaseModel):
         orm_mode = True
     @classmethod
     def from_orm_with_base64(cls, comunidad):
+        # Se mantiene el nombre por compatibilidad, pero `imagen` ahora es la URL del almacén de media
         data = comunidad.__dict__.copy()
-        if comunidad.imagen:
-            data["imagen"] = base64.b64encode(comunidad.imagen).decode("utf-8")
+        data["imagen"] = url_media(comunidad.imagen_hash)
         return cls(**data)
 
 class ComunidadOut(BaseModel):
@@ -63,7 +64,7 @@ class ComunidadContexto(BaseModel):
     id_comunidad: int
     nombre: str
     slogan: Optional[str] = None
-    imagen: Optional[str] = None  # Codificada en base64 para frontend
+    imagen: Optional[str] = None  # URL en /api/media
     servicios: Optional[List[ServicioResumen]] = [] 
     estado_membresia: Optional[str] = None  # congelado (0), activa (1), pendiente de plan(2), pendiente de pago(3)
 
@@ -82,32 +83,35 @@ class ComunidadContexto(BaseModel):
     @classmethod
     def from_orm_with_base64(cls, comunidad, servicios=None, estado_membresia=None):
         data = comunidad.__dict__.copy()
-        if comunidad.imagen:
-            data["imagen"] = base64.b64encode(comunidad.imagen).decode("utf-8")
+        data["imagen"] = url_media(comunidad.imagen_hash)
         if servicios is not None:
             data["servicios"] = servicios
 
-        estados = {
-            0: "congelado",
-            1: "activa",
-            2: "pendiente de plan",
-            3: "pendiente de pago"
-        }
-        estado_nombre = "pendiente de pago"
-        print("Estado de membresía recibido:", estado_membresia)
-        if estado_membresia is not None:
-            try:
-                estado_int = int(estado_membresia)
-                estado_nombre = estados.get(estado_int, "inactiva")
-            except Exception:
-                estado_nombre = "inactiva"
-        data["estado_membresia"] = estado_nombre
+        logger.debug(f"Estado de membresía recibido: {estado_membresia}")
+        data["estado_membresia"] = nombre_estado_membresia(estado_membresia)
         return cls(**data)
 
 
+ESTADOS_MEMBRESIA = {
+    0: "congelado",
+    1: "activa",
+    2: "pendiente de plan",
+    3: "pendiente de pago"
+}
+
+def nombre_estado_membresia(estado_membresia) -> str:
+    """Texto del estado de membresía; sin inscripción se muestra como pendiente de pago."""
+    if estado_membresia is None:
+        return "pendiente de pago"
+    try:
+        return ESTADOS_MEMBRESIA.get(int(estado_membresia), "inactiva")
+    except Exception:
+        return "inactiva"
+
+
 class ComunidadDetalleOut(BaseModel):
     id_comunidad: int
     nombre: str
     slogan: Optional[str] = None  # Aquí se usará como descripción
-    imagen: Optional[str] = None  # base64
+    imagen: Optional[str] = None  # URL en /api/media
     servicios: List[ServicioOut]
\ No newline at end of file
@@ -1,17 +1,43 @@
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, UploadFile
 from datetime import datetime
 from app.modules.communities.models import Comunidad
 import logging
-import base64
-from typing import Optional
+from typing import List, Optional
 
+from app.core.catalogo import cache_catalogo
+from app.core.paginacion import Pagina, ParametrosPagina, paginar, paginar_async
+from app.modules.communities.schemas import ComunidadRead
 from app.modules.services.models import ComunidadXServicio, Servicio
 from app.modules.services.services import obtener_servicios_por_ids
 from app.modules.services.schemas import ServicioOut
+from app.modules.media.services import guardar_media_opcional, url_media
 
 logger = logging.getLogger(__name__)
 
+def listar_comunidades_activas(session: Session):
+    return session.exec(select(Comunidad).where(Comunidad.estado == True)).all()
+
+async def listar_comunidades_activas_async(session: AsyncSession):
+    resultado = await session.exec(select(Comunidad).where(Comunidad.estado == True))
+    return resultado.all()
+
+ORDENES_COMUNIDADES = {"nombre": Comunidad.nombre, "fecha_creacion": Comunidad.fecha_creacion}
+
+def _pagina_comunidades(pagina: Pagina) -> Pagina[ComunidadRead]:
+    return Pagina(items=[ComunidadRead.from_orm_with_base64(c) for c in pagina.items], siguiente=pagina.siguiente)
+
+@cache_catalogo(Comunidad)
+def listar_comunidades_catalogo(session: Session, params: ParametrosPagina = ParametrosPagina()) -> Pagina[ComunidadRead]:
+    consulta = select(Comunidad).where(Comunidad.estado == True)
+    return _pagina_comunidades(paginar(session, consulta, params, Comunidad.id_comunidad, ORDENES_COMUNIDADES))
+
+@cache_catalogo(Comunidad)
+async def listar_comunidades_catalogo_async(session: AsyncSession, params: ParametrosPagina = ParametrosPagina()) -> Pagina[ComunidadRead]:
+    consulta = select(Comunidad).where(Comunidad.estado == True)
+    return _pagina_comunidades(await paginar_async(session, consulta, params, Comunidad.id_comunidad, ORDENES_COMUNIDADES))
+
 def eliminar_comunidad_service(id_comunidad: int, session: Session, current_admin_email: str):
     comunidad = session.exec(
         select(Comunidad).where(Comunidad.id_comunidad == id_comunidad, Comunidad.estado == True)
@@ -53,7 +79,8 @@ async def editar_comunidad_service(
         comunidad.slogan = slogan
 
     if imagen is not None:
-        comunidad.imagen = await imagen.read()
+        comunidad.imagen_hash = guardar_media_opcional(await imagen.read())
+        comunidad.imagen = None
 
     comunidad.fecha_modificacion = datetime.utcnow()
     comunidad.modificado_por = current_admin_email
@@ -63,8 +90,7 @@ async def editar_comunidad_service(
     session.refresh(comunidad)
 
     comunidad_dict = comunidad.__dict__.copy()
-    if comunidad_dict.get("imagen"):
-        comunidad_dict["imagen"] = base64.b64encode(comunidad_dict["imagen"]).decode("utf-8")
+    comunidad_dict["imagen"] = url_media(comunidad.imagen_hash)
 
     return comunidad_dict
 
@@ -72,6 +98,7 @@ def register_user(user_data):
     # solo lo hice para que corra xd
     pass
 
+@cache_catalogo(Comunidad, Servicio, ComunidadXServicio)
 def get_comunidades_con_servicios(session: Session):
     comunidades = session.exec(select(Comunidad)).all()
     servicios = session.exec(select(Servicio)).all()
@@ -86,21 +113,20 @@ def get_comunidades_con_servicios(session: Session):
     resultado = []
     for c in comunidades:
         comunidad_dict = c.dict()
-        # Codifica imagen a base64 si existe
-        if comunidad_dict.get("imagen"):
-            comunidad_dict["imagen"] = base64.b64encode(comunidad_dict["imagen"]).decode("utf-8")
+        # La imagen se envía como URL del almacén de media
+        comunidad_dict["imagen"] = url_media(comunidad_dict.pop("imagen_hash", None))
         # Haz lo mismo para los servicios
         servicios_list = []
         for s in servicios_por_comunidad[c.id_comunidad]:
             s_dict = s.dict()
-            if s_dict.get("imagen"):
-                s_dict["imagen"] = base64.b64encode(s_dict["imagen"]).decode("utf-8")
+            s_dict["imagen"] = url_media(s_dict.pop("imagen_hash", None))
             servicios_list.append(s_dict)
         comunidad_dict["servicios"] = servicios_list
         resultado.append(comunidad_dict)
     return resultado
 
 
+@cache_catalogo(Comunidad, Servicio, ComunidadXServicio)
 def get_comunidades_con_servicios_sin_imagen(session: Session):
     comunidades = session.exec(select(Comunidad)).all()
     servicios = session.exec(select(Servicio)).all()
@@ -116,10 +142,12 @@ def get_comunidades_con_servicios_sin_imagen(session: Session):
     for c in comunidades:
         comunidad_dict = c.dict()
         comunidad_dict.pop("imagen", None)  # Elimina imagen
+        comunidad_dict.pop("imagen_hash", None)
         servicios_list = []
         for s in servicios_por_comunidad[c.id_comunidad]:
             s_dict = s.dict()
             s_dict.pop("imagen", None)  # Elimina imagen
+            s_dict.pop("imagen_hash", None)
             servicios_list.append(s_dict)
         comunidad_dict["servicios"] = servicios_list
         resultado.append(comunidad_dict)
@@ -161,8 +189,7 @@ def obtener_comunidad_por_id(session: Session, id_comunidad: int):
         raise HTTPException(status_code=404, detail="Comunidad no encontrada o inactiva")
 
     comunidad_dict = comunidad.dict()
-    if comunidad_dict.get("imagen"):
-        comunidad_dict["imagen"] = base64.b64encode(comunidad_dict["imagen"]).decode("utf-8")
+    comunidad_dict["imagen"] = url_media(comunidad_dict.pop("imagen_hash", None))
 
     return comunidad_dict
 
@@ -179,9 +206,8 @@ def obtener_comunidad_con_imagen_base64(session: Session, id_comunidad: int):
     if not comunidad:
         raise HTTPException(status_code=404, detail="Comunidad no encontrada")
 
-    imagen_base64 = base64.b64encode(comunidad.imagen).decode("utf-8") if comunidad.imagen else None
-
-    return comunidad, imagen_base64
+    # Se mantiene la firma (comunidad, imagen) pero la imagen ahora es una URL
+    return comunidad, url_media(comunidad.imagen_hash)
 
 
 def obtener_servicios_con_imagen_base64(session: Session, id_comunidad: int) -> list[ServicioOut]:
@@ -189,17 +215,12 @@ def obtener_servicios_con_imagen_base64(session: Session, id_comunidad: int) ->
     servicios_out = []
 
     for servicio in servicios:
-        imagen_base64 = (
-            base64.b64encode(servicio.imagen).decode("utf-8")
-            if servicio.imagen else None
-        )
-
         servicio_out = ServicioOut(
             id_servicio=servicio.id_servicio, # type: ignore
             nombre=servicio.nombre,
             modalidad = servicio.modalidad,
             descripcion=servicio.descripcion,
-            imagen=imagen_base64
+            imagen=url_media(servicio.imagen_hash)
         )
 
         servicios_out.append(servicio_out)
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import List, Optional
+from app.core.db import columnas_diferidas
 
 class Departamento(SQLModel, table=True):
     id_departamento: int = Field(primary_key=True)
@@ -8,10 +9,13 @@ class Departamento(SQLModel, table=True):
     # Relación uno a muchos con distrito
     distritos: List["Distrito"] = Relationship(back_populates="departamento")
 class Distrito(SQLModel, table=True):
+    __mapper_args__ = columnas_diferidas("imagen")
+
     id_distrito: int = Field(primary_key=True)
     id_departamento: int = Field(foreign_key="departamento.id_departamento")
     nombre: str = Field(max_length=45)
-    imagen: Optional[bytes] = None
+    imagen: Optional[bytes] = None  # Legado: las imágenes nuevas van al almacén de media
+    imagen_hash: Optional[str] = Field(default=None, max_length=64)
 
     # Relación inversa: muchos a uno (sin Optional aquí)
     departamento: Departamento = Relationship(back_populates="distritos")
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
 from typing import List
-from app.core.db import get_session
-from app.modules.geography.models import Departamento, Distrito
+from app.modules.geography.services import obtener_geografia, recargar_geografia
+from app.modules.users.dependencies import get_current_admin
+from app.core.etag import RutaConEtag, respuesta_con_etag
 
 
-router = APIRouter()
+router = APIRouter(route_class=RutaConEtag)
+
+# Los datos cambian muy rara vez: el cliente puede reutilizarlos y revalidar con el ETag
+CACHE_CONTROL_GEOGRAFIA = "public, max-age=3600"
+
 
 @router.get("/departamentos", response_model=List[dict])
-def listar_departamentos(session: Session = Depends(get_session)):
-    departamentos = session.query(Departamento).all()
-    return [{"id_departamento": d.id_departamento, "nombre": d.nombre} for d in departamentos]
+def listar_departamentos(request: Request):
+    return respuesta_con_etag(request, *obtener_geografia().json_departamentos, CACHE_CONTROL_GEOGRAFIA)
 
 @router.get("/distritos/{id_departamento}", response_model=List[dict])
-def listar_distritos_por_departamento(id_departamento: int, session: Session = Depends(get_session)):
-    distritos = session.query(Distrito).filter(Distrito.id_departamento == id_departamento).all() # type: ignore
-    return [{"id_distrito": d.id_distrito, "nombre": d.nombre} for d in distritos]
\ No newline at end of file
+def listar_distritos_por_departamento(id_departamento: int, request: Request):
+    return respuesta_con_etag(request, *obtener_geografia().respuesta_distritos(id_departamento), CACHE_CONTROL_GEOGRAFIA)
+
+@router.post("/recargar")
+def recargar(current_admin=Depends(get_current_admin)):
+    """Vuelve a leer departamentos y distritos tras un cambio hecho por un administrador."""
+    indice = recargar_geografia()
+    return {"departamentos": len(indice.departamentos), "distritos": len(indice.distritos)}
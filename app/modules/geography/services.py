@@ -0,0 +1,111 @@
+"""
+Geografía precargada en memoria.
+
+Departamentos y distritos casi nunca cambian, así que al arrancar se leen una sola
+vez (sin las columnas BLOB) y se arma un índice inmutable con las respuestas ya
+serializadas a JSON y su ETag fuerte. Los endpoints solo devuelven esos bytes.
+Si un administrador cambia la tabla, `recargar_geografia()` arma un índice nuevo
+y lo reemplaza de una vez (las peticiones en curso siguen con el anterior).
+"""
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.etag import etag_de
+from app.core.logger import logger
+from app.modules.geography.models import Departamento, Distrito
+
+JSON_LISTA_VACIA = b"[]"
+
+
+def _serializar(datos) -> bytes:
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class DistritoGeo:
+    id_distrito: int
+    id_departamento: int
+    nombre: str
+    imagen_hash: Optional[str]
+
+
+@dataclass(frozen=True)
+class IndiceGeografia:
+    departamentos: Mapping[int, str]
+    distritos: Mapping[int, DistritoGeo]
+    distritos_por_departamento: Mapping[int, Tuple[DistritoGeo, ...]]
+    # Respuestas listas para enviar: (bytes JSON, ETag)
+    json_departamentos: Tuple[bytes, str]
+    json_distritos: Mapping[int, Tuple[bytes, str]]
+
+    def respuesta_distritos(self, id_departamento: int) -> Tuple[bytes, str]:
+        return self.json_distritos.get(id_departamento, _RESPUESTA_VACIA)
+
+
+_RESPUESTA_VACIA = (JSON_LISTA_VACIA, etag_de(JSON_LISTA_VACIA))
+
+
+def construir_indice(session: Session) -> IndiceGeografia:
+    departamentos = session.exec(
+        select(Departamento.id_departamento, Departamento.nombre).order_by(Departamento.id_departamento)  # type: ignore
+    ).all()
+    distritos = [
+        DistritoGeo(*fila)
+        for fila in session.exec(
+            select(Distrito.id_distrito, Distrito.id_departamento, Distrito.nombre, Distrito.imagen_hash)  # type: ignore
+            .order_by(Distrito.id_distrito)
+        ).all()
+    ]
+
+    por_departamento = {}
+    for distrito in distritos:
+        por_departamento.setdefault(distrito.id_departamento, []).append(distrito)
+
+    contenido = _serializar([{"id_departamento": id_, "nombre": nombre} for id_, nombre in departamentos])
+    json_distritos = {}
+    for id_departamento, lista in por_departamento.items():
+        bytes_json = _serializar([{"id_distrito": d.id_distrito, "nombre": d.nombre} for d in lista])
+        json_distritos[id_departamento] = (bytes_json, etag_de(bytes_json))
+
+    return IndiceGeografia(
+        departamentos=MappingProxyType(dict(departamentos)),
+        distritos=MappingProxyType({d.id_distrito: d for d in distritos}),
+        distritos_por_departamento=MappingProxyType({k: tuple(v) for k, v in por_departamento.items()}),
+        json_departamentos=(contenido, etag_de(contenido)),
+        json_distritos=MappingProxyType(json_distritos),
+    )
+
+
+# Se reemplaza entero (asignación atómica); nunca se modifica en el lugar
+_indice: Optional[IndiceGeografia] = None
+
+
+def recargar_geografia(session: Optional[Session] = None) -> IndiceGeografia:
+    """Lee la geografía desde la BD y reemplaza el índice en memoria."""
+    global _indice
+    if session is None:
+        from app.core.db import engine  # import diferido: db importa la configuración
+        with Session(engine) as propia:
+            indice = construir_indice(propia)
+    else:
+        indice = construir_indice(session)
+    _indice = indice
+    logger.info(f"🗺️ Geografía cargada: {len(indice.departamentos)} departamentos, {len(indice.distritos)} distritos")
+    return indice
+
+
+def obtener_geografia() -> IndiceGeografia:
+    """Índice actual; si el arranque no pudo cargarlo, se carga en la primera petición."""
+    indice = _indice
+    if indice is None:
+        indice = recargar_geografia()
+    return indice
+
+
+def descartar_geografia() -> None:
+    global _indice
+    _indice = None
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.instrumentacion import RutaInstrumentada
+from app.core.trabajos import Trabajo, gestor_trabajos
+from app.modules.users.dependencies import get_current_admin
+
+router = APIRouter(route_class=RutaInstrumentada)
+
+# Cada cuánto se relee el trabajo de la tabla al transmitir eventos
+TRABAJOS_SONDEO = float(os.getenv("TRABAJOS_SONDEO", "0.5"))
+
+
+def _obtener_trabajo(id_trabajo: str) -> Trabajo:
+    trabajo = gestor_trabajos.obtener(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+@router.get("")
+def listar_trabajos(propios: bool = True, current_admin=Depends(get_current_admin)):
+    """Trabajos de carga masiva recientes (por defecto, solo los del administrador)."""
+    trabajos = gestor_trabajos.listar(current_admin.email if propios else None)
+    return [t.a_dict() for t in trabajos]
+
+
+@router.get("/{id_trabajo}")
+def estado_trabajo(id_trabajo: str, current_admin=Depends(get_current_admin)):
+    """
+    Estado y avance de una carga masiva. Al completarse, `resumen` trae el resultado de
+    siempre: insertados, omitidos y errores por fila.
+    """
+    return _obtener_trabajo(id_trabajo).a_dict()
+
+
+@router.get("/{id_trabajo}/eventos")
+async def eventos_trabajo(id_trabajo: str, current_admin=Depends(get_current_admin)):
+    """
+    Server-Sent Events con el avance del trabajo: un evento por cada cambio y el último
+    cuando termina (completado o fallido). El trabajo puede estar corriendo en otro
+    worker: el avance se lee de la tabla.
+    """
+    trabajo = await run_in_threadpool(_obtener_trabajo, id_trabajo)
+
+    async def eventos():
+        actual = trabajo
+        version = -1
+        while actual is not None:
+            if actual.version != version:
+                version = actual.version
+                yield f"data: {json.dumps(actual.a_dict(), default=str)}\n\n"
+                if actual.finalizado:
+                    return
+            await asyncio.sleep(TRABAJOS_SONDEO)
+            actual = await run_in_threadpool(gestor_trabajos.obtener, id_trabajo)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Response
+
+from app.modules.media.services import detectar_content_type, es_hash_valido, leer_media
+from app.core.etag import coincide
+from app.core.instrumentacion import RutaInstrumentada
+
+router = APIRouter(route_class=RutaInstrumentada)
+
+# El contenido de un hash nunca cambia, así que el navegador/CDN puede guardarlo para siempre
+CACHE_CONTROL_INMUTABLE = "public, max-age=31536000, immutable"
+
+# Un SVG puede traer <script>: se descarga como adjunto y, si se abre igual, sin ejecutar nada
+CABECERAS_SVG = {
+    "Content-Disposition": "attachment",
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'",
+}
+
+
+@router.get("/{hash_media}")
+def obtener_media(hash_media: str, request: Request):
+    etag = f'"{hash_media}"'
+    cabeceras = {"ETag": etag, "Cache-Control": CACHE_CONTROL_INMUTABLE, "X-Content-Type-Options": "nosniff"}
+
+    # Si el cliente ya tiene la versión (mismo hash) no se lee ni se envía el archivo
+    if es_hash_valido(hash_media) and coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabeceras)
+
+    contenido = leer_media(hash_media)
+    content_type = detectar_content_type(contenido)
+    if content_type == "image/svg+xml":
+        cabeceras.update(CABECERAS_SVG)
+    return Response(
+        content=contenido,
+        media_type=content_type,
+        headers=cabeceras,
+    )
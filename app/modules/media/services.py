@@ -0,0 +1,140 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+from sqlmodel import Session, select
+from fastapi import HTTPException
+
+from app.core.db import cargar_blobs
+from app.core.logger import logger
+
+# Carpeta donde se guardan los archivos (sustituto local de un object store)
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_URL_PREFIX = os.getenv("MEDIA_URL_PREFIX", "/api/media")
+
+_HASH_REGEX = re.compile(r"^[0-9a-f]{64}$")
+
+# Firmas de los formatos de imagen que se suben desde el panel de administración
+_FIRMAS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+def calcular_hash(contenido: bytes) -> str:
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def es_hash_valido(hash_media: str) -> bool:
+    return bool(_HASH_REGEX.match(hash_media))
+
+
+def _ruta_media(hash_media: str) -> str:
+    # Se reparte en subcarpetas por los dos primeros caracteres para no saturar un solo directorio
+    return os.path.join(MEDIA_ROOT, hash_media[:2], hash_media)
+
+
+def detectar_content_type(contenido: bytes) -> str:
+    for firma, content_type in _FIRMAS:
+        if contenido.startswith(firma):
+            return content_type
+    if contenido[:4] == b"RIFF" and contenido[8:12] == b"WEBP":
+        return "image/webp"
+    cabecera = contenido.lstrip()[:5]
+    if cabecera.startswith(b"<svg") or cabecera == b"<?xml":
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+
+def guardar_media(contenido: bytes) -> str:
+    """
+    Guarda el contenido una sola vez bajo su hash SHA-256 y devuelve el hash.
+    Si el archivo ya existe no se vuelve a escribir.
+    """
+    hash_media = calcular_hash(contenido)
+    ruta = _ruta_media(hash_media)
+    if os.path.exists(ruta):
+        return hash_media
+
+    carpeta = os.path.dirname(ruta)
+    os.makedirs(carpeta, exist_ok=True)
+
+    # Escritura atómica: archivo temporal + rename, para no servir archivos a medio escribir
+    fd, ruta_tmp = tempfile.mkstemp(dir=carpeta)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contenido)
+        os.replace(ruta_tmp, ruta)
+    except Exception:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+    logger.info(f"🖼️ Media guardada: {hash_media} ({len(contenido)} bytes)")
+    return hash_media
+
+
+def guardar_media_opcional(contenido: Optional[bytes]) -> Optional[str]:
+    if not contenido:
+        return None
+    return guardar_media(contenido)
+
+
+def leer_media(hash_media: str) -> bytes:
+    if not es_hash_valido(hash_media):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    ruta = _ruta_media(hash_media)
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    with open(ruta, "rb") as f:
+        return f.read()
+
+
+def url_media(hash_media: Optional[str]) -> Optional[str]:
+    """Devuelve la URL pública de un archivo o None si la entidad no tiene imagen."""
+    if not hash_media:
+        return None
+    return f"{MEDIA_URL_PREFIX}/{hash_media}"
+
+
+def migrar_imagenes_legadas(session: Session, tamano_lote: int = 50) -> dict:
+    """
+    Copia las imágenes guardadas en las columnas BLOB `imagen` (comunidad, servicio, distrito)
+    al almacén de media, completa `imagen_hash` y libera la columna BLOB.
+    Es idempotente: solo procesa filas con imagen y sin hash.
+    """
+    from app.modules.communities.models import Comunidad
+    from app.modules.services.models import Servicio
+    from app.modules.geography.models import Distrito
+
+    resumen = {}
+    for modelo in (Comunidad, Servicio, Distrito):
+        migradas = 0
+        while True:
+            filas = session.exec(
+                select(modelo)
+                .where(modelo.imagen.is_not(None), modelo.imagen_hash.is_(None))  # type: ignore
+                .options(cargar_blobs())
+                .limit(tamano_lote)
+            ).all()
+            if not filas:
+                break
+
+            for fila in filas:
+                fila.imagen_hash = guardar_media(fila.imagen)
+                fila.imagen = None
+                session.add(fila)
+            session.commit()
+            migradas += len(filas)
+
+        resumen[modelo.__tablename__] = migradas
+        logger.info(f"🖼️ Migración de imágenes en '{modelo.__tablename__}': {migradas} filas")
+
+    return resumen
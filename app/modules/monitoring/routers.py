@@ -0,0 +1,93 @@
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlmodel import Session
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import caches_registradas
+from app.core.catalogo import limpiar_catalogo
+from app.core.config import settings
+from app.core.db import get_session, resumen_pools
+from app.core.etag import estadisticas_etag
+from app.core.instrumentacion import RutaInstrumentada, exportar_prometheus, registro_metricas
+from app.core.metricas_pool import metricas_pools
+from app.core.scheduler import programador
+from app.modules.notifications.services import resumen_cola
+from app.modules.users.dependencies import get_current_admin
+
+router = APIRouter(route_class=RutaInstrumentada)
+
+# Si se define, Prometheus debe enviar "Authorization: Bearer <METRICS_TOKEN>".
+# En prod es obligatorio: sin él /metrics responde 401 en vez de quedar público.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+def verificar_token_metricas(authorization: str | None = Header(default=None)):
+    if not METRICS_TOKEN:
+        if settings.entorno == "prod":
+            raise HTTPException(status_code=401, detail="METRICS_TOKEN no configurado")
+        return
+    if not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+
+@router.get("/pool")
+def metricas_pool(current_admin=Depends(get_current_admin)):
+    """
+    Estado y métricas acumuladas de los pools de conexiones: checkouts, tiempo de espera
+    por una conexión, timeouts y uso del overflow. Sirve para ajustar DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    return {"entorno": settings.entorno, "pools": resumen_pools()}
+
+@router.post("/pool/reiniciar")
+def reiniciar_metricas_pool(current_admin=Depends(get_current_admin)):
+    """Pone a cero los contadores acumulados (p. ej. antes de una prueba de carga)."""
+    for metricas in metricas_pools.values():
+        metricas.reiniciar()
+    return {"ok": True}
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verificar_token_metricas)])
+def metricas_prometheus():
+    """
+    Métricas por ruta en formato Prometheus: peticiones, histograma de latencia,
+    sentencias SQL, tiempo en BD, tiempo de serialización y estado del pool.
+    """
+    return PlainTextResponse(exportar_prometheus(), media_type="text/plain; version=0.0.4")
+
+@router.post("/metrics/reiniciar")
+def reiniciar_metricas_rutas(current_admin=Depends(get_current_admin)):
+    registro_metricas.reiniciar()
+    return {"ok": True}
+
+@router.get("/scheduler")
+def estado_programador(current_admin=Depends(get_current_admin)):
+    """Tareas programadas de este proceso: corridas, errores y próxima ejecución."""
+    return {"instancia": programador.id_instancia, "activo": settings.scheduler_activo, "tareas": programador.estado()}
+
+@router.post("/scheduler/{tarea}/ejecutar")
+def ejecutar_tarea(tarea: str, current_admin=Depends(get_current_admin)):
+    """Corre la tarea ahora (si este proceso obtiene el lease)."""
+    if tarea not in programador.tareas:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    espera = programador.ejecutar(tarea)
+    return {"ok": True, "segundos_hasta_proxima": espera}
+
+@router.get("/correos")
+def estado_cola_correos(session: Session = Depends(get_session), current_admin=Depends(get_current_admin)):
+    """Correos de la bandeja de salida por estado."""
+    return resumen_cola(session)
+
+@router.get("/caches")
+def estadisticas_caches(current_admin=Depends(get_current_admin)):
+    """Entradas, aciertos, fallos y ratio de aciertos de cada caché de este proceso."""
+    return [cache.estadisticas() for cache in caches_registradas.values()]
+
+@router.post("/caches/catalogo/vaciar")
+def vaciar_cache_catalogo(current_admin=Depends(get_current_admin)):
+    """Vacía el catálogo en caché (p. ej. tras editar la BD a mano)."""
+    limpiar_catalogo()
+    return {"ok": True}
+
+@router.get("/etag")
+def estadisticas_peticiones_condicionales(current_admin=Depends(get_current_admin)):
+    """Respuestas resueltas con 304 y bytes de cuerpo que no se enviaron gracias al ETag."""
+    return estadisticas_etag()
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index, LargeBinary, Text
+from sqlalchemy.dialects import mysql
+from sqlmodel import Field, SQLModel
+
+from app.core.db import columnas_diferidas
+
+
+class CorreoSaliente(SQLModel, table=True):
+    """Bandeja de salida: los endpoints solo insertan aquí y el worker envía."""
+    __tablename__ = "correo_saliente"  # type: ignore
+    __mapper_args__ = columnas_diferidas("adjunto")
+    __table_args__ = (
+        Index("ix_correo_saliente_estado_proximo", "estado", "proximo_intento"),
+    )
+
+    id_correo: Optional[int] = Field(default=None, primary_key=True)
+    destinatario: str = Field(max_length=255)
+    asunto: str = Field(max_length=255)
+    html: str = Field(sa_column=Column(Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=False))
+    adjunto_nombre: Optional[str] = Field(default=None, max_length=255)
+    adjunto: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary().with_variant(mysql.LONGBLOB(), "mysql")))
+    estado: int = 0  # 0 = pendiente, 1 = enviado, 2 = fallido (sin más reintentos)
+    intentos: int = 0
+    proximo_intento: datetime = Field(default_factory=datetime.utcnow)
+    bloqueado_hasta: Optional[datetime] = None  # reclamado por un worker hasta esta hora
+    procesado_por: Optional[str] = Field(default=None, max_length=100)
+    ultimo_error: Optional[str] = Field(default=None, max_length=500)
+    fecha_creacion: datetime = Field(default_factory=datetime.utcnow)
+    fecha_envio: Optional[datetime] = None
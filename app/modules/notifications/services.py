@@ -0,0 +1,204 @@
+"""
+Bandeja de salida de correos (outbox).
+
+Los endpoints llaman a encolar_correo(), que solo inserta una fila. El worker
+(app/modules/notifications/worker.py) reclama lotes de pendientes, los entrega al
+transporte configurado y reprograma los fallidos con backoff exponencial.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlmodel import Session, select
+
+from app.core.db import cargar_blobs, engine
+from app.core.logger import logger
+from app.modules.notifications.models import CorreoSaliente
+from app.modules.notifications.transportes import ErrorEnvioPermanente, Mensaje, Transporte
+
+EMAIL_LOTE = int(os.getenv("EMAIL_LOTE", "50"))                        # correos por lote
+EMAIL_MAX_INTENTOS = int(os.getenv("EMAIL_MAX_INTENTOS", "6"))
+EMAIL_BACKOFF_BASE = float(os.getenv("EMAIL_BACKOFF_BASE", "30"))      # segundos; se duplica por intento
+EMAIL_BACKOFF_MAX = float(os.getenv("EMAIL_BACKOFF_MAX", "3600"))
+EMAIL_TASA_MAX = float(os.getenv("EMAIL_TASA_MAX", "10"))              # correos por segundo (0 = sin límite)
+EMAIL_BLOQUEO_SEGUNDOS = int(os.getenv("EMAIL_BLOQUEO_SEGUNDOS", "300"))
+
+PENDIENTE, ENVIADO, FALLIDO = 0, 1, 2
+
+
+def encolar_correo(
+    destinatario: str,
+    asunto: str,
+    html: str,
+    adjunto_nombre: Optional[str] = None,
+    adjunto: Optional[bytes] = None,
+    session: Optional[Session] = None,
+) -> None:
+    """
+    Agrega un correo a la bandeja de salida. Con `session` el correo se guarda en la
+    misma transacción que el cambio que lo origina (el commit lo hace quien llama).
+    """
+    correo = CorreoSaliente(
+        destinatario=destinatario, asunto=asunto, html=html,
+        adjunto_nombre=adjunto_nombre, adjunto=adjunto,
+    )
+    if session is not None:
+        session.add(correo)
+        return
+    with Session(engine) as propia:
+        propia.add(correo)
+        propia.commit()
+        logger.debug(f"Correo encolado para {destinatario}: {asunto}", extra={"id_correo": correo.id_correo})
+
+
+def calcular_backoff(intentos: int) -> float:
+    return min(EMAIL_BACKOFF_BASE * (2 ** max(intentos - 1, 0)), EMAIL_BACKOFF_MAX)
+
+
+def reclamar_lote(session: Session, propietario: str, tamano: int = EMAIL_LOTE, ahora: Optional[datetime] = None) -> List[CorreoSaliente]:
+    """
+    Marca hasta `tamano` correos pendientes como tomados por `propietario` durante
+    EMAIL_BLOQUEO_SEGUNDOS y los devuelve. Varios workers pueden reclamar a la vez:
+    el UPDATE condicionado evita que dos se queden con el mismo correo.
+    """
+    ahora = ahora or datetime.utcnow()
+    disponible = (
+        CorreoSaliente.estado == PENDIENTE,
+        CorreoSaliente.proximo_intento <= ahora,
+        or_(CorreoSaliente.bloqueado_hasta.is_(None), CorreoSaliente.bloqueado_hasta < ahora),  # type: ignore
+    )
+    ids = session.exec(
+        select(CorreoSaliente.id_correo)
+        .where(*disponible)
+        .order_by(CorreoSaliente.proximo_intento, CorreoSaliente.id_correo)
+        .limit(tamano)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        session.commit()
+        return []
+
+    session.exec(
+        update(CorreoSaliente)
+        .where(CorreoSaliente.id_correo.in_(ids), *disponible)  # type: ignore
+        .values(procesado_por=propietario, bloqueado_hasta=ahora + timedelta(seconds=EMAIL_BLOQUEO_SEGUNDOS))
+    )
+    session.commit()
+    return list(session.exec(
+        select(CorreoSaliente)
+        .options(cargar_blobs())
+        .where(CorreoSaliente.id_correo.in_(ids), CorreoSaliente.procesado_por == propietario)  # type: ignore
+        .order_by(CorreoSaliente.id_correo)
+    ).all())
+
+
+class LimitadorTasa:
+    """Token bucket: como máximo `por_segundo` envíos por segundo (ráfagas de hasta `por_segundo`)."""
+
+    def __init__(self, por_segundo: float):
+        self.por_segundo = por_segundo
+        self._fichas = por_segundo
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self, cantidad: int = 1) -> None:
+        if self.por_segundo <= 0:
+            return
+        with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self._fichas = min(self.por_segundo, self._fichas + (ahora - self._ultimo) * self.por_segundo)
+                self._ultimo = ahora
+                if self._fichas >= cantidad:
+                    self._fichas -= cantidad
+                    return
+                time.sleep((cantidad - self._fichas) / self.por_segundo)
+
+
+def procesar_lote(
+    transporte: Transporte,
+    propietario: str,
+    limitador: Optional[LimitadorTasa] = None,
+    tamano: int = EMAIL_LOTE,
+) -> Dict[str, int]:
+    """Reclama un lote, lo envía respetando la tasa y guarda el resultado de cada correo."""
+    with Session(engine) as session:
+        correos = reclamar_lote(session, propietario, tamano)
+        if not correos:
+            return {"enviados": 0, "reintentos": 0, "fallidos": 0}
+
+        mensajes = [
+            Mensaje(c.id_correo, c.destinatario, c.asunto, c.html, c.adjunto_nombre, c.adjunto)  # type: ignore[arg-type]
+            for c in correos
+        ]
+        # Sin transacción abierta ni conexión tomada mientras se habla con el proveedor
+        session.expunge_all()
+        session.rollback()
+
+        resultados: List[Optional[Exception]] = []
+        # Sub-lotes del tamaño de la tasa, para no exceder el límite por segundo
+        paso = max(int(limitador.por_segundo), 1) if limitador and limitador.por_segundo > 0 else len(mensajes)
+        for inicio in range(0, len(mensajes), paso):
+            parte = mensajes[inicio:inicio + paso]
+            if limitador:
+                limitador.esperar(len(parte))
+            try:
+                resultados.extend(transporte.enviar_lote(parte))
+            except Exception as e:
+                # Falló el lote completo (p. ej. no hubo conexión SMTP)
+                resultados.extend([e] * len(parte))
+
+        ahora = datetime.utcnow()
+        conteo = {"enviados": 0, "reintentos": 0, "fallidos": 0}
+        for correo, error in zip(correos, resultados):
+            session.add(correo)
+            correo.bloqueado_hasta = None
+            if error is None:
+                correo.estado = ENVIADO
+                correo.fecha_envio = ahora
+                correo.ultimo_error = None
+                conteo["enviados"] += 1
+                continue
+
+            correo.intentos += 1
+            correo.ultimo_error = f"{type(error).__name__}: {error}"[:500]
+            if isinstance(error, ErrorEnvioPermanente) or correo.intentos >= EMAIL_MAX_INTENTOS:
+                correo.estado = FALLIDO
+                conteo["fallidos"] += 1
+                logger.error(
+                    f"Correo {correo.id_correo} descartado tras {correo.intentos} intentos: {correo.ultimo_error}",
+                    extra={"id_correo": correo.id_correo},
+                )
+            else:
+                correo.proximo_intento = ahora + timedelta(seconds=calcular_backoff(correo.intentos))
+                conteo["reintentos"] += 1
+                logger.warning(
+                    f"Correo {correo.id_correo} reprogramado (intento {correo.intentos}): {correo.ultimo_error}",
+                    extra={"id_correo": correo.id_correo},
+                )
+        session.commit()
+
+    logger.info("Lote de correos procesado", extra={"transporte": transporte.nombre, **conteo})
+    return conteo
+
+
+def resumen_cola(session: Session) -> Dict[str, int]:
+    """Cantidad de correos por estado y cuántos pendientes ya deberían haber salido."""
+    por_estado = dict(session.exec(
+        select(CorreoSaliente.estado, func.count()).group_by(CorreoSaliente.estado)
+    ).all())
+    vencidos = session.exec(
+        select(func.count()).where(
+            CorreoSaliente.estado == PENDIENTE,
+            CorreoSaliente.proximo_intento <= datetime.utcnow(),
+        )
+    ).one()
+    return {
+        "pendientes": por_estado.get(PENDIENTE, 0),
+        "enviados": por_estado.get(ENVIADO, 0),
+        "fallidos": por_estado.get(FALLIDO, 0),
+        "pendientes_vencidos": vencidos,
+    }
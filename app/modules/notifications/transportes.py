@@ -0,0 +1,169 @@
+"""
+Transportes de correo. El worker entrega los mensajes de un lote al transporte
+configurado con EMAIL_TRANSPORTE:
+
+- "brevo"   API transaccional de Brevo (por defecto)
+- "smtp"    servidor SMTP (una sola conexión por lote)
+- "archivo" escribe cada mensaje como JSON en EMAIL_CARPETA_SALIDA (desarrollo y pruebas)
+"""
+import base64
+import json
+import os
+import smtplib
+import ssl
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from typing import List, Optional
+
+EMAIL_FROM = os.getenv("EMAIL_FROM")
+EMAIL_FROM_NOMBRE = os.getenv("EMAIL_FROM_NOMBRE", "CommuConnect")
+
+
+class ErrorEnvioPermanente(Exception):
+    """El proveedor rechazó el mensaje (dirección inválida, contenido, ...): no se reintenta."""
+
+
+@dataclass
+class Mensaje:
+    id_correo: int
+    destinatario: str
+    asunto: str
+    html: str
+    adjunto_nombre: Optional[str] = None
+    adjunto: Optional[bytes] = None
+
+
+class Transporte(ABC):
+    nombre = "base"
+
+    def enviar_lote(self, mensajes: List[Mensaje]) -> List[Optional[Exception]]:
+        """Envía los mensajes y devuelve, en el mismo orden, None o el error de cada uno."""
+        resultados: List[Optional[Exception]] = []
+        for mensaje in mensajes:
+            try:
+                self.enviar(mensaje)
+                resultados.append(None)
+            except Exception as e:
+                resultados.append(e)
+        return resultados
+
+    @abstractmethod
+    def enviar(self, mensaje: Mensaje) -> None:
+        """Envía un mensaje; lanza ErrorEnvioPermanente si no tiene sentido reintentarlo."""
+
+
+class TransporteBrevo(Transporte):
+    nombre = "brevo"
+
+    def __init__(self, api_key: Optional[str] = None):
+        import sib_api_v3_sdk as brevo
+
+        self._brevo = brevo
+        cfg = brevo.Configuration()
+        cfg.api_key["api-key"] = api_key or os.getenv("BREVO_API_KEY")
+        self._api = brevo.TransactionalEmailsApi(brevo.ApiClient(cfg))
+
+    def enviar(self, mensaje: Mensaje) -> None:
+        extra = {}
+        if mensaje.adjunto is not None:
+            extra["attachment"] = [{
+                "content": base64.b64encode(mensaje.adjunto).decode(),
+                "name": mensaje.adjunto_nombre,
+            }]
+        email = self._brevo.SendSmtpEmail(
+            sender={"email": EMAIL_FROM, "name": EMAIL_FROM_NOMBRE},
+            to=[{"email": mensaje.destinatario}],
+            subject=mensaje.asunto,
+            html_content=mensaje.html,
+            **extra,
+        )
+        try:
+            self._api.send_transac_email(email)
+        except self._brevo.rest.ApiException as e:
+            # 4xx (salvo 429) es un rechazo del mensaje; 429 y 5xx se reintentan
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                raise ErrorEnvioPermanente(f"Brevo {e.status}: {e.reason}") from e
+            raise
+
+
+class TransporteSMTP(Transporte):
+    nombre = "smtp"
+
+    def __init__(self):
+        self.host = os.getenv("SMTP_HOST", "localhost")
+        self.puerto = int(os.getenv("SMTP_PORT", "587"))
+        self.usuario = os.getenv("SMTP_USER")
+        self.password = os.getenv("SMTP_PASSWORD")
+        self.starttls = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes", "si", "sí")
+
+    def _construir(self, mensaje: Mensaje) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = f"{EMAIL_FROM_NOMBRE} <{EMAIL_FROM}>"
+        email["To"] = mensaje.destinatario
+        email["Subject"] = mensaje.asunto
+        email.set_content("Este mensaje requiere un cliente de correo con soporte HTML.")
+        email.add_alternative(mensaje.html, subtype="html")
+        if mensaje.adjunto is not None:
+            email.add_attachment(
+                mensaje.adjunto, maintype="application", subtype="octet-stream",
+                filename=mensaje.adjunto_nombre or "adjunto",
+            )
+        return email
+
+    def enviar(self, mensaje: Mensaje) -> None:
+        error = self.enviar_lote([mensaje])[0]
+        if error is not None:
+            raise error
+
+    def enviar_lote(self, mensajes: List[Mensaje]) -> List[Optional[Exception]]:
+        # Una conexión para todo el lote
+        with smtplib.SMTP(self.host, self.puerto, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.usuario:
+                smtp.login(self.usuario, self.password or "")
+            resultados: List[Optional[Exception]] = []
+            for mensaje in mensajes:
+                try:
+                    smtp.send_message(self._construir(mensaje))
+                    resultados.append(None)
+                except smtplib.SMTPRecipientsRefused as e:
+                    resultados.append(ErrorEnvioPermanente(str(e.recipients)))
+                except Exception as e:
+                    resultados.append(e)
+            return resultados
+
+
+class TransporteArchivo(Transporte):
+    nombre = "archivo"
+
+    def __init__(self, carpeta: Optional[str] = None):
+        self.carpeta = carpeta or os.getenv("EMAIL_CARPETA_SALIDA", "logs/correos")
+        os.makedirs(self.carpeta, exist_ok=True)
+
+    def enviar(self, mensaje: Mensaje) -> None:
+        datos = {
+            "id_correo": mensaje.id_correo,
+            "destinatario": mensaje.destinatario,
+            "asunto": mensaje.asunto,
+            "html": mensaje.html,
+            "adjunto_nombre": mensaje.adjunto_nombre,
+            "adjunto_bytes": len(mensaje.adjunto) if mensaje.adjunto is not None else None,
+            "enviado": datetime.utcnow().isoformat(),
+        }
+        ruta = os.path.join(self.carpeta, f"{mensaje.id_correo}-{uuid.uuid4().hex[:8]}.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+
+
+TRANSPORTES = {t.nombre: t for t in (TransporteBrevo, TransporteSMTP, TransporteArchivo)}
+
+
+def crear_transporte(nombre: Optional[str] = None) -> Transporte:
+    nombre = (nombre or os.getenv("EMAIL_TRANSPORTE", "brevo")).lower()
+    if nombre not in TRANSPORTES:
+        raise RuntimeError(f"EMAIL_TRANSPORTE inválido: '{nombre}' (use {', '.join(TRANSPORTES)})")
+    return TRANSPORTES[nombre]()
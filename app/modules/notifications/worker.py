@@ -0,0 +1,46 @@
+"""
+Worker de la bandeja de salida de correos.
+
+Uso (proceso aparte, ver Procfile):
+    python -m app.modules.notifications.worker
+
+Variables: EMAIL_TRANSPORTE, EMAIL_LOTE, EMAIL_TASA_MAX, EMAIL_MAX_INTENTOS,
+EMAIL_BACKOFF_BASE, EMAIL_WORKER_ESPERA (segundos entre sondeos con la cola vacía).
+"""
+import os
+import signal
+import socket
+import threading
+import uuid
+
+from app.core.logger import logger
+from app.modules.notifications.services import EMAIL_TASA_MAX, LimitadorTasa, procesar_lote
+from app.modules.notifications.transportes import crear_transporte
+
+EMAIL_WORKER_ESPERA = float(os.getenv("EMAIL_WORKER_ESPERA", "5"))
+
+
+def ejecutar_worker(detener: threading.Event) -> None:
+    propietario = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    transporte = crear_transporte()
+    limitador = LimitadorTasa(EMAIL_TASA_MAX)
+    logger.info(f"Worker de correos iniciado ({propietario}, transporte {transporte.nombre})")
+
+    while not detener.is_set():
+        try:
+            conteo = procesar_lote(transporte, propietario, limitador)
+        except Exception:
+            logger.exception("Error procesando el lote de correos")
+            conteo = None
+        # Cola vacía o error: esperar antes de volver a sondear; si hubo trabajo, seguir
+        if not conteo or not any(conteo.values()):
+            detener.wait(EMAIL_WORKER_ESPERA)
+
+    logger.info("Worker de correos detenido")
+
+
+if __name__ == "__main__":
+    evento = threading.Event()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(senal, lambda *_: evento.set())
+    ejecutar_worker(evento)
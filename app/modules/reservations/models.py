@@ -1,9 +1,14 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
+from app.core.db import columnas_diferidas
 
 class Sesion(SQLModel, table=True):
     __tablename__ = "sesion"
+    __table_args__ = (
+        Index("ix_sesion_servicio_tipo_inicio", "id_servicio", "tipo", "inicio"),
+    )
     id_sesion: Optional[int] = Field(default=None, primary_key=True)
     id_servicio: Optional[int] = Field(foreign_key="servicio.id_servicio")
 
@@ -24,6 +29,9 @@ class Sesion(SQLModel, table=True):
 
 class SesionVirtual(SQLModel, table=True):
     __tablename__ = "sesion_virtual"
+    __table_args__ = (
+        Index("ix_sesion_virtual_profesional", "id_profesional"),
+    )
     id_sesion_virtual: Optional[int] = Field(default=None, primary_key=True)
     id_sesion: int = Field(foreign_key="sesion.id_sesion")
     id_profesional: int = Field(foreign_key="profesional.id_profesional")
@@ -45,6 +53,7 @@ class SesionPresencial(SQLModel, table=True):
     id_sesion: Optional[int] = Field(foreign_key="sesion.id_sesion")
     id_local: Optional[int] = Field(foreign_key="local.id_local")
     capacidad: Optional[int] = None
+    reservas_confirmadas: int = Field(default=0)  # Contador mantenido al reservar/cancelar
 
     fecha_creacion: Optional[datetime] = Field(default_factory=datetime.utcnow)
     creado_por: Optional[str] = Field(default=None, max_length=50)
@@ -58,6 +67,11 @@ class SesionPresencial(SQLModel, table=True):
 
 class Reserva(SQLModel, table=True):
     __tablename__ = "reserva"
+    __mapper_args__ = columnas_diferidas("archivo")
+    __table_args__ = (
+        Index("ix_reserva_sesion_estado", "id_sesion", "estado_reserva"),
+        Index("ix_reserva_cliente_estado", "id_cliente", "estado_reserva"),
+    )
 
     id_reserva: Optional[int] = Field(default=None, primary_key=True)
     id_sesion:   Optional[int] = Field(default=None, foreign_key="sesion.id_sesion")
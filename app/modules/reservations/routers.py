@@ -4,38 +4,43 @@ from fastapi import HTTPException, File, UploadFile
 from fastapi import APIRouter, Depends, Query, HTTPException, status, Path as FastPath
 from sqlmodel import Session, select
 from sqlalchemy.orm import joinedload
-from app.core.db import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.db import get_async_session, get_session, usa_db_async
 from app.modules.services.models import Local
 from app.modules.reservations.services import (
     obtener_fechas_presenciales, obtener_horas_presenciales, listar_sesiones_presenciales_detalladas,
     obtener_fechas_inicio_por_profesional, existe_reserva_para_usuario, obtener_resumen_reserva_presencial, 
     crear_reserva_presencial, listar_reservas_usuario_comunidad_semana, get_reservation_details, 
     cancelar_reserva_por_id, obtener_url_archivo_virtual, 
-    obtener_info_formulario, completar_formulario_virtual,cancelar_reserva_virtual_por_id
+    obtener_info_formulario, completar_formulario_virtual,cancelar_reserva_virtual_por_id,
+    calcular_disponibilidad, reconciliar_contadores_reservas,
+    calcular_disponibilidad_async, listar_reservas_cliente_comunidad_semana_async
 )
 from app.modules.reservations.schemas import (
     FechasPresencialesResponse, HorasPresencialesResponse, ListaSesionesPresencialesResponse, 
     ReservaPresencialSummary, ReservaRequest, ListaReservasComunidadResponse, 
     ReservaComunidadResponse, ReservaDetailScreenResponse, ReservaResponse, FormularioInfoResponse,
-    ReservaCreate, ReservaPresencialCreadaResponse
+    ReservaCreate, ReservaPresencialCreadaResponse, DisponibilidadSesionOut
 )
-from app.modules.auth.dependencies import get_current_user, get_current_cliente_id
+from app.modules.auth.dependencies import get_current_user, get_current_cliente_id, get_current_principal
+from app.modules.auth.services import Principal
 from app.modules.reservations.models import  SesionVirtual, Sesion
 from app.modules.services.models import  Servicio
 from app.modules.users.models import Usuario
-from fastapi import BackgroundTasks
 from app.modules.billing.services import obtener_inscripcion_activa, es_plan_con_topes
 from utils.datetime_utils import convert_utc_to_local
 from app.modules.users.services import obtener_cliente_desde_usuario
 from app.modules.services.models import Profesional
-from app.modules.reservations.services import procesar_archivo_sesiones_virtuales
+from app.core.importacion import respuesta_trabajo
+from app.modules.reservations.services import encolar_archivo_sesiones_virtuales
 from app.modules.users.dependencies import get_current_admin
 from app.modules.reservations.services import crear_reserva_virtual_con_validaciones
 from app.modules.reservations.services import obtener_resumen_reserva_virtual
 from app.modules.reservations.schemas import ReservaVirtualSummary
-import traceback
+from app.core.logger import logger
+from app.core.instrumentacion import RutaInstrumentada
 
-router = APIRouter()
+router = APIRouter(route_class=RutaInstrumentada)
 
 @router.get(
     "/fechas-presenciales",
@@ -159,6 +164,39 @@ def sesiones_presenciales_detalladas(
 
     return ListaSesionesPresencialesResponse(sesiones=filas)
 
+def disponibilidad_sesiones(
+    *,
+    ids: List[int] = Query(..., description="IDs de sesión (p.ej. ?ids=1&ids=2)"),
+    session: Session = Depends(get_session),
+):
+    """
+    Calcula la disponibilidad de todas las sesiones pedidas con una sola consulta agrupada.
+    Las sesiones que no existen no se incluyen en la respuesta.
+    """
+    disponibilidad = calcular_disponibilidad(session, ids)
+    return [disponibilidad[i] for i in dict.fromkeys(ids) if i in disponibilidad]
+
+async def disponibilidad_sesiones_async(
+    *,
+    ids: List[int] = Query(..., description="IDs de sesión (p.ej. ?ids=1&ids=2)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Calcula la disponibilidad de todas las sesiones pedidas con una sola consulta agrupada.
+    Las sesiones que no existen no se incluyen en la respuesta.
+    """
+    disponibilidad = await calcular_disponibilidad_async(session, ids)
+    return [disponibilidad[i] for i in dict.fromkeys(ids) if i in disponibilidad]
+
+# Con ASYNC_DB_ROUTERS=reservations la disponibilidad se atiende con el motor async
+router.add_api_route(
+    "/disponibilidad",
+    disponibilidad_sesiones_async if usa_db_async("reservations") else disponibilidad_sesiones,
+    methods=["GET"],
+    response_model=List[DisponibilidadSesionOut],
+    summary="Reservas confirmadas y vacantes libres de varias sesiones",
+)
+
 @router.get("/fechas-sesiones_virtuales_por_profesional/{id_profesional}")
 def get_fechas_sesiones(id_profesional: int, session: Session = Depends(get_session)):
     try:
@@ -170,7 +208,7 @@ def get_fechas_sesiones(id_profesional: int, session: Session = Depends(get_sess
         return {"fechas_inicio": fechas}
 
     except Exception as e:
-        print(f"Error inesperado: {e}")
+        logger.error(f"Error inesperado: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor.")
 
 @router.get("/reserva-existe/{id_sesion}")
@@ -184,7 +222,7 @@ def verificar_reserva(
         existe = existe_reserva_para_usuario(db, id_sesion, id_usuario)
         return {"reserva_existente": existe}
     except Exception as e:
-        print(f"Error al verificar reserva: {e}")
+        logger.error(f"Error al verificar reserva: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor.")
 
 @router.post(
@@ -195,7 +233,6 @@ def verificar_reserva(
 )
 def create_reserva_virtual(
     reserva_in: ReservaCreate,
-    bg_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     cliente_id: int = Depends(get_current_cliente_id),
     usuario: Usuario = Depends(get_current_user)
@@ -212,7 +249,6 @@ def create_reserva_virtual(
             cliente_id=cliente_id,
             usuario_id=usuario.id_usuario,
             id_comunidad=reserva_in.id_comunidad,
-            bg_tasks=bg_tasks
         )
         # 2. Confirmamos transacción
         session.commit()
@@ -241,8 +277,7 @@ def create_reserva_virtual(
 
     except Exception as e:
         session.rollback()
-        print("❌ Error inesperado en create_reserva_virtual:")
-        traceback.print_exc()
+        logger.exception("❌ Error inesperado en create_reserva_virtual")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno al crear la reserva: {str(e)}"
@@ -282,7 +317,6 @@ def create_reserva_presencial(
     reserva_in: ReservaRequest,
     session: Session = Depends(get_session),
     current_user: Usuario = Depends(get_current_user),
-    bg_tasks: BackgroundTasks,
 ):
     """
     Crea una nueva reserva para una sesión presencial.
@@ -293,7 +327,6 @@ def create_reserva_presencial(
         db=session,
         id_sesion=reserva_in.id_sesion,
         id_usuario=current_user.id_usuario,
-        bg_tasks=bg_tasks
     )
 
     if error:
@@ -301,35 +334,7 @@ def create_reserva_presencial(
 
     return response
 
-@router.get(
-    "/by-user-community",
-    response_model=ListaReservasComunidadResponse,
-    summary="Listar reservas de un usuario en una comunidad para los siguientes 7 dias",
-)
-
-
-def list_reservations_by_user_community(
-    *,
-    id_comunidad: int = Query(..., description="ID de la comunidad a filtrar"),
-    fecha: str = Query(..., description="Fecha de inicio en formato DD/MM/YYYY"),
-    session: Session = Depends(get_session),
-    current_user: Usuario = Depends(get_current_user),
-):
-    try:
-        fecha_obj = datetime.strptime(fecha, "%d/%m/%Y").date()
-    except ValueError:
-        raise HTTPException(
-            status_code=400,
-            detail="Formato inválido para 'fecha'. Debe ser DD/MM/YYYY."
-        )
-
-    reservas_data = listar_reservas_usuario_comunidad_semana(
-        db=session, 
-        id_usuario=current_user.id_usuario, 
-        id_comunidad=id_comunidad, 
-        fecha=fecha_obj
-    )
-    
+def _armar_lista_reservas_comunidad(reservas_data) -> ListaReservasComunidadResponse:
     response_reservas = []
     for reserva in reservas_data:
         local_inicio = convert_utc_to_local(reserva.inicio)
@@ -347,6 +352,59 @@ def list_reservations_by_user_community(
     
     return ListaReservasComunidadResponse(reservas=response_reservas)
 
+def _parsear_fecha_semana(fecha: str) -> date:
+    try:
+        return datetime.strptime(fecha, "%d/%m/%Y").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Formato inválido para 'fecha'. Debe ser DD/MM/YYYY."
+        )
+
+def list_reservations_by_user_community(
+    *,
+    id_comunidad: int = Query(..., description="ID de la comunidad a filtrar"),
+    fecha: str = Query(..., description="Fecha de inicio en formato DD/MM/YYYY"),
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user),
+):
+    fecha_obj = _parsear_fecha_semana(fecha)
+
+    reservas_data = listar_reservas_usuario_comunidad_semana(
+        db=session, 
+        id_usuario=current_user.id_usuario, 
+        id_comunidad=id_comunidad, 
+        fecha=fecha_obj
+    )
+    return _armar_lista_reservas_comunidad(reservas_data)
+
+async def list_reservations_by_user_community_async(
+    *,
+    id_comunidad: int = Query(..., description="ID de la comunidad a filtrar"),
+    fecha: str = Query(..., description="Fecha de inicio en formato DD/MM/YYYY"),
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    fecha_obj = _parsear_fecha_semana(fecha)
+    if principal.id_cliente is None:
+        return ListaReservasComunidadResponse(reservas=[])
+
+    reservas_data = await listar_reservas_cliente_comunidad_semana_async(
+        db=session,
+        id_cliente=principal.id_cliente,
+        id_comunidad=id_comunidad,
+        fecha=fecha_obj
+    )
+    return _armar_lista_reservas_comunidad(reservas_data)
+
+router.add_api_route(
+    "/by-user-community",
+    list_reservations_by_user_community_async if usa_db_async("reservations") else list_reservations_by_user_community,
+    methods=["GET"],
+    response_model=ListaReservasComunidadResponse,
+    summary="Listar reservas de un usuario en una comunidad para los siguientes 7 dias",
+)
+
 @router.get(
     "/{id_reserva}/details",
     response_model=ReservaDetailScreenResponse,
@@ -406,7 +464,6 @@ def get_info_formulario(
 @router.post("/formulario/{id_sesion}/enviar")
 async def enviar_formulario(
     id_sesion: int,
-    bg_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
     current_user: Usuario = Depends(get_current_user)
@@ -441,30 +498,27 @@ async def enviar_formulario(
         id_sesion=id_sesion,
         cliente_id=cliente_id,
         file=file,
-        bg_tasks=bg_tasks,
         profesional_email=profesional.email,
         profesional_nombre=profesional.nombre_completo,
         cliente_nombre=cliente_nombre
     )
 
-@router.post("/carga-masiva")
+@router.post("/admin/reconciliar-contadores")
+def reconciliar_contadores(
+    db: Session = Depends(get_session),
+    current_admin = Depends(get_current_admin)
+):
+    """Corrige `reservas_confirmadas` de las sesiones presenciales que se desfasaron."""
+    corregidas = reconciliar_contadores_reservas(db)
+    return {"sesiones_corregidas": corregidas}
+
+@router.post("/carga-masiva", status_code=202)
 def carga_masiva_sesiones_virtuales(
     archivo: UploadFile = File(...),
-    db: Session = Depends(get_session),
     current_admin: Usuario = Depends(get_current_admin)
 ):
-    try:
-        resultado = procesar_archivo_sesiones_virtuales(db, archivo, current_admin.email)
-    except Exception as e:
-        resultado = {
-            "insertados": 0,
-            "errores": [f"Error general: {str(e)}"]
-        }
-
-    return {
-        "mensaje": "Carga masiva de sesiones virtuales completada (con errores)" if resultado["errores"] else "Carga exitosa.",
-        "resumen": resultado
-    }
+    """Encola la carga; el avance y el resumen se consultan en /api/importaciones/{id_trabajo}."""
+    return respuesta_trabajo(encolar_archivo_sesiones_virtuales(archivo, current_admin.email))
 
 
 @router.get(
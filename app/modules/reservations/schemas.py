@@ -31,6 +31,14 @@ class SesionPresencialOut(BaseModel):
     )
 
 
+class DisponibilidadSesionOut(BaseModel):
+    id_sesion: int
+    capacidad: Optional[int] = None      # Solo sesiones presenciales
+    reservas_confirmadas: int
+    total_reservas: int                  # Incluye pendientes y canceladas
+    vacantes_libres: Optional[int] = None
+
+
 class ListaSesionesPresencialesResponse(BaseModel):
     sesiones: List[SesionPresencialOut]
     model_config = ConfigDict(from_attributes=True)
@@ -1,46 +1,42 @@
 from datetime import date, datetime, time, timedelta, timezone
 from typing import List, Optional
 from sqlmodel import Session, select, update
-from sqlalchemy import func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import case, func
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.exc import IntegrityError
 import pytz
 import pandas as pd
-import numpy as np
-from fastapi import BackgroundTasks, HTTPException, UploadFile
+from fastapi import HTTPException, UploadFile
 
 from app.modules.billing.models import DetalleInscripcion
 from app.modules.billing.services import (
+    _consulta_inscripcion_activa,
     obtener_inscripcion_activa, 
     es_plan_con_topes
 )
 from app.modules.reservations.models import Reserva, Sesion, SesionPresencial, SesionVirtual
-from app.modules.reservations.schemas import FormularioInfoResponse
+from app.modules.reservations.schemas import DisponibilidadSesionOut, FormularioInfoResponse
 from app.modules.services.models import ComunidadXServicio, Local, Profesional, Servicio
 from app.modules.users.models import Cliente, Usuario
 from utils.datetime_utils import convert_local_to_utc, convert_utc_to_local
+from app.core.importacion import Agenda, Importador, como_fecha_hora, como_numero, como_texto, ejecutar_importador, en_bloques, encolar_importacion, local_a_utc, valor
+from app.core.logger import logger
 from utils.email_brevo import send_form_email, send_reservation_cancel_email, send_reservation_email
+from utils.email_templates import ContextoCancelacionReserva, ContextoFormulario, ContextoReserva
 
-from app.modules.reservations.schemas import SesionCargaMasiva
-from pydantic import ValidationError
 
 from datetime import datetime, timezone
-from io import BytesIO
 
 
 from app.modules.billing.models import Inscripcion, Plan
 from typing import Tuple, Optional
-from fastapi import BackgroundTasks
 
 
 
-def listar_reservas_usuario_comunidad_semana(db: Session, id_usuario: int, id_comunidad: int, fecha: date):
+def _consulta_reservas_comunidad_semana(id_cliente: int, id_comunidad: int, fecha: date):
     end_date = fecha + timedelta(days=7)
 
-    cliente = db.exec(select(Cliente).where(Cliente.id_usuario == id_usuario)).first()
-    if not cliente:
-        return []
-
     # ✅ CORREGIDO: Convertir fechas locales a rangos UTC para filtrar correctamente
     start_of_period_local = datetime.combine(fecha, time.min)
     end_of_period_local = datetime.combine(end_date, time.min)
@@ -48,7 +44,7 @@ def listar_reservas_usuario_comunidad_semana(db: Session, id_usuario: int, id_co
     start_of_period_utc = convert_local_to_utc(start_of_period_local)
     end_of_period_utc = convert_local_to_utc(end_of_period_local)
 
-    stmt = (
+    return (
         select(
             Reserva.id_reserva,
             Servicio.nombre.label("nombre_servicio"),
@@ -58,17 +54,41 @@ def listar_reservas_usuario_comunidad_semana(db: Session, id_usuario: int, id_co
         .join(Sesion, Reserva.id_sesion == Sesion.id_sesion)
         .join(Servicio, Sesion.id_servicio == Servicio.id_servicio)
         .join(ComunidadXServicio, Servicio.id_servicio == ComunidadXServicio.id_servicio)
-        .where(Reserva.id_cliente == cliente.id_cliente)
+        .where(Reserva.id_cliente == id_cliente)
         .where(ComunidadXServicio.id_comunidad == id_comunidad)
         .where(ComunidadXServicio.estado == 1)
         .where(Sesion.inicio >= start_of_period_utc)  # ✅ CORREGIDO: Filtrar con rango UTC
         .where(Sesion.inicio < end_of_period_utc)     # ✅ CORREGIDO: Filtrar con rango UTC
         .where(Reserva.estado_reserva.in_(['confirmada', 'formulario_pendiente']))
     )
-    
-    reservas = db.exec(stmt).all()
+
+def listar_reservas_usuario_comunidad_semana(db: Session, id_usuario: int, id_comunidad: int, fecha: date):
+    cliente = db.exec(select(Cliente).where(Cliente.id_usuario == id_usuario)).first()
+    if not cliente:
+        return []
+
+    reservas = db.exec(_consulta_reservas_comunidad_semana(cliente.id_cliente, id_comunidad, fecha)).all()
     return reservas
 
+async def listar_reservas_cliente_comunidad_semana_async(db: AsyncSession, id_cliente: int, id_comunidad: int, fecha: date):
+    """Variante async: recibe directamente el id_cliente (ya resuelto por el principal)."""
+    resultado = await db.exec(_consulta_reservas_comunidad_semana(id_cliente, id_comunidad, fecha))
+    return resultado.all()
+
+def _consulta_fechas_presenciales(id_servicio: int, id_distrito: int, id_local: int):
+    return (
+        select(Sesion.inicio)  # ✅ CORREGIDO: Obtener datetime completo UTC
+        .join(SesionPresencial, SesionPresencial.id_sesion == Sesion.id_sesion)
+        .join(Local, Local.id_local == SesionPresencial.id_local)
+        .where(
+            Sesion.id_servicio == id_servicio,
+            Sesion.tipo == "Presencial",
+            SesionPresencial.id_local == id_local,
+            Local.id_distrito == id_distrito,
+        )
+        .distinct()
+    )
+
 def obtener_fechas_presenciales(
     session: Session,
     id_servicio: int,
@@ -92,20 +112,7 @@ def obtener_fechas_presenciales(
         return []  # o podrías lanzar una excepción custom aquí
 
     # 2) Construir la consulta - OBTENER DATETIME COMPLETO para conversión
-    stmt = (
-        select(Sesion.inicio)  # ✅ CORREGIDO: Obtener datetime completo UTC
-        .join(SesionPresencial, SesionPresencial.id_sesion == Sesion.id_sesion)
-        .join(Local, Local.id_local == SesionPresencial.id_local)
-        .where(
-            Sesion.id_servicio == id_servicio,
-            Sesion.tipo == "Presencial",
-            SesionPresencial.id_local == id_local,
-            Local.id_distrito == id_distrito,
-        )
-        .distinct()
-    )
-
-    raw_results = session.exec(stmt).all()
+    raw_results = session.exec(_consulta_fechas_presenciales(id_servicio, id_distrito, id_local)).all()
     
     # 3) ✅ CORREGIDO: Convertir UTC a hora local y extraer fechas únicas
     fechas_locales = set()
@@ -182,6 +189,54 @@ def obtener_horas_presenciales(
 
     return horas_locales
 
+def _consulta_disponibilidad(ids: List[int]):
+    confirmadas = func.coalesce(
+        func.sum(case((Reserva.estado_reserva == "confirmada", 1), else_=0)), 0
+    )
+    return (
+        select(
+            Sesion.id_sesion,
+            SesionPresencial.capacidad,
+            confirmadas.label("confirmadas"),
+            func.count(Reserva.id_reserva).label("total"),
+        )
+        .outerjoin(SesionPresencial, SesionPresencial.id_sesion == Sesion.id_sesion)
+        .outerjoin(Reserva, Reserva.id_sesion == Sesion.id_sesion)
+        .where(Sesion.id_sesion.in_(ids)) # type: ignore
+        .group_by(Sesion.id_sesion, SesionPresencial.capacidad)
+    )
+
+def _armar_disponibilidad(filas) -> dict[int, DisponibilidadSesionOut]:
+    disponibilidad = {}
+    for id_ses, capacidad, total_confirmadas, total in filas:
+        total_confirmadas = int(total_confirmadas)
+        disponibilidad[id_ses] = DisponibilidadSesionOut(
+            id_sesion=id_ses,
+            capacidad=capacidad,
+            reservas_confirmadas=total_confirmadas,
+            total_reservas=total,
+            vacantes_libres=capacidad - total_confirmadas if capacidad is not None else None,
+        )
+    return disponibilidad
+
+def calcular_disponibilidad(db: Session, ids_sesion: List[int]) -> dict[int, DisponibilidadSesionOut]:
+    """
+    Calcula reservas confirmadas, total de reservas y vacantes libres de un conjunto
+    de sesiones en una sola consulta agrupada. Devuelve un dict indexado por id_sesion.
+    """
+    ids = list({i for i in ids_sesion if i is not None})
+    if not ids:
+        return {}
+    return _armar_disponibilidad(db.exec(_consulta_disponibilidad(ids)).all())
+
+async def calcular_disponibilidad_async(db: AsyncSession, ids_sesion: List[int]) -> dict[int, DisponibilidadSesionOut]:
+    """Igual que `calcular_disponibilidad`, con el motor async."""
+    ids = list({i for i in ids_sesion if i is not None})
+    if not ids:
+        return {}
+    resultado = await db.exec(_consulta_disponibilidad(ids))
+    return _armar_disponibilidad(resultado.all())
+
 def listar_sesiones_presenciales_detalladas(
     session: Session,
     id_servicio: int,
@@ -240,6 +295,7 @@ def listar_sesiones_presenciales_detalladas(
     )
 
     rows = session.exec(stmt).all()
+    disponibilidad = calcular_disponibilidad(session, [row[0] for row in rows])
     resultado = []
     for (
         id_ses, id_ses_pres, fecha_sesion,
@@ -251,15 +307,8 @@ def listar_sesiones_presenciales_detalladas(
         local_fin = convert_utc_to_local(dt_fin)
         # --- FIN DEL CAMBIO ---
 
-        # 4) contar confirmadas, calcular vacantes_libres…
-        total_confirmadas = session.exec(
-            select(func.count(Reserva.id_reserva))
-            .where(
-                Reserva.id_sesion      == id_ses,
-                Reserva.estado_reserva == "confirmada"
-            )
-        ).one()
-        vac_libres = vac_tot - total_confirmadas
+        # 4) vacantes libres según el conteo agrupado
+        vac_libres = disponibilidad[id_ses].vacantes_libres
 
         resultado.append({
             "id_sesion":           id_ses,
@@ -307,10 +356,10 @@ def existe_reserva_para_usuario(db: Session, id_sesion: int, id_usuario: int) ->
     cliente = db.exec(stmt_cliente).first()
 
     if not cliente:
-        print("Cliente no encontrado para este usuario.")
+        logger.debug("Cliente no encontrado para este usuario.")
         return False
 
-    print(f"🔍 Verificando reserva para id_sesion={id_sesion}, id_cliente={cliente.id_cliente}")
+    logger.debug(f"🔍 Verificando reserva para id_sesion={id_sesion}, id_cliente={cliente.id_cliente}")
 
     # Buscar reserva
     stmt_reserva = select(Reserva).where(
@@ -321,9 +370,9 @@ def existe_reserva_para_usuario(db: Session, id_sesion: int, id_usuario: int) ->
     reserva = db.exec(stmt_reserva).first()
 
     if reserva:
-        print(f"Reserva encontrada: ID {reserva.id_reserva}")
+        logger.debug(f"Reserva encontrada: ID {reserva.id_reserva}")
     else:
-        print("No se encontró ninguna reserva activa.")
+        logger.debug("No se encontró ninguna reserva activa.")
 
     return reserva is not None
 
@@ -352,6 +401,21 @@ def validar_sesion_no_reservada(session: Session, id_sesion: int) -> None:
             detail="La sesión ya está reservada por otro cliente."
         )
 
+def _consulta_reservas_en_conflicto(cliente_id: int, id_comunidad: int, inicio_nueva: datetime, fin_nueva: datetime):
+    return (
+        select(Reserva)
+        .join(Sesion, Reserva.id_sesion == Sesion.id_sesion)
+        .where(
+            Reserva.id_cliente == cliente_id,
+            Reserva.id_comunidad == id_comunidad,  # <-- ¡Clave! Solo en la misma comunidad
+            Reserva.estado_reserva.in_(["confirmada", "formulario_pendiente"]),
+            Sesion.inicio.is_not(None),
+            Sesion.fin.is_not(None),
+            inicio_nueva < Sesion.fin,
+            fin_nueva > Sesion.inicio
+        )
+    )
+
 def validar_cliente_sin_conflicto(
     session: Session,
     cliente_id: int,
@@ -365,11 +429,10 @@ def validar_cliente_sin_conflicto(
     inicio_nueva = sesion_actual.inicio
     fin_nueva = sesion_actual.fin
 
-    print("🟡 VALIDANDO CONFLICTO DE SESIONES")
-    print(f"Cliente ID: {cliente_id}")
-    print(f"Comunidad ID: {id_comunidad}")
-    print(f"Inicio nueva sesión: {inicio_nueva}")
-    print(f"Fin nueva sesión: {fin_nueva}")
+    logger.debug(
+        f"🟡 Validando conflicto de sesiones - cliente {cliente_id}, comunidad {id_comunidad}, "
+        f"inicio {inicio_nueva}, fin {fin_nueva}"
+    )
 
     if not inicio_nueva or not fin_nueva:
         raise HTTPException(
@@ -379,22 +442,12 @@ def validar_cliente_sin_conflicto(
 
     # Query para buscar reservas que se solapen en el tiempo PARA LA MISMA COMUNIDAD
     reservas_en_conflicto = session.exec(
-        select(Reserva)
-        .join(Sesion, Reserva.id_sesion == Sesion.id_sesion)
-        .where(
-            Reserva.id_cliente == cliente_id,
-            Reserva.id_comunidad == id_comunidad,  # <-- ¡Clave! Solo en la misma comunidad
-            Reserva.estado_reserva.in_(["confirmada", "formulario_pendiente"]),
-            Sesion.inicio.is_not(None),
-            Sesion.fin.is_not(None),
-            inicio_nueva < Sesion.fin,
-            fin_nueva > Sesion.inicio
-        )
+        _consulta_reservas_en_conflicto(cliente_id, id_comunidad, inicio_nueva, fin_nueva)
     ).all()
 
-    print(f"🔍 Reservas en conflicto encontradas: {len(reservas_en_conflicto)}")
+    logger.debug(f"🔍 Reservas en conflicto encontradas: {len(reservas_en_conflicto)}")
     for r in reservas_en_conflicto:
-        print(f"- Conflicto con sesión ID: {r.id_sesion}, Estado: {r.estado_reserva}")
+        logger.debug(f"- Conflicto con sesión ID: {r.id_sesion}, Estado: {r.estado_reserva}")
 
     if reservas_en_conflicto:
         raise HTTPException(
@@ -486,7 +539,6 @@ def crear_reserva_virtual_con_validaciones(
     cliente_id: int,
     usuario_id: int,
     id_comunidad: int,
-    bg_tasks: BackgroundTasks
 ) -> Reserva:
     detalle = None
     reserva = None
@@ -504,20 +556,20 @@ def crear_reserva_virtual_con_validaciones(
             detail="No tienes permiso para realizar esta operación como cliente."
         )
 
-    print("🔹 Iniciando creación de reserva virtual")
+    logger.debug("🔹 Iniciando creación de reserva virtual")
     with session.begin_nested():
-        print("🔸 Obteniendo sesión bloqueada...")
+        logger.debug("🔸 Obteniendo sesión bloqueada...")
         sesion = obtener_sesion_bloqueada(session, id_sesion)
         if sesion.tipo != "Virtual":
             raise HTTPException(status_code=400, detail="La sesión no es de tipo virtual.")
         
-        print("🔸 Validando unicidad virtual...")
+        logger.debug("🔸 Validando unicidad virtual...")
         validar_unicidad_virtual(session, sesion)
 
-        print("🔸 Validando cliente sin conflicto...")
+        logger.debug("🔸 Validando cliente sin conflicto...")
         validar_cliente_sin_conflicto(session, cliente_id, sesion, id_comunidad)
 
-        print("🔹 Obteniendo inscripción activa...")
+        logger.debug("🔹 Obteniendo inscripción activa...")
         inscripcion = obtener_inscripcion_activa(session, cliente_id, id_comunidad)
         if not inscripcion:
             raise HTTPException(404, "No se encontró inscripción activa para este cliente en la comunidad.")
@@ -528,12 +580,12 @@ def crear_reserva_virtual_con_validaciones(
         if not plan:
             raise HTTPException(500, "El plan asociado a la inscripción no existe.")
 
-        print(f"📌 Plan encontrado: id={plan.id_plan}, topes={plan.topes}")
+        logger.debug(f"📌 Plan encontrado: id={plan.id_plan}, topes={plan.topes}")
 
         if es_plan_con_topes_virtual(plan):
-            print("✅ El plan tiene topes. Obteniendo detalle...")
+            logger.debug("✅ El plan tiene topes. Obteniendo detalle...")
             detalle = obtener_detalle_topes_bloqueado(session, inscripcion.id_inscripcion)
-            print("🔍 Detalle topes:", detalle)
+            logger.debug(f"🔍 Detalle topes: {detalle}")
             if detalle is None:
                 raise HTTPException(500, "No se encontró detalle de topes.")
             validar_topes_disponibles(detalle)
@@ -561,24 +613,22 @@ def crear_reserva_virtual_con_validaciones(
     servicio = session.get(Servicio, sesion.id_servicio) if sesion else None
     usuario = session.get(Usuario, usuario_id)
 
-    bg_tasks.add_task(
-        send_reservation_email,
+    # Se encola en la misma transacción que la reserva
+    send_reservation_email(
+        session=session,
         to_email=usuario.email,
-        details={
-            "id_reserva": reserva.id_reserva,
-            "nombre_cliente": usuario.nombre,
-            "apellido_cliente": usuario.apellido,
-            "nombre_servicio": servicio.nombre if servicio else "—",
-            "fecha": reserva.fecha_reservada.date() if reserva.fecha_reservada else None,
-            "hora_inicio": reserva.fecha_reservada.time() if reserva.fecha_reservada else None,
-            "hora_fin": sesion.fin.time() if sesion and sesion.fin else None,
-            "tipo": "virtual"
-        }
+        contexto=ContextoReserva(
+            nombre_cliente=usuario.nombre,
+            nombre_servicio=servicio.nombre if servicio else "—",
+            fecha=reserva.fecha_reservada.date() if reserva.fecha_reservada else None,
+            hora_inicio=reserva.fecha_reservada.time() if reserva.fecha_reservada else None,
+            hora_fin=sesion.fin.time() if sesion and sesion.fin else None,
+        ),
     )
 
-    print(f"🔍 Cliente ID: {cliente_id}, Comunidad ID: {id_comunidad}")
-    print(f"Reserva ID: {reserva.id_reserva} creada correctamente.")
-    print(f"Detalle topes usado: ID {detalle.id_registros_inscripcion if detalle else '—'}")
+    logger.debug(f"🔍 Cliente ID: {cliente_id}, Comunidad ID: {id_comunidad}")
+    logger.info(f"Reserva ID: {reserva.id_reserva} creada correctamente.")
+    logger.debug(f"Detalle topes usado: ID {detalle.id_registros_inscripcion if detalle else '—'}")
 
     return reserva
 
@@ -609,14 +659,7 @@ def validar_unicidad_virtual(session: Session, sesion: Sesion):
 
 
 def obtener_inscripcion_activa(session: Session, cliente_id: int, comunidad_id: int) -> Inscripcion:
-    inscripcion = session.exec(
-        select(Inscripcion)
-        .where(
-            Inscripcion.id_cliente == cliente_id,
-            Inscripcion.id_comunidad == comunidad_id,
-            Inscripcion.estado == 1
-        )
-    ).one_or_none()
+    inscripcion = session.exec(_consulta_inscripcion_activa(cliente_id, comunidad_id)).one_or_none()
     if not inscripcion:
         raise HTTPException(
             status_code=403,
@@ -636,7 +679,7 @@ def obtener_detalle_topes_bloqueado(session: Session, id_inscripcion: int) -> De
             status_code=500,
             detail="No se encontró el detalle de inscripción para topes."
         )
-    print(f"📌 Estado antes de commit → disponibles: {detalle.topes_disponibles}, consumidos: {detalle.topes_consumidos}")
+    logger.debug(f"📌 Estado antes de commit → disponibles: {detalle.topes_disponibles}, consumidos: {detalle.topes_consumidos}")
     return detalle
 
 
@@ -713,6 +756,7 @@ def obtener_resumen_reserva_presencial(db: Session, id_sesion: int, id_usuario:
     # ✅ CORREGIDO: Convertir UTC a hora local de Lima para extraer fecha correcta
     local_inicio = convert_utc_to_local(dt_inicio)
     local_fin = convert_utc_to_local(dt_fin)
+    disponibilidad = calcular_disponibilidad(db, [id_ses]).get(id_ses)
 
     resumen = {
         "id_sesion": id_ses,
@@ -723,13 +767,14 @@ def obtener_resumen_reserva_presencial(db: Session, id_sesion: int, id_usuario:
         "hora_inicio": local_inicio.strftime("%H:%M") if local_inicio else "N/A",
         "hora_fin": local_fin.strftime("%H:%M") if local_fin else "N/A",
         "vacantes_totales": vac_tot,
+        "vacantes_libres": disponibilidad.vacantes_libres if disponibilidad else None,
         "nombres": usuario.nombre,
         "apellidos": usuario.apellido
     }
     
     return resumen, None
 
-def crear_reserva_presencial(db: Session, id_sesion: int, id_usuario: int, bg_tasks: BackgroundTasks):
+def crear_reserva_presencial(db: Session, id_sesion: int, id_usuario: int):
     with db.begin_nested():
         # 1. Buscar el cliente y su usuario
         cliente = db.exec(select(Cliente).where(Cliente.id_usuario == id_usuario)).first()
@@ -740,11 +785,10 @@ def crear_reserva_presencial(db: Session, id_sesion: int, id_usuario: int, bg_ta
         if not usuario:
             return None, "Usuario no encontrado"
 
-        # 2. Bloquear y obtener sesión presencial
+        # 2. Obtener sesión presencial (sin bloquear: el cupo se toma con un UPDATE condicional)
         sesion_presencial_stmt = (
             select(SesionPresencial)
             .where(SesionPresencial.id_sesion == id_sesion)
-            .with_for_update()
         )
         sesion_presencial = db.exec(sesion_presencial_stmt).first()
 
@@ -794,12 +838,8 @@ def crear_reserva_presencial(db: Session, id_sesion: int, id_usuario: int, bg_ta
         except Exception as e:
             return None, str(e)
 
-        # 6. Verificar vacantes
-        total_confirmadas = db.exec(
-            select(func.count(Reserva.id_reserva))
-            .where(Reserva.id_sesion == id_sesion, Reserva.estado_reserva == "confirmada")
-        ).one()
-        if total_confirmadas >= sesion_presencial.capacidad:
+        # 6. Tomar un cupo de forma atómica
+        if not tomar_cupo(db, id_sesion):
             return None, "No hay vacantes disponibles"
 
         # 7. Crear la reserva
@@ -832,8 +872,19 @@ def crear_reserva_presencial(db: Session, id_sesion: int, id_usuario: int, bg_ta
             "topes_consumidos": topes_consumidos_actual,
         }
 
-        # 9. Enviar email en segundo plano
-        bg_tasks.add_task(send_reservation_email, to_email=usuario.email, details=response_details)
+        # 9. Encolar el email en la misma transacción que la reserva
+        contexto = ContextoReserva(
+            nombre_cliente=usuario.nombre,
+            nombre_servicio=servicio.nombre,
+            fecha=response_details["fecha"],
+            hora_inicio=response_details["hora_inicio"],
+            hora_fin=response_details["hora_fin"],
+            ubicacion=local.nombre,
+            direccion_detallada=local.direccion_detallada,
+            topes_consumidos=topes_consumidos_actual,
+            topes_disponibles=topes_disponibles_actual,
+        )
+        send_reservation_email(to_email=usuario.email, contexto=contexto, session=db)
         
         db.commit()
 
@@ -966,10 +1017,11 @@ def get_reservation_details(db: Session, id_reserva: int, id_usuario: int):
     return response_data, None
 
 def obtener_info_formulario(db: Session, id_sesion: int, cliente_id: int):
-    # 1. Validar que la reserva existe y pertenece al cliente
-    reserva = db.exec(
-        select(Reserva).where(Reserva.id_sesion == id_sesion, Reserva.id_cliente == cliente_id)
+    # 1. Validar que la reserva existe y pertenece al cliente (sin traer el archivo)
+    fila = db.exec(
+        select(Reserva, Reserva.archivo.is_not(None)).where(Reserva.id_sesion == id_sesion, Reserva.id_cliente == cliente_id) # type: ignore
     ).one_or_none()
+    reserva, formulario_completado = fila if fila else (None, False)
     if not reserva:
         raise HTTPException(status_code=404, detail="Reserva no encontrada o no pertenece al cliente.")
 
@@ -995,7 +1047,7 @@ def obtener_info_formulario(db: Session, id_sesion: int, cliente_id: int):
         "hora_inicio": local_inicio.time() if local_inicio else None,
         "hora_fin": local_fin.time() if local_fin else None,
         "url_formulario": sesion_virtual.url_archivo,
-        "formulario_completado": reserva.archivo is not None
+        "formulario_completado": bool(formulario_completado)
     }
 
 async def completar_formulario_virtual(
@@ -1003,7 +1055,6 @@ async def completar_formulario_virtual(
     id_sesion: int, 
     cliente_id: int, 
     file: UploadFile,
-    bg_tasks: BackgroundTasks,
     profesional_email: str,
     profesional_nombre: str,
     cliente_nombre: str
@@ -1011,14 +1062,15 @@ async def completar_formulario_virtual(
     """
     Guarda el archivo del formulario en la reserva y envía un correo al profesional.
     """
-    reserva = session.exec(
-        select(Reserva).where(Reserva.id_sesion == id_sesion, Reserva.id_cliente == cliente_id)
+    fila = session.exec(
+        select(Reserva, Reserva.archivo.is_not(None)).where(Reserva.id_sesion == id_sesion, Reserva.id_cliente == cliente_id) # type: ignore
     ).one_or_none()
+    reserva, tiene_archivo = fila if fila else (None, False)
 
     if not reserva:
         raise HTTPException(status_code=404, detail="No se encontró una reserva para el usuario en esta sesión.")
     
-    if reserva.archivo is not None:
+    if tiene_archivo:
         raise HTTPException(status_code=400, detail="El formulario para esta reserva ya ha sido enviado.")
 
     # Obtenemos la sesión para los detalles del correo
@@ -1034,20 +1086,18 @@ async def completar_formulario_virtual(
     session.commit()
     
     # Preparamos los detalles para el correo
-    email_details = {
-        "nombre_profesional": profesional_nombre,
-        "nombre_cliente": cliente_nombre,
-        "fecha_sesion": sesion_obj.inicio.strftime("%d/%m/%Y"),
-        "hora_inicio": sesion_obj.inicio.strftime("%H:%M"),
-    }
+    contexto = ContextoFormulario(
+        nombre_profesional=profesional_nombre,
+        nombre_cliente=cliente_nombre,
+        inicio_sesion=sesion_obj.inicio,
+    )
 
-    # Enviamos el correo en segundo plano
-    bg_tasks.add_task(
-        send_form_email,
+    # Encolamos el correo para el worker
+    send_form_email(
         to_email=profesional_email,
         file_content=file_content,
         filename=file.filename,
-        details=email_details
+        contexto=contexto,
     )
 
     return {"mensaje": "Archivo enviado al profesional correspondiente."}
@@ -1106,6 +1156,84 @@ def cancelar_reserva_por_id(db: Session, id_reserva: int, id_usuario: int):
 '''
 
 
+def tomar_cupo(db: Session, id_sesion: int) -> bool:
+    """
+    Incrementa `reservas_confirmadas` solo si aún hay capacidad, en un único UPDATE condicional.
+    Devuelve False si la sesión está llena (o no es presencial).
+    """
+    resultado = db.exec(
+        update(SesionPresencial)
+        .where(
+            SesionPresencial.id_sesion == id_sesion,
+            SesionPresencial.reservas_confirmadas < SesionPresencial.capacidad
+        )
+        .values(reservas_confirmadas=SesionPresencial.reservas_confirmadas + 1)
+    )
+    return resultado.rowcount == 1
+
+def liberar_cupo(db: Session, id_sesion: int) -> None:
+    """Devuelve un cupo a la sesión presencial. En sesiones virtuales no afecta ninguna fila."""
+    db.exec(
+        update(SesionPresencial)
+        .where(
+            SesionPresencial.id_sesion == id_sesion,
+            SesionPresencial.reservas_confirmadas > 0
+        )
+        .values(reservas_confirmadas=SesionPresencial.reservas_confirmadas - 1)
+    )
+
+def marcar_reserva_cancelada(db: Session, reserva: Reserva, id_usuario: int, ahora: datetime) -> None:
+    """
+    Cambia el estado a 'cancelada' con un UPDATE condicionado al estado leído,
+    así dos cancelaciones simultáneas no liberan el cupo dos veces.
+    """
+    estado_anterior = reserva.estado_reserva
+    resultado = db.exec(
+        update(Reserva)
+        .where(Reserva.id_reserva == reserva.id_reserva, Reserva.estado_reserva == estado_anterior)
+        .values(estado_reserva="cancelada", modificado_por=str(id_usuario), fecha_modificacion=ahora)
+    )
+    if resultado.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="La reserva fue modificada por otra operación. Inténtalo nuevamente.")
+
+    if estado_anterior == "confirmada":
+        liberar_cupo(db, reserva.id_sesion) # type: ignore
+
+    db.commit()
+    db.refresh(reserva)
+
+def _consulta_reconciliar_contadores():
+    conteo_real = (
+        select(func.count(Reserva.id_reserva))
+        .where(Reserva.id_sesion == SesionPresencial.id_sesion, Reserva.estado_reserva == "confirmada")
+        .scalar_subquery()
+    )
+    return (
+        update(SesionPresencial)
+        .where(SesionPresencial.reservas_confirmadas != conteo_real)
+        .values(reservas_confirmadas=conteo_real)
+        .execution_options(synchronize_session=False)
+    )
+
+def reconciliar_contadores_reservas(db: Session) -> int:
+    """
+    Recalcula `reservas_confirmadas` desde la tabla reserva y corrige solo las sesiones con desfase.
+    Devuelve la cantidad de sesiones corregidas.
+    """
+    resultado = db.exec(_consulta_reconciliar_contadores())
+    db.commit()
+
+    if resultado.rowcount:
+        logger.warning(f"⚠️ Contadores de reservas corregidos en {resultado.rowcount} sesiones presenciales")
+    return resultado.rowcount
+
+TAREA_RECONCILIAR_CONTADORES = "reconciliar_contadores_reservas"
+
+def tarea_reconciliar_contadores(session: Session) -> None:
+    """Tarea del programador: corrige los contadores desfasados y vuelve a correr según su intervalo."""
+    reconciliar_contadores_reservas(session)
+
 def cancelar_reserva_por_id(db: Session, id_reserva: int, id_usuario: int):
     """
     Cancela una reserva cambiando su estado a 'cancelada'.
@@ -1153,25 +1281,20 @@ def cancelar_reserva_por_id(db: Session, id_reserva: int, id_usuario: int):
                 detail="Solo puedes cancelar una reserva presencial con al menos 1 hora de anticipación."
             )
 
-    # 5. Cancelar la reserva
-    reserva.estado_reserva = "cancelada"
-    reserva.modificado_por = str(id_usuario)
-    reserva.fecha_modificacion = datetime.utcnow()
-    db.add(reserva)
-    db.commit()
-    db.refresh(reserva)
+    # 5. Cancelar la reserva y liberar el cupo si estaba confirmada
+    marcar_reserva_cancelada(db, reserva, id_usuario, datetime.utcnow())
 
     # 6. Enviar correo
     usuario = db.get(Usuario, id_usuario)
     servicio = db.get(Servicio, sesion.id_servicio) if sesion else None
 
     if usuario and servicio:
-        details = {
-            "nombre_cliente": usuario.nombre,
-            "nombre_servicio": servicio.nombre,
-            "fecha": sesion.inicio.strftime("%Y-%m-%d") if sesion.inicio else ""
-        }
-        send_reservation_cancel_email(usuario.email, details)
+        contexto = ContextoCancelacionReserva(
+            nombre_cliente=usuario.nombre,
+            nombre_servicio=servicio.nombre,
+            fecha=sesion.inicio.date() if sesion and sesion.inicio else None,
+        )
+        send_reservation_cancel_email(usuario.email, contexto)
 
     return {"message": "Reserva cancelada exitosamente."}
 
@@ -1220,25 +1343,19 @@ def cancelar_reserva_virtual_por_id(db: Session, id_reserva: int, id_usuario: in
         raise HTTPException(status_code=400, detail="Solo puedes cancelar hasta 24 horas antes del inicio de la sesión.")
 
     # 5. Cancelar reserva
-    reserva.estado_reserva = "cancelada"
-    reserva.fecha_modificacion = ahora
-    reserva.modificado_por = str(id_usuario)
-
-    db.add(reserva)
-    db.commit()
-    db.refresh(reserva)
+    marcar_reserva_cancelada(db, reserva, id_usuario, ahora)
 
     # 6. Enviar correo de confirmación
     usuario = db.get(Usuario, id_usuario)
     servicio = db.get(Servicio, sesion.id_servicio) if sesion else None
 
     if usuario and servicio:
-        details = {
-            "nombre_cliente": usuario.nombre,
-            "nombre_servicio": servicio.nombre,
-            "fecha": sesion.inicio.strftime("%Y-%m-%d"),
-        }
-        send_reservation_cancel_email(usuario.email, details)
+        contexto = ContextoCancelacionReserva(
+            nombre_cliente=usuario.nombre,
+            nombre_servicio=servicio.nombre,
+            fecha=sesion.inicio.date() if sesion and sesion.inicio else None,
+        )
+        send_reservation_cancel_email(usuario.email, contexto)
 
     return {"message": "Reserva virtual cancelada exitosamente."}
 
@@ -1264,137 +1381,173 @@ def verificar_cruce_de_reservas(db: Session, id_cliente: int, id_comunidad: int,
 
     return reservas_existentes is not None
 
-def procesar_archivo_sesiones_virtuales(db: Session, archivo, creado_por: str):
-    df = pd.read_excel(BytesIO(archivo.file.read()), engine="openpyxl")
-    df = df.replace({np.nan: None})
-
-    resumen = {
-        "insertados": 0,
-        "errores": []
-    }
+class ImportadorSesiones(Importador):
+    """Validaciones comunes de la carga de sesiones: fechas locales (Lima) a UTC, ni pasadas ni invertidas."""
+    columnas: Tuple[str, ...] = ("fecha_inicio", "fecha_fin")
+
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        df["descripcion"] = como_texto(df["descripcion"]) if "descripcion" in df else None
+        self.invalidos = {}
+        for columna in ("fecha_inicio", "fecha_fin"):
+            fechas, self.invalidos[columna] = como_fecha_hora(df[columna])
+            df[columna] = local_a_utc(fechas)
+        return df
+
+    def validar(self, df: pd.DataFrame) -> None:
+        for columna in ("fecha_inicio", "fecha_fin"):
+            self.rechazar(
+                df, df[columna].isna(),
+                lambda fila, d, columna=columna: f"Error de validación - '{columna}' vacío o con formato inválido",
+                omitir=False,
+            )
+        self.rechazar(
+            df, df["descripcion"].str.len().gt(100).fillna(False).astype(bool),
+            lambda fila, d: "Error de validación - 'descripcion' supera los 100 caracteres",
+            omitir=False,
+        )
+        self.rechazar(
+            df, df["fecha_inicio"] < datetime.utcnow(),
+            lambda fila, d: f"No se puede crear una sesión en el pasado: {d['fecha_inicio']}",
+            omitir=False,
+        )
+        self.rechazar(
+            df, df["fecha_inicio"] >= df["fecha_fin"],
+            lambda fila, d: "La fecha de inicio debe ser anterior a la fecha de fin.",
+            omitir=False,
+        )
 
-    for idx, fila in df.iterrows():
-        try:
-            datos = SesionCargaMasiva.model_validate(fila.to_dict())
-            procesar_fila_sesion_virtual(datos, db, creado_por)
-            resumen["insertados"] += 1
-        except ValidationError as ve:
-            resumen["errores"].append(f"Fila {idx + 2}: Error de validación - {ve}")
-        except Exception as e:
-            db.rollback()
-            resumen["errores"].append(f"Fila {idx + 2}: {str(e)}")
+    def nueva_sesion(self, d, id_servicio: int, tipo: str, ahora: datetime) -> Sesion:
+        return Sesion(
+            id_servicio=id_servicio,
+            tipo=tipo,
+            descripcion=d.descripcion or f"Sesión {tipo.lower()} de servicio {id_servicio}",
+            inicio=valor(d.fecha_inicio),
+            fin=valor(d.fecha_fin),
+            creado_por=self.creado_por,
+            fecha_creacion=ahora,
+            estado=1,
+        )
 
-    return resumen
 
+class ImportadorSesionesVirtuales(ImportadorSesiones):
+    columnas = ("id_servicio", "id_profesional", "fecha_inicio", "fecha_fin", "url_meeting", "url_archivo")
 
-def procesar_fila_sesion_virtual(datos: SesionCargaMasiva, db: Session, creado_por: str):
-    ahora = datetime.now(timezone.utc)
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = super().preparar(df)
+        for columna in ("id_servicio", "id_profesional"):
+            df[columna], self.invalidos[columna] = como_numero(df[columna])
+        for columna in ("url_meeting", "url_archivo"):
+            df[columna] = como_texto(df[columna])
+        return df
 
-    # ✅ CORREGIDO: Convertir fechas locales (Lima) a UTC para almacenamiento
-    if datos.fecha_inicio.tzinfo is None:
-        datos.fecha_inicio = convert_local_to_utc(datos.fecha_inicio)
-    if datos.fecha_fin.tzinfo is None:
-        datos.fecha_fin = convert_local_to_utc(datos.fecha_fin)
-        
-    if datos.fecha_inicio < ahora:
-        raise ValueError(
-            f"No se puede crear una sesión en el pasado: {datos.fecha_inicio}"
+    def validar(self, df: pd.DataFrame) -> None:
+        for columna in ("id_servicio", "id_profesional", "url_meeting", "url_archivo"):
+            self.rechazar(
+                df, df[columna].isna(),
+                lambda fila, d, columna=columna: f"Error de validación - '{columna}' vacío o inválido",
+                omitir=False,
+            )
+        super().validar(df)
+
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        modalidades: dict = {}
+        for bloque in en_bloques(df["id_servicio"].astype(int).unique().tolist()):
+            modalidades.update(self.db.exec(
+                select(Servicio.id_servicio, Servicio.modalidad).where(Servicio.id_servicio.in_(bloque))  # type: ignore
+            ).all())
+        servicio_de_profesional: dict = {}
+        for bloque in en_bloques(df["id_profesional"].astype(int).unique().tolist()):
+            servicio_de_profesional.update(self.db.exec(
+                select(Profesional.id_profesional, Profesional.id_servicio).where(Profesional.id_profesional.in_(bloque))  # type: ignore
+            ).all())
+
+        self.rechazar(
+            df, ~df["id_servicio"].isin(list(modalidades)),
+            lambda fila, d: f"Servicio con ID {int(d['id_servicio'])} no existe.", omitir=False,
         )
-
-    if datos.fecha_inicio >= datos.fecha_fin:
-        raise ValueError(
-            f"La fecha de inicio debe ser anterior a la fecha de fin."
+        self.rechazar(
+            df, df["id_servicio"].map(lambda s: (modalidades.get(s) or "").lower() != "virtual"),
+            lambda fila, d: f"El servicio {int(d['id_servicio'])} no es de modalidad virtual.", omitir=False,
         )
-
-    # Validar servicio virtual
-    servicio = db.exec(
-        select(Servicio).where(Servicio.id_servicio == datos.id_servicio)
-    ).first()
-    if not servicio:
-        raise ValueError(f"Servicio con ID {datos.id_servicio} no existe.")
-    if servicio.modalidad.lower() != "virtual":
-        raise ValueError(f"El servicio {datos.id_servicio} no es de modalidad virtual.")
-
-    # Validar profesional
-    profesional = db.exec(
-        select(Profesional).where(Profesional.id_profesional == datos.id_profesional)
-    ).first()
-    if not profesional:
-        raise ValueError(f"Profesional con ID {datos.id_profesional} no existe.")
-    
-    # Validar que el profesional esté vinculado al mismo servicio
-    if profesional.id_servicio != datos.id_servicio:
-        raise ValueError(
-            f"El profesional {datos.id_profesional} está asociado al servicio {profesional.id_servicio}, "
-            f"pero se está intentando asignar a una sesión del servicio {datos.id_servicio}."
+        self.rechazar(
+            df, ~df["id_profesional"].isin(list(servicio_de_profesional)),
+            lambda fila, d: f"Profesional con ID {int(d['id_profesional'])} no existe.", omitir=False,
         )
-
-    # Validaciones de conflicto lógico
-    validar_sesion_duplicada(db, datos)
-    validar_sesion_solapada(db, datos)
-
-    # Si todo está bien, ahora sí se crea la sesión
-    nueva_sesion = Sesion(
-        id_servicio=datos.id_servicio,
-        tipo="Virtual",
-        descripcion=datos.descripcion or f"Sesión virtual de servicio {datos.id_servicio}",
-        inicio=datos.fecha_inicio,
-        fin=datos.fecha_fin,
-        creado_por=creado_por,
-        fecha_creacion=datetime.now(timezone.utc),
-        estado=1
-    )
-    db.add(nueva_sesion)
-    db.flush()  # Ahora sí, porque ya validamos todo
-
-    nueva_virtual = SesionVirtual(
-        id_sesion=nueva_sesion.id_sesion,
-        id_profesional=datos.id_profesional,
-        url_meeting=datos.url_meeting,
-        url_archivo=datos.url_archivo,
-        creado_por=creado_por,
-        fecha_creacion=datetime.now(timezone.utc),
-        estado=1
-    )
-    db.add(nueva_virtual)
-    db.commit()
-
-
-def validar_sesion_duplicada(db: Session, datos: SesionCargaMasiva):
-    existe = db.exec(
-        select(Sesion)
-        .join(SesionVirtual, Sesion.id_sesion == SesionVirtual.id_sesion)
-        .where(
-            Sesion.id_servicio == datos.id_servicio,
-            Sesion.inicio == datos.fecha_inicio,
-            SesionVirtual.id_profesional == datos.id_profesional
+        self.rechazar(
+            df, df["id_profesional"].map(servicio_de_profesional) != df["id_servicio"],
+            lambda fila, d: (
+                f"El profesional {int(d['id_profesional'])} está asociado al servicio {servicio_de_profesional.get(d['id_profesional'])}, "
+                f"pero se está intentando asignar a una sesión del servicio {int(d['id_servicio'])}."
+            ),
+            omitir=False,
         )
-    ).first()
 
-    if existe:
-        raise ValueError(
-            f"Ya existe una sesión virtual programada para el servicio {datos.id_servicio}, "
-            f"con el profesional {datos.id_profesional} exactamente a las {datos.fecha_inicio}."
-        )
+        restantes = self.pendientes(df)
+        if restantes.empty:
+            return
+        # Sesiones del mismo profesional y servicio en la ventana del archivo, en una consulta
+        existentes = []
+        for bloque in en_bloques(restantes["id_profesional"].astype(int).unique().tolist()):
+            existentes.extend(self.db.exec(
+                select(SesionVirtual.id_profesional, Sesion.id_servicio, Sesion.inicio, Sesion.fin)
+                .join(Sesion, Sesion.id_sesion == SesionVirtual.id_sesion)
+                .where(
+                    SesionVirtual.id_profesional.in_(bloque),  # type: ignore
+                    Sesion.inicio < valor(restantes["fecha_fin"].max()),
+                    Sesion.fin > valor(restantes["fecha_inicio"].min()),
+                )
+            ).all())
+        exactas = {(p, s, i) for p, s, i, _ in existentes}
+        intervalos: dict = {}
+        for p, s, i, f in existentes:
+            intervalos.setdefault((p, s), []).append((i, f))
+        agendas = {clave: Agenda(lista) for clave, lista in intervalos.items()}
+
+        # Filas en orden: una fila aceptada ocupa su horario para las siguientes del archivo
+        for d in restantes.itertuples():
+            clave = (int(d.id_profesional), int(d.id_servicio))
+            inicio, fin = valor(d.fecha_inicio), valor(d.fecha_fin)
+            agenda = agendas.setdefault(clave, Agenda())
+            if (*clave, inicio) in exactas:
+                self.rechazar_fila(d.Index, (
+                    f"Ya existe una sesión virtual programada para el servicio {clave[1]}, "
+                    f"con el profesional {clave[0]} exactamente a las {inicio}."
+                ), omitir=False)
+            elif agenda.cruza(inicio, fin):
+                self.rechazar_fila(d.Index, (
+                    f"El profesional {clave[0]} ya tiene una sesión que se cruza entre "
+                    f"{inicio} y {fin} para el mismo servicio {clave[1]}."
+                ), omitir=False)
+            else:
+                agenda.agregar(inicio, fin)
+                exactas.add((*clave, inicio))
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        ahora = datetime.now(timezone.utc)
+        sesiones = []
+        for d in lote.itertuples():
+            sesion = self.nueva_sesion(d, int(d.id_servicio), "Virtual", ahora)
+            sesion.sesiones_virtuales = [SesionVirtual(
+                id_profesional=int(d.id_profesional),
+                url_meeting=d.url_meeting,
+                url_archivo=d.url_archivo,
+                creado_por=self.creado_por,  # type: ignore
+                fecha_creacion=ahora,
+                estado=1,
+            )]
+            sesiones.append(sesion)
+        self.db.add_all(sesiones)
+        self.db.flush()
 
 
-def validar_sesion_solapada(db: Session, datos: SesionCargaMasiva):
-    solapada = db.exec(
-        select(Sesion)
-        .join(SesionVirtual, Sesion.id_sesion == SesionVirtual.id_sesion)
-        .where(
-            SesionVirtual.id_profesional == datos.id_profesional,
-            Sesion.id_servicio == datos.id_servicio,
-            Sesion.inicio < datos.fecha_fin,
-            Sesion.fin > datos.fecha_inicio
-        )
-    ).first()
+def procesar_archivo_sesiones_virtuales(db: Session, archivo, creado_por: str):
+    return ejecutar_importador(ImportadorSesionesVirtuales(db, creado_por), archivo)
 
-    if solapada:
-        raise ValueError(
-            f"El profesional {datos.id_profesional} ya tiene una sesión que se cruza entre "
-            f"{datos.fecha_inicio} y {datos.fecha_fin} para el mismo servicio {datos.id_servicio}."
-        )
+
+def encolar_archivo_sesiones_virtuales(archivo: UploadFile, creado_por: str):
+    return encolar_importacion(
+        "sesiones_virtuales", archivo, creado_por, lambda db: ImportadorSesionesVirtuales(db, creado_por)
+    )
 
 
 
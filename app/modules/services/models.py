@@ -2,6 +2,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, ClassVar, TYPE_CHECKING, List
 from datetime import datetime
 from app.core.enums import ModalidadServicio
+from app.core.db import columnas_diferidas
 
 class ComunidadXServicio(SQLModel, table=True):
     __tablename__: ClassVar[str] = "comunidadxservicio" # type: ignore[assignment]
@@ -10,10 +11,13 @@ class ComunidadXServicio(SQLModel, table=True):
     estado: int = Field(default=1)  # 1=Activo, 0=Inactivo
 
 class Servicio(SQLModel, table=True):
+    __mapper_args__ = columnas_diferidas("imagen")
+
     id_servicio: Optional[int] = Field(default=None, primary_key=True)
     nombre: str = Field(max_length=100)
     descripcion: Optional[str] = Field(default=None, max_length=100)
-    imagen: Optional[bytes] = None
+    imagen: Optional[bytes] = None  # Legado: las imágenes nuevas van al almacén de media
+    imagen_hash: Optional[str] = Field(default=None, max_length=64)
     modalidad: ModalidadServicio  # Enum: 'Virtual' o 'Presencial'
     fecha_creacion: datetime
     creado_por: str = Field(max_length=50)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, Query
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile, Query
 from fastapi.responses import JSONResponse
 from sqlmodel import Session, select
 from app.core.db import get_session
@@ -15,18 +15,22 @@ from app.modules.services.schemas import ProfesionalCreate, ProfesionalOut
 from app.modules.services.schemas import LocalOut
 from app.modules.users.models import Usuario
 from app.modules.communities.services import obtener_servicios_con_imagen_base64
-from ..services.services import crear_local, procesar_archivo_profesionales
+from app.modules.media.services import url_media
+from ..services.services import crear_local, encolar_archivo_profesionales
 from app.modules.services.services import obtener_sesiones_virtuales_por_profesional, obtener_sesiones_presenciales_por_local
 from app.modules.services.schemas import SesionVirtualConDetalle,SesionPresencialConDetalle
 from app.modules.services.services import obtener_detalle_sesion_virtual
-from app.modules.services.services import procesar_archivo_locales
+from app.modules.services.services import encolar_archivo_locales
 from app.modules.services.services import obtener_detalle_sesion_presencial
 from app.modules.services.schemas import DetalleSesionVirtualResponse
 from app.modules.services.schemas import DetalleSesionPresencialResponse
-from app.modules.services.services import procesar_archivo_sesiones_presenciales
+from app.modules.services.services import encolar_archivo_sesiones_presenciales
+from app.core.importacion import respuesta_trabajo
+from app.core.etag import RutaConEtag, respuesta_json
+from app.core.paginacion import ParametrosPagina, agregar_cabeceras_pagina, parametros_pagina
 
 
-router = APIRouter()
+router = APIRouter(route_class=RutaConEtag)
 
 @router.get("/profesionales/{id_servicio}", response_model=List[ProfesionalRead])
 def listar_profesionales_por_servicio(id_servicio: int, session: Session = Depends(get_session)):
@@ -64,8 +68,8 @@ def obtener_locales_por_servicio_y_distrito(
     return locales
 
 @router.get("/servicios", response_model=list[ServicioRead])
-def listar_todos_los_servicios(session: Session = Depends(get_session)):
-    return listar_servicios(session)
+def listar_todos_los_servicios(request: Request, session: Session = Depends(get_session)):
+    return respuesta_json(request, listar_servicios(session), list[ServicioRead])
 
 @router.post("/servicios", response_model=ServicioRead)
 def crear_servicio_endpoint(
@@ -78,18 +82,12 @@ def crear_servicio_endpoint(
     datos = ServicioCreate(nombre=nombre, descripcion=descripcion, modalidad=modalidad) # type: ignore
     nuevo_servicio = crear_servicio(session, datos, imagen)
 
-    import base64
-    imagen_base64 = (
-        base64.b64encode(nuevo_servicio.imagen).decode("utf-8")
-        if nuevo_servicio.imagen else None
-    )
-
     return ServicioRead(
         id_servicio=nuevo_servicio.id_servicio, # type: ignore
         nombre=nuevo_servicio.nombre,
         descripcion=nuevo_servicio.descripcion,
         modalidad=nuevo_servicio.modalidad,
-        imagen_base64=imagen_base64,
+        imagen_url=url_media(nuevo_servicio.imagen_hash),
         fecha_creacion=nuevo_servicio.fecha_creacion,
         creado_por=nuevo_servicio.creado_por,
         fecha_modificacion=nuevo_servicio.fecha_modificacion,
@@ -124,18 +122,12 @@ def actualizar_servicio_endpoint(
         usuario=current_user.email  # o current_user.username o .id
     )
 
-    import base64
-    imagen_base64 = (
-        base64.b64encode(servicio_actualizado.imagen).decode("utf-8")
-        if servicio_actualizado.imagen else None
-    )
-
     return ServicioRead(
         id_servicio=servicio_actualizado.id_servicio, # type: ignore
         nombre=servicio_actualizado.nombre,
         descripcion=servicio_actualizado.descripcion,
         modalidad=servicio_actualizado.modalidad,
-        imagen_base64=imagen_base64,
+        imagen_url=url_media(servicio_actualizado.imagen_hash),
         fecha_creacion=servicio_actualizado.fecha_creacion,
         creado_por=servicio_actualizado.creado_por,
         fecha_modificacion=servicio_actualizado.fecha_modificacion,
@@ -151,8 +143,15 @@ def obtener_servicio_por_identificador(
     return obtener_servicio_por_id(session, id_servicio)
 
 @router.get("/", response_model=list[ProfesionalOut])
-def obtener_profesionales(db: Session = Depends(get_session)):
-    return listar_profesionales(db)
+def obtener_profesionales(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
+):
+    pagina = listar_profesionales(db, params)
+    agregar_cabeceras_pagina(response, request, pagina)
+    return pagina.items
 
 @router.post("/", response_model=ProfesionalOut)
 def registrar_profesional_con_servicio(
@@ -172,7 +171,7 @@ def obtener_locales_por_servicio(id_servicio: int, db: Session = Depends(get_ses
         raise HTTPException(status_code=404, detail="No se encontraron locales para este servicio")
     return locales
 
-@router.post("/locales-carga-masiva/{id_servicio}")
+@router.post("/locales-carga-masiva/{id_servicio}", status_code=202)
 def carga_masiva_locales(
     id_servicio: int,
     archivo: UploadFile = File(...),
@@ -192,7 +191,7 @@ def carga_masiva_locales(
     5. **link** - URL o enlace relacionado (OPCIONAL)
     
     **Notas importantes:**
-    - El archivo debe ser .xlsx o .xls
+    - El archivo debe ser .xlsx o .csv (separado por "," o ";")
     - La primera fila debe contener los nombres de las columnas exactamente como se especifica
     - El departamento se asigna automáticamente como 14 (por defecto)
     - Se valida que el servicio exista antes de procesar
@@ -205,35 +204,26 @@ def carga_masiva_locales(
     Sala Yoga       | 2          | Calle Secundaria 456   |             | http://example.com
     ```
     
-    **Respuesta:**
+    **Respuesta (202):** id_trabajo de la carga. En /api/importaciones/{id_trabajo} se
+    consulta el avance y, al terminar, el resumen:
     - insertados: número de locales creados exitosamente
     - omitidos: número de filas omitidas por campos vacíos o duplicados
     - errores: lista de errores específicos por fila
     """
-    try:
-        # Validar que el archivo sea Excel
-        if not archivo.filename or not archivo.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(
-                status_code=400, 
-                detail="El archivo debe ser un Excel (.xlsx o .xls)"
-            )
-        
-        resultado = procesar_archivo_locales(
-            db=db, 
-            archivo=archivo, 
-            id_servicio=id_servicio, 
-            creado_por=current_admin.email
+    # Validar que el archivo sea Excel o CSV
+    if not archivo.filename or not archivo.filename.lower().endswith(('.xlsx', '.csv')):
+        raise HTTPException(
+            status_code=400, 
+            detail="El archivo debe ser un Excel (.xlsx) o un CSV"
         )
-        
-        return {
-            "mensaje": "Carga masiva de locales completada",
-            "id_servicio": id_servicio,
-            "resumen": resultado
-        }
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al procesar archivo: {str(e)}")
+
+    trabajo = encolar_archivo_locales(
+        db=db, 
+        archivo=archivo, 
+        id_servicio=id_servicio, 
+        creado_por=current_admin.email
+    )
+    return {**respuesta_trabajo(trabajo), "id_servicio": id_servicio}
 
 
 
@@ -339,19 +329,12 @@ def listar_servicios_disponibles_para_comunidad(
         servicios_disponibles = []
         for servicio in servicios_activos:
             if servicio.id_servicio not in servicios_asociados_activos:
-                # Convertir imagen a base64 si existe
-                import base64
-                imagen_base64 = (
-                    base64.b64encode(servicio.imagen).decode("utf-8")
-                    if servicio.imagen else None
-                )
-                
                 servicio_out = ServicioOut(
                     id_servicio=servicio.id_servicio, # type: ignore
                     nombre=servicio.nombre,
                     modalidad=servicio.modalidad,
                     descripcion=servicio.descripcion,
-                    imagen=imagen_base64
+                    imagen=url_media(servicio.imagen_hash)
                 )
                 servicios_disponibles.append(servicio_out)
         
@@ -453,36 +436,42 @@ def anhadir_servicio_a_comunidad(
         )
 
 
-@router.post("/carga-masiva")
+@router.post("/carga-masiva", status_code=202)
 def carga_masiva_profesionales(
     archivo: UploadFile = File(...),
-    db: Session = Depends(get_session),
     current_admin: Usuario = Depends(get_current_admin)
 ):
-    try:
-        resultado = procesar_archivo_profesionales(db, archivo, current_admin.email)
-        return {"mensaje": "Carga masiva completada", "resumen": resultado}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """Encola la carga; el avance y el resumen se consultan en /api/importaciones/{id_trabajo}."""
+    return respuesta_trabajo(encolar_archivo_profesionales(archivo, current_admin.email))
 
 
 
 @router.get("/profesionales/{id_profesional}/sesiones-virtuales", response_model=List[SesionVirtualConDetalle])
 def listar_sesiones_virtuales_de_profesional(
     id_profesional: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_session),
-    current_user: Usuario = Depends(get_current_user)  # solo para autenticación básica
+    current_user: Usuario = Depends(get_current_user),  # solo para autenticación básica
+    params: ParametrosPagina = Depends(parametros_pagina),
 ):
-    return obtener_sesiones_virtuales_por_profesional(db, id_profesional)
+    pagina = obtener_sesiones_virtuales_por_profesional(db, id_profesional, params)
+    agregar_cabeceras_pagina(response, request, pagina)
+    return pagina.items
 
 
 @router.get("/locales/{id_local}/sesiones-presenciales", response_model=List[SesionPresencialConDetalle])
 def listar_sesiones_presenciales_de_local(
     id_local: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_session),
-    current_user: Usuario = Depends(get_current_user)  # Para autenticación si la necesitas
+    current_user: Usuario = Depends(get_current_user),  # Para autenticación si la necesitas
+    params: ParametrosPagina = Depends(parametros_pagina),
 ):
-    return obtener_sesiones_presenciales_por_local(db, id_local)
+    pagina = obtener_sesiones_presenciales_por_local(db, id_local, params)
+    agregar_cabeceras_pagina(response, request, pagina)
+    return pagina.items
 
 
 
@@ -517,40 +506,12 @@ def crear_local_endpoint(
     return crear_local(db, data, creado_por=current_user.email)
 
 
-@router.post("/carga-masiva-sesiones-presenciales/{id_servicio}")
+@router.post("/carga-masiva-sesiones-presenciales/{id_servicio}", status_code=202)
 def carga_masiva_sesiones_presenciales(
     id_servicio: int,
     archivo: UploadFile = File(...),
-    db: Session = Depends(get_session),
     current_admin: Usuario = Depends(get_current_admin)
 ):
-    try:
-        resultado = procesar_archivo_sesiones_presenciales(
-            db=db,
-            archivo=archivo,
-            id_servicio=id_servicio,
-            creado_por=current_admin.email
-        )
-    except Exception as e:
-        return {
-            "mensaje": "Error al procesar el archivo.",
-            "resumen": {
-                "insertados": 0,
-                "errores": [f"Error general: {str(e)}"]
-            }
-        }
-
-    # Usar una única lógica para el mensaje
-    if resultado["insertados"] > 0 and not resultado["errores"]:
-        mensaje = "Carga exitosa de sesiones presenciales."
-    elif resultado["insertados"] > 0 and resultado["errores"]:
-        mensaje = (
-            f"Se insertaron {resultado['insertados']} sesiones, pero algunas filas presentaron errores."
-        )
-    else:  # insertados == 0
-        mensaje = "No se insertó ninguna sesión. Todos los registros fallaron."
-
-    return {
-        "mensaje": mensaje,
-        "resumen": resultado
-    }
\ No newline at end of file
+    """Encola la carga; el avance y el resumen se consultan en /api/importaciones/{id_trabajo}."""
+    trabajo = encolar_archivo_sesiones_presenciales(archivo, id_servicio, current_admin.email)
+    return respuesta_trabajo(trabajo)
\ No newline at end of file
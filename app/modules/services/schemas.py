@@ -19,7 +19,7 @@ class ServicioOut(BaseModel):
     nombre: str
     modalidad: str
     descripcion: Optional[str] = None
-    imagen: Optional[str] = None  # base64
+    imagen: Optional[str] = None  # URL en /api/media
 
 
 class ProfesionalRead(BaseModel):
@@ -40,7 +40,7 @@ class ProfesionalRead(BaseModel):
 class DistritoOut(BaseModel):
     id_distrito: int
     nombre: str
-    imagen: Optional[str] = None  # base64
+    imagen: Optional[str] = None  # URL en /api/media
 
 class LocalOut(BaseModel): # type: ignore
     id_local: int
@@ -58,7 +58,8 @@ class ServicioRead(BaseModel):
     nombre: str
     descripcion: Optional[str]
     modalidad: Optional[str]
-    imagen_base64: Optional[str]
+    imagen_url: Optional[str] = None
+    imagen_base64: Optional[str] = None  # Obsoleto: ya no se envía, usar imagen_url
     fecha_creacion: Optional[datetime]
     creado_por: Optional[str]
     fecha_modificacion: Optional[datetime]
@@ -7,16 +7,18 @@ from typing import List, Optional
 from app.modules.geography.models import Distrito  # Modelo de geografía
 from app.modules.services.models import Local, Profesional      # Modelo Local dentro de services
 from app.modules.services.schemas import DistritoOut, ServicioCreate, ServicioRead, ServicioUpdate  # Esquema de salida (DTO)
-import base64
+from app.modules.media.services import guardar_media_opcional, url_media
 from app.modules.services.schemas import ProfesionalCreate, ProfesionalOut, SesionVirtualConDetalle, SesionPresencialConDetalle
 from app.modules.services.schemas import InscritoPresencialDetalleOut
 import pandas as pd
 from .schemas import DetalleSesionVirtualResponse, LocalCreate, ProfesionalDetalleOut, InscritoDetalleOut,DetalleSesionPresencialResponse,LocalDetalleOut
 from app.modules.users.models import Cliente, Usuario
 from app.modules.communities.models import Comunidad
-from io import BytesIO
-import numpy as np
-from app.modules.reservations.schemas import SesionPresencialCargaMasiva
+from sqlalchemy import insert
+from app.core.catalogo import cache_catalogo
+from app.core.paginacion import Pagina, ParametrosPagina, paginar
+from app.core.importacion import Agenda, Importador, claves_existentes, como_numero, como_texto, ejecutar_importador, en_bloques, encolar_importacion, valor
+from app.modules.reservations.services import ImportadorSesiones, calcular_disponibilidad
 from utils.datetime_utils import convert_utc_to_local, convert_local_to_utc  # ✅ AGREGADO: Importación para conversión de zonas horarias
 
 
@@ -67,16 +69,16 @@ def obtener_distritos_por_servicio_service(session: Session, id_servicio: int) -
 
     resultado = []
     for d in distritos:
-        imagen = base64.b64encode(d.imagen).decode("utf-8") if d.imagen else None
         resultado.append(DistritoOut(
             id_distrito=d.id_distrito,
             nombre=d.nombre,
-            imagen=imagen
+            imagen=url_media(d.imagen_hash)
         ))
 
     return resultado
 
 
+@cache_catalogo(Servicio)
 def listar_servicios(db: Session) -> list[ServicioRead]:
     servicios = db.exec(select(Servicio)).all()
     resultado = []
@@ -84,10 +86,7 @@ def listar_servicios(db: Session) -> list[ServicioRead]:
         if servicio.estado != 0:
             #print("Servicio:", servicio.nombre, servicio.estado)
             servicio_dict = servicio.dict()
-            if servicio.imagen:
-                servicio_dict["imagen_base64"] = base64.b64encode(servicio.imagen).decode("utf-8")
-            else:
-                servicio_dict["imagen_base64"] = None
+            servicio_dict["imagen_url"] = url_media(servicio.imagen_hash)
             resultado.append(ServicioRead(**servicio_dict))
     return resultado
 
@@ -98,13 +97,13 @@ def crear_servicio(
     archivo_imagen: UploadFile,
     usuario: str = "admin"
 ):
-    contenido_imagen = archivo_imagen.file.read() if archivo_imagen else None
+    imagen_hash = guardar_media_opcional(archivo_imagen.file.read()) if archivo_imagen else None
 
     nuevo_servicio = Servicio(
         nombre=servicio_data.nombre,
         descripcion=servicio_data.descripcion,
         modalidad=servicio_data.modalidad,
-        imagen=contenido_imagen,
+        imagen_hash=imagen_hash,
         fecha_creacion=datetime.utcnow(),
         creado_por=usuario,
         estado=True,
@@ -158,7 +157,8 @@ def actualizar_servicio(
     if datos.modalidad is not None:
         servicio.modalidad = datos.modalidad
     if imagen is not None:
-        servicio.imagen = imagen.file.read()
+        servicio.imagen_hash = guardar_media_opcional(imagen.file.read())
+        servicio.imagen = None
 
     servicio.fecha_modificacion = datetime.now(timezone.utc)
     servicio.modificado_por = usuario
@@ -175,17 +175,12 @@ def obtener_servicio_por_id(db: Session, id_servicio: int) -> ServicioRead:
     elif not servicio.estado:
         raise HTTPException(status_code=404, detail="Servicio eliminado o inactivo")    
 
-    imagen_base64 = (
-        base64.b64encode(servicio.imagen).decode("utf-8")
-        if servicio.imagen else None
-    )
-
     return ServicioRead(
         id_servicio=servicio.id_servicio, # type: ignore
         nombre=servicio.nombre,
         descripcion=servicio.descripcion,
         modalidad=servicio.modalidad,
-        imagen_base64=imagen_base64,
+        imagen_url=url_media(servicio.imagen_hash),
         fecha_creacion=servicio.fecha_creacion,
         creado_por=servicio.creado_por,
         fecha_modificacion=servicio.fecha_modificacion,
@@ -193,8 +188,12 @@ def obtener_servicio_por_id(db: Session, id_servicio: int) -> ServicioRead:
         estado=servicio.estado # type: ignore
     )
 
-def listar_profesionales(db: Session) -> list[Profesional]:
-    return db.exec(select(Profesional).where(Profesional.estado == 1)).all() # type: ignore
+def listar_profesionales(db: Session, params: ParametrosPagina = ParametrosPagina()) -> Pagina[Profesional]:
+    consulta = select(Profesional).where(Profesional.estado == 1)  # type: ignore
+    return paginar(db, consulta, params, Profesional.id_profesional, ordenes={
+        "nombre_completo": Profesional.nombre_completo,
+        "email": Profesional.email,
+    })
 
 def crear_profesional(db: Session, data: ProfesionalCreate, creado_por: str) -> Profesional:
     nuevo_profesional = Profesional(
@@ -220,56 +219,109 @@ def listar_locales_por_servicio(db: Session, id_servicio: int) -> list[Local]:
     return db.exec(query).all() # type: ignore
 
 
+class ImportadorProfesionales(Importador):
+    columnas = ("email",)
+
+    def __init__(self, db: Session, creado_por: str, **kwargs):
+        super().__init__(db, creado_por, **kwargs)
+        self.emails_vistos: set = set()
+
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        df["email"] = como_texto(df["email"]).str.lower()
+        for columna in ("nombre_completo", "formulario"):
+            df[columna] = como_texto(df[columna]) if columna in df else None
+        servicio = df["id_servicio"] if "id_servicio" in df else pd.Series(None, index=df.index, dtype=object)
+        df["id_servicio"], self.servicio_invalido = como_numero(servicio)
+        return df
+
+    def validar(self, df: pd.DataFrame) -> None:
+        self.rechazar(df, df["email"].isna(), lambda fila, d: "El email está vacío")
+        self.rechazar(df, self.servicio_invalido, lambda fila, d: f"id_servicio inválido ({d['id_servicio']})", omitir=False)
+
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        tomados = {e.lower() for e in claves_existentes(self.db, Profesional.email, df["email"]) if e} | self.emails_vistos
+        self.rechazar(
+            df, df["email"].isin(tomados) | df["email"].duplicated(),
+            lambda fila, d: f"El email '{d['email']}' ya existe",
+        )
+        restantes = self.pendientes(df)
+        ids = restantes["id_servicio"].dropna().astype(int)
+        servicios = claves_existentes(self.db, Servicio.id_servicio, ids)
+        self.rechazar(
+            restantes, restantes["id_servicio"].notna() & ~restantes["id_servicio"].isin(servicios),
+            lambda fila, d: f"servicio {int(d['id_servicio'])} no existe",
+            omitir=False,
+        )
+        self.emails_vistos.update(self.pendientes(df)["email"])
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        ahora = datetime.utcnow()
+        self.db.exec(insert(Profesional), params=[  # type: ignore[call-overload]
+            {
+                "nombre_completo": d.nombre_completo,
+                "email": d.email,
+                "id_servicio": int(d.id_servicio) if valor(d.id_servicio) is not None else None,
+                "formulario": d.formulario,
+                "creado_por": self.creado_por,
+                "fecha_creacion": ahora,
+                "estado": 1,
+            }
+            for d in lote.itertuples()
+        ])
+
+
 def procesar_archivo_profesionales(db: Session, archivo: UploadFile, creado_por: str):
-    df = pd.read_excel(BytesIO(archivo.file.read()), engine="openpyxl")
-
-    resumen = {
-        "insertados": 0,
-        "omitidos": 0,
-        "errores": []
-    }
-
-    for idx, fila in df.iterrows():
-        try:
-            email = str(fila.get("email")).strip().lower()
-
-            if pd.isna(email) or email == "":
-                resumen["errores"].append(f"Fila {idx + 2}: El email está vacío") # type: ignore
-                resumen["omitidos"] += 1
-                continue
-
-            existe = db.exec(select(Profesional).where(Profesional.email == email)).first()
-            if existe:
-                resumen["errores"].append(f"Fila {idx + 2}: El email '{email}' ya existe") # type: ignore
-                resumen["omitidos"] += 1
-                continue
-
-            servicio_id = int(fila.get("id_servicio")) if not pd.isna(fila.get("id_servicio")) else None # type: ignore
-            if servicio_id:
-                servicio = db.exec(select(Servicio).where(Servicio.id_servicio == servicio_id)).first()
-                if not servicio:
-                    resumen["errores"].append(f"Fila {idx + 2}: servicio {servicio_id} no existe") # type: ignore
-                    continue
-
-            nuevo_profesional = Profesional(
-                nombre_completo=str(fila.get("nombre_completo")).strip() if not pd.isna(fila.get("nombre_completo")) else None,
-                email=email,
-                id_servicio=servicio_id,
-                formulario=str(fila.get("formulario")).strip() if not pd.isna(fila.get("formulario")) else None,
-                creado_por=creado_por,
-                fecha_creacion=datetime.utcnow(),
-                estado=1
-            )
-
-            db.add(nuevo_profesional)
-            db.commit()
-            resumen["insertados"] += 1
-
-        except Exception as e:
-            db.rollback()
-            resumen["errores"].append(f"Fila {idx + 2}: {str(e)}") # type: ignore
-
-    return resumen
+    return ejecutar_importador(ImportadorProfesionales(db, creado_por), archivo)
+
+
+def encolar_archivo_profesionales(archivo: UploadFile, creado_por: str):
+    return encolar_importacion("profesionales", archivo, creado_por, lambda db: ImportadorProfesionales(db, creado_por))
+
+
+class ImportadorLocales(Importador):
+    columnas = ("nombre", "id_distrito", "direccion_detallada")
+
+    def __init__(self, db: Session, creado_por: str, id_servicio: int, **kwargs):
+        super().__init__(db, creado_por, **kwargs)
+        self.id_servicio = id_servicio
+        self.nombres_vistos: set = set()
+
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        for columna in ("nombre", "direccion_detallada", "responsable", "link"):
+            df[columna] = como_texto(df[columna]) if columna in df else None
+        df["id_distrito"], self.distrito_invalido = como_numero(df["id_distrito"])
+        return df
+
+    def validar(self, df: pd.DataFrame) -> None:
+        # Sin campos obligatorios: se omite sin mensaje, como siempre
+        self.rechazar(
+            df, df["nombre"].isna() | df["id_distrito"].isna() | df["direccion_detallada"].isna(),
+            lambda fila, d: "",
+        )
+        self.rechazar(df, self.distrito_invalido, lambda fila, d: f"id_distrito inválido ({d['id_distrito']})", omitir=False)
+
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        tomados = claves_existentes(self.db, Local.nombre, df["nombre"], Local.id_servicio == self.id_servicio) | self.nombres_vistos
+        self.rechazar(df, df["nombre"].isin(tomados) | df["nombre"].duplicated(), lambda fila, d: "")
+        self.nombres_vistos.update(self.pendientes(df)["nombre"])
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        ahora = datetime.utcnow()
+        self.db.exec(insert(Local), params=[  # type: ignore[call-overload]
+            {
+                "nombre": d.nombre,
+                "direccion_detallada": d.direccion_detallada,
+                "responsable": d.responsable,
+                "link": d.link,
+                "id_departamento": 14,  # Departamento por defecto
+                "id_distrito": int(d.id_distrito),
+                "id_servicio": self.id_servicio,
+                "fecha_creacion": ahora,
+                "creado_por": self.creado_por,
+                "estado": 1,
+            }
+            for d in lote.itertuples()
+        ])
 
 
 def procesar_archivo_locales(db: Session, archivo: UploadFile, id_servicio: int, creado_por: str):
@@ -285,93 +337,51 @@ def procesar_archivo_locales(db: Session, archivo: UploadFile, id_servicio: int,
     
     Nota: El departamento se asigna automáticamente como 14 (por defecto)
     """
-    df = pd.read_excel(BytesIO(archivo.file.read()), engine="openpyxl")
-
-    resumen = {
-        "insertados": 0,
-        "omitidos": 0,
-        "errores": []
-    }
-
     # Verificar que el servicio existe
     servicio = db.get(Servicio, id_servicio)
     if not servicio:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
 
-    for idx, fila in df.iterrows():
-        try:
-            # Validar campos obligatorios
-            if pd.isna(fila['nombre']) or pd.isna(fila['id_distrito']) or pd.isna(fila['direccion_detallada']) or fila['direccion_detallada'] == '':
-                resumen["omitidos"] += 1
-                continue
-
-            # Verificar si ya existe un local con el mismo nombre para este servicio
-            existe_local = db.exec(
-                select(Local).where(
-                    Local.nombre == fila['nombre'],
-                    Local.id_servicio == id_servicio
-                )
-            ).first()
-            
-            if existe_local:
-                resumen["omitidos"] += 1
-                continue
-
-            # Manejar campos opcionales
-            responsable_valor = None
-            if not pd.isna(fila.get('responsable')) and fila.get('responsable') != '':
-                responsable_valor = fila['responsable']
-            
-            link_valor = None
-            if not pd.isna(fila.get('link')) and fila.get('link') != '':
-                link_valor = fila['link']
-
-            # Crear nuevo local
-            nuevo_local = Local(
-                nombre=fila['nombre'],  # type: ignore
-                direccion_detallada=fila['direccion_detallada'],  # type: ignore (ahora obligatorio)
-                responsable=responsable_valor,
-                link=link_valor,
-                id_departamento=14,  # Departamento por defecto
-                id_distrito=int(fila['id_distrito']),  # type: ignore
-                id_servicio=id_servicio,
-                fecha_creacion=datetime.utcnow(),
-                creado_por=creado_por,
-                estado=1
-            )
-            
-            db.add(nuevo_local)
-            db.commit()
-            db.refresh(nuevo_local)
-
-            resumen["insertados"] += 1
-
-        except Exception as e:
-            db.rollback()
-            resumen["errores"].append(f"Fila {idx + 2}: {str(e)}")  # type: ignore
-
-    return resumen
+    return ejecutar_importador(ImportadorLocales(db, creado_por, id_servicio), archivo)
+
+
+def encolar_archivo_locales(db: Session, archivo: UploadFile, id_servicio: int, creado_por: str):
+    # El 404 se responde de inmediato, antes de encolar
+    if not db.get(Servicio, id_servicio):
+        raise HTTPException(status_code=404, detail="Servicio no encontrado")
+    return encolar_importacion(
+        "locales", archivo, creado_por, lambda db: ImportadorLocales(db, creado_por, id_servicio)
+    )
+
+def _consulta_sesiones_virtuales_profesional(id_profesional: int):
+    return (
+        select(SesionVirtual, Sesion)
+        .join(Sesion, Sesion.id_sesion == SesionVirtual.id_sesion)
+        .where(SesionVirtual.id_profesional == id_profesional)
+    )
+
 
 def obtener_sesiones_virtuales_por_profesional(
-    db: Session, id_profesional: int
-) -> List[SesionVirtualConDetalle]:
-    sesiones_virtuales = db.exec(
-        select(SesionVirtual).where(SesionVirtual.id_profesional == id_profesional)
-    ).all()
+    db: Session, id_profesional: int, params: ParametrosPagina = ParametrosPagina()
+) -> Pagina[SesionVirtualConDetalle]:
+    # Sesión virtual y sesión base en una sola consulta, de a una página
+    pagina = paginar(
+        db,
+        _consulta_sesiones_virtuales_profesional(id_profesional),
+        params,
+        SesionVirtual.id_sesion_virtual,
+        ordenes={"inicio": Sesion.inicio},
+    )
+    filas = pagina.items
 
-    resultado = []
+    # Conteo de inscritos de todas las sesiones en una consulta agrupada
+    disponibilidad = calcular_disponibilidad(db, [sesion.id_sesion for _, sesion in filas])
 
-    for sv in sesiones_virtuales:
-        sesion = db.exec(
-            select(Sesion).where(Sesion.id_sesion == sv.id_sesion)
-        ).first()
+    resultado = []
 
+    for sv, sesion in filas:
         if sesion:
-            inscritos_resultado = db.exec(
-                select(func.count(Reserva.id_reserva)).where(Reserva.id_sesion == sesion.id_sesion) # type: ignore
-            ).one()
-
-            inscritos = inscritos_resultado[0] if isinstance(inscritos_resultado, tuple) else inscritos_resultado
+            inscritos = disponibilidad[sesion.id_sesion].total_reservas
 
             # ✅ CORREGIDO: Convertir UTC a hora local de Lima para mostrar al usuario
             local_inicio = convert_utc_to_local(sesion.inicio)
@@ -386,7 +396,7 @@ def obtener_sesiones_virtuales_por_profesional(
                 inscritos=inscritos
             ))
 
-    return resultado
+    return Pagina(items=resultado, siguiente=pagina.siguiente)
 
 
 def get_sesion_presencial_con_local(id_sesion_presencial: int, db: Session):
@@ -460,26 +470,35 @@ def obtener_detalle_sesion_presencial(id_sesion_presencial: int, db: Session) ->
 
 
 
+def _consulta_sesiones_presenciales_local(id_local: int):
+    return (
+        select(SesionPresencial, Sesion)
+        .join(Sesion, Sesion.id_sesion == SesionPresencial.id_sesion)
+        .where(SesionPresencial.id_local == id_local)
+    )
+
+
 def obtener_sesiones_presenciales_por_local(
-    db: Session, id_local: int
-) -> List[SesionPresencialConDetalle]:
-    sesiones_presenciales = db.exec(
-        select(SesionPresencial).where(SesionPresencial.id_local == id_local)
-    ).all()
+    db: Session, id_local: int, params: ParametrosPagina = ParametrosPagina()
+) -> Pagina[SesionPresencialConDetalle]:
+    # Sesión presencial y sesión base en una sola consulta, de a una página
+    pagina = paginar(
+        db,
+        _consulta_sesiones_presenciales_local(id_local),
+        params,
+        SesionPresencial.id_sesion_presencial,
+        ordenes={"inicio": Sesion.inicio},
+    )
+    filas = pagina.items
 
-    resultado = []
+    # Conteo de inscritos de todas las sesiones en una consulta agrupada
+    disponibilidad = calcular_disponibilidad(db, [sesion.id_sesion for _, sesion in filas])
 
-    for sp in sesiones_presenciales:
-        sesion = db.exec(
-            select(Sesion).where(Sesion.id_sesion == sp.id_sesion)
-        ).first()
+    resultado = []
 
+    for sp, sesion in filas:
         if sesion:
-            inscritos_resultado = db.exec(
-                select(func.count(Reserva.id_reserva)).where(Reserva.id_sesion == sesion.id_sesion) # type: ignore
-            ).one()
-
-            inscritos = inscritos_resultado[0] if isinstance(inscritos_resultado, tuple) else inscritos_resultado
+            inscritos = disponibilidad[sesion.id_sesion].total_reservas
 
             # ✅ CORREGIDO: Convertir UTC a hora local de Lima para mostrar al usuario
             local_inicio = convert_utc_to_local(sesion.inicio)
@@ -495,7 +514,7 @@ def obtener_sesiones_presenciales_por_local(
                 inscritos=inscritos
             ))
 
-    return resultado
+    return Pagina(items=resultado, siguiente=pagina.siguiente)
 
 
 def get_sesion_virtual_con_profesional(id_sesion_virtual: int, db: Session):
@@ -529,13 +548,14 @@ def formatear_profesional(profesional: Profesional) -> ProfesionalDetalleOut:
     )
 
 def listar_inscritos_de_sesion(id_sesion: int, db: Session) -> List[InscritoDetalleOut]:
+    # Solo se necesita saber si hay archivo, no su contenido
     reservas = db.exec(
-        select(Reserva).where(Reserva.id_sesion == id_sesion)
+        select(Reserva, Reserva.archivo.is_not(None)).where(Reserva.id_sesion == id_sesion) # type: ignore
     ).all()
 
     inscritos = []
 
-    for reserva in reservas:
+    for reserva, tiene_archivo in reservas:
         cliente = db.get(Cliente, reserva.id_cliente)
         usuario = db.get(Usuario, cliente.id_usuario) # type: ignore
         comunidad = db.get(Comunidad, reserva.id_comunidad)
@@ -544,7 +564,7 @@ def listar_inscritos_de_sesion(id_sesion: int, db: Session) -> List[InscritoDeta
             nombre=usuario.nombre, # type: ignore
             apellido=usuario.apellido, # type: ignore
             comunidad=comunidad.nombre, # type: ignore
-            entrego_archivo=bool(reserva.archivo)
+            entrego_archivo=bool(tiene_archivo)
         ))
 
     return inscritos
@@ -593,137 +613,113 @@ def crear_local(
     return local
 
 
-def procesar_archivo_sesiones_presenciales(
-    db: Session, archivo: UploadFile, id_servicio: int, creado_por: str
-):
-    df = pd.read_excel(BytesIO(archivo.file.read()), engine="openpyxl")
-    df = df.replace({np.nan: None})
-
-    resumen = {
-        "insertados": 0,
-        "errores": []
-    }
-
-    for idx, fila in df.iterrows():
-        try:
-            datos_dict = fila.to_dict()
-            datos_dict["id_servicio"] = id_servicio
-            
-            valor_capacidad = datos_dict.get("capacidad")
-
-            try:
-                if valor_capacidad is None or str(valor_capacidad).strip() == '':
-                    datos_dict["capacidad"] = None
-                else:
-                    datos_dict["capacidad"] = int(float(valor_capacidad))
-            except (ValueError, TypeError):
-                datos_dict["capacidad"] = None
-
-                
-            datos = SesionPresencialCargaMasiva.model_validate(datos_dict)
-            procesar_fila_sesion_presencial(
-                db=db,
-                datos=datos,
-                id_servicio=id_servicio,
-                creado_por=creado_por,
-                fila=idx + 2
-            )
-            resumen["insertados"] += 1
-        except Exception as e:
-            db.rollback()
-            resumen["errores"].append(f"Fila {idx + 2}: {str(e)}")
-
-    return resumen
-
-
-def procesar_fila_sesion_presencial(
-    db: Session,
-    datos: SesionPresencialCargaMasiva,
-    id_servicio: int,
-    creado_por: str,
-    fila: int
-):
-    ahora = datetime.now(timezone.utc)
-
-    # Validar que el local exista y esté vinculado al servicio
-    local = db.exec(
-        select(Local).where(
-            Local.id_local == datos.id_local,
-            Local.id_servicio == id_servicio
-        )
-    ).first()
-
-    if not local:
-        raise ValueError(f"Fila {fila}: El local con ID {datos.id_local} no está asociado al servicio con ID {id_servicio}.")
-    
+class ImportadorSesionesPresenciales(ImportadorSesiones):
+    columnas = ("fecha_inicio", "fecha_fin", "id_local", "capacidad")
 
-    # ✅ CORREGIDO: Convertir fechas locales (Lima) a UTC para almacenamiento
-    if datos.fecha_inicio.tzinfo is None:
-        datos.fecha_inicio = convert_local_to_utc(datos.fecha_inicio)
-    if datos.fecha_fin.tzinfo is None:
-        datos.fecha_fin = convert_local_to_utc(datos.fecha_fin)
-    if datos.capacidad is None or datos.capacidad <= 0:
-        raise ValueError(f"Fila {fila}: La capacidad debe ser un número positivo.")
-    if datos.fecha_inicio < ahora:
-        raise ValueError(f"Fila {fila}: No se puede crear una sesión en el pasado.")
-    if datos.fecha_inicio >= datos.fecha_fin:
-        raise ValueError(f"Fila {fila}: La fecha de inicio debe ser anterior a la fecha de fin.")
-
-    servicio = db.get(Servicio, datos.id_servicio)
-    if not servicio or servicio.estado != 1:
-        raise ValueError(f"Fila {fila}: Servicio con ID {datos.id_servicio} no existe o está inactivo.")
-    if servicio.modalidad.lower() != "presencial":
-        raise ValueError(f"Fila {fila}: El servicio {datos.id_servicio} no es presencial.")
-
-    local = db.get(Local, datos.id_local)
-    if not local or local.estado != 1:
-        raise ValueError(f"Fila {fila}: Local con ID {datos.id_local} no existe o está inactivo.")
-    if local.id_servicio != datos.id_servicio:
-        raise ValueError(f"Fila {fila}: El local {datos.id_local} no está asignado al servicio {datos.id_servicio}.")
+    def __init__(self, db: Session, creado_por: str, id_servicio: int, **kwargs):
+        super().__init__(db, creado_por, **kwargs)
+        self.id_servicio = id_servicio
 
-    
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = super().preparar(df)
+        df["id_local"], self.invalidos["id_local"] = como_numero(df["id_local"])
+        df["capacidad"], _ = como_numero(df["capacidad"])  # inválida cuenta como vacía
+        return df
 
-    validar_solapamiento_presencial(db, datos, fila)
+    def validar(self, df: pd.DataFrame) -> None:
+        self.rechazar(
+            df, df["id_local"].isna(),
+            lambda fila, d: "Error de validación - 'id_local' vacío o inválido", omitir=False,
+        )
+        self.rechazar(
+            df, df["capacidad"].isna() | (df["capacidad"].fillna(0).astype(int) <= 0),
+            lambda fila, d: "La capacidad debe ser un número positivo.", omitir=False,
+        )
+        super().validar(df)
+
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        servicio = self.db.get(Servicio, self.id_servicio)
+        if not servicio or servicio.estado != 1:
+            self.rechazar(df, df["id_local"].notna(), lambda fila, d: f"Servicio con ID {self.id_servicio} no existe o está inactivo.", omitir=False)
+            return
+        if servicio.modalidad.lower() != "presencial":
+            self.rechazar(df, df["id_local"].notna(), lambda fila, d: f"El servicio {self.id_servicio} no es presencial.", omitir=False)
+            return
+
+        ids_local = df["id_local"].astype(int).unique().tolist()
+        locales: dict = {}
+        for bloque in en_bloques(ids_local):
+            locales.update({
+                local.id_local: local
+                for local in self.db.exec(select(Local).where(Local.id_local.in_(bloque), Local.id_servicio == self.id_servicio)).all()  # type: ignore
+            })
+        self.rechazar(
+            df, ~df["id_local"].isin(list(locales)),
+            lambda fila, d: f"El local con ID {int(d['id_local'])} no está asociado al servicio con ID {self.id_servicio}.",
+            omitir=False,
+        )
+        self.rechazar(
+            df, df["id_local"].map(lambda i: i in locales and locales[i].estado != 1),
+            lambda fila, d: f"Local con ID {int(d['id_local'])} no existe o está inactivo.",
+            omitir=False,
+        )
 
-    nueva_sesion = Sesion(
-        id_servicio=datos.id_servicio,
-        tipo="Presencial",
-        descripcion=datos.descripcion or f"Sesión presencial de servicio {datos.id_servicio}",
-        inicio=datos.fecha_inicio,
-        fin=datos.fecha_fin,
-        creado_por=creado_por,
-        fecha_creacion=ahora,
-        estado=1
-    )
-    db.add(nueva_sesion)
-    db.flush()
+        restantes = self.pendientes(df)
+        if restantes.empty:
+            return
+        existentes = []
+        for bloque in en_bloques(restantes["id_local"].astype(int).unique().tolist()):
+            existentes.extend(self.db.exec(
+                select(SesionPresencial.id_local, Sesion.inicio, Sesion.fin)
+                .join(Sesion, Sesion.id_sesion == SesionPresencial.id_sesion)
+                .where(
+                    Sesion.id_servicio == self.id_servicio,
+                    SesionPresencial.id_local.in_(bloque),  # type: ignore
+                    Sesion.inicio < valor(restantes["fecha_fin"].max()),
+                    Sesion.fin > valor(restantes["fecha_inicio"].min()),
+                )
+            ).all())
+        intervalos: dict = {}
+        for id_local, inicio, fin in existentes:
+            intervalos.setdefault(id_local, []).append((inicio, fin))
+        agendas = {id_local: Agenda(lista) for id_local, lista in intervalos.items()}
+
+        for d in restantes.itertuples():
+            inicio, fin = valor(d.fecha_inicio), valor(d.fecha_fin)
+            agenda = agendas.setdefault(int(d.id_local), Agenda())
+            if agenda.cruza(inicio, fin):
+                self.rechazar_fila(d.Index, (
+                    f"Ya existe una sesión presencial para el servicio {self.id_servicio} en el local {int(d.id_local)} "
+                    f"que se cruza con el horario del {inicio} al {fin}."
+                ), omitir=False)
+            else:
+                agenda.agregar(inicio, fin)
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        ahora = datetime.now(timezone.utc)
+        sesiones = []
+        for d in lote.itertuples():
+            sesion = self.nueva_sesion(d, self.id_servicio, "Presencial", ahora)
+            sesion.sesiones_presenciales = [SesionPresencial(
+                id_local=int(d.id_local),
+                capacidad=int(d.capacidad),
+                creado_por=self.creado_por,
+                fecha_creacion=ahora,
+                estado=1,
+            )]
+            sesiones.append(sesion)
+        self.db.add_all(sesiones)
+        self.db.flush()
 
-    nueva_presencial = SesionPresencial(
-        id_sesion=nueva_sesion.id_sesion,
-        id_local=datos.id_local,
-        capacidad=datos.capacidad,
-        creado_por=creado_por,
-        fecha_creacion=ahora,
-        estado=1
-    )
-    db.add(nueva_presencial)
-    db.commit()
 
+def procesar_archivo_sesiones_presenciales(
+    db: Session, archivo: UploadFile, id_servicio: int, creado_por: str
+):
+    return ejecutar_importador(ImportadorSesionesPresenciales(db, creado_por, id_servicio), archivo)
 
-def validar_solapamiento_presencial(db: Session, datos: SesionPresencialCargaMasiva, fila: int):
-    conflicto = db.exec(
-        select(Sesion)
-        .join(SesionPresencial, Sesion.id_sesion == SesionPresencial.id_sesion)
-        .where(
-            Sesion.id_servicio == datos.id_servicio,
-            SesionPresencial.id_local == datos.id_local,
-            Sesion.inicio < datos.fecha_fin,
-            Sesion.fin > datos.fecha_inicio
-        )
-    ).first()
 
-    if conflicto:
-        raise ValueError(
-            f"Fila {fila}: Ya existe una sesión presencial para el servicio {datos.id_servicio} en el local {datos.id_local} "
-            f"que se cruza con el horario del {datos.fecha_inicio} al {datos.fecha_fin}."
-        )
+def encolar_archivo_sesiones_presenciales(archivo: UploadFile, id_servicio: int, creado_por: str):
+    return encolar_importacion(
+        "sesiones_presenciales", archivo, creado_por,
+        lambda db: ImportadorSesionesPresenciales(db, creado_por, id_servicio),
+    )
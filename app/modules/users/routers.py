@@ -1,13 +1,17 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, File, Form, HTTPException, BackgroundTasks, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from app.core.db import get_session
+from app.core.paginacion import ParametrosPagina, agregar_cabeceras_pagina, paginar, parametros_pagina
+from app.core.respuestas import respuesta_modelo
 from app.modules.auth.dependencies import get_current_cliente_id
 from app.modules.communities.services import unir_cliente_a_comunidad
 from app.modules.geography.models import Departamento, Distrito
 from app.modules.services.schemas import ProfesionalCreate, ProfesionalRead
 from app.modules.users.schemas import AdministradorCreate, AdministradorRead, ClienteCreate, ClienteRead, ClienteUpdate, ClienteUpdateIn, ClienteUsuarioFull, UsuarioClienteFull , UsuarioCreate, UsuarioRead,UsuarioBase
-from app.modules.users.services import crear_administrador, crear_cliente, crear_usuario, modificar_cliente, obtener_cliente_con_usuario_por_id, procesar_archivo_clientes, reenviar_confirmacion
+from app.core.importacion import respuesta_trabajo
+from app.modules.users.services import crear_administrador, crear_cliente, crear_usuario, modificar_cliente, obtener_cliente_con_usuario_por_id, encolar_archivo_clientes, reenviar_confirmacion
 from app.modules.users.dependencies import get_current_admin
 from app.core.logger import logger
 from typing import List, Optional
@@ -16,7 +20,7 @@ from app.core.enums import TipoUsuario
 from app.core.security import hash_password, verify_confirmation_token
 from app.modules.communities.schemas import ComunidadContexto
 from app.modules.auth.dependencies import get_current_user
-from app.modules.users.services import obtener_cliente_desde_usuario, obtener_comunidades_del_cliente, construir_respuesta_contexto
+from app.modules.users.services import obtener_cliente_desde_usuario, obtener_contexto_comunidades
 from app.modules.communities.models import Comunidad
 from app.modules.communities.services import (
     obtener_comunidad_con_imagen_base64,
@@ -38,9 +42,9 @@ from app.modules.users.services import (
 )
 from app.modules.users.schemas import VerificarTokenSchema
 from app.modules.users.services import verificar_token_reset_password, cambiar_contrasena_con_link
-from fastapi import BackgroundTasks
+from app.core.instrumentacion import RutaInstrumentada
 
-router = APIRouter()
+router = APIRouter(route_class=RutaInstrumentada)
 
 @router.post("/usuario", response_model=UsuarioRead, status_code=status.HTTP_201_CREATED)
 def registrar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_session)):
@@ -72,15 +76,13 @@ def registrar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_session)
         raise HTTPException(status_code=500, detail=f"Error al registrar usuario")
 
 @router.post("/cliente", response_model=ClienteRead)
-def registrar_cliente(cliente: ClienteCreate, bg: BackgroundTasks, db: Session = Depends(get_session)):
+def registrar_cliente(cliente: ClienteCreate, db: Session = Depends(get_session)):
     try:
-        nuevo_cliente = crear_cliente(db, cliente, bg)
+        nuevo_cliente = crear_cliente(db, cliente)
         logger.info(f"Cliente registrado: {cliente.email}")
         return nuevo_cliente
     except Exception as e:
         logger.error(f"Error al registrar cliente {cliente.email}", exc_info=True)
-        print(">>> ERROR DETECTADO <<<")
-        print(e)
         raise HTTPException(status_code=500, detail="Error al registrar cliente")
 
 @router.get("/confirm/{token}", response_model=UsuarioRead)
@@ -107,8 +109,8 @@ def confirmar_email(token: str, db: Session = Depends(get_session)):
     return usuario
 
 @router.post("/resend-confirmation")
-def resend_confirmation(email: str,bg: BackgroundTasks,db: Session = Depends(get_session)):
-    return reenviar_confirmacion(db, email, bg)
+def resend_confirmation(email: str, db: Session = Depends(get_session)):
+    return reenviar_confirmacion(db, email)
 
 
 @router.post("/administrador", response_model=AdministradorRead)
@@ -123,14 +125,28 @@ def registrar_administrador(administrador: AdministradorCreate, db: Session = De
 
 #Endpoint para listar todos los clientes
 @router.get("/clientes", response_model=List[UsuarioClienteFull])
-def listar_clientes(session: Session = Depends(get_session)):
-    clientes = session.exec(
-        select(Usuario).where(
+def listar_clientes(
+    request: Request,
+    session: Session = Depends(get_session),
+    params: ParametrosPagina = Depends(parametros_pagina),
+):
+    consulta = (
+        select(Usuario)
+        .where(
             Usuario.tipo == TipoUsuario.Cliente,
             Usuario.estado == True
         )
-    ).all()
-    return clientes
+        .options(selectinload(Usuario.cliente))  # type: ignore[arg-type]
+    )
+    pagina = paginar(session, consulta, params, Usuario.id_usuario, ordenes={
+        "nombre": Usuario.nombre,
+        "apellido": Usuario.apellido,
+        "email": Usuario.email,
+        "fecha_creacion": Usuario.fecha_creacion,
+    })
+    # Se valida una sola vez desde los objetos ORM y se serializa directo a bytes
+    respuesta = respuesta_modelo(pagina.items, List[UsuarioClienteFull], validar=True)
+    return agregar_cabeceras_pagina(respuesta, request, pagina)
 
 #Endpoint para regisrar a un cliente a una comunidad
 @router.post("/unir_cliente_comunidad")
@@ -146,64 +162,14 @@ def unir_cliente_comunidad(
 @router.get("/usuario/comunidades", response_model=List[ComunidadContexto])
 def listar_comunidades_usuario(
     session: Session = Depends(get_session),
-    current_user: Usuario = Depends(get_current_user)
+    id_cliente: int = Depends(get_current_cliente_id)
 ):
-    print(f"\n[INICIO] Usuario autenticado: {current_user.email} (ID: {current_user.id_usuario})")
-
-    try:
-        # Paso 1: obtener cliente vinculado al usuario
-        try:
-            print(" Buscando cliente vinculado al usuario...")
-            cliente = obtener_cliente_desde_usuario(session, current_user)
-            print(f" Cliente encontrado: ID {cliente.id_cliente}")
-        except HTTPException as e:
-            print(f" Error HTTP al buscar cliente: {e.detail}")
-            raise e
-        except Exception as e:
-            print(f" Error inesperado al buscar cliente: {e}")
-            raise HTTPException(
-                status_code=404,
-                detail=f"[cliente] No se encontró cliente vinculado al usuario {current_user.id_usuario}: {str(e)}"
-            )
-
-        # Paso 2: obtener comunidades del cliente
-        try:
-            print("Buscando comunidades del cliente...")
-            comunidades = obtener_comunidades_del_cliente(session, cliente.id_cliente) # type: ignore
-            print(f" Comunidades encontradas: {[c.nombre for c in comunidades]}")
-        except HTTPException as e:
-            print(f" Error HTTP al obtener comunidades: {e.detail}")
-            raise e
-        except Exception as e:
-            print(f" Error inesperado al obtener comunidades: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"[comunidades] Error al obtener comunidades del cliente {cliente.id_cliente}: {str(e)}"
-            )
-
-        # Paso 3: construir respuesta final con servicios
-        try:
-            print("Construyendo respuesta final con servicios...")
-            respuesta = construir_respuesta_contexto(session, comunidades,cliente.id_cliente) # type: ignore
-            print(" Respuesta construida correctamente.")
-        except HTTPException as e:
-            print(f" Error HTTP al construir respuesta: {e.detail}")
-            raise e
-        except Exception as e:
-            print(f" Error inesperado al construir respuesta: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"[respuesta] Error desconocido al construir la respuesta: {str(e)}"
-            )
-
-        return respuesta
-
-    except HTTPException as e:
-        print(f" HTTPException final capturada: {e.detail}")
-        raise e
-    except Exception as e:
-        print(f" Excepción general capturada: {e}")
-        raise HTTPException(status_code=500, detail=f"[general] Error inesperado: {str(e)}")
+    """
+    Comunidades del cliente con sus servicios y estado de membresía.
+    El cliente sale del token (sin consulta) y el resto se arma en dos consultas.
+    """
+    logger.debug(f"Listando comunidades del cliente {id_cliente}")
+    return obtener_contexto_comunidades(session, id_cliente)
 
 
 
@@ -213,14 +179,14 @@ def obtener_comunidad_detalle(
     session: Session = Depends(get_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    comunidad, imagen_base64 = obtener_comunidad_con_imagen_base64(session, id_comunidad)
+    comunidad, imagen_url = obtener_comunidad_con_imagen_base64(session, id_comunidad)
     servicios_out = obtener_servicios_con_imagen_base64(session, id_comunidad)
 
     return ComunidadDetalleOut(
         id_comunidad=comunidad.id_comunidad, # type: ignore
         nombre=comunidad.nombre,
         slogan=comunidad.slogan,  # Usado como texto descriptivo
-        imagen=imagen_base64,
+        imagen=imagen_url,
         servicios=servicios_out
     )
 
@@ -341,17 +307,13 @@ def obtener_cliente_por_id_cliente(
 ):
     return obtener_cliente_con_usuario_por_id(db, id_cliente)
 
-@router.post("/clientes/carga-masiva")
+@router.post("/clientes/carga-masiva", status_code=202)
 def carga_masiva_clientes(
     archivo: UploadFile = File(...),
-    db: Session = Depends(get_session),
     current_admin: Usuario = Depends(get_current_admin)
 ):
-    try:
-        resultado = procesar_archivo_clientes(db, archivo, current_admin.email)
-        return {"mensaje": "Carga masiva completada", "resumen": resultado}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """Encola la carga; el avance y el resumen se consultan en /api/importaciones/{id_trabajo}."""
+    return respuesta_trabajo(encolar_archivo_clientes(archivo, current_admin.email))
     
 from sqlalchemy import func
 
@@ -383,13 +345,12 @@ def actualizar_datos_cliente(
 @router.post("/recuperar-contrasena/link")
 def solicitar_link_recuperacion(
     datos: SolicitarRecuperacionSchema,
-    bg: BackgroundTasks,  # ← primero los sin default
     db: Session = Depends(get_session)
 ):
     """
     Solicita un enlace de recuperación (token temporal JWT)
     """
-    return solicitar_recuperacion_contrasena_con_link(db, datos.email, bg)
+    return solicitar_recuperacion_contrasena_con_link(db, datos.email)
 
 @router.post("/verificar-token")
 def verificar_token_contrasena(datos: VerificarTokenSchema):
@@ -399,10 +360,9 @@ def verificar_token_contrasena(datos: VerificarTokenSchema):
 @router.post("/reset-password/link")
 def resetear_contrasena_con_link(
     datos: CambioContrasenaSchema,
-    bg: BackgroundTasks,  # ✅ Sin valor por defecto
     db: Session = Depends(get_session)  # ✅ Con valor por defecto
 ):
     """
     Cambia la contraseña usando el token enviado por correo (válido solo si no expiró).
     """
-    return cambiar_contrasena_con_link(db, datos.token, datos.nueva_contrasena, bg)
\ No newline at end of file
+    return cambiar_contrasena_con_link(db, datos.token, datos.nueva_contrasena)
\ No newline at end of file
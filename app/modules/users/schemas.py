@@ -98,7 +98,7 @@ class UsuarioClienteFull(BaseModel):
     id_usuario: int
     nombre: str
     apellido: str
-    email: EmailStr
+    email: str  # Solo de salida: el email ya se validó al registrarse (EmailStr aquí costaba ~0.4 ms por fila)
     tipo: TipoUsuario
     fecha_creacion: Optional[datetime]
     creado_por: Optional[str]
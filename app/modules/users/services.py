@@ -1,22 +1,24 @@
+from sqlalchemy import insert
 from sqlmodel import Session, select
 from app.core.enums import TipoUsuario
 from app.modules.geography.models import Departamento, Distrito
 from app.modules.users.models import Administrador, Usuario, Cliente
+from app.core.importacion import Importador, claves_existentes, como_fecha_hora, como_numero, como_texto, ejecutar_importador, encolar_importacion, valor
+from app.core.logger import logger
 from app.modules.users.schemas import ClienteCreate, ClienteUpdate, ClienteUsuarioFull, UsuarioBase, UsuarioCreate, AdministradorCreate
-from app.core.security import hash_password,create_confirmation_token
+from app.core.security import IMPORTACION_BCRYPT_ROUNDS, hash_password, hash_passwords, create_confirmation_token, pwd_context
 from utils.email_brevo import send_confirmation_email
-from fastapi import HTTPException, UploadFile, status, BackgroundTasks
+from fastapi import HTTPException, UploadFile, status
 from datetime import datetime
-from passlib.context import CryptContext
-from app.modules.communities.schemas import ComunidadContexto
+from app.modules.communities.schemas import ComunidadContexto, nombre_estado_membresia
+from app.modules.media.services import url_media
+from app.modules.services.models import ComunidadXServicio, Servicio
 from app.modules.services.schemas import ProfesionalCreate, ServicioResumen
-from app.modules.communities.services import obtener_servicios_de_comunidad
 from typing import List, Optional, Dict
 from app.modules.communities.models import ClienteXComunidad, Comunidad
 from app.modules.billing.models import Inscripcion
 import base64
 import pandas as pd
-from io import BytesIO
 from datetime import timedelta
 from app.core.security import create_access_token, hash_password, decode_access_token
 from utils.email_brevo import send_reset_link_email, send_password_changed_email
@@ -24,7 +26,6 @@ from jose import JWTError
 import os
 import re
 import pytz
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def crear_usuario(db: Session, usuario: UsuarioCreate):
     hashed_password = pwd_context.hash(usuario.password)
@@ -45,7 +46,7 @@ def crear_usuario(db: Session, usuario: UsuarioCreate):
     db.flush() 
     return db_usuario
 
-def crear_cliente(db: Session, cliente: ClienteCreate, bg: BackgroundTasks):
+def crear_cliente(db: Session, cliente: ClienteCreate):
     usuario_data = UsuarioCreate(
         nombre=cliente.nombre,
         apellido=cliente.apellido,
@@ -73,11 +74,11 @@ def crear_cliente(db: Session, cliente: ClienteCreate, bg: BackgroundTasks):
     db.refresh(db_cliente)
     db.refresh(nuevo_usuario)
     token = create_confirmation_token(nuevo_usuario.email)
-    bg.add_task(send_confirmation_email, nuevo_usuario.email, token)
+    send_confirmation_email(nuevo_usuario.email, token)
     return db_cliente
 
 
-def reenviar_confirmacion(db: Session, email: str, bg: BackgroundTasks):
+def reenviar_confirmacion(db: Session, email: str):
     usuario: Usuario | None = db.exec(
         select(Usuario).where(Usuario.email == email)
     ).first()
@@ -89,7 +90,7 @@ def reenviar_confirmacion(db: Session, email: str, bg: BackgroundTasks):
         raise HTTPException(400, "La cuenta ya está confirmada")
 
     token = create_confirmation_token(usuario.email)
-    bg.add_task(send_confirmation_email, usuario.email, token)
+    send_confirmation_email(usuario.email, token)
     return {"msg": "Se envió un nuevo enlace de confirmación"}
 
 def crear_administrador(db: Session, administrador: AdministradorCreate):
@@ -113,15 +114,18 @@ def crear_administrador(db: Session, administrador: AdministradorCreate):
 
 
 def obtener_cliente_desde_usuario(session: Session, user: Usuario) -> Cliente:
-    print(f" Buscando cliente con id_usuario = {user.id_usuario}...")
+    logger.debug(f" Buscando cliente con id_usuario = {user.id_usuario}...")
 
     try:
         cliente = session.exec(
             select(Cliente).where(Cliente.id_usuario == user.id_usuario)
         ).first()
-        print(f"Cliente encontrado: {cliente}") if cliente else print("⚠️ Cliente no encontrado.")
+        if cliente:
+            logger.debug(f"Cliente encontrado: ID {cliente.id_cliente}")
+        else:
+            logger.warning(f"⚠️ Cliente no encontrado para id_usuario = {user.id_usuario}")
     except Exception as e:
-        print(f"Error al ejecutar la consulta del cliente: {e}")
+        logger.error(f"Error al ejecutar la consulta del cliente: {e}")
         raise HTTPException(status_code=500, detail=f"[cliente] Error en la consulta: {str(e)}")
 
     if not cliente:
@@ -131,7 +135,7 @@ def obtener_cliente_desde_usuario(session: Session, user: Usuario) -> Cliente:
 
 
 def obtener_comunidades_del_cliente(session: Session, id_cliente: int) -> List[Comunidad]:
-    print(f"Buscando comunidades para el cliente con ID {id_cliente}...")
+    logger.debug(f"Buscando comunidades para el cliente con ID {id_cliente}...")
 
     try:
         comunidad_ids = session.exec(
@@ -139,13 +143,13 @@ def obtener_comunidades_del_cliente(session: Session, id_cliente: int) -> List[C
                 ClienteXComunidad.id_cliente == id_cliente
             )
         ).all()
-        print(f" IDs de comunidades encontradas: {comunidad_ids}")
+        logger.debug(f" IDs de comunidades encontradas: {comunidad_ids}")
     except Exception as e:
-        print(f"Error al obtener IDs de comunidades: {e}")
+        logger.error(f"Error al obtener IDs de comunidades: {e}")
         raise HTTPException(status_code=500, detail=f"[comunidades] Error al obtener IDs: {str(e)}")
 
     if not comunidad_ids:
-        print(" No se encontraron comunidades para este cliente.")
+        logger.debug(" No se encontraron comunidades para este cliente.")
         return []
 
     try:
@@ -155,123 +159,125 @@ def obtener_comunidades_del_cliente(session: Session, id_cliente: int) -> List[C
                 Comunidad.estado == True
             )
         ).all()
-        print(f"Comunidades activas encontradas: {[c.nombre for c in comunidades]}")
+        logger.debug(f"Comunidades activas encontradas: {[c.nombre for c in comunidades]}")
     except Exception as e:
-        print(f"Error al obtener detalles de comunidades: {e}")
+        logger.error(f"Error al obtener detalles de comunidades: {e}")
         raise HTTPException(status_code=500, detail=f"[comunidades] Error al obtener comunidades activas: {str(e)}")
 
     return comunidades # type: ignore
 
 
-def tiene_membresia_activa(session: Session, id_cliente: int, id_comunidad: int) -> int:
-    # ✅ ELIMINAR import local conflictivo - usar el import global
-    
-    inscripcion = session.exec(
-        select(Inscripcion)
-        .where(
-            Inscripcion.id_cliente == id_cliente,
-            Inscripcion.id_comunidad == id_comunidad
-        )
-        .order_by(Inscripcion.fecha_creacion.desc()) # type: ignore
-    ).first()
-    
-    if not inscripcion:
-        return None # type: ignore
-    
-    # 🔥 NUEVA LÓGICA: Reactivar automáticamente si hay suspensión expirada
-    if inscripcion.estado == 0:  # Congelado
-        from app.modules.billing.models import Suspension
-        
-        # ✅ USAR la misma lógica de datetime que en calcular_estado_suspension
-        lima_tz = pytz.timezone("America/Lima")
-        ahora = datetime.now(lima_tz).replace(tzinfo=None)  # Convertir a naive datetime para comparar
-        
-        # Buscar suspensión expirada (aceptada pero ya terminó)
-        suspension_expirada = session.exec(
-            select(Suspension)
-            .where(
-                Suspension.id_inscripcion == inscripcion.id_inscripcion,
-                Suspension.estado == 1,  # Aceptada
-                Suspension.fecha_fin <= ahora  # Ya terminó
-            )
-        ).first()
-        
-        if suspension_expirada:
-            # ✨ REACTIVAR AUTOMÁTICAMENTE
-            inscripcion.estado = 1  # Activa
-            inscripcion.modificado_por = "sistema_auto"
-            inscripcion.fecha_modificacion = datetime.utcnow()
-            session.add(inscripcion)
-            session.commit()
-            session.refresh(inscripcion)
-            print(f"🔄 Membresía reactivada automáticamente - Inscripción ID: {inscripcion.id_inscripcion}")
-    
-    # Si la inscripción no está activa, retornar su estado
-    if inscripcion.estado != 1:  # 1 = Activa
-        return inscripcion.estado # type: ignore
-    
-    # Si la inscripción está activa, verificar si hay suspensión vigente
+def _suspension_en_curso():
+    """EXISTS correlacionado: la inscripción tiene una suspensión aceptada vigente (hora de Lima)."""
     from app.modules.billing.models import Suspension
-    
+
     # ✅ USAR la misma lógica de datetime que en calcular_estado_suspension
     lima_tz = pytz.timezone("America/Lima")
     ahora = datetime.now(lima_tz).replace(tzinfo=None)  # Convertir a naive datetime para comparar
-    
-    # 🔍 DEBUG: Agregar logs para verificar fechas
-    print(f"🕐 [DEBUG] Verificando suspensión - Fecha actual Lima: {ahora}")
-    
-    suspension_activa = session.exec(
-        select(Suspension)
+
+    return (
+        select(Suspension.id_suspension)
         .where(
-            Suspension.id_inscripcion == inscripcion.id_inscripcion,
+            Suspension.id_inscripcion == Inscripcion.id_inscripcion,
             Suspension.estado == 1,  # Aceptada
             Suspension.fecha_inicio <= ahora,  # Ya comenzó
             Suspension.fecha_fin > ahora  # Aún no terminó
         )
-    ).first()
-    
-    if suspension_activa:
-        print(f"🔍 [DEBUG] Suspensión encontrada - Inicio: {suspension_activa.fecha_inicio}, Fin: {suspension_activa.fecha_fin}")
-        # Hay una suspensión activa, retornar estado especial
-        return 2  # 2 = Suspendida (puedes usar el código que prefieras)
-    
-    # No hay suspensión activa, la membresía está disponible
-    return inscripcion.estado # type: ignore
-
-def construir_respuesta_contexto(
-    session: Session,
-    comunidades: List[Comunidad],
-    id_cliente: int
-) -> List[ComunidadContexto]:
-    respuesta = []
-
-    for comunidad in comunidades:
-        print(f"Procesando comunidad ID {comunidad.id_comunidad}: {comunidad.nombre}")
-
-        try:
-            servicios = obtener_servicios_de_comunidad(session, comunidad.id_comunidad) # type: ignore
-            print(f"Servicios obtenidos para '{comunidad.nombre}': {[s.nombre for s in servicios]}")
-
-            servicios_resumen = [ServicioResumen(nombre=s.nombre,modalidad=s.modalidad) for s in servicios]
-
-            # 🔹 Determinar el estado de membresía individualmente
-            estado = tiene_membresia_activa(session, id_cliente, comunidad.id_comunidad) # type: ignore
-            
-            comunidad_contexto = ComunidadContexto.from_orm_with_base64(
-                comunidad=comunidad,
-                servicios=servicios_resumen,
-                estado_membresia=estado
-            )
-            respuesta.append(comunidad_contexto)
+        .exists()
+    )
 
-        except Exception as e:
-            print(f" Error al procesar comunidad ID {comunidad.id_comunidad}: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error en comunidad '{comunidad.nombre}': {str(e)}"
-            )
+def _estado_membresia(estado: Optional[int], suspendida: bool) -> Optional[int]:
+    # Activa pero con suspensión vigente que la tarea aún no congeló
+    if estado == 1 and suspendida:
+        return 2  # 2 = Suspendida
+    return estado
 
-    return respuesta
+def _consulta_estado_membresia(id_cliente: int, id_comunidad: int):
+    return (
+        select(Inscripcion.estado, _suspension_en_curso())
+        .where(
+            Inscripcion.id_cliente == id_cliente,
+            Inscripcion.id_comunidad == id_comunidad
+        )
+        .order_by(Inscripcion.fecha_creacion.desc()) # type: ignore
+    )
+
+def tiene_membresia_activa(session: Session, id_cliente: int, id_comunidad: int) -> int:
+    """
+    Estado de la última inscripción del cliente en la comunidad (2 si tiene una suspensión
+    aceptada en curso). Solo lee: congelar/reactivar lo hace la tarea programada
+    billing.services.tarea_transiciones_membresia.
+    """
+    fila = session.exec(_consulta_estado_membresia(id_cliente, id_comunidad)).first()
+
+    if not fila:
+        return None # type: ignore
+    return _estado_membresia(*fila) # type: ignore
+
+def obtener_contexto_comunidades(session: Session, id_cliente: int) -> List[ComunidadContexto]:
+    """
+    Comunidades activas del cliente con sus servicios activos y el estado de membresía,
+    en dos consultas sin importar cuántas comunidades tenga.
+    """
+    # Última inscripción del cliente en cada comunidad (mismo criterio que tiene_membresia_activa)
+    ultima_inscripcion = (
+        select(Inscripcion.id_inscripcion)
+        .where(
+            Inscripcion.id_cliente == id_cliente,
+            Inscripcion.id_comunidad == Comunidad.id_comunidad
+        )
+        .order_by(Inscripcion.fecha_creacion.desc(), Inscripcion.id_inscripcion.desc()) # type: ignore
+        .limit(1)
+        .correlate(Comunidad)
+        .scalar_subquery()
+    )
+    comunidades = session.exec(
+        select(
+            Comunidad.id_comunidad,
+            Comunidad.nombre,
+            Comunidad.slogan,
+            Comunidad.imagen_hash,
+            Inscripcion.estado,
+            _suspension_en_curso().label("suspendida"),
+        )
+        .join(ClienteXComunidad, ClienteXComunidad.id_comunidad == Comunidad.id_comunidad)
+        .outerjoin(Inscripcion, Inscripcion.id_inscripcion == ultima_inscripcion)
+        .where(
+            ClienteXComunidad.id_cliente == id_cliente,
+            Comunidad.estado == True
+        )
+        .order_by(Comunidad.id_comunidad)
+    ).all()
+    if not comunidades:
+        return []
+
+    servicios_por_comunidad: Dict[int, List[ServicioResumen]] = {c.id_comunidad: [] for c in comunidades}
+    servicios = session.exec(
+        select(ComunidadXServicio.id_comunidad, Servicio.nombre, Servicio.modalidad)
+        .join(Servicio, Servicio.id_servicio == ComunidadXServicio.id_servicio)
+        .where(
+            ComunidadXServicio.id_comunidad.in_(servicios_por_comunidad), # type: ignore
+            ComunidadXServicio.estado == 1,
+            Servicio.estado == True  # Solo servicios activos
+        )
+        .order_by(ComunidadXServicio.id_comunidad, Servicio.id_servicio)
+    ).all()
+    for servicio in servicios:
+        servicios_por_comunidad[servicio.id_comunidad].append(
+            ServicioResumen(nombre=servicio.nombre, modalidad=servicio.modalidad)
+        )
+
+    return [
+        ComunidadContexto(
+            id_comunidad=c.id_comunidad,
+            nombre=c.nombre,
+            slogan=c.slogan,
+            imagen=url_media(c.imagen_hash),
+            servicios=servicios_por_comunidad[c.id_comunidad],
+            estado_membresia=nombre_estado_membresia(_estado_membresia(c.estado, c.suspendida)),
+        )
+        for c in comunidades
+    ]
 
 
 def modificar_cliente(db: Session, id_usuario: int, data: dict, current_admin):
@@ -349,82 +355,118 @@ def obtener_cliente_con_usuario_por_id(db: Session, id_cliente: int):
         usuario=usuario # type: ignore
     )
 
-def procesar_archivo_clientes(db: Session, archivo: UploadFile, creado_por: str):
-    df = pd.read_excel(BytesIO(archivo.file.read()), engine="openpyxl")
-
-    resumen = {
-        "insertados": 0,
-        "omitidos": 0,
-        "errores": []
-    }
-
-    # Expresión regular para validar email
-    email_regex = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
-
-    for idx, fila in df.iterrows():
-        try:
-            fila_num = idx + 2  # +2 porque pandas empieza en 0 y la cabecera es la 1
-
-            if pd.isna(fila['email']) or pd.isna(fila['num_doc']): # type: ignore
-                resumen["errores"].append(f"Fila {fila_num}: No se insertó porque el correo o número de documento está vacío.")
-                resumen["omitidos"] += 1
-                continue
-
-            # Validar formato de email
-            if not email_regex.match(str(fila['email'])):
-                resumen["errores"].append(f"Fila {fila_num}: No se insertó porque el formato del correo es inválido ({fila['email']}).")
-                resumen["omitidos"] += 1
-                continue
-
-            # Verifica unicidad de email y num_doc
-            existe_email = db.exec(select(Usuario).where(Usuario.email == fila['email'])).first()
-            existe_doc = db.exec(select(Cliente).where(Cliente.num_doc == fila['num_doc'])).first()
-            if existe_email:
-                resumen["errores"].append(f"Fila {fila_num}: No se insertó porque el correo ya existe en el sistema ({fila['email']}).")
-                resumen["omitidos"] += 1
-                continue
-            if existe_doc:
-                resumen["errores"].append(f"Fila {fila_num}: No se insertó porque el número de documento ya existe en el sistema ({fila['num_doc']}).")
-                resumen["omitidos"] += 1
-                continue
-
-            usuario = Usuario(
-                nombre=fila['nombre'], # type: ignore
-                apellido=fila['apellido'], # type: ignore
-                email=fila['email'], # type: ignore
-                password=hash_password(fila['password']), # type: ignore
-                tipo="Cliente", # type: ignore
-                fecha_creacion=datetime.utcnow(),
-                creado_por=creado_por,
-                estado=True
+EMAIL_REGEX = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+
+
+class ImportadorClientes(Importador):
+    columnas = (
+        "nombre", "apellido", "email", "password", "tipo_documento", "num_doc", "numero_telefono",
+        "id_departamento", "id_distrito", "fecha_nac", "talla", "peso",
+    )
+    prefijo_error_escritura = "No se insertó por error inesperado: "
+    # Costo de bcrypt de las cuentas importadas; se rehashean con el normal en el primer login
+    rondas_hash = IMPORTACION_BCRYPT_ROUNDS
+    obligatorias = ("nombre", "apellido", "password", "tipo_documento", "numero_telefono", "id_departamento", "id_distrito", "talla", "peso")
+
+    def __init__(self, db: Session, creado_por: str, **kwargs):
+        super().__init__(db, creado_por, **kwargs)
+        # Emails y documentos ya aceptados en partes anteriores del archivo
+        self.emails_vistos: set = set()
+        self.docs_vistos: set = set()
+
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        for columna in ("nombre", "apellido", "email", "password", "tipo_documento", "num_doc", "numero_telefono", "direccion", "genero"):
+            df[columna] = como_texto(df[columna]) if columna in df else None
+        self.invalidos = {}
+        for columna in ("id_departamento", "id_distrito", "talla", "peso"):
+            df[columna], self.invalidos[columna] = como_numero(df[columna])
+        df["fecha_nac"], self.invalidos["fecha_nac"] = como_fecha_hora(df["fecha_nac"])
+        df["_email"] = df["email"].str.lower()
+        return df
+
+    def validar(self, df: pd.DataFrame) -> None:
+        self.rechazar(
+            df, df["email"].isna() | df["num_doc"].isna(),
+            lambda fila, d: "No se insertó porque el correo o número de documento está vacío.",
+        )
+        formato_valido = df["email"].str.match(EMAIL_REGEX).fillna(False).astype(bool)
+        self.rechazar(
+            df, ~formato_valido,
+            lambda fila, d: f"No se insertó porque el formato del correo es inválido ({d['email']}).",
+        )
+        for columna, invalidos in self.invalidos.items():
+            self.rechazar(
+                df, invalidos,
+                lambda fila, d, columna=columna: f"No se insertó por error inesperado: valor inválido en '{columna}'.",
+                omitir=False,
             )
-            db.add(usuario)
-            db.commit()
-            db.refresh(usuario)
-
-            cliente = Cliente(
-                id_usuario=usuario.id_usuario, # type: ignore
-                tipo_documento=fila['tipo_documento'], # type: ignore
-                num_doc=fila['num_doc'], # type: ignore
-                numero_telefono=fila['numero_telefono'], # type: ignore
-                id_departamento=int(fila['id_departamento']), # type: ignore
-                id_distrito=int(fila['id_distrito']), # type: ignore
-                direccion=fila.get('direccion'),
-                fecha_nac=fila['fecha_nac'], # type: ignore
-                genero=fila.get('genero'),
-                talla=float(fila['talla']), # type: ignore
-                peso=float(fila['peso']) # type: ignore
+        for columna in self.obligatorias:
+            self.rechazar(
+                df, df[columna].isna(),
+                lambda fila, d, columna=columna: f"No se insertó por error inesperado: falta el valor de '{columna}'.",
+                omitir=False,
             )
-            db.add(cliente)
-            db.commit()
 
-            resumen["insertados"] += 1
+    def validar_contra_bd(self, df: pd.DataFrame) -> None:
+        emails_bd = {e.lower() for e in claves_existentes(self.db, Usuario.email, df["email"])}
+        docs_bd = claves_existentes(self.db, Cliente.num_doc, df["num_doc"])
+
+        # Repetidos dentro del archivo: se acepta la primera aparición, como si ya existiera
+        emails_tomados = emails_bd | self.emails_vistos
+        self.rechazar(
+            df, df["_email"].isin(emails_tomados) | df["_email"].duplicated(),
+            lambda fila, d: f"No se insertó porque el correo ya existe en el sistema ({d['email']}).",
+        )
+        restantes = self.pendientes(df)
+        docs_tomados = docs_bd | self.docs_vistos
+        self.rechazar(
+            restantes, restantes["num_doc"].isin(docs_tomados) | restantes["num_doc"].duplicated(),
+            lambda fila, d: f"No se insertó porque el número de documento ya existe en el sistema ({d['num_doc']}).",
+        )
+        aceptadas = self.pendientes(df)
+        self.emails_vistos.update(aceptadas["_email"])
+        self.docs_vistos.update(aceptadas["num_doc"])
+
+    def hashear(self, passwords: List[str]) -> List[str]:
+        return hash_passwords(passwords, self.rondas_hash)
+
+    def insertar(self, lote: pd.DataFrame) -> None:
+        ahora = datetime.utcnow()
+        hashes = self.hashear(lote["password"].tolist())
+        self.db.exec(insert(Usuario), params=[  # type: ignore[call-overload]
+            {
+                "nombre": d.nombre, "apellido": d.apellido, "email": d.email, "password": hash_,
+                "tipo": "Cliente", "fecha_creacion": ahora, "creado_por": self.creado_por, "estado": True,
+            }
+            for d, hash_ in zip(lote.itertuples(), hashes)
+        ])
+        ids = dict(self.db.exec(
+            select(Usuario.email, Usuario.id_usuario).where(Usuario.email.in_(lote["email"].tolist()))  # type: ignore
+        ).all())
+        self.db.exec(insert(Cliente), params=[  # type: ignore[call-overload]
+            {
+                "id_usuario": ids[d.email],
+                "tipo_documento": d.tipo_documento,
+                "num_doc": d.num_doc,
+                "numero_telefono": d.numero_telefono,
+                "id_departamento": int(d.id_departamento),
+                "id_distrito": int(d.id_distrito),
+                "direccion": d.direccion,
+                "fecha_nac": valor(d.fecha_nac).date() if valor(d.fecha_nac) else None,
+                "genero": d.genero,
+                "talla": float(d.talla),
+                "peso": float(d.peso),
+            }
+            for d in lote.itertuples()
+        ])
+
+
+def procesar_archivo_clientes(db: Session, archivo: UploadFile, creado_por: str):
+    return ejecutar_importador(ImportadorClientes(db, creado_por), archivo)
 
-        except Exception as e:
-            db.rollback()
-            resumen["errores"].append(f"Fila {fila_num}: No se insertó por error inesperado: {str(e)}")
 
-    return resumen
+def encolar_archivo_clientes(archivo: UploadFile, creado_por: str):
+    return encolar_importacion("clientes", archivo, creado_por, lambda db: ImportadorClientes(db, creado_por))
 
 """sercies cambio de contraseña"""
 RESET_LINK_EXPIRATION_MINUTES = 5
@@ -432,7 +474,7 @@ FRONTEND_RESET_URL = "http://localhost:4200/autenticacion/reset-password"
 
 
 
-def solicitar_recuperacion_contrasena_con_link(db: Session, email: str, bg: BackgroundTasks) -> dict:
+def solicitar_recuperacion_contrasena_con_link(db: Session, email: str) -> dict:
     """
     Solicita recuperación de contraseña por enlace (token JWT).
     Si el correo existe, envía un link con token válido por 30 minutos.
@@ -457,14 +499,14 @@ def solicitar_recuperacion_contrasena_con_link(db: Session, email: str, bg: Back
     link = f"{FRONTEND_RESET_URL}?token={token}"
 
     try:
-        bg.add_task(send_reset_link_email, usuario.email, usuario.nombre, link)
+        send_reset_link_email(usuario.email, usuario.nombre, link)
         return {
             "mensaje": "Enlace de recuperación enviado con éxito. La vigencia de enlace es de 5 minutos",
             "email_enviado": True,
             "token": token  # ✅ Coma agregada arriba
         }
     except Exception as e:
-        print(f"Error al enviar el correo: {e}")
+        logger.error(f"Error al enviar el correo: {e}")
         return {
             "mensaje": "No se pudo enviar el correo de recuperación.",
             "email_enviado": False
@@ -501,7 +543,7 @@ def verificar_token_reset_password(token: str) -> dict:
             "mensaje": "El enlace ya expiró o es inválido."
         }
 
-def cambiar_contrasena_con_link(db: Session, token: str, nueva_contrasena: str, bg: BackgroundTasks) -> dict:
+def cambiar_contrasena_con_link(db: Session, token: str, nueva_contrasena: str) -> dict:
     try:
         payload = decode_access_token(token)
 
@@ -527,11 +569,11 @@ def cambiar_contrasena_con_link(db: Session, token: str, nueva_contrasena: str,
         db.add(usuario)
         db.commit()
 
-        bg.add_task(send_password_changed_email, usuario.email, usuario.nombre)
+        send_password_changed_email(usuario.email, usuario.nombre)
 
 
         return {"mensaje": "Tu contraseña fue actualizada correctamente.", "exito": True}
 
     except Exception as e:
-        print(f"Error en cambiar_contrasena_con_link: {e}")
+        logger.error(f"Error en cambiar_contrasena_con_link: {e}")
         return {"mensaje": "El enlace ya expiró o es inválido. Solicita uno nuevo.", "exito": False}
\ No newline at end of file
@@ -66,6 +66,7 @@ CREATE TABLE IF NOT EXISTS `CommuConnect_1`.`distrito` (
   `id_departamento` INT NOT NULL,
   `nombre` VARCHAR(45) NOT NULL,
   `imagen` LONGBLOB NULL,
+  `imagen_hash` CHAR(64) NULL,
   PRIMARY KEY (`id_distrito`),
   CONSTRAINT `fk_departamento_dist`
     FOREIGN KEY (`id_departamento`)
@@ -120,6 +121,7 @@ CREATE TABLE IF NOT EXISTS `CommuConnect_1`.`comunidad` (
   `nombre` VARCHAR(100) NOT NULL,
   `slogan` VARCHAR(350) NULL,
   `imagen` LONGBLOB NULL,
+  `imagen_hash` CHAR(64) NULL,
   `fecha_creacion` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `creado_por` VARCHAR(50) NULL,
   `fecha_modificacion` TIMESTAMP NULL,
@@ -137,6 +139,7 @@ CREATE TABLE IF NOT EXISTS `CommuConnect_1`.`servicio` (
   `nombre` VARCHAR(100) NOT NULL,
   `descripcion` VARCHAR(100) NULL,
   `imagen` LONGBLOB NULL,
+  `imagen_hash` CHAR(64) NULL,
   `modalidad` ENUM('Virtual','Presencial') NULL,
   `fecha_creacion` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `creado_por` VARCHAR(50) NULL,
@@ -259,6 +262,7 @@ CREATE TABLE IF NOT EXISTS `CommuConnect_1`.`sesion_presencial` (
   `id_sesion` INT NULL,
   `id_local` INT NULL,
   `capacidad` INT NULL,
+  `reservas_confirmadas` INT NOT NULL DEFAULT 0,
   `fecha_creacion` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `creado_por` VARCHAR(50) NULL,
   `fecha_modificacion` TIMESTAMP NULL,
@@ -505,6 +509,16 @@ CREATE TABLE IF NOT EXISTS `CommuConnect_1`.`comunidadxplan` (
         ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- -----------------------------------------------------
+-- Índices secundarios de las consultas frecuentes
+-- -----------------------------------------------------
+CREATE INDEX `ix_reserva_sesion_estado` ON `CommuConnect_1`.`reserva` (`id_sesion`, `estado_reserva`);
+CREATE INDEX `ix_reserva_cliente_estado` ON `CommuConnect_1`.`reserva` (`id_cliente`, `estado_reserva`);
+CREATE INDEX `ix_sesion_servicio_tipo_inicio` ON `CommuConnect_1`.`sesion` (`id_servicio`, `tipo`, `inicio`);
+CREATE INDEX `ix_inscripcion_cliente_comunidad_estado` ON `CommuConnect_1`.`inscripcion` (`id_cliente`, `id_comunidad`, `estado`);
+CREATE INDEX `ix_sesion_virtual_profesional` ON `CommuConnect_1`.`sesion_virtual` (`id_profesional`);
+CREATE INDEX `ix_suspension_inscripcion_estado_fechas` ON `CommuConnect_1`.`suspension` (`id_inscripcion`, `estado`, `fecha_inicio`, `fecha_fin`);
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
@@ -0,0 +1,16 @@
+-- Migración: contador persistido de reservas confirmadas por sesión presencial
+-- Después de aplicarla, el contador se mantiene al reservar/cancelar y se puede
+-- reparar con POST /api/reservations/admin/reconciliar-contadores
+
+USE `CommuConnect_1`;
+
+ALTER TABLE `sesion_presencial`
+  ADD COLUMN `reservas_confirmadas` INT NOT NULL DEFAULT 0 AFTER `capacidad`;
+
+UPDATE `sesion_presencial` sp
+SET sp.`reservas_confirmadas` = (
+  SELECT COUNT(*)
+  FROM `reserva` r
+  WHERE r.`id_sesion` = sp.`id_sesion`
+    AND r.`estado_reserva` = 'confirmada'
+);
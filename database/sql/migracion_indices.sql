@@ -0,0 +1,12 @@
+-- Migración: índices compuestos para las consultas frecuentes de reservas y billing
+-- Deben coincidir con los Index(...) declarados en los modelos.
+-- Verificar con: python -m utils.index_advisor
+
+USE `CommuConnect_1`;
+
+CREATE INDEX `ix_reserva_sesion_estado` ON `reserva` (`id_sesion`, `estado_reserva`);
+CREATE INDEX `ix_reserva_cliente_estado` ON `reserva` (`id_cliente`, `estado_reserva`);
+CREATE INDEX `ix_sesion_servicio_tipo_inicio` ON `sesion` (`id_servicio`, `tipo`, `inicio`);
+CREATE INDEX `ix_inscripcion_cliente_comunidad_estado` ON `inscripcion` (`id_cliente`, `id_comunidad`, `estado`);
+CREATE INDEX `ix_sesion_virtual_profesional` ON `sesion_virtual` (`id_profesional`);
+CREATE INDEX `ix_suspension_inscripcion_estado_fechas` ON `suspension` (`id_inscripcion`, `estado`, `fecha_inicio`, `fecha_fin`);
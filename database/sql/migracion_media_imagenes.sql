@@ -0,0 +1,11 @@
+-- Migración: imágenes en almacén de media direccionado por contenido
+-- 1) Ejecutar este script sobre la BD existente.
+-- 2) Ejecutar `python -m utils.migrar_imagenes_media` para copiar los BLOB actuales
+--    al almacén (MEDIA_ROOT) y completar `imagen_hash`.
+-- Las columnas `imagen` se mantienen por compatibilidad y quedan en NULL tras la migración.
+
+USE `CommuConnect_1`;
+
+ALTER TABLE `comunidad` ADD COLUMN `imagen_hash` CHAR(64) NULL AFTER `imagen`;
+ALTER TABLE `servicio` ADD COLUMN `imagen_hash` CHAR(64) NULL AFTER `imagen`;
+ALTER TABLE `distrito` ADD COLUMN `imagen_hash` CHAR(64) NULL AFTER `imagen`;
@@ -6,6 +6,9 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 from typing import AsyncGenerator
 
+# Perfil de pruebas (pool chico, sin echo) salvo que se indique otro
+os.environ.setdefault("APP_ENV", "test")
+
 # Add the project root to the path to allow imports from 'app'
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import pytest
 from httpx import AsyncClient
 from sqlmodel import Session, select
@@ -48,8 +49,14 @@ async def test_archivo_real_clientes_demo_cambiado(async_client: AsyncClient, ad
         print(f"\n📊 Status Code: {response.status_code}")
         print(f"📝 Response Headers: {dict(response.headers)}")
         
-        if response.status_code == 200:
+        if response.status_code == 202:
+            # La carga se procesa como trabajo: se consulta su estado hasta que termine
             result = response.json()
+            for _ in range(600):
+                result = (await async_client.get(result["url_estado"], headers=headers)).json()
+                if result.get("estado") in ("completado", "fallido"):
+                    break
+                await asyncio.sleep(0.1)
             print("✅ Carga masiva exitosa!")
             print(f"📈 Resumen: {result}")
         else:
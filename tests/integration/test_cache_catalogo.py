@@ -0,0 +1,105 @@
+"""
+Caché de lectura del catálogo: la segunda lectura no consulta la BD y cualquier
+commit que toque las tablas del catálogo vacía solo las cachés que dependen de ellas.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401
+from app.core.catalogo import caches_catalogo, estadisticas_catalogo, limpiar_catalogo
+from app.modules.billing.models import Plan
+from app.modules.billing.services import listar_planes_catalogo
+from app.modules.communities.models import Comunidad
+from app.modules.communities.services import get_comunidades_con_servicios_sin_imagen
+
+
+@pytest.fixture
+def bd():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Plan(id_plan=1, titulo="Mensual", descripcion="d", precio=50, creado_por="t"))
+        session.add(Comunidad(id_comunidad=1, nombre="Runners", creado_por="t"))
+        session.commit()
+    limpiar_catalogo()
+    yield engine
+    limpiar_catalogo()
+    engine.dispose()
+
+
+@contextmanager
+def contar_consultas(engine):
+    consultas = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", _registrar)
+
+
+def _stats(nombre: str) -> dict:
+    return {s["nombre"]: s for s in estadisticas_catalogo()}[nombre]
+
+
+def test_segunda_lectura_sale_de_memoria(bd):
+    antes = _stats("catalogo.listar_planes_catalogo")
+    with Session(bd) as session:
+        with contar_consultas(bd) as consultas:
+            primera = listar_planes_catalogo(session)
+            assert len(consultas) == 1
+            assert listar_planes_catalogo(session) == primera
+            assert get_comunidades_con_servicios_sin_imagen(session)[0]["nombre"] == "Runners"
+            total = len(consultas)
+            get_comunidades_con_servicios_sin_imagen(session)
+            assert len(consultas) == total
+
+    despues = _stats("catalogo.listar_planes_catalogo")
+    assert despues["aciertos"] - antes["aciertos"] == 1
+    assert despues["fallos"] - antes["fallos"] == 1
+
+
+def test_commit_invalida_solo_las_tablas_tocadas(bd):
+    with Session(bd) as session:
+        listar_planes_catalogo(session)
+        get_comunidades_con_servicios_sin_imagen(session)
+
+        plan = session.get(Plan, 1)
+        plan.titulo = "Trimestral"
+        session.add(plan)
+        session.commit()
+
+        assert len(caches_catalogo["catalogo.listar_planes_catalogo"]) == 0
+        assert len(caches_catalogo["catalogo.get_comunidades_con_servicios_sin_imagen"]) == 1
+        assert listar_planes_catalogo(session).items[0].titulo == "Trimestral"
+
+
+def test_rollback_no_invalida(bd):
+    with Session(bd) as session:
+        listar_planes_catalogo(session)
+        session.add(Plan(titulo="Anual", descripcion="d", precio=400, creado_por="t"))
+        session.flush()
+        session.rollback()
+    assert len(caches_catalogo["catalogo.listar_planes_catalogo"]) == 1
+
+
+def test_update_masivo_invalida(bd):
+    with Session(bd) as session:
+        listar_planes_catalogo(session)
+        session.exec(update(Plan).values(precio=60))  # type: ignore
+        session.commit()
+        assert len(caches_catalogo["catalogo.listar_planes_catalogo"]) == 0
+        assert listar_planes_catalogo(session).items[0].precio == 60
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.cache import CacheTTL
+from app.core.db import engine
+from app.core.security import create_access_token, decode_access_token
+from app.core.cache import hay_backend_compartido
+from app.modules.auth.services import PRINCIPAL_CACHE_TTL_LOCAL, cache_principales, resolver_principal
+from app.modules.users.models import Administrador, Usuario
+
+
+@contextmanager
+def contar_consultas():
+    consultas = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", _registrar)
+
+
+@pytest.fixture(name="usuario")
+def usuario_fixture():
+    with Session(engine) as db:
+        usuario = Usuario(
+            nombre="Cache", apellido="Principal", email=f"cache_{uuid.uuid4().hex[:8]}@test.com",
+            password="x", tipo="Administrador",
+        )
+        db.add(usuario)
+        db.commit()
+        db.refresh(usuario)
+
+    yield usuario
+
+    with Session(engine) as db:
+        for admin in db.query(Administrador).filter(Administrador.id_usuario == usuario.id_usuario).all():
+            db.delete(admin)
+        db.delete(db.get(Usuario, usuario.id_usuario))
+        db.commit()
+
+
+def test_cache_ttl_expira_y_desaloja_lru():
+    cache = CacheTTL("test_lru", max_items=2, ttl=1, backend=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1        # "a" pasa a ser la más reciente
+    cache.set("c", 3)                 # desaloja "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    time.sleep(1.1)
+    assert cache.get("a") is None
+    assert cache.estadisticas()["aciertos"] == 2
+
+
+def test_una_sola_consulta_por_token(usuario):
+    cache_principales.clear()
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(str(usuario.id_usuario))}"}
+
+    conteos = []
+    for _ in range(3):
+        with contar_consultas() as consultas:
+            response = client.get("/api/auth/validar-token", headers=headers)
+        assert response.status_code == 200
+        conteos.append(len(consultas))
+
+    print(f"📊 Consultas por petición autenticada: {conteos}")
+    assert conteos == [1, 0, 0]
+
+
+def test_cambio_de_admin_invalida_principal(usuario):
+    cache_principales.clear()
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(str(usuario.id_usuario))}"}
+
+    assert client.get("/api/billing/suspensiones/todas-con-estado", headers=headers).status_code == 403
+
+    with Session(engine) as db:
+        db.add(Administrador(id_usuario=usuario.id_usuario))
+        db.commit()
+
+    assert client.get("/api/billing/suspensiones/todas-con-estado", headers=headers).status_code == 200
+
+
+def test_token_incluye_rol_e_id_cliente():
+    token = create_access_token("1", extra_claims={"rol": "Cliente", "id_cliente": 7})
+    payload = decode_access_token(token)
+    assert payload["rol"] == "Cliente"
+    assert payload["id_cliente"] == 7
+
+
+def test_principal_sin_password_y_se_carga_al_usarlo(usuario):
+    cache_principales.clear()
+    with Session(engine) as db:
+        principal = resolver_principal(db, usuario.id_usuario)
+        assert "password" not in principal.datos_usuario
+        # Quien necesita el hash (cambiar contraseña) lo lee de la BD
+        assert principal.usuario_en(db).password == "x"
+
+
+@pytest.mark.skipif(hay_backend_compartido(), reason="con Redis el TTL puede durar lo mismo que el token")
+def test_ttl_corto_sin_backend_compartido():
+    if "PRINCIPAL_CACHE_TTL" not in os.environ:
+        assert cache_principales.ttl == PRINCIPAL_CACHE_TTL_LOCAL
+    assert cache_principales.backend is None
@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import pandas as pd
 import pytest
 from io import BytesIO
@@ -60,6 +61,15 @@ def create_test_excel_invalid():
     
     return excel_buffer
 
+async def esperar_resumen(async_client: AsyncClient, headers: dict, respuesta: dict) -> dict:
+    """La carga se procesa como trabajo: espera a que termine y devuelve el trabajo con su resumen."""
+    for _ in range(600):
+        trabajo = (await async_client.get(respuesta["url_estado"], headers=headers)).json()
+        if trabajo["estado"] in ("completado", "fallido"):
+            return trabajo
+        await asyncio.sleep(0.1)
+    raise AssertionError("La carga masiva no terminó")
+
 def test_estructura_excel():
     """Prueba que podemos crear un Excel con la estructura correcta"""
     excel_file = create_test_excel()
@@ -103,8 +113,8 @@ async def test_endpoint_carga_masiva_exitosa(async_client: AsyncClient, admin_to
     
     print(f"📊 Status Code: {response.status_code}")
     
-    if response.status_code == 200:
-        result = response.json()
+    if response.status_code == 202:
+        result = await esperar_resumen(async_client, headers, response.json())
         print("✅ Carga masiva exitosa!")
         print(f"📈 Resumen: {result}")
         
@@ -138,8 +148,8 @@ async def test_endpoint_carga_masiva_datos_invalidos(async_client: AsyncClient,
     
     print(f"📊 Status Code para datos inválidos: {response.status_code}")
     
-    if response.status_code == 200:
-        result = response.json()
+    if response.status_code == 202:
+        result = await esperar_resumen(async_client, headers, response.json())
         print(f"📈 Response: {result}")
         
         # Debería procesar algunos y omitir otros
@@ -1,4 +1,5 @@
 import os
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -28,8 +29,13 @@ def test_carga_masiva_profesionales(auth_headers):
             headers=auth_headers
         )
 
-    assert response.status_code == 200, f"Error HTTP: {response.text}"
-    data = response.json()
+    assert response.status_code == 202, f"Error HTTP: {response.text}"
+    # La carga se procesa como trabajo: se consulta su estado hasta que termine
+    for _ in range(600):
+        data = client.get(response.json()["url_estado"], headers=auth_headers).json()
+        if data["estado"] in ("completado", "fallido"):
+            break
+        time.sleep(0.1)
     print("\nRespuesta del endpoint /api/services/carga-masiva:")
     print(data)
 
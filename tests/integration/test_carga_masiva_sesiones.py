@@ -1,4 +1,5 @@
 import os
+import time
 import pytest
 from httpx import Response
 from fastapi.testclient import TestClient
@@ -49,9 +50,14 @@ def test_carga_masiva_sesiones_virtuales(auth_headers):
     print("\n📦 JSON de respuesta:")
     print(data)
 
-    # Validar respuesta
-    assert response.status_code == 200, f"❌ Error HTTP: {response.status_code} - {response.text}"
-    data = response.json()
+    # Validar respuesta: la carga se procesa como trabajo y se consulta su estado
+    assert response.status_code == 202, f"❌ Error HTTP: {response.status_code} - {response.text}"
     assert "mensaje" in data
+    for _ in range(600):
+        data = client.get(data["url_estado"], headers=auth_headers).json()
+        if data["estado"] in ("completado", "fallido"):
+            break
+        time.sleep(0.1)
+    assert data["estado"] == "completado", data
     assert "resumen" in data
     print("✅ Test de carga masiva exitoso.")
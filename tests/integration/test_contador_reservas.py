@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401  (registra las tareas del programador)
+from app.core.db import engine
+from app.core.scheduler import programador
+from app.modules.reservations.models import Reserva, Sesion, SesionPresencial
+from app.modules.reservations.services import (
+    TAREA_RECONCILIAR_CONTADORES, liberar_cupo, reconciliar_contadores_reservas, tarea_reconciliar_contadores, tomar_cupo,
+)
+
+CAPACIDAD = 5
+INTENTOS = 20
+
+
+@pytest.fixture(name="sesion_presencial")
+def sesion_presencial_fixture():
+    with Session(engine) as db:
+        inicio = datetime.utcnow() + timedelta(days=3)
+        sesion = Sesion(descripcion="Sesión contador test", tipo="Presencial", inicio=inicio, fin=inicio + timedelta(hours=1))
+        db.add(sesion)
+        db.commit()
+        db.refresh(sesion)
+
+        sp = SesionPresencial(id_sesion=sesion.id_sesion, capacidad=CAPACIDAD)
+        db.add(sp)
+        db.commit()
+        db.refresh(sp)
+
+    yield sp
+
+    with Session(engine) as db:
+        for r in db.exec(select(Reserva).where(Reserva.id_sesion == sp.id_sesion)).all():
+            db.delete(r)
+        db.delete(db.get(SesionPresencial, sp.id_sesion_presencial))
+        db.delete(db.get(Sesion, sp.id_sesion))
+        db.commit()
+
+
+def test_tomar_cupo_no_sobrepasa_capacidad_en_paralelo(sesion_presencial):
+    exitos = []
+    barrera = threading.Barrier(INTENTOS)
+
+    def intentar():
+        with Session(engine) as db:
+            barrera.wait()
+            if tomar_cupo(db, sesion_presencial.id_sesion):
+                db.commit()
+                exitos.append(1)
+
+    hilos = [threading.Thread(target=intentar) for _ in range(INTENTOS)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert len(exitos) == CAPACIDAD
+    with Session(engine) as db:
+        sp = db.get(SesionPresencial, sesion_presencial.id_sesion_presencial)
+        assert sp.reservas_confirmadas == CAPACIDAD
+
+
+def test_liberar_cupo_no_baja_de_cero(sesion_presencial):
+    with Session(engine) as db:
+        liberar_cupo(db, sesion_presencial.id_sesion)
+        db.commit()
+        sp = db.get(SesionPresencial, sesion_presencial.id_sesion_presencial)
+        assert sp.reservas_confirmadas == 0
+
+
+def test_reconciliacion_repara_desfase(sesion_presencial):
+    with Session(engine) as db:
+        db.add(Reserva(id_sesion=sesion_presencial.id_sesion, estado_reserva="confirmada"))
+        db.add(Reserva(id_sesion=sesion_presencial.id_sesion, estado_reserva="cancelada"))
+        db.commit()
+
+        assert reconciliar_contadores_reservas(db) >= 1
+
+        sp = db.get(SesionPresencial, sesion_presencial.id_sesion_presencial)
+        db.refresh(sp)
+        assert sp.reservas_confirmadas == 1
+
+
+def test_reconciliacion_programada(sesion_presencial):
+    assert programador.tareas[TAREA_RECONCILIAR_CONTADORES].funcion is tarea_reconciliar_contadores
+    with Session(engine) as db:
+        db.add(Reserva(id_sesion=sesion_presencial.id_sesion, estado_reserva="confirmada"))
+        db.commit()
+
+        # Sin espera propia: el programador usa el intervalo de la tarea
+        assert tarea_reconciliar_contadores(db) is None
+
+        sp = db.get(SesionPresencial, sesion_presencial.id_sesion_presencial)
+        db.refresh(sp)
+        assert sp.reservas_confirmadas == 1
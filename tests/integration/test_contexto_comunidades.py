@@ -0,0 +1,55 @@
+"""
+/usuario/comunidades se arma con un número fijo de consultas y devuelve lo mismo
+que el armado comunidad por comunidad.
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.db import engine
+from app.modules.auth.dependencies import get_current_cliente_id
+from app.modules.communities.models import ClienteXComunidad
+from app.modules.users.services import obtener_contexto_comunidades
+from utils.benchmark_contexto_comunidades import ID_CLIENTE, _crear_bd, medir, por_comunidad
+
+RUTA = "/api/usuarios/usuario/comunidades"
+
+
+@pytest.mark.parametrize("comunidades", [1, 10, 100])
+def test_consultas_fijas_y_mismo_resultado(comunidades):
+    engine_prueba = _crear_bd(comunidades)
+    try:
+        with Session(engine_prueba) as session:
+            esperado = por_comunidad(session, ID_CLIENTE)
+            obtenido = obtener_contexto_comunidades(session, ID_CLIENTE)
+        assert [c.model_dump() for c in obtenido] == [c.model_dump() for c in esperado]
+
+        assert medir(engine_prueba, obtener_contexto_comunidades, 1)["consultas"] == 2
+    finally:
+        engine_prueba.dispose()
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 2})
+def test_endpoint_comunidades_usuario():
+    with Session(engine) as session:
+        id_cliente = session.exec(select(ClienteXComunidad.id_cliente)).first()
+    if id_cliente is None:
+        pytest.skip("No hay clientes inscritos en comunidades")
+
+    app.dependency_overrides[get_current_cliente_id] = lambda: id_cliente
+    try:
+        response = TestClient(app).get(RUTA)
+    finally:
+        app.dependency_overrides.pop(get_current_cliente_id, None)
+
+    assert response.status_code == 200, response.text
+    for comunidad in response.json():
+        assert {"id_comunidad", "nombre", "servicios", "estado_membresia"} <= set(comunidad)
@@ -0,0 +1,172 @@
+"""
+Bandeja de salida de correos: encolado, envío por lotes, reintentos con backoff
+y reclamo sin duplicados entre workers.
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401
+from app.core.db import engine
+from app.modules.notifications.models import CorreoSaliente
+from app.modules.notifications.services import (
+    ENVIADO, FALLIDO, PENDIENTE, LimitadorTasa, calcular_backoff, procesar_lote, reclamar_lote,
+)
+from app.modules.notifications.transportes import ErrorEnvioPermanente, Transporte, TransporteArchivo, TransporteSMTP
+from utils.email_brevo import send_confirmation_email
+
+
+class TransporteFallido(Transporte):
+    nombre = "fallido"
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def enviar(self, mensaje):
+        raise self.error
+
+
+@pytest.fixture
+def destinatario():
+    """Dirección única por prueba; al terminar se borran sus correos."""
+    correo = f"prueba-{uuid.uuid4().hex[:10]}@example.com"
+    yield correo
+    with Session(engine) as session:
+        for fila in session.exec(select(CorreoSaliente).where(CorreoSaliente.destinatario == correo)).all():
+            session.delete(fila)
+        session.commit()
+
+
+def _correos(destinatario):
+    with Session(engine) as session:
+        return session.exec(select(CorreoSaliente).where(CorreoSaliente.destinatario == destinatario)).all()
+
+
+@pytest.fixture
+def aislar_cola():
+    """
+    Aplaza los pendientes ajenos a la prueba para que el lote solo tome los suyos.
+    Al terminar les devuelve su proximo_intento original, así una BD de desarrollo
+    con correos reales en cola no queda con envíos retrasados.
+    """
+    originales = {}
+    # Sin microsegundos: MySQL los descarta y la comparación del final fallaría
+    aplazado = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+
+    def _aislar(destinatario):
+        with Session(engine) as session:
+            for fila in session.exec(select(CorreoSaliente).where(
+                CorreoSaliente.estado == PENDIENTE, CorreoSaliente.destinatario != destinatario
+            )).all():
+                originales.setdefault(fila.id_correo, fila.proximo_intento)
+                fila.proximo_intento = aplazado
+                session.add(fila)
+            session.commit()
+
+    yield _aislar
+
+    if originales:
+        with Session(engine) as session:
+            for fila in session.exec(select(CorreoSaliente).where(
+                CorreoSaliente.id_correo.in_(list(originales))  # type: ignore[union-attr]
+            )).all():
+                # Solo si nadie la tocó mientras tanto
+                if fila.proximo_intento == aplazado:
+                    fila.proximo_intento = originales[fila.id_correo]
+                    session.add(fila)
+            session.commit()
+
+
+def test_send_encola_sin_enviar(destinatario):
+    send_confirmation_email(destinatario, "token-de-prueba")
+
+    correos = _correos(destinatario)
+    assert len(correos) == 1
+    assert correos[0].estado == PENDIENTE
+    assert "token-de-prueba" in correos[0].html
+
+
+def test_lote_enviado_por_transporte_archivo(destinatario, aislar_cola, tmp_path):
+    send_confirmation_email(destinatario, "uno")
+    send_confirmation_email(destinatario, "dos")
+    aislar_cola(destinatario)
+
+    conteo = procesar_lote(TransporteArchivo(str(tmp_path)), "prueba")
+
+    assert conteo["enviados"] == 2
+    assert all(c.estado == ENVIADO and c.fecha_envio for c in _correos(destinatario))
+    archivos = [json.loads(p.read_text(encoding="utf-8")) for p in tmp_path.iterdir()]
+    assert {a["destinatario"] for a in archivos} == {destinatario}
+
+
+def test_error_transitorio_se_reprograma(destinatario, aislar_cola):
+    send_confirmation_email(destinatario, "token")
+    aislar_cola(destinatario)
+
+    antes = datetime.utcnow()
+    conteo = procesar_lote(TransporteFallido(ConnectionError("sin red")), "prueba")
+
+    assert conteo["reintentos"] == 1
+    (correo,) = _correos(destinatario)
+    assert correo.estado == PENDIENTE
+    assert correo.intentos == 1
+    assert correo.bloqueado_hasta is None
+    assert correo.proximo_intento >= antes + timedelta(seconds=calcular_backoff(1) - 1)
+    assert "sin red" in correo.ultimo_error
+
+
+def test_error_permanente_no_se_reintenta(destinatario, aislar_cola):
+    send_confirmation_email(destinatario, "token")
+    aislar_cola(destinatario)
+
+    conteo = procesar_lote(TransporteFallido(ErrorEnvioPermanente("dirección inválida")), "prueba")
+
+    assert conteo["fallidos"] == 1
+    assert _correos(destinatario)[0].estado == FALLIDO
+
+
+def test_reclamo_sin_duplicados(destinatario, aislar_cola):
+    for i in range(3):
+        send_confirmation_email(destinatario, f"token-{i}")
+    aislar_cola(destinatario)
+
+    with Session(engine) as session:
+        primero = reclamar_lote(session, "worker-a", tamano=10)
+    with Session(engine) as session:
+        segundo = reclamar_lote(session, "worker-b", tamano=10)
+
+    assert len(primero) == 3
+    assert segundo == []
+
+
+def test_backoff_exponencial_con_tope():
+    assert calcular_backoff(2) == 2 * calcular_backoff(1)
+    assert calcular_backoff(50) == calcular_backoff(60)
+
+
+def test_limitador_de_tasa():
+    limitador = LimitadorTasa(20)
+    inicio = time.monotonic()
+    for _ in range(30):
+        limitador.esperar()
+    # 20 en ráfaga y 10 más a 20 por segundo
+    assert time.monotonic() - inicio >= 0.45
+
+
+def test_transporte_sin_enviar_no_se_instancia():
+    class TransporteIncompleto(Transporte):
+        nombre = "incompleto"
+
+    with pytest.raises(TypeError):
+        TransporteIncompleto()
+    TransporteSMTP()
@@ -0,0 +1,84 @@
+"""
+Motor async: las variantes async devuelven lo mismo que las sync, y prueba de carga
+con 500 clientes concurrentes comparando ambas rutas de disponibilidad.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+pytest.importorskip(os.getenv("ASYNC_DB_DRIVER", "aiomysql"))
+
+from app.core.db import engine, get_async_engine, get_async_session
+from app.modules.communities.services import listar_comunidades_activas, listar_comunidades_activas_async
+from app.modules.reservations.models import Sesion
+from app.modules.reservations.routers import disponibilidad_sesiones, disponibilidad_sesiones_async
+from app.modules.reservations.services import calcular_disponibilidad, calcular_disponibilidad_async
+from utils.prueba_carga import ejecutar_carga, imprimir_resultado
+
+CLIENTES = 500
+DURACION = 5.0
+
+
+async def _con_sesion_async(funcion, *args):
+    try:
+        async for session in get_async_session():
+            return await funcion(session, *args)
+    finally:
+        # Cada asyncio.run usa su propio loop: no se reutilizan conexiones entre loops
+        await get_async_engine().dispose()
+
+
+@pytest.fixture(name="ids_sesion")
+def ids_sesion_fixture():
+    with Session(engine) as session:
+        ids = session.exec(select(Sesion.id_sesion).limit(20)).all()
+    if not ids:
+        pytest.skip("No hay sesiones en la base de datos")
+    return list(ids)
+
+
+def test_disponibilidad_async_igual_a_sync(ids_sesion):
+    with Session(engine) as session:
+        esperado = calcular_disponibilidad(session, ids_sesion)
+    obtenido = asyncio.run(_con_sesion_async(calcular_disponibilidad_async, ids_sesion))
+    assert obtenido == esperado
+
+
+def test_listado_comunidades_async_igual_a_sync():
+    with Session(engine) as session:
+        esperado = sorted(c.id_comunidad for c in listar_comunidades_activas(session))
+    obtenido = asyncio.run(_con_sesion_async(listar_comunidades_activas_async))
+    assert sorted(c.id_comunidad for c in obtenido) == esperado
+
+
+def test_carga_500_clientes_sync_vs_async(ids_sesion):
+    app_carga = FastAPI()
+    app_carga.add_api_route("/sync/disponibilidad", disponibilidad_sesiones, methods=["GET"])
+    app_carga.add_api_route("/async/disponibilidad", disponibilidad_sesiones_async, methods=["GET"])
+    query = "&".join(f"ids={i}" for i in ids_sesion)
+
+    async def medir():
+        resultados = []
+        for etiqueta in ("sync", "async"):
+            resultado = await ejecutar_carga(
+                "http://carga", f"/{etiqueta}/disponibilidad?{query}", CLIENTES, DURACION,
+                etiqueta=etiqueta, transport=ASGITransport(app=app_carga),
+            )
+            imprimir_resultado(resultado)
+            resultados.append(resultado)
+        await get_async_engine().dispose()
+        return resultados
+
+    sync, asincrono = asyncio.run(medir())
+    print(f"📊 async/sync con {CLIENTES} clientes: x{asincrono.throughput / max(sync.throughput, 1e-9):.2f}")
+    assert asincrono.errores == 0
+    assert asincrono.latencias
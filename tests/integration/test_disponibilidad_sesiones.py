@@ -0,0 +1,94 @@
+"""
+Benchmark: la cantidad de consultas para calcular disponibilidad no depende
+de cuántas sesiones se listan.
+"""
+import os
+import sys
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.db import engine
+from app.modules.reservations.models import Sesion, SesionVirtual
+from app.modules.reservations.services import calcular_disponibilidad
+from app.modules.services.services import obtener_sesiones_virtuales_por_profesional
+
+
+@contextmanager
+def contar_consultas():
+    consultas = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", _registrar)
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    with Session(engine) as session:
+        yield session
+
+
+def test_calcular_disponibilidad_usa_una_consulta(session: Session):
+    ids = session.exec(select(Sesion.id_sesion).limit(200)).all()
+    if not ids:
+        pytest.skip("No hay sesiones en la base de datos")
+
+    conteos = {}
+    for n in (1, 10, len(ids)):
+        with contar_consultas() as consultas:
+            disponibilidad = calcular_disponibilidad(session, ids[:n])
+        conteos[n] = len(consultas)
+        assert set(disponibilidad) == set(ids[:n])
+
+    print(f"📊 Consultas por cantidad de sesiones: {conteos}")
+    assert set(conteos.values()) == {1}
+
+
+def test_sesiones_virtuales_por_profesional_consultas_constantes(session: Session):
+    profesionales = session.exec(
+        select(SesionVirtual.id_profesional, func.count(SesionVirtual.id_sesion_virtual).label("n"))
+        .group_by(SesionVirtual.id_profesional)
+        .order_by(func.count(SesionVirtual.id_sesion_virtual))
+    ).all()
+    if len(profesionales) < 2:
+        pytest.skip("Se necesitan al menos dos profesionales con sesiones virtuales")
+
+    (id_menor, n_menor), (id_mayor, n_mayor) = profesionales[0], profesionales[-1]
+
+    with contar_consultas() as consultas_menor:
+        obtener_sesiones_virtuales_por_profesional(session, id_menor)
+    with contar_consultas() as consultas_mayor:
+        obtener_sesiones_virtuales_por_profesional(session, id_mayor)
+
+    print(f"📊 {n_menor} sesiones -> {len(consultas_menor)} consultas | {n_mayor} sesiones -> {len(consultas_mayor)} consultas")
+    assert len(consultas_menor) == len(consultas_mayor)
+
+
+def test_endpoint_disponibilidad(session: Session):
+    ids = session.exec(select(Sesion.id_sesion).limit(5)).all()
+    if not ids:
+        pytest.skip("No hay sesiones en la base de datos")
+
+    client = TestClient(app)
+    response = client.get("/api/reservations/disponibilidad", params={"ids": ids})
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [d["id_sesion"] for d in data] == list(ids)
+    for d in data:
+        assert d["reservas_confirmadas"] <= d["total_reservas"]
+        if d["capacidad"] is not None:
+            assert d["vacantes_libres"] == d["capacidad"] - d["reservas_confirmadas"]
@@ -0,0 +1,113 @@
+"""
+Peticiones condicionales: los GET de lectura frecuente devuelven ETag y, si el cliente
+ya tiene esa versión, un 304 sin cuerpo. Los listados cacheados no se re-serializan.
+"""
+import json
+import os
+import sys
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core import etag
+from app.core.catalogo import limpiar_catalogo
+from app.core.db import get_session
+from app.modules.billing.models import Plan
+from app.modules.billing.schemas import PlanOut
+
+PETICIONES = 20
+
+
+@pytest.fixture
+def bd():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, 5):
+            session.add(Plan(id_plan=i, titulo=f"Plan {i}", descripcion="Acceso a todas las sesiones " * 5,
+                             duracion=30 * i, precio=50 * i, creado_por="t"))
+        session.commit()
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    limpiar_catalogo()
+    etag.reiniciar_estadisticas_etag()
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    limpiar_catalogo()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(bd):
+    return TestClient(app)
+
+
+def test_304_y_bytes_ahorrados(client):
+    primera = client.get("/api/billing/planes")
+    assert primera.status_code == 200
+    assert [p["titulo"] for p in primera.json()] == ["Plan 1", "Plan 2", "Plan 3", "Plan 4"]
+    assert primera.headers["cache-control"] == etag.CACHE_CONTROL_REVALIDAR
+    valor = primera.headers["etag"]
+
+    transferidos = 0
+    for _ in range(PETICIONES):
+        response = client.get("/api/billing/planes", headers={"If-None-Match": valor})
+        assert response.status_code == 304
+        assert response.headers["etag"] == valor
+        transferidos += len(response.content)
+
+    sin_etag = PETICIONES * len(primera.content)
+    assert transferidos == 0
+    assert etag.estadisticas_etag() == {"respuestas_304": PETICIONES, "bytes_ahorrados": sin_etag}
+
+
+def test_acierto_de_cache_no_reserializa(client, monkeypatch):
+    valor = client.get("/api/billing/planes").headers["etag"]
+
+    llamadas = []
+    original = etag.serializar
+    monkeypatch.setattr(etag, "serializar", lambda *a: llamadas.append(a) or original(*a))
+    assert client.get("/api/billing/planes", headers={"If-None-Match": valor}).status_code == 304
+    assert client.get("/api/billing/planes").headers["etag"] == valor
+    assert llamadas == []
+
+
+def test_cambio_de_datos_cambia_el_etag(client, bd):
+    valor = client.get("/api/billing/planes").headers["etag"]
+    with Session(bd) as session:
+        plan = session.get(Plan, 1)
+        plan.precio = 45
+        session.add(plan)
+        session.commit()
+
+    response = client.get("/api/billing/planes", headers={"If-None-Match": valor})
+    assert response.status_code == 200
+    assert response.headers["etag"] != valor
+    assert response.json()[0]["precio"] == 45
+
+
+def test_ruta_generica_por_hash_del_cuerpo(client):
+    response = client.get("/api/billing/planes/2")
+    assert response.json()["topes"] == "ilimitado"
+    valor = response.headers["etag"]
+    assert client.get("/api/billing/planes/2", headers={"If-None-Match": f'W/{valor}, "otro"'}).status_code == 304
+    assert client.get("/api/billing/planes/3", headers={"If-None-Match": valor}).status_code == 200
+    # Los errores no llevan ETag
+    assert "etag" not in client.get("/api/billing/planes/99").headers
+
+
+def test_mismo_json_que_response_model():
+    planes = [PlanOut(id_plan=1, titulo="Á", descripcion="d", precio=10.5, estado=1)]
+    assert json.loads(etag.serializar(planes, list[PlanOut])) == jsonable_encoder(planes)
@@ -0,0 +1,92 @@
+"""
+Geografía precargada: los listados salen del índice en memoria (sin consultas) como
+JSON ya serializado con ETag fuerte, y `recargar` toma los cambios de la BD.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.modules.geography import services as geografia
+from app.modules.geography.models import Departamento, Distrito
+from app.modules.users.dependencies import get_current_admin
+
+
+@pytest.fixture
+def bd(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Departamento(id_departamento=15, nombre="Lima"))
+        session.add(Departamento(id_departamento=4, nombre="Arequipa"))
+        session.add(Distrito(id_distrito=1, id_departamento=15, nombre="Miraflores", imagen=b"x" * 1000))
+        session.add(Distrito(id_distrito=2, id_departamento=15, nombre="Barranco"))
+        session.commit()
+    with Session(engine) as session:
+        geografia.recargar_geografia(session)
+    yield engine
+    geografia.descartar_geografia()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(bd):
+    app.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(email="admin@test.com")
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_admin, None)
+
+
+def test_listados_desde_memoria(client, bd):
+    consultas = []
+    event.listen(bd, "before_cursor_execute", lambda *a: consultas.append(a[2]))
+
+    response = client.get("/api/geography/departamentos")
+    assert response.json() == [{"id_departamento": 4, "nombre": "Arequipa"}, {"id_departamento": 15, "nombre": "Lima"}]
+    assert response.headers["content-type"] == "application/json"
+    response = client.get("/api/geography/distritos/15")
+    assert response.json() == [{"id_distrito": 1, "nombre": "Miraflores"}, {"id_distrito": 2, "nombre": "Barranco"}]
+    assert client.get("/api/geography/distritos/99").json() == []
+    assert consultas == []
+
+
+def test_etag_fuerte_y_304(client):
+    response = client.get("/api/geography/distritos/15")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    revalidacion = client.get("/api/geography/distritos/15", headers={"If-None-Match": etag})
+    assert revalidacion.status_code == 304
+    assert revalidacion.content == b""
+    assert client.get("/api/geography/distritos/4", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_indice_inmutable_sin_blobs(bd):
+    indice = geografia.obtener_geografia()
+    assert indice.distritos[1] == geografia.DistritoGeo(1, 15, "Miraflores", None)
+    assert [d.nombre for d in indice.distritos_por_departamento[15]] == ["Miraflores", "Barranco"]
+    with pytest.raises(TypeError):
+        indice.departamentos[1] = "Amazonas"  # type: ignore[index]
+
+
+def test_recargar(client, bd, monkeypatch):
+    monkeypatch.setattr("app.core.db.engine", bd)
+    etag = client.get("/api/geography/distritos/4").headers["etag"]
+    with Session(bd) as session:
+        session.add(Distrito(id_distrito=3, id_departamento=4, nombre="Yanahuara"))
+        session.commit()
+    assert client.get("/api/geography/distritos/4").json() == []
+
+    assert client.post("/api/geography/recargar").json() == {"departamentos": 2, "distritos": 3}
+    response = client.get("/api/geography/distritos/4")
+    assert response.json() == [{"id_distrito": 3, "nombre": "Yanahuara"}]
+    assert response.headers["etag"] != etag
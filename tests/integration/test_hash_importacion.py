@@ -0,0 +1,71 @@
+"""
+Hash de contraseñas en carga masiva: en paralelo con un pool de procesos, con el
+costo configurado para cuentas importadas y rehash al costo normal en el primer login.
+"""
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401
+from app.core import security
+from app.core.security import cerrar_pool_hash, hash_passwords, verify_and_update_password, verify_password
+from app.modules.users.models import Usuario
+from app.modules.users.services import ImportadorClientes
+from utils.benchmark_hash_importacion import ejecutar
+
+
+def test_hash_en_paralelo_mantiene_el_orden():
+    passwords = [f"clave-{i}" for i in range(6)]
+    try:
+        hashes = hash_passwords(passwords, rounds=4, procesos=2)
+    finally:
+        cerrar_pool_hash()
+    assert len(hashes) == 6
+    assert all(h.startswith("$2b$04$") for h in hashes)
+    assert all(verify_password(p, h) for p, h in zip(passwords, hashes))
+
+
+def test_rehash_en_primer_login():
+    importado = hash_passwords(["secreta"], rounds=4)[0]
+
+    valida, nuevo = verify_and_update_password("secreta", importado)
+    assert valida and nuevo is not None
+    assert nuevo.startswith(f"$2b${security.BCRYPT_ROUNDS:02d}$")
+
+    # Con el costo normal ya no hay nada que actualizar
+    assert verify_and_update_password("secreta", nuevo) == (True, None)
+    assert verify_and_update_password("otra", importado) == (False, None)
+
+
+def test_importador_usa_costo_de_importacion(monkeypatch):
+    monkeypatch.setattr(ImportadorClientes, "rondas_hash", 4)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    df = pd.DataFrame({
+        "nombre": ["A", "B"], "apellido": ["X", "Y"], "email": ["a@test.com", "b@test.com"],
+        "password": ["clave-a", "clave-b"], "tipo_documento": ["DNI"] * 2, "num_doc": [1, 2],
+        "numero_telefono": ["9"] * 2, "id_departamento": [1] * 2, "id_distrito": [1] * 2,
+        "fecha_nac": ["1990-01-01"] * 2, "talla": [170] * 2, "peso": [70] * 2,
+    })
+    with Session(engine) as session:
+        resumen = ImportadorClientes(session, "admin").procesar(df)
+        usuarios = session.exec(select(Usuario.email, Usuario.password).order_by(Usuario.email)).all()  # type: ignore
+    engine.dispose()
+
+    assert resumen["insertados"] == 2
+    assert all(h.startswith("$2b$04$") for _, h in usuarios)
+    assert verify_password("clave-b", usuarios[1][1])
+
+
+def test_benchmark():
+    resultados = ejecutar(cantidad=4, rondas=(4,), procesos=[1, 2])
+    assert [r["procesos"] for r in resultados] == [1, 2]
+    assert resultados[0]["aceleracion"] == 1
+    assert all(r["hashes_por_segundo"] > 0 for r in resultados)
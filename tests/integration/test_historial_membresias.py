@@ -0,0 +1,85 @@
+"""
+El historial de membresías se arma con una sola consulta, sin importar cuántas
+inscripciones tenga el cliente.
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.db import engine
+from app.modules.auth.dependencies import get_current_cliente_id
+from app.modules.billing.models import Inscripcion
+
+RUTA = "/api/billing/usuario/inscripciones"
+
+
+@pytest.fixture(name="id_cliente")
+def id_cliente_fixture():
+    with Session(engine) as session:
+        fila = session.exec(
+            select(Inscripcion.id_cliente, func.count(Inscripcion.id_inscripcion))
+            .group_by(Inscripcion.id_cliente)
+            .order_by(func.count(Inscripcion.id_inscripcion).desc())
+        ).first()
+    if not fila:
+        pytest.skip("No hay inscripciones en la base de datos")
+
+    app.dependency_overrides[get_current_cliente_id] = lambda: fila[0]
+    yield fila[0]
+    app.dependency_overrides.pop(get_current_cliente_id, None)
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 1})
+def test_historial_una_consulta(id_cliente):
+    client = TestClient(app)
+    response = client.get(RUTA)
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert int(response.headers["X-Total-Count"]) == len(data)
+    assert [d["id_inscripcion"] for d in data] == sorted(d["id_inscripcion"] for d in data)
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 2})
+def test_historial_paginado(id_cliente):
+    client = TestClient(app)
+    completo = client.get(RUTA).json()
+
+    primera = client.get(RUTA, params={"pagina": 1, "tamano_pagina": 1})
+    assert primera.json() == completo[:1]
+    assert int(primera.headers["X-Total-Count"]) == len(completo)
+
+    fuera = client.get(RUTA, params={"pagina": len(completo) + 1, "tamano_pagina": 1})
+    assert fuera.json() == []
+    assert int(fuera.headers["X-Total-Count"]) == len(completo)
+
+
+def test_historial_filtro_fechas(id_cliente):
+    client = TestClient(app)
+    response = client.get(RUTA, params={"desde": "2100-01-01"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.presupuesto_consultas({"GET /api/billing/inscripcion/{id_inscripcion}/detalle": 1})
+def test_detalle_pago_una_consulta(id_cliente):
+    with Session(engine) as session:
+        id_inscripcion = session.exec(
+            select(Inscripcion.id_inscripcion).where(Inscripcion.id_cliente == id_cliente)
+        ).first()
+
+    client = TestClient(app)
+    response = client.get(f"/api/billing/inscripcion/{id_inscripcion}/detalle")
+    assert response.status_code == 200, response.text
+    assert set(response.json()) == {"nombre_membresia", "fecha_pago", "hora_pago", "id_pago", "tarjeta"}
+
+    assert client.get("/api/billing/inscripcion/999999999/detalle").status_code == 404
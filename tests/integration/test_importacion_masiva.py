@@ -0,0 +1,256 @@
+"""
+Motor de carga masiva: mismas reglas por fila que antes, repetidos y cruces dentro
+del archivo detectados en memoria, y consultas que no crecen con el número de filas.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401
+from app.core.enums import ModalidadServicio
+from app.core.importacion import Agenda, LectorFilas, procesar_por_partes
+from app.modules.reservations.models import Sesion, SesionPresencial, SesionVirtual
+from app.modules.reservations.services import ImportadorSesionesVirtuales
+from app.modules.services.models import Local, Profesional, Servicio
+from app.modules.services.services import ImportadorLocales, ImportadorProfesionales, ImportadorSesionesPresenciales
+from app.modules.users.models import Cliente, Usuario
+from app.modules.users.services import ImportadorClientes
+from utils.benchmark_lectura_importacion import ejecutar as benchmark_lectura
+
+
+class ImportadorClientesSinBcrypt(ImportadorClientes):
+    def hashear(self, passwords):
+        return [f"hash-{p}" for p in passwords]
+
+
+@pytest.fixture
+def bd():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    ahora = datetime.utcnow()
+    with Session(engine) as session:
+        session.add(Servicio(id_servicio=1, nombre="Virtual", modalidad=ModalidadServicio.Virtual, fecha_creacion=ahora, creado_por="t", estado=1))
+        session.add(Servicio(id_servicio=2, nombre="Presencial", modalidad=ModalidadServicio.Presencial, fecha_creacion=ahora, creado_por="t", estado=1))
+        session.add(Profesional(id_profesional=1, email="prof@test.com", id_servicio=1))
+        session.add(Local(id_local=1, id_departamento=14, id_distrito=1, id_servicio=2, nombre="Local 1", estado=1))
+        session.add(Usuario(id_usuario=1, nombre="Ya", apellido="Existe", email="existe@test.com", password="x"))
+        session.add(Cliente(id_usuario=1, tipo_documento="DNI", num_doc="11111111", numero_telefono="9",
+                            id_departamento=1, id_distrito=1, talla=170, peso=70))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def _clientes(n: int, **columnas) -> pd.DataFrame:
+    datos = {
+        "nombre": ["Nombre"] * n, "apellido": ["Apellido"] * n,
+        "email": [f"cliente{i}@test.com" for i in range(n)], "password": ["clave"] * n,
+        "tipo_documento": ["DNI"] * n, "num_doc": [20000000 + i for i in range(n)],
+        "numero_telefono": ["999999999"] * n, "id_departamento": [1] * n, "id_distrito": [1] * n,
+        "direccion": ["Av. Siempre Viva"] * n, "fecha_nac": ["1990-01-01"] * n, "genero": ["F"] * n,
+        "talla": [160] * n, "peso": [60] * n,
+    }
+    datos.update(columnas)
+    return pd.DataFrame(datos)
+
+
+def _contar_consultas(engine, funcion):
+    consultas = 0
+
+    def contar(*args):
+        nonlocal consultas
+        consultas += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        resultado = funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    return consultas, resultado
+
+
+def test_clientes_mismos_mensajes_por_fila(bd):
+    df = _clientes(
+        6,
+        email=["nuevo@test.com", "existe@test.com", "mal-formato", "NUEVO@test.com", None, "otro@test.com"],
+        num_doc=[30000001, 30000002, 30000003, 30000004, 30000005, 11111111],
+    )
+    with Session(bd) as session:
+        resumen = ImportadorClientesSinBcrypt(session, "admin").procesar(df)
+        emails = session.exec(select(Usuario.email)).all()
+
+    assert resumen["insertados"] == 1
+    assert resumen["omitidos"] == 5
+    assert resumen["errores"] == [
+        "Fila 3: No se insertó porque el correo ya existe en el sistema (existe@test.com).",
+        "Fila 4: No se insertó porque el formato del correo es inválido (mal-formato).",
+        "Fila 5: No se insertó porque el correo ya existe en el sistema (NUEVO@test.com).",
+        "Fila 6: No se insertó porque el correo o número de documento está vacío.",
+        "Fila 7: No se insertó porque el número de documento ya existe en el sistema (11111111).",
+    ]
+    assert sorted(emails) == ["existe@test.com", "nuevo@test.com"]
+
+
+def test_clientes_consultas_no_crecen_con_las_filas(bd):
+    consultas = {}
+    for n in (10, 200):
+        with Session(bd) as session:
+            df = _clientes(n, email=[f"c{n}-{i}@test.com" for i in range(n)], num_doc=[n * 1000 + i for i in range(n)])
+            consultas[n], resumen = _contar_consultas(bd, lambda: ImportadorClientesSinBcrypt(session, "admin").procesar(df))
+        assert resumen["insertados"] == n
+    assert consultas[200] == consultas[10]
+
+
+def test_lote_con_error_se_reporta_por_fila(bd):
+    class ImportadorQueFalla(ImportadorClientesSinBcrypt):
+        def insertar(self, lote):
+            if 4 in lote.index:
+                raise RuntimeError("fallo de escritura")
+            super().insertar(lote)
+
+    with Session(bd) as session:
+        resumen = ImportadorQueFalla(session, "admin", tamano_lote=10).procesar(_clientes(5))
+
+    assert resumen["insertados"] == 4
+    assert resumen["errores"] == ["Fila 4: No se insertó por error inesperado: fallo de escritura"]
+
+
+def test_profesionales_y_locales(bd):
+    with Session(bd) as session:
+        profesionales = ImportadorProfesionales(session, "admin").procesar(pd.DataFrame({
+            "email": ["PROF@test.com", "nuevo@test.com", "nuevo@test.com", None, "x@test.com"],
+            "id_servicio": [1, 1, 1, 1, 99],
+            "nombre_completo": ["Profesional"] * 5,
+        }))
+        locales = ImportadorLocales(session, "admin", id_servicio=2).procesar(pd.DataFrame({
+            "nombre": ["Local 1", "Local 2", "Local 2", None],
+            "id_distrito": [1, 2, 3, 4],
+            "direccion_detallada": ["Av. 1"] * 4,
+        }))
+
+    assert profesionales == {
+        "insertados": 1, "omitidos": 3,
+        "errores": [
+            "Fila 2: El email 'prof@test.com' ya existe",
+            "Fila 4: El email 'nuevo@test.com' ya existe",
+            "Fila 5: El email está vacío",
+            "Fila 6: servicio 99 no existe",
+        ],
+    }
+    assert locales == {"insertados": 1, "omitidos": 3, "errores": []}
+
+
+def test_sesiones_cruces_en_archivo_y_bd(bd):
+    inicio = (datetime.now() + timedelta(days=5)).replace(hour=10, minute=0, second=0, microsecond=0)
+    fin = inicio + timedelta(hours=1)
+    with Session(bd) as session:
+        virtuales = ImportadorSesionesVirtuales(session, "admin").procesar(pd.DataFrame({
+            "id_servicio": [1, 1, 1, 2, 1],
+            "id_profesional": [1, 1, 1, 1, 1],
+            "fecha_inicio": [inicio, inicio, inicio + timedelta(minutes=30), inicio, inicio - timedelta(days=30)],
+            "fecha_fin": [fin] * 5,
+            "url_meeting": ["https://meet"] * 5,
+            "url_archivo": ["https://archivo"] * 5,
+        }))
+        presenciales = ImportadorSesionesPresenciales(session, "admin", id_servicio=2).procesar(pd.DataFrame({
+            "fecha_inicio": [inicio, inicio + timedelta(minutes=30), inicio + timedelta(hours=1), inicio],
+            "fecha_fin": [fin, fin, fin + timedelta(hours=1), fin],
+            "id_local": [1, 1, 1, 7],
+            "capacidad": [10, 10, 0, 10],
+        }))
+        sesiones = session.exec(select(Sesion.tipo)).all()
+        hijas = (len(session.exec(select(SesionVirtual)).all()), len(session.exec(select(SesionPresencial)).all()))
+
+    assert virtuales["insertados"] == 1
+    assert [e.split(":")[0] for e in virtuales["errores"]] == ["Fila 3", "Fila 4", "Fila 5", "Fila 6"]
+    assert "exactamente" in virtuales["errores"][0]
+    assert "se cruza" in virtuales["errores"][1]
+    assert "no es de modalidad virtual" in virtuales["errores"][2]
+    assert "en el pasado" in virtuales["errores"][3]
+
+    assert presenciales["insertados"] == 1
+    assert [e.split(":")[0] for e in presenciales["errores"]] == ["Fila 3", "Fila 4", "Fila 5"]
+    assert sorted(sesiones) == ["Presencial", "Virtual"]
+    assert hijas == (1, 1)
+
+
+def test_columnas_faltantes(bd):
+    with Session(bd) as session, pytest.raises(Exception) as error:
+        ImportadorProfesionales(session, "admin").procesar(pd.DataFrame({"nombre": ["x"]}))
+    assert "email" in str(error.value.detail)  # type: ignore[attr-defined]
+
+
+def test_agenda():
+    base = datetime(2030, 1, 1, 10)
+    agenda = Agenda([(base, base + timedelta(hours=1)), (base + timedelta(minutes=30), base + timedelta(hours=2))])
+    assert agenda.cruza(base + timedelta(hours=1, minutes=30), base + timedelta(hours=3))
+    assert not agenda.cruza(base + timedelta(hours=2), base + timedelta(hours=3))
+    agenda.agregar(base + timedelta(hours=2), base + timedelta(hours=3))
+    assert agenda.cruza(base + timedelta(hours=2, minutes=59), base + timedelta(hours=4))
+    assert not agenda.cruza(base - timedelta(hours=1), base)
+
+
+def _excel(df: pd.DataFrame) -> BytesIO:
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def test_lector_xlsx_por_partes_igual_que_read_excel():
+    df = _clientes(12)
+    df.loc[4, :] = None  # fila vacía intermedia: se conserva como en pd.read_excel
+    archivo = _excel(df)
+    completo = pd.read_excel(archivo, engine="openpyxl")
+    archivo.seek(0)
+
+    partes = list(LectorFilas(archivo, tamano=5))
+
+    assert [len(p) for p in partes] == [5, 5, 2]
+    leido = pd.concat(partes, ignore_index=True)
+    assert list(leido.columns) == list(completo.columns)
+    assert leido["email"].tolist()[:4] == completo["email"].tolist()[:4]
+    assert leido.iloc[4].isna().all()
+    assert leido["num_doc"].tolist()[5:] == [int(v) for v in completo["num_doc"].tolist()[5:]]
+
+
+def test_lector_csv_con_punto_y_coma():
+    contenido = "email;id_servicio;nombre_completo\n a@test.com;1;A\nb@test.com;1;B\nc@test.com;;C\n".encode()
+    partes = list(LectorFilas(BytesIO(contenido), "profesionales.csv", tamano=2))
+    assert [len(p) for p in partes] == [2, 1]
+    assert partes[0]["email"].tolist() == ["a@test.com", "b@test.com"]
+    assert pd.isna(partes[1]["id_servicio"].iloc[0])
+
+
+def test_por_partes_mismo_resultado_que_completo(bd):
+    df = _clientes(20, email=[f"p{i % 15}@test.com" for i in range(20)], num_doc=[40000000 + i for i in range(20)])
+    with Session(bd) as session:
+        por_partes = procesar_por_partes(ImportadorClientesSinBcrypt(session, "admin"), LectorFilas(_excel(df), tamano=7))
+    assert por_partes["insertados"] == 15
+    assert por_partes["errores"] == [
+        f"Fila {fila}: No se insertó porque el correo ya existe en el sistema (p{fila - 17}@test.com)."
+        for fila in range(17, 22)
+    ]
+
+
+def test_archivo_vacio_reporta_columnas(bd):
+    with Session(bd) as session, pytest.raises(Exception) as error:
+        procesar_por_partes(ImportadorProfesionales(session, "admin"), LectorFilas(BytesIO(b""), "vacio.csv"))
+    assert "email" in str(error.value.detail)  # type: ignore[attr-defined]
+
+
+def test_benchmark_lectura():
+    resultados = benchmark_lectura(filas=300, parte=100, estrategias=("read_csv", "lector_csv"))
+    assert [r["filas"] for r in resultados] == [300, 300]
+    assert all(r["rss_pico_mb"] >= r["rss_base_mb"] > 0 for r in resultados)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlmodel import Session
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401
+from app.core.db import engine
+from app.modules.billing.services import obtener_inscripcion_activa
+from app.modules.reservations.services import calcular_disponibilidad
+from utils.index_advisor import PATRONES, analizar_patrones, capturar_consultas, imprimir_reporte
+
+INDICES_ESPERADOS = {
+    "reserva": {"ix_reserva_sesion_estado", "ix_reserva_cliente_estado"},
+    "sesion": {"ix_sesion_servicio_tipo_inicio"},
+    "sesion_virtual": {"ix_sesion_virtual_profesional"},
+    "inscripcion": {"ix_inscripcion_cliente_comunidad_estado"},
+    "suspension": {"ix_suspension_inscripcion_estado_fechas"},
+}
+
+
+def test_indices_creados_en_la_bd():
+    inspector = inspect(engine)
+    for tabla, esperados in INDICES_ESPERADOS.items():
+        existentes = {i["name"] for i in inspector.get_indexes(tabla)}
+        assert esperados <= existentes, f"Faltan índices en {tabla}: {esperados - existentes}"
+
+
+def test_patrones_frecuentes_sin_full_scan_por_falta_de_indice():
+    reporte = analizar_patrones(engine)
+    imprimir_reporte(reporte)
+
+    assert reporte.analizadas == len(PATRONES)
+    assert not reporte.errores, [f"{h.consulta} -> {h.tabla}" for h in reporte.errores]
+
+
+def _normalizar(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def test_patrones_son_las_consultas_que_ejecutan_los_servicios():
+    # Si un servicio cambia su consulta, el patrón cambia con él (no hay copias que se desfasen)
+    with Session(engine) as db, capturar_consultas(engine) as consultas:
+        calcular_disponibilidad(db, [-1, -2, -3])
+        with pytest.raises(HTTPException):
+            obtener_inscripcion_activa(db, -1, -1)
+    ejecutadas = {_normalizar(sql) for sql, _ in consultas}
+
+    for nombre in ("reservations.calcular_disponibilidad", "billing.obtener_inscripcion_activa"):
+        compilado = PATRONES[nombre]().compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+        assert _normalizar(str(compilado)) in ejecutadas, nombre
@@ -0,0 +1,68 @@
+import dataclasses
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.instrumentacion import MedicionPeticion, registro_metricas
+from app.modules.monitoring import routers as monitoring
+from utils.pytest_presupuesto_consultas import _limite
+
+RUTA = "/api/comunidades/listar_comunidad"
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 1})
+def test_server_timing_y_metricas_por_ruta():
+    registro_metricas.reiniciar()
+    client = TestClient(app)
+
+    response = client.get(RUTA)
+    assert response.status_code == 200
+
+    timing = response.headers["Server-Timing"]
+    assert 'db;dur=' in timing and 'desc="1 consultas"' in timing
+    assert "ser;dur=" in timing and "total;dur=" in timing
+
+    estadistica = registro_metricas.copia()[("GET", RUTA)]
+    assert estadistica.peticiones == 1
+    assert estadistica.consultas == 1
+
+    texto = client.get("/api/monitoring/metrics").text
+    assert f'commuconnect_db_consultas_total{{metodo="GET",ruta="{RUTA}"}} 1' in texto
+    assert "commuconnect_http_latencia_segundos_bucket" in texto
+    assert 'commuconnect_db_pool_checkouts_total{pool="sync"}' in texto
+
+
+def test_rutas_inexistentes_no_abren_series_nuevas():
+    registro_metricas.reiniciar()
+    client = TestClient(app)
+    client.get("/api/no-existe/123")
+    client.get("/api/no-existe/456")
+    assert list(registro_metricas.copia()) == [("GET", "sin_ruta")]
+
+
+def test_metricas_exigen_token_en_prod(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(monitoring, "settings", dataclasses.replace(monitoring.settings, entorno="prod"))
+    monkeypatch.setattr(monitoring, "METRICS_TOKEN", None)
+    assert client.get("/api/monitoring/metrics").status_code == 401
+
+    monkeypatch.setattr(monitoring, "METRICS_TOKEN", "secreto")
+    assert client.get("/api/monitoring/metrics").status_code == 401
+    response = client.get("/api/monitoring/metrics", headers={"Authorization": "Bearer secreto"})
+    assert response.status_code == 200
+
+
+def test_resolucion_de_presupuestos():
+    presupuestos = {"GET /api/a": 2, "/api/b": 3, "*": 10}
+    assert _limite(presupuestos, "GET", "/api/a") == 2
+    assert _limite(presupuestos, "POST", "/api/b") == 3
+    assert _limite(presupuestos, "GET", "/api/c") == 10
+    assert _limite({}, "GET", "/api/c") is None
+    assert MedicionPeticion().consultas == 0
@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.logger import (
+    FiltroMuestreo, FormatoJSON, MiddlewareRequestId, crear_pipeline, request_id_ctx,
+)
+from utils.benchmark_logging import medir_llamadas, medir_middleware
+
+
+class _Captura(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append(record)
+
+
+def _app_con_log(log: logging.Logger) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        log.info("ping", extra={"id_reserva": 7})
+        return {"request_id": request_id_ctx.get()}
+
+    app.add_middleware(MiddlewareRequestId)
+    return app
+
+
+def test_request_id_se_propaga_al_log_y_a_la_respuesta():
+    captura = _Captura()
+    handler_cola, listener = crear_pipeline(captura)
+    log = logging.getLogger("test.request_id")
+    log.propagate = False
+    log.handlers = [handler_cola]
+    log.setLevel(logging.INFO)
+
+    listener.start()
+    client = TestClient(_app_con_log(log))
+    generado = client.get("/ping")
+    propio = client.get("/ping", headers={"X-Request-ID": "abc-123"})
+    listener.stop()
+
+    assert generado.headers["X-Request-ID"] == generado.json()["request_id"] != "-"
+    assert propio.headers["X-Request-ID"] == "abc-123"
+
+    ids = [r.request_id for r in captura.registros]
+    assert ids == [generado.headers["X-Request-ID"], "abc-123"]
+
+    linea = json.loads(FormatoJSON().format(captura.registros[1]))
+    assert linea["request_id"] == "abc-123"
+    assert linea["id_reserva"] == 7
+    assert linea["mensaje"] == "ping"
+
+
+def test_muestreo_solo_descarta_debug():
+    filtro = FiltroMuestreo(tasa_debug=0.0)
+
+    def registro(nivel, **extra):
+        r = logging.makeLogRecord({"levelno": nivel, "msg": "x"})
+        r.__dict__.update(extra)
+        return r
+
+    assert not filtro.filter(registro(logging.DEBUG))
+    assert filtro.filter(registro(logging.DEBUG, muestreo=1.0))
+    assert filtro.filter(registro(logging.INFO))
+    assert filtro.filter(registro(logging.ERROR))
+
+
+def test_benchmark_sobrecosto():
+    llamadas = medir_llamadas(2000)
+    middleware = medir_middleware(200)
+    print(f"📊 µs por llamada: {llamadas} | µs por petición: {middleware}")
+    # Encolar no debería costar más que formatear y escribir en el mismo hilo
+    assert llamadas["logger_cola"] <= llamadas["logger_sincrono"] * 1.5
@@ -0,0 +1,82 @@
+import os
+import sys
+from fastapi.testclient import TestClient
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.modules.media import services as media_services
+
+client = TestClient(app)
+
+# Cabecera PNG mínima para que se detecte el content-type
+IMAGEN_PNG = b"\x89PNG\r\n\x1a\n" + b"contenido de prueba"
+
+
+def _guardar_imagen_prueba(tmp_path, monkeypatch) -> str:
+    monkeypatch.setattr(media_services, "MEDIA_ROOT", str(tmp_path))
+    return media_services.guardar_media(IMAGEN_PNG)
+
+
+def test_media_se_guarda_una_sola_vez(tmp_path, monkeypatch):
+    hash_1 = _guardar_imagen_prueba(tmp_path, monkeypatch)
+    hash_2 = _guardar_imagen_prueba(tmp_path, monkeypatch)
+
+    assert hash_1 == hash_2
+    archivos = [f for _, _, fs in os.walk(tmp_path) for f in fs]
+    assert archivos == [hash_1]
+
+
+def test_media_devuelve_etag_y_cache_inmutable(tmp_path, monkeypatch):
+    hash_media = _guardar_imagen_prueba(tmp_path, monkeypatch)
+
+    response = client.get(f"/api/media/{hash_media}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{hash_media}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    assert "content-disposition" not in response.headers
+
+
+def test_svg_se_sirve_como_adjunto_sin_scripts(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_services, "MEDIA_ROOT", str(tmp_path))
+    hash_media = media_services.guardar_media(b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>')
+
+    response = client.get(f"/api/media/{hash_media}")
+
+    assert response.headers["content-type"] == "image/svg+xml"
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["content-security-policy"].startswith("default-src 'none'")
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_media_responde_304_con_if_none_match(tmp_path, monkeypatch):
+    hash_media = _guardar_imagen_prueba(tmp_path, monkeypatch)
+
+    response = client.get(
+        f"/api/media/{hash_media}",
+        headers={"If-None-Match": f'"{hash_media}"'}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_media_inexistente_devuelve_404(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_services, "MEDIA_ROOT", str(tmp_path))
+
+    assert client.get(f"/api/media/{'0' * 64}").status_code == 404
+    assert client.get("/api/media/no-es-un-hash").status_code == 404
+
+
+def test_listar_comunidades_devuelve_urls_de_imagen():
+    response = client.get("/api/comunidades/listar_comunidad")
+
+    assert response.status_code == 200
+    for comunidad in response.json():
+        imagen = comunidad.get("imagen")
+        assert imagen is None or imagen.startswith("/api/media/")
@@ -0,0 +1,61 @@
+import logging
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.config import cargar_settings
+from app.core.db import engine, resumen_pools
+from app.core.metricas_pool import metricas_pools
+
+
+def test_perfiles_sin_echo_y_overrides(monkeypatch):
+    prod = cargar_settings("prod")
+    assert prod.db_echo is False
+    assert prod.debug is False
+
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    ajustado = cargar_settings("prod")
+    assert ajustado.db_pool_size == 3
+    assert ajustado.db_pool_pre_ping is False
+
+    with pytest.raises(RuntimeError):
+        cargar_settings("staging")
+
+
+def test_engine_sin_echo():
+    assert engine.echo is False
+
+
+def test_logger_del_pool_bajo_sqlalchemy():
+    # Con el log raíz en DEBUG (dev) los checkouts no deben salir en sistema.log
+    nombre = engine.pool.logger.name
+    assert nombre.startswith("sqlalchemy.pool.")
+    assert not engine.pool.logger.isEnabledFor(logging.DEBUG)
+
+
+def test_checkouts_se_registran():
+    metricas_pools["sync"].reiniciar()
+    for _ in range(3):
+        with engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+
+    sync = resumen_pools()[0]
+    assert sync["pool"] == "sync"
+    assert sync["checkouts"] == 3
+    assert sync["timeouts"] == 0
+    assert sync["espera_max_ms"] >= 0
+    assert sync["conexiones_en_uso"] == 0
+
+
+def test_endpoint_metricas_requiere_admin():
+    client = TestClient(app)
+    assert client.get("/api/monitoring/pool").status_code == 401
@@ -0,0 +1,196 @@
+"""
+Paginación por cursor: los listados devuelven como máximo `limite` filas y el cursor
+de la página siguiente en X-Siguiente-Cursor / Link. Recorrer todas las páginas
+devuelve cada fila una sola vez, con empates y NULL en la columna de orden.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.catalogo import limpiar_catalogo
+from app.core.db import get_session
+from app.core.enums import TipoDocumento, TipoUsuario
+from app.core.paginacion import PAGINACION_LIMITE_MAX, codificar_cursor
+from app.modules.billing.models import Suspension
+from app.modules.communities.models import Comunidad
+from app.modules.services.models import Profesional
+from app.modules.users.models import Cliente, Usuario
+
+TOTAL = 23
+
+
+@pytest.fixture
+def bd():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    base = datetime(2025, 1, 1, 8)
+    with Session(engine) as session:
+        for i in range(1, TOTAL + 1):
+            session.add(Usuario(id_usuario=i, nombre=f"N{i % 4}", apellido="A", email=f"c{i}@test.com", password="x",
+                                tipo=TipoUsuario.Cliente))
+            session.add(Cliente(id_cliente=i, id_usuario=i, tipo_documento=TipoDocumento.DNI, num_doc=str(i),
+                                numero_telefono="9", id_departamento=15, id_distrito=1, talla=170, peso=70))
+            # Fechas repetidas de a tres para forzar empates en el orden
+            session.add(Suspension(id_suspension=i, id_cliente=i, id_inscripcion=i, motivo="m",
+                                   fecha_inicio=base + timedelta(days=i // 3), fecha_fin=base + timedelta(days=30),
+                                   creado_por="t", estado=2))
+            session.add(Profesional(id_profesional=i, nombre_completo=None if i % 5 == 0 else f"P{i % 3}",
+                                    email=f"p{i}@test.com"))
+            session.add(Comunidad(id_comunidad=i, nombre=f"Comunidad {i % 6}", creado_por="t"))
+        session.commit()
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    limpiar_catalogo()
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    limpiar_catalogo()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(bd):
+    return TestClient(app)
+
+
+def _recorrer(client, ruta, **params):
+    """Sigue X-Siguiente-Cursor hasta el final; devuelve las páginas."""
+    paginas, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get(ruta, params=query)
+        assert response.status_code == 200, response.text
+        paginas.append(response.json())
+        cursor = response.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return paginas
+        assert 'rel="next"' in response.headers["Link"]
+        assert len(paginas) <= TOTAL
+
+
+@pytest.mark.parametrize("ruta,clave", [
+    ("/api/usuarios/clientes", "id_usuario"),
+    ("/api/billing/suspensiones/todas", "id_suspension"),
+    ("/api/services/", "id_profesional"),
+    ("/api/comunidades/listar_comunidad", "id_comunidad"),
+])
+def test_recorrido_completo_sin_repetidos(client, ruta, clave):
+    paginas = _recorrer(client, ruta, limite=5)
+    assert [len(p) for p in paginas] == [5, 5, 5, 5, 3]
+    ids = [fila[clave] for p in paginas for fila in p]
+    assert ids == list(range(1, TOTAL + 1))
+
+
+def test_limite_por_defecto_devuelve_la_tabla_pequena_entera(client):
+    response = client.get("/api/usuarios/clientes")
+    assert len(response.json()) == TOTAL
+    assert "X-Siguiente-Cursor" not in response.headers
+
+
+def test_orden_descendente_con_empates(client):
+    paginas = _recorrer(client, "/api/billing/suspensiones/todas", limite=4, orden="-fecha_inicio")
+    filas = [s for p in paginas for s in p]
+    assert sorted(s["id_suspension"] for s in filas) == list(range(1, TOTAL + 1))
+    claves = [(s["fecha_inicio"], s["id_suspension"]) for s in filas]
+    assert claves == sorted(claves, reverse=True)
+
+
+@pytest.mark.parametrize("orden", ["nombre_completo", "-nombre_completo"])
+def test_orden_con_nulos(client, orden):
+    paginas = _recorrer(client, "/api/services/", limite=3, orden=orden)
+    filas = [p for pagina in paginas for p in pagina]
+    assert sorted(p["id_profesional"] for p in filas) == list(range(1, TOTAL + 1))
+
+    # NULL primero en ascendente y al final en descendente; empates por id en el mismo sentido
+    descendente = orden.startswith("-")
+    esperado = sorted(filas, key=lambda p: (p["nombre_completo"] is not None, p["nombre_completo"] or "", p["id_profesional"]),
+                      reverse=descendente)
+    assert [p["id_profesional"] for p in filas] == [p["id_profesional"] for p in esperado]
+
+
+def test_paginas_del_catalogo_se_cachean_por_separado(client):
+    primera = client.get("/api/comunidades/listar_comunidad", params={"limite": 10})
+    segunda = client.get("/api/comunidades/listar_comunidad",
+                         params={"limite": 10, "cursor": primera.headers["X-Siguiente-Cursor"]})
+    assert [c["id_comunidad"] for c in primera.json()] == list(range(1, 11))
+    assert [c["id_comunidad"] for c in segunda.json()] == list(range(11, 21))
+    assert client.get("/api/comunidades/listar_comunidad", params={"limite": 10}).json() == primera.json()
+
+
+def test_cursor_invalido(client):
+    assert client.get("/api/usuarios/clientes", params={"cursor": "no-es-un-cursor"}).status_code == 400
+
+
+@pytest.mark.parametrize("ruta,orden,valores", [
+    ("/api/comunidades/listar_comunidad", "", ["x", "abc"]),
+    ("/api/billing/planes", "", [None, [1]]),
+    ("/api/billing/suspensiones/todas", "fecha_inicio", ["no-es-fecha", 1]),
+    ("/api/billing/suspensiones/todas", "fecha_inicio", [123, 1]),
+    ("/api/usuarios/clientes", "nombre", [{"a": 1}, 1]),
+    ("/api/usuarios/clientes", "", [None, None]),
+])
+def test_cursor_con_valores_alterados(client, ruta, orden, valores):
+    cursor = codificar_cursor(orden, *valores)
+    params = {"cursor": cursor, **({"orden": orden} if orden else {})}
+    response = client.get(ruta, params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor de paginación inválido"
+
+
+def test_cursor_de_otro_orden(client):
+    cursor = client.get("/api/usuarios/clientes", params={"limite": 2, "orden": "nombre"}).headers["X-Siguiente-Cursor"]
+    response = client.get("/api/usuarios/clientes", params={"limite": 2, "orden": "email", "cursor": cursor})
+    assert response.status_code == 400
+    # Un cursor armado a mano con el orden correcto sí se acepta
+    cursor = codificar_cursor("email", "c1@test.com", 1)
+    response = client.get("/api/usuarios/clientes", params={"limite": 2, "orden": "email", "cursor": cursor})
+    assert response.status_code == 200
+
+
+def test_orden_no_permitido(client):
+    response = client.get("/api/usuarios/clientes", params={"orden": "password"})
+    assert response.status_code == 400
+    assert "nombre" in response.json()["detail"]
+
+
+def test_limite_maximo(client):
+    assert client.get("/api/usuarios/clientes", params={"limite": PAGINACION_LIMITE_MAX + 1}).status_code == 422
+    assert client.get("/api/usuarios/clientes", params={"limite": 0}).status_code == 422
+
+
+def test_consultas_constantes_por_pagina(client, bd):
+    consultas = []
+
+    def contar(*args):
+        consultas.append(1)
+
+    event.listen(bd, "before_cursor_execute", contar)
+    try:
+        conteos = []
+        cursor = None
+        while True:
+            consultas.clear()
+            params = {"limite": 5, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/usuarios/clientes", params=params)
+            conteos.append(len(consultas))
+            cursor = response.headers.get("X-Siguiente-Cursor")
+            if not cursor:
+                break
+    finally:
+        event.remove(bd, "before_cursor_execute", contar)
+    # Página de usuarios + selectinload de clientes, igual en la primera y en la última
+    assert len(set(conteos)) == 1 and conteos[0] <= 2
@@ -0,0 +1,101 @@
+"""
+Plantillas de correo precompiladas: render desde contextos tipados, secciones
+opcionales, escape de HTML y formateo localizado de fechas.
+"""
+import os
+import sys
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils.benchmark_plantillas_correo import ejecutar
+from utils.email_templates import (
+    FORMULARIO,
+    MEMBRESIA_ACTIVA,
+    RESERVA,
+    ContextoCancelacionReserva,
+    ContextoFormulario,
+    ContextoMembresiaActiva,
+    ContextoReserva,
+    compilar,
+    formatear_fecha,
+    plantillas,
+)
+
+
+def _reserva(**cambios):
+    datos = dict(
+        nombre_cliente="Ana", nombre_servicio="Yoga", fecha=date(2025, 8, 5),
+        hora_inicio=time(9, 0), hora_fin=time(10, 30),
+    )
+    datos.update(cambios)
+    return ContextoReserva(**datos)
+
+
+def test_reserva_con_y_sin_secciones():
+    asunto, html = RESERVA.renderizar(_reserva())
+    assert asunto == "Confirmación de tu Reserva"
+    assert "martes 5 de agosto de 2025" in html
+    assert "09:00 - 10:30" in html
+    assert "N/A" in html  # sin ubicación
+    assert "Resumen de tu plan" not in html
+    assert "<small" not in html
+
+    _, html = RESERVA.renderizar(_reserva(
+        ubicacion="Local Centro", direccion_detallada="Av. Sol 1", topes_consumidos=0, topes_disponibles=4,
+    ))
+    assert "Av. Sol 1</small>" in html
+    assert "Has utilizado 0 de 4 topes." in html
+
+
+def test_valores_escapados():
+    _, html = RESERVA.renderizar(_reserva(nombre_cliente="<script>x</script>"))
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+
+
+def test_asunto_con_campos_y_formatos():
+    asunto, html = FORMULARIO.renderizar(ContextoFormulario("Prof", "Cliente", datetime(2025, 8, 5, 18, 45)))
+    assert asunto == "Nuevo Formulario Recibido de Cliente"
+    assert "<strong>05/08/2025</strong> a las <strong>18:45</strong>" in html
+
+
+def test_precio_y_fecha_faltante():
+    _, html = MEMBRESIA_ACTIVA.renderizar(ContextoMembresiaActiva(
+        "Ana", "Mensual", "Comunidad", None, date(2025, 12, 31), Decimal("50.00"),
+    ))
+    assert "S/ 50.00" in html
+    assert "<strong>Fecha de inicio:</strong> </li>" in html
+    assert "miércoles 31 de diciembre de 2025" in html
+
+
+def test_contexto_equivocado():
+    with pytest.raises(TypeError):
+        RESERVA.renderizar(ContextoCancelacionReserva("Ana", "Yoga", date(2025, 8, 5)))
+
+
+def test_formatos_de_fecha():
+    assert formatear_fecha(date(2025, 8, 5), "iso") == "2025-08-05"
+    assert formatear_fecha(datetime(2025, 8, 5, 7, 5), "hora") == "07:05"
+    assert formatear_fecha(date(2025, 8, 5), "larga", "en") == "Tuesday, August 5, 2025"
+    with pytest.raises(ValueError):
+        compilar("{fecha:desconocido}")
+
+
+def test_campos_invalidos_se_rechazan_al_compilar():
+    # Solo atributos simples del contexto: nada de índices, atributos anidados ni !r
+    for texto in ("{url.__class__}", "{url[0]}", "{url!r}"):
+        with pytest.raises(ValueError):
+            compilar(texto)
+
+
+def test_registro_y_benchmark():
+    assert {"reserva", "cancelacion_reserva", "suspension_aceptada"} <= set(plantillas.nombres())
+    resultados = ejecutar(repeticiones=200)
+    assert {r["plantilla"] for r in resultados} == {"reserva", "cancelacion", "suspension"}
+    assert all(r["renders_por_segundo"] > 0 for r in resultados)
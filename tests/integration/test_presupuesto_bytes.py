@@ -0,0 +1,72 @@
+"""
+Benchmark de regresión: bytes que MySQL envía por endpoint.
+Las columnas BLOB están diferidas, así que los listados no deberían traer imágenes ni archivos.
+Se mide con el contador `Bytes_sent` de la sesión MySQL usada por la petición.
+"""
+import os
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.db import engine, get_session
+
+# Presupuesto máximo (bytes) por endpoint
+PRESUPUESTOS = {
+    "/api/comunidades/listar_comunidad": 64 * 1024,
+    "/api/comunidades/comunidades-con-servicios": 128 * 1024,
+    "/api/comunidades/comunidades-con-servicios_sinImagen": 128 * 1024,
+    "/api/services/servicios": 64 * 1024,
+    "/api/services/usuario/servicio/2/distritos": 32 * 1024,
+    "/api/billing/suspensiones/todas": 256 * 1024,
+}
+
+
+def _bytes_enviados(conexion) -> int:
+    fila = conexion.execute(text("SHOW SESSION STATUS LIKE 'Bytes_sent'")).one()
+    return int(fila[1])
+
+
+@pytest.fixture(name="conexion")
+def conexion_fixture():
+    """Fija una sola conexión para que el contador de la sesión MySQL mida la petición completa."""
+    anterior = app.dependency_overrides.get(get_session)
+    with engine.connect() as conexion:
+        def get_session_conexion_fija():
+            with Session(bind=conexion) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_conexion_fija
+        yield conexion
+        conexion.rollback()
+
+    if anterior is not None:
+        app.dependency_overrides[get_session] = anterior
+    else:
+        app.dependency_overrides.pop(get_session, None)
+
+
+@pytest.mark.parametrize("endpoint", list(PRESUPUESTOS))
+def test_bytes_por_endpoint_dentro_del_presupuesto(conexion, endpoint):
+    client = TestClient(app)
+
+    # Costo de la propia consulta de estado, para descontarlo
+    base = _bytes_enviados(conexion)
+    costo_medicion = _bytes_enviados(conexion) - base
+
+    antes = _bytes_enviados(conexion)
+    response = client.get(endpoint)
+    despues = _bytes_enviados(conexion)
+
+    assert response.status_code in (200, 404), response.text
+    consumidos = despues - antes - costo_medicion
+    print(f"📦 {endpoint}: {consumidos} bytes desde MySQL")
+    assert consumidos <= PRESUPUESTOS[endpoint], (
+        f"{endpoint} trajo {consumidos} bytes (presupuesto {PRESUPUESTOS[endpoint]})"
+    )
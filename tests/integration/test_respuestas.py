@@ -0,0 +1,154 @@
+"""
+Pipeline de salida: JSON con orjson, serialización de response_model en un solo paso
+y compresión gzip/brotli negociada por Accept-Encoding sobre un tamaño mínimo.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.catalogo import limpiar_catalogo
+from app.core.compresion import MiddlewareCompresion, elegir_codificacion
+from app.core.db import get_session
+from app.core.enums import TipoDocumento, TipoUsuario
+from app.core.respuestas import RespuestaJSON, a_json
+from app.modules.communities.models import Comunidad
+from app.modules.users.models import Cliente, Usuario
+from app.modules.users.schemas import UsuarioClienteFull
+from utils.benchmark_respuestas import ejecutar
+
+
+@pytest.fixture
+def bd():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, 31):
+            session.add(Comunidad(id_comunidad=i, nombre=f"Comunidad {i}", slogan="Entrena con nosotros", creado_por="t"))
+            session.add(Usuario(id_usuario=i, nombre=f"N{i}", apellido="A", email=f"c{i}@test.com", password="x",
+                                tipo=TipoUsuario.Cliente, fecha_creacion=datetime(2025, 1, 1, 15)))
+            session.add(Cliente(id_cliente=i, id_usuario=i, tipo_documento=TipoDocumento.DNI, num_doc=str(i),
+                                numero_telefono="9", id_departamento=15, id_distrito=1, talla=170, peso=70))
+        session.commit()
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    limpiar_catalogo()
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    limpiar_catalogo()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("accept, brotli_disponible, esperado", [
+    ("gzip, deflate, br", True, "br"),
+    ("gzip, deflate, br", False, "gzip"),
+    ("br;q=0.5, gzip", True, "gzip"),
+    ("gzip;q=0, identity", True, None),
+    ("*", False, "gzip"),
+    ("", True, None),
+])
+def test_negociacion(accept, brotli_disponible, esperado):
+    assert elegir_codificacion(accept, brotli_disponible) == esperado
+
+
+def test_listado_grande_sale_comprimido(bd):
+    client = TestClient(app)
+    response = client.get("/api/comunidades/comunidades-con-servicios_sinImagen", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.num_bytes_downloaded < len(response.content) / 3
+    assert len(response.json()) == 30
+
+    # El ETag pasa a débil y sigue sirviendo para revalidar
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    revalidacion = client.get("/api/comunidades/comunidades-con-servicios_sinImagen",
+                              headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidacion.status_code == 304
+
+    sin_compresion = client.get("/api/comunidades/comunidades-con-servicios_sinImagen", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sin_compresion.headers
+    assert sin_compresion.headers["etag"] == etag.removeprefix("W/")
+
+
+def _app_prueba():
+    cuerpo = json.dumps([{"i": i} for i in range(500)]).encode()
+    rutas = [
+        Route("/json", lambda r: Response(cuerpo, media_type="application/json")),
+        Route("/chico", lambda r: Response(b'{"ok":true}', media_type="application/json")),
+        Route("/imagen", lambda r: Response(os.urandom(4096), media_type="image/png")),
+    ]
+    return TestClient(MiddlewareCompresion(Starlette(routes=rutas), minimo=1024)), cuerpo
+
+
+def test_umbral_y_tipos_excluidos():
+    client, cuerpo = _app_prueba()
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == cuerpo
+    assert "content-encoding" not in client.get("/chico", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/imagen", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_brotli():
+    brotli = pytest.importorskip("brotli")
+    client, cuerpo = _app_prueba()
+    response = client.get("/json", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == cuerpo or brotli.decompress(response.content) == cuerpo
+
+
+def test_json_rapido_equivale_a_json_estandar():
+    datos = {"fecha": datetime(2025, 5, 1, 10, 30), "precio": Decimal("10.50"), "nombre": "Ñandú", 1: [None, True]}
+    cuerpo = RespuestaJSON(datos).body
+    assert json.loads(cuerpo) == {"fecha": "2025-05-01T10:30:00", "precio": 10.5, "nombre": "Ñandú", "1": [None, True]}
+    assert "Ñandú".encode() in cuerpo
+
+
+def test_clientes_en_dos_consultas_y_misma_salida(bd):
+    consultas = []
+    event.listen(bd, "before_cursor_execute", lambda *a: consultas.append(a[2]))
+    response = TestClient(app).get("/api/usuarios/clientes", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(consultas) == 2  # usuarios + clientes (selectinload), sin N+1
+
+    primero = response.json()[0]
+    assert primero["email"] == "c1@test.com"
+    assert primero["fecha_creacion"] == "2025-01-01T10:00:00-05:00"  # hora de Lima
+    assert primero["cliente"]["num_doc"] == "1"
+
+    with Session(bd) as session:
+        usuario = session.get(Usuario, 1)
+        esperado = json.loads(UsuarioClienteFull.model_validate(usuario, from_attributes=True).model_dump_json())
+        assert json.loads(a_json([usuario], List[UsuarioClienteFull], validar=True)) == [esperado]
+
+
+def test_benchmark():
+    resultados = ejecutar(clientes=20, repeticiones=2)
+    assert {r["ruta"] for r in resultados["endpoints"]} >= {"/api/usuarios/clientes", "/api/services/servicios"}
+    gzip_clientes = next(r for r in resultados["endpoints"]
+                         if r["ruta"] == "/api/usuarios/clientes" and r["codificacion"] == "gzip")
+    assert gzip_clientes["bytes"] < gzip_clientes["bytes_sin_comprimir"]
+    assert [r["estrategia"] for r in resultados["serializacion"]] == ["fastapi_response_model", "a_json"]
@@ -0,0 +1,97 @@
+"""
+Tablero de suspensiones del admin: una consulta por página, estado visual calculado en
+SQL y filtros/paginación en la base de datos.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import literal
+from sqlalchemy.sql import visitors
+from sqlmodel import Session, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.db import engine
+from app.modules.billing.models import Suspension
+from app.modules.billing.services import calcular_estado_suspension, estado_visual_suspension_sql
+from app.modules.users.dependencies import get_current_admin
+
+RUTA = "/api/billing/suspensiones/todas-con-estado"
+
+
+@pytest.fixture(name="client")
+def client_fixture():
+    app.dependency_overrides[get_current_admin] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_admin, None)
+
+
+def test_estado_sql_coincide_con_python():
+    ahora = datetime(2025, 6, 15, 12, 0, 0)
+    casos = []
+    for estado in (0, 1, 2, 3):
+        for delta_inicio in (-30, -1, 0, 3, 7, 8, 20):
+            for duracion in (1, 5, 40):
+                inicio = ahora + timedelta(days=delta_inicio, hours=1)
+                casos.append(Suspension(estado=estado, fecha_inicio=inicio, fecha_fin=inicio + timedelta(days=duracion)))
+
+    with Session(engine) as session:
+        for suspension in casos:
+            valores = {
+                "estado": suspension.estado,
+                "fecha_inicio": suspension.fecha_inicio,
+                "fecha_fin": suspension.fecha_fin,
+            }
+
+            def reemplazar(elemento):
+                if getattr(elemento, "table", None) is Suspension.__table__ and elemento.name in valores:
+                    return literal(valores[elemento.name], type_=elemento.type)
+                return None
+
+            expresion = visitors.replacement_traverse(estado_visual_suspension_sql(ahora), {}, reemplazar)
+            en_sql = session.exec(select(expresion)).one()
+            assert en_sql == calcular_estado_suspension(suspension, ahora)["estado_visual"], valores
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 1})
+def test_tablero_una_consulta(client):
+    response = client.get(RUTA, params={"tamano_pagina": 200})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert int(response.headers["X-Total-Count"]) >= len(data)
+    for fila in data:
+        assert "archivo" not in fila
+        assert {"estado_visual", "color", "acciones_disponibles", "tiene_archivo", "comunidad"} <= set(fila)
+
+
+@pytest.mark.presupuesto_consultas({f"GET {RUTA}": 2})
+def test_tablero_paginado_y_filtros(client):
+    completo = client.get(RUTA, params={"tamano_pagina": 200})
+    total = int(completo.headers["X-Total-Count"])
+    if total == 0:
+        pytest.skip("No hay suspensiones en la base de datos")
+
+    primera = client.get(RUTA, params={"pagina": 1, "tamano_pagina": 1})
+    assert primera.json() == completo.json()[:1]
+    assert int(primera.headers["X-Total-Count"]) == total
+
+    estado = completo.json()[0]["estado_visual"]
+    filtrado = client.get(RUTA, params={"estado_visual": estado, "tamano_pagina": 200}).json()
+    assert filtrado and all(f["estado_visual"] == estado for f in filtrado)
+
+    fuera = client.get(RUTA, params={"pagina": total + 1, "tamano_pagina": 1})
+    assert fuera.json() == []
+    assert int(fuera.headers["X-Total-Count"]) == total
+
+
+def test_tablero_filtro_fechas(client):
+    response = client.get(RUTA, params={"desde": "2100-01-01"})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert response.headers["X-Total-Count"] == "0"
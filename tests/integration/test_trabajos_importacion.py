@@ -0,0 +1,199 @@
+"""
+Cargas masivas como trabajos: el endpoint responde 202 con el id del trabajo y el
+avance (filas procesadas, insertados, errores) se consulta o se sigue por SSE.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app
+from app.core.enums import ModalidadServicio
+from app.core import importacion
+from app.core.trabajos import COMPLETADO, FALLIDO, PENDIENTE, PROCESANDO, GestorTrabajos, gestor_trabajos
+from app.modules.services.models import Profesional, Servicio
+from app.modules.services.services import ImportadorProfesionales
+from app.modules.users.dependencies import get_current_admin
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@pytest.fixture
+def bd(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Servicio(id_servicio=1, nombre="Yoga", modalidad=ModalidadServicio.Virtual,
+                             fecha_creacion=datetime.utcnow(), creado_por="t", estado=1))
+        session.commit()
+    monkeypatch.setattr(gestor_trabajos, "_engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(bd):
+    app.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(email="admin@test.com")
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_admin, None)
+
+
+def _excel(df: pd.DataFrame) -> BytesIO:
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def _profesionales(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "email": [f"prof{i}@test.com" for i in range(n - 1)] + ["prof0@test.com"],
+        "id_servicio": [1] * n,
+        "nombre_completo": ["Profesional"] * n,
+    })
+
+
+def _esperar(client, id_trabajo: str) -> dict:
+    for _ in range(200):
+        estado = client.get(f"/api/importaciones/{id_trabajo}").json()
+        if estado["estado"] in (COMPLETADO, FALLIDO):
+            return estado
+        time.sleep(0.05)
+    raise AssertionError("El trabajo no terminó")
+
+
+def test_carga_responde_de_inmediato_y_publica_avance(client, bd):
+    archivo = _excel(_profesionales(30))
+    response = client.post("/api/services/carga-masiva", files={"archivo": ("p.xlsx", archivo, XLSX)})
+    assert response.status_code == 202, response.text
+    data = response.json()
+    assert data["url_estado"] == f"/api/importaciones/{data['id_trabajo']}"
+
+    estado = _esperar(client, data["id_trabajo"])
+    assert estado["estado"] == COMPLETADO
+    assert estado["filas_totales"] == estado["filas_procesadas"] == 30
+    assert (estado["insertados"], estado["omitidos"], estado["errores"]) == (29, 1, 1)
+    assert estado["resumen"]["errores"] == ["Fila 31: El email 'prof0@test.com' ya existe"]
+    with Session(bd) as session:
+        assert len(session.exec(select(Profesional)).all()) == 29
+
+    ids = [t["id_trabajo"] for t in client.get("/api/importaciones").json()]
+    assert data["id_trabajo"] in ids
+
+
+def test_eventos_hasta_terminar(client):
+    archivo = _excel(_profesionales(5))
+    id_trabajo = client.post("/api/services/carga-masiva", files={"archivo": ("p.xlsx", archivo, XLSX)}).json()["id_trabajo"]
+
+    with client.stream("GET", f"/api/importaciones/{id_trabajo}/eventos") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        eventos = [json.loads(linea[len("data: "):]) for linea in response.iter_lines() if linea.startswith("data: ")]
+
+    assert eventos[-1]["estado"] == COMPLETADO
+    assert eventos[-1]["insertados"] == 4
+    avance = [e["filas_procesadas"] for e in eventos]
+    assert avance == sorted(avance)
+
+
+def test_archivo_invalido_termina_fallido(client):
+    archivo = _excel(pd.DataFrame({"nombre": ["x"]}))
+    id_trabajo = client.post("/api/services/carga-masiva", files={"archivo": ("p.xlsx", archivo, XLSX)}).json()["id_trabajo"]
+    estado = _esperar(client, id_trabajo)
+    assert estado["estado"] == FALLIDO
+    assert "email" in estado["detalle"]
+
+
+def test_trabajo_inexistente(client):
+    assert client.get("/api/importaciones/no-existe").status_code == 404
+    response = client.post("/api/services/locales-carga-masiva/99", files={"archivo": ("l.xlsx", _excel(pd.DataFrame()), XLSX)})
+    assert response.status_code == 404
+
+
+def test_importador_avisa_por_lote(bd):
+    avances = []
+    with Session(bd) as session:
+        importador = ImportadorProfesionales(session, "admin", tamano_lote=10)
+        importador.al_avanzar = avances.append
+        importador.procesar(_profesionales(25))
+
+    # validación (1 rechazada) y luego lotes de 10, 10 y 4
+    assert [a["filas_procesadas"] for a in avances] == [1, 11, 21, 25]
+    assert avances[-1] == {"filas_procesadas": 25, "insertados": 24, "omitidos": 1, "errores": 1}
+
+
+def test_detener_cancela_pendientes_y_borra_temporales(bd, monkeypatch):
+    gestor = GestorTrabajos(engine=bd, hilos=1)
+    monkeypatch.setattr(importacion, "gestor_trabajos", gestor)
+    rutas = []
+    guardar = importacion._guardar_temporal
+    monkeypatch.setattr(importacion, "_guardar_temporal", lambda archivo: rutas.append(guardar(archivo)) or rutas[-1])
+
+    # Un trabajo ocupa el único hilo, así la importación queda en cola
+    liberar, ocupado = threading.Event(), threading.Event()
+    gestor.encolar("bloqueo", "admin", lambda session, trabajo: ocupado.set() or liberar.wait(5))
+    assert ocupado.wait(5)
+    archivo = UploadFile(_excel(_profesionales(3)), filename="p.xlsx")
+    trabajo = importacion.encolar_importacion("profesionales", archivo, "admin",
+                                              lambda db: ImportadorProfesionales(db, "admin"))
+    assert trabajo.estado == PENDIENTE and os.path.exists(rutas[0])
+
+    gestor.detener()
+    liberar.set()
+
+    assert trabajo.estado == FALLIDO
+    assert trabajo.terminado is not None and "Cancelado" in trabajo.detalle
+    assert not os.path.exists(rutas[0])
+
+
+def test_temporal_se_borra_al_terminar(client, monkeypatch):
+    rutas = []
+    guardar = importacion._guardar_temporal
+    monkeypatch.setattr(importacion, "_guardar_temporal", lambda archivo: rutas.append(guardar(archivo)) or rutas[-1])
+
+    response = client.post("/api/services/carga-masiva",
+                           files={"archivo": ("p.xlsx", _excel(_profesionales(3)), XLSX)})
+    estado = _esperar(client, response.json()["id_trabajo"])
+    assert estado["estado"] == COMPLETADO
+    for _ in range(100):
+        if not os.path.exists(rutas[0]):
+            break
+        time.sleep(0.01)
+    assert not os.path.exists(rutas[0])
+
+
+def test_otro_worker_ve_el_avance(bd):
+    # Dos gestores sobre la misma base simulan dos workers de uvicorn
+    ejecutor, otro = GestorTrabajos(engine=bd, hilos=1), GestorTrabajos(engine=bd, hilos=1)
+    avanzar, avanzado = threading.Event(), threading.Event()
+
+    def funcion(session, trabajo):
+        trabajo.avanzar(filas_totales=10, filas_procesadas=4)
+        avanzado.set()
+        avanzar.wait(5)
+        return {"insertados": 10}
+
+    trabajo = ejecutor.encolar("prueba", "admin", funcion)
+    assert avanzado.wait(5)
+    visto = otro.obtener(trabajo.id)
+    assert (visto.estado, visto.filas_procesadas) == (PROCESANDO, 4)
+    assert [t.id for t in otro.listar("admin")] == [trabajo.id]
+
+    avanzar.set()
+    ejecutor.detener(esperar=True)
+    visto = otro.obtener(trabajo.id)
+    assert visto.estado == COMPLETADO and visto.resumen == {"insertados": 10}
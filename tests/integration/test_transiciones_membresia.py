@@ -0,0 +1,143 @@
+"""
+Tarea programada de transiciones de membresía: lease en BD (un solo proceso la corre),
+congelamiento/reactivación en bloque y lectura de estado sin escrituras.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, select
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.main import app  # noqa: F401  (registra todos los modelos)
+from app.core.db import engine
+from app.core.scheduler import LeaseTarea, Programador
+from app.modules.billing.models import Inscripcion, Suspension
+from app.modules.billing.services import aplicar_transiciones_membresia, ahora_lima, segundos_hasta_proxima_transicion
+from app.modules.communities.models import Comunidad
+from app.modules.users.models import Cliente
+from app.modules.users.services import tiene_membresia_activa
+
+
+@pytest.fixture(name="lease")
+def lease_fixture():
+    SQLModel.metadata.create_all(engine, tables=[LeaseTarea.__table__])  # type: ignore
+    yield "test_lease"
+    with Session(engine) as session:
+        fila = session.get(LeaseTarea, "test_lease")
+        if fila:
+            session.delete(fila)
+            session.commit()
+
+
+def test_lease_un_solo_propietario(lease):
+    uno, otro = Programador(engine), Programador(engine)
+
+    assert uno.tomar_lease(lease)
+    assert not otro.tomar_lease(lease)
+    assert uno.tomar_lease(lease)  # renovar el propio
+
+    uno.liberar_lease(lease)
+    assert otro.tomar_lease(lease)
+    assert not uno.tomar_lease(lease)
+
+
+def test_ejecutar_sin_lease_no_corre_la_tarea(lease):
+    corridas = []
+    uno, otro = Programador(engine), Programador(engine)
+    for programador in (uno, otro):
+        programador.registrar(lease, lambda session: corridas.append(1) or 30.0, intervalo=60)
+
+    assert uno.ejecutar(lease) == 30.0
+    assert otro.ejecutar(lease) is None
+    assert len(corridas) == 1
+
+
+@pytest.fixture(name="inscripcion")
+def inscripcion_fixture():
+    with Session(engine) as session:
+        id_cliente = session.exec(select(Cliente.id_cliente)).first()
+        id_comunidad = session.exec(select(Comunidad.id_comunidad)).first()
+        if id_cliente is None or id_comunidad is None:
+            pytest.skip("Se necesita al menos un cliente y una comunidad")
+
+        inscripcion = Inscripcion(id_cliente=id_cliente, id_comunidad=id_comunidad, creado_por="test", estado=1)
+        session.add(inscripcion)
+        session.commit()
+        session.refresh(inscripcion)
+
+    yield inscripcion
+
+    with Session(engine) as session:
+        for suspension in session.exec(select(Suspension).where(Suspension.id_inscripcion == inscripcion.id_inscripcion)):
+            session.delete(suspension)
+        session.delete(session.get(Inscripcion, inscripcion.id_inscripcion))
+        session.commit()
+
+
+def test_congela_y_reactiva_en_bloque(inscripcion):
+    ahora = ahora_lima()
+    with Session(engine) as session:
+        suspension = Suspension(
+            id_cliente=inscripcion.id_cliente, id_inscripcion=inscripcion.id_inscripcion, motivo="test",
+            fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora + timedelta(days=10),
+            creado_por="test", estado=1,
+        )
+        session.add(suspension)
+        session.commit()
+
+        cambios = aplicar_transiciones_membresia(session, ahora)
+        assert cambios["congeladas"] >= 1
+        assert session.get(Inscripcion, inscripcion.id_inscripcion).estado == 0
+
+        # Idempotente: una segunda corrida no vuelve a tocar la fila
+        aplicar_transiciones_membresia(session, ahora)
+        assert session.get(Inscripcion, inscripcion.id_inscripcion).estado == 0
+
+        # La próxima transición es el fin de la suspensión (o algo anterior)
+        espera = segundos_hasta_proxima_transicion(session, ahora)
+        assert espera is not None and espera <= timedelta(days=10).total_seconds()
+
+        # Pasado el fin de la suspensión, se reactiva
+        despues = ahora + timedelta(days=11)
+        cambios = aplicar_transiciones_membresia(session, despues, datetime.utcnow())
+        assert cambios["reactivadas"] >= 1
+        session.expire_all()
+        assert session.get(Inscripcion, inscripcion.id_inscripcion).estado == 1
+        assert session.get(Inscripcion, inscripcion.id_inscripcion).modificado_por == "sistema_auto"
+
+
+def test_lectura_de_estado_no_escribe(inscripcion):
+    ahora = ahora_lima()
+    with Session(engine) as session:
+        session.add(Suspension(
+            id_cliente=inscripcion.id_cliente, id_inscripcion=inscripcion.id_inscripcion, motivo="test",
+            fecha_inicio=ahora - timedelta(days=20), fecha_fin=ahora - timedelta(days=1),
+            creado_por="test", estado=1,
+        ))
+        session.get(Inscripcion, inscripcion.id_inscripcion).estado = 0
+        session.commit()
+
+    sentencias = []
+
+    def capturar(conn, cursor, statement, *args):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        with Session(engine) as session:
+            estado = tiene_membresia_activa(session, inscripcion.id_cliente, inscripcion.id_comunidad)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+
+    assert len(sentencias) == 1
+    assert sentencias[0].lstrip().upper().startswith("SELECT")
+    assert estado is not None
+    # La suspensión ya terminó, pero la lectura no reactiva: eso lo hace la tarea
+    with Session(engine) as session:
+        assert session.get(Inscripcion, inscripcion.id_inscripcion).estado == 0
@@ -0,0 +1,108 @@
+"""
+Benchmark de /usuario/comunidades: armado por comunidad (N+1) frente al modelo de
+lectura en bloque (obtener_contexto_comunidades).
+
+Crea una BD SQLite en memoria con un cliente inscrito en 1, 10 y 100 comunidades
+(3 servicios y una inscripción por comunidad) y mide consultas y tiempo de cada estrategia.
+
+Uso:
+    DATABASE_URL=sqlite:// python -m utils.benchmark_contexto_comunidades --repeticiones 20
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.core.enums import ModalidadServicio
+from app.modules.billing.models import Inscripcion
+from app.modules.communities.models import ClienteXComunidad, Comunidad
+from app.modules.communities.schemas import ComunidadContexto
+from app.modules.communities.services import obtener_servicios_de_comunidad
+from app.modules.services.models import ComunidadXServicio, Servicio
+from app.modules.services.schemas import ServicioResumen
+from app.modules.users.services import obtener_comunidades_del_cliente, obtener_contexto_comunidades, tiene_membresia_activa
+
+ID_CLIENTE = 1
+SERVICIOS_POR_COMUNIDAD = 3
+
+
+def _crear_bd(comunidades: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    ahora = datetime.utcnow()
+    with Session(engine) as session:
+        for i in range(1, comunidades + 1):
+            session.add(Comunidad(id_comunidad=i, nombre=f"Comunidad {i}", creado_por="benchmark"))
+            session.add(ClienteXComunidad(id_cliente=ID_CLIENTE, id_comunidad=i))
+            session.add(Inscripcion(id_comunidad=i, id_cliente=ID_CLIENTE, creado_por="benchmark", estado=i % 4))
+            for j in range(SERVICIOS_POR_COMUNIDAD):
+                id_servicio = (i - 1) * SERVICIOS_POR_COMUNIDAD + j + 1
+                session.add(Servicio(
+                    id_servicio=id_servicio, nombre=f"Servicio {id_servicio}", modalidad=ModalidadServicio.Presencial,
+                    fecha_creacion=ahora, creado_por="benchmark", estado=1,
+                ))
+                session.add(ComunidadXServicio(id_comunidad=i, id_servicio=id_servicio))
+        session.commit()
+    return engine
+
+
+def por_comunidad(session: Session, id_cliente: int) -> List[ComunidadContexto]:
+    """Estrategia anterior: dos consultas de comunidades y tres o más por cada una."""
+    respuesta = []
+    for comunidad in obtener_comunidades_del_cliente(session, id_cliente):
+        servicios = obtener_servicios_de_comunidad(session, comunidad.id_comunidad)  # type: ignore
+        respuesta.append(ComunidadContexto.from_orm_with_base64(
+            comunidad=comunidad,
+            servicios=[ServicioResumen(nombre=s.nombre, modalidad=s.modalidad) for s in servicios],
+            estado_membresia=tiene_membresia_activa(session, id_cliente, comunidad.id_comunidad),  # type: ignore
+        ))
+    return respuesta
+
+
+def medir(engine, estrategia: Callable[[Session, int], List[ComunidadContexto]], repeticiones: int) -> Dict[str, float]:
+    consultas = 0
+
+    def contar(*args):
+        nonlocal consultas
+        consultas += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            with Session(engine) as session:
+                resultado = estrategia(session, ID_CLIENTE)
+        transcurrido = time.perf_counter() - inicio
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+    return {
+        "comunidades": len(resultado),
+        "consultas": consultas / repeticiones,
+        "ms": transcurrido * 1000 / repeticiones,
+    }
+
+
+def ejecutar(tamanos=(1, 10, 100), repeticiones: int = 20) -> List[Dict]:
+    resultados = []
+    for tamano in tamanos:
+        engine = _crear_bd(tamano)
+        for nombre, estrategia in (("por_comunidad", por_comunidad), ("conjunto", obtener_contexto_comunidades)):
+            resultados.append({"estrategia": nombre, **medir(engine, estrategia, repeticiones)})
+        engine.dispose()
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas y tiempo de /usuario/comunidades por estrategia")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'estrategia':>15} {'comunidades':>12} {'consultas':>10} {'ms':>10}")
+    for r in ejecutar(repeticiones=args.repeticiones):
+        print(f"{r['estrategia']:>15} {r['comunidades']:>12} {r['consultas']:>10.0f} {r['ms']:>10.2f}")
@@ -0,0 +1,66 @@
+"""
+Benchmark del hash de contraseñas en carga masiva: hashes por segundo según la
+cantidad de procesos (1, 2, 4, ... hasta los núcleos disponibles) y las rondas.
+
+Uso:
+    python -m utils.benchmark_hash_importacion --passwords 200 --rondas 10 12
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.core.security import cerrar_pool_hash, hash_passwords
+
+
+def niveles_de_procesos(maximo: int) -> List[int]:
+    niveles, n = [], 1
+    while n < maximo:
+        niveles.append(n)
+        n *= 2
+    niveles.append(maximo)
+    return niveles
+
+
+def medir(cantidad: int, rondas: int, procesos: int) -> float:
+    """Hashes por segundo (sin contar el arranque del pool)."""
+    passwords = [f"clave-{i}" for i in range(cantidad)]
+    hash_passwords(passwords[:procesos], rondas, procesos)  # levanta el pool
+    inicio = time.perf_counter()
+    hash_passwords(passwords, rondas, procesos)
+    return cantidad / (time.perf_counter() - inicio)
+
+
+def ejecutar(cantidad: int = 200, rondas: Sequence[int] = (10, 12), procesos: Optional[Sequence[int]] = None) -> List[Dict]:
+    procesos = procesos or niveles_de_procesos(os.cpu_count() or 1)
+    resultados = []
+    try:
+        for r in rondas:
+            base = None
+            for p in procesos:
+                por_segundo = medir(cantidad, r, p)
+                base = base or por_segundo
+                resultados.append({
+                    "rondas": r,
+                    "procesos": p,
+                    "hashes_por_segundo": por_segundo,
+                    "aceleracion": por_segundo / base,
+                    # minutos para un Excel de 5000 filas
+                    "minutos_5000": 5000 / por_segundo / 60,
+                })
+    finally:
+        cerrar_pool_hash()
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hashes bcrypt por segundo según procesos")
+    parser.add_argument("--passwords", type=int, default=200)
+    parser.add_argument("--rondas", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--procesos", type=int, nargs="+")
+    args = parser.parse_args()
+
+    print(f"{'rondas':>6} {'procesos':>8} {'hashes/s':>10} {'x':>6} {'min/5000':>9}")
+    for r in ejecutar(args.passwords, args.rondas, args.procesos):
+        print(f"{r['rondas']:>6} {r['procesos']:>8} {r['hashes_por_segundo']:>10.1f} "
+              f"{r['aceleracion']:>6.2f} {r['minutos_5000']:>9.2f}")
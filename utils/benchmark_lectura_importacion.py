@@ -0,0 +1,122 @@
+"""
+Benchmark de memoria de la lectura de cargas masivas: pico de RSS al leer un archivo
+de clientes de N filas completo (pd.read_excel / pd.read_csv sobre los bytes subidos)
+frente a LectorFilas por partes. Cada estrategia corre en un proceso aparte para que
+los picos no se mezclen.
+
+Uso:
+    python -m utils.benchmark_lectura_importacion --filas 100000 --parte 5000
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+from typing import Dict, List
+
+import openpyxl
+
+COLUMNAS = [
+    "nombre", "apellido", "email", "password", "tipo_documento", "num_doc", "numero_telefono",
+    "id_departamento", "id_distrito", "direccion", "fecha_nac", "genero", "talla", "peso",
+]
+ESTRATEGIAS = ("read_excel", "lector_xlsx", "read_csv", "lector_csv")
+
+
+def _fila(i: int) -> list:
+    return [
+        f"Nombre{i}", f"Apellido{i}", f"cliente{i}@test.com", "clave-segura", "DNI", 10000000 + i,
+        "999999999", 15, 1 + i % 40, f"Av. Siempre Viva {i}", date(1990, 1, 1) + timedelta(days=i % 9000),
+        "F" if i % 2 else "M", 150 + i % 40, 50 + i % 50,
+    ]
+
+
+def generar(filas: int, directorio: str) -> Dict[str, str]:
+    """Escribe el mismo contenido como XLSX (modo write_only) y como CSV."""
+    ruta_xlsx = os.path.join(directorio, f"clientes_{filas}.xlsx")
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(COLUMNAS)
+    for i in range(filas):
+        hoja.append(_fila(i))
+    libro.save(ruta_xlsx)
+
+    ruta_csv = os.path.join(directorio, f"clientes_{filas}.csv")
+    with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS)
+        for i in range(filas):
+            escritor.writerow(_fila(i))
+    return {"xlsx": ruta_xlsx, "csv": ruta_csv}
+
+
+def _rss_pico_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(estrategia: str, ruta: str, parte: int) -> Dict:
+    """Lee el archivo con la estrategia indicada (en este proceso) y devuelve el pico de RSS."""
+    import pandas as pd
+
+    from app.core.importacion import LectorFilas
+
+    base = _rss_pico_mb()
+    inicio = time.perf_counter()
+    filas = 0
+    if estrategia in ("read_excel", "read_csv"):
+        with open(ruta, "rb") as f:
+            datos = BytesIO(f.read())  # como hacía el endpoint con archivo.file.read()
+        df = pd.read_excel(datos, engine="openpyxl") if estrategia == "read_excel" else pd.read_csv(datos)
+        filas = len(df)
+    else:
+        for df in LectorFilas(ruta, tamano=parte):
+            filas += len(df)
+    return {
+        "estrategia": estrategia,
+        "filas": filas,
+        "segundos": time.perf_counter() - inicio,
+        "rss_base_mb": base,
+        "rss_pico_mb": _rss_pico_mb(),
+    }
+
+
+def ejecutar(filas: int = 100000, parte: int = 5000, estrategias=ESTRATEGIAS) -> List[Dict]:
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = generar(filas, directorio)
+        for estrategia in estrategias:
+            ruta = rutas["xlsx" if "xlsx" in estrategia or estrategia == "read_excel" else "csv"]
+            salida = subprocess.run(
+                [sys.executable, "-m", "utils.benchmark_lectura_importacion",
+                 "--medir", estrategia, "--ruta", ruta, "--parte", str(parte)],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            )
+            linea = next(l for l in salida.stdout.splitlines() if l.startswith('{"estrategia"'))
+            resultados.append(json.loads(linea))
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pico de RSS al leer una carga masiva")
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--parte", type=int, default=5000)
+    parser.add_argument("--medir", choices=ESTRATEGIAS, help=argparse.SUPPRESS)
+    parser.add_argument("--ruta", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.ruta, args.parte)))
+        sys.exit(0)
+
+    print(f"{'estrategia':>12} {'filas':>8} {'s':>7} {'RSS pico MB':>12} {'sobre base MB':>14}")
+    for r in ejecutar(args.filas, args.parte):
+        print(f"{r['estrategia']:>12} {r['filas']:>8} {r['segundos']:>7.2f} "
+              f"{r['rss_pico_mb']:>12.1f} {r['rss_pico_mb'] - r['rss_base_mb']:>14.1f}")
@@ -0,0 +1,105 @@
+"""
+Benchmark del costo de loguear en el hilo de la petición.
+
+Compara, por llamada:
+  - print() a stdout (lo que hacían los endpoints)
+  - logger síncrono con FileHandler (formatea y escribe en el mismo hilo)
+  - logger con QueueHandler (app.core.logger: solo encola)
+y mide el sobrecosto por petición del middleware de request-id.
+
+Uso:
+    python -m utils.benchmark_logging --n 20000
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logger import FormatoJSON, MiddlewareRequestId, crear_pipeline
+
+
+def _por_llamada(funcion: Callable[[int], None], n: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(n):
+        funcion(i)
+    return (time.perf_counter() - inicio) / n
+
+
+def _handler_archivo(carpeta: str, nombre: str) -> logging.Handler:
+    handler = logging.FileHandler(os.path.join(carpeta, nombre))
+    handler.setFormatter(FormatoJSON())
+    return handler
+
+
+def _logger_aislado(nombre: str, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(nombre)
+    log.propagate = False
+    log.handlers = [handler]
+    log.setLevel(logging.INFO)
+    return log
+
+
+def medir_llamadas(n: int = 20000) -> Dict[str, float]:
+    """Microsegundos por llamada de cada estrategia."""
+    resultados = {}
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        resultados["print"] = _por_llamada(lambda i: print(f"Reserva {i} creada correctamente"), n)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        sincrono = _logger_aislado("benchmark.sincrono", _handler_archivo(carpeta, "sync.log"))
+        resultados["logger_sincrono"] = _por_llamada(lambda i: sincrono.info(f"Reserva {i} creada correctamente"), n)
+
+        handler_cola, listener = crear_pipeline(_handler_archivo(carpeta, "cola.log"))
+        encolado = _logger_aislado("benchmark.cola", handler_cola)
+        listener.start()
+        resultados["logger_cola"] = _por_llamada(lambda i: encolado.info(f"Reserva {i} creada correctamente"), n)
+        listener.stop()  # espera a que se escriba todo lo encolado
+
+        for handler in (*sincrono.handlers, *listener.handlers):
+            handler.close()
+
+    return {k: v * 1_000_000 for k, v in resultados.items()}
+
+
+def medir_middleware(n: int = 2000) -> Dict[str, float]:
+    """Microsegundos por petición con y sin el middleware de request-id."""
+    def crear_app(con_middleware: bool) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        if con_middleware:
+            app.add_middleware(MiddlewareRequestId)
+        return app
+
+    resultados = {}
+    for etiqueta, con_middleware in (("sin_middleware", False), ("con_middleware", True)):
+        client = TestClient(crear_app(con_middleware))
+        client.get("/ping")
+        resultados[etiqueta] = _por_llamada(lambda i: client.get("/ping"), n) * 1_000_000
+    resultados["sobrecosto_middleware"] = resultados["con_middleware"] - resultados["sin_middleware"]
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de logging por llamada y por petición")
+    parser.add_argument("--n", type=int, default=20000, help="Llamadas de log a medir")
+    parser.add_argument("--peticiones", type=int, default=2000, help="Peticiones para medir el middleware")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        llamadas = medir_llamadas(args.n)
+    for nombre, us in llamadas.items():
+        print(f"{nombre:>22}: {us:8.2f} µs/llamada")
+    for nombre, us in medir_middleware(args.peticiones).items():
+        print(f"{nombre:>22}: {us:8.2f} µs/petición")
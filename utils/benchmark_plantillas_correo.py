@@ -0,0 +1,164 @@
+"""
+Micro-benchmark de las plantillas de correo: renders por segundo de las plantillas
+precompiladas frente al armado anterior con f-strings, .get() y strftime por mensaje.
+
+Uso:
+    python -m utils.benchmark_plantillas_correo --repeticiones 20000
+"""
+import argparse
+import time
+from datetime import date, datetime, time as hora
+from typing import Callable, Dict, List
+
+from utils.email_templates import (
+    CANCELACION_RESERVA,
+    RESERVA,
+    SUSPENSION_ACEPTADA,
+    ContextoCancelacionReserva,
+    ContextoReserva,
+    ContextoSuspension,
+    formatear_fecha,
+)
+
+RESERVA_CTX = ContextoReserva(
+    nombre_cliente="María", nombre_servicio="Yoga", fecha=date(2025, 8, 5),
+    hora_inicio=hora(9, 0), hora_fin=hora(10, 0), ubicacion="Local Miraflores",
+    direccion_detallada="Av. Larco 123", topes_consumidos=3, topes_disponibles=8,
+)
+CANCELACION_CTX = ContextoCancelacionReserva(nombre_cliente="María", nombre_servicio="Yoga", fecha=date(2025, 8, 5))
+SUSPENSION_CTX = ContextoSuspension(
+    nombre_usuario="María", motivo="Viaje", fecha_inicio=datetime(2025, 8, 1), fecha_fin=datetime(2025, 8, 31),
+)
+
+
+def _reserva_fstring(details: dict) -> str:
+    direccion_detallada_html = f"<br><small style='color: #555;'>{details.get('direccion_detallada', '')}</small>" if details.get('direccion_detallada') else ""
+    creditos_html = ""
+    if details.get("topes_disponibles") is not None and details.get("topes_consumidos") is not None:
+        creditos_html = f"""
+            <p style="margin-top: 20px; border-top: 1px solid #eee; padding-top: 15px; font-size: 14px;">
+                <strong>Resumen de tu plan:</strong>
+                Has utilizado {details['topes_consumidos']} de {details['topes_disponibles']} topes.
+            </p>
+        """
+    hora_inicio_str = details.get('hora_inicio').strftime('%H:%M') if details.get('hora_inicio') else 'N/A'  # type: ignore
+    hora_fin_str = details.get('hora_fin').strftime('%H:%M') if details.get('hora_fin') else 'N/A'  # type: ignore
+    return f"""
+        <div style="font-family: Arial, sans-serif; color: #333; max-width: 600px; margin: auto; border: 1px solid #ddd; padding: 20px; border-radius: 8px;">
+            <h2 style="color: #4f46e5;">Confirmación de Reserva en CommuConnect</h2>
+            <p>Hola {details.get('nombre_cliente', '')},</p>
+            <p>Tu reserva ha sido confirmada con éxito. Aquí están los detalles:</p>
+            <table style="width: 100%; border-collapse: collapse; margin-top: 20px; font-size: 14px;">
+                <tr style="background-color: #f9f9f9;">
+                    <td style="padding: 10px; border: 1px solid #eee; font-weight: bold;">Servicio:</td>
+                    <td style="padding: 10px; border: 1px solid #eee;">{details.get('nombre_servicio', 'N/A')}</td>
+                </tr>
+                <tr>
+                    <td style="padding: 10px; border: 1px solid #eee; font-weight: bold;">Fecha:</td>
+                    <td style="padding: 10px; border: 1px solid #eee;">{details.get('fecha', 'N/A')}</td>
+                </tr>
+                <tr style="background-color: #f9f9f9;">
+                    <td style="padding: 10px; border: 1px solid #eee; font-weight: bold;">Hora:</td>
+                    <td style="padding: 10px; border: 1px solid #eee;">{hora_inicio_str} - {hora_fin_str}</td>
+                </tr>
+                <tr>
+                    <td style="padding: 10px; border: 1px solid #eee; font-weight: bold;">Ubicación:</td>
+                    <td style="padding: 10px; border: 1px solid #eee;">
+                        {details.get('ubicacion', 'N/A')}
+                        {direccion_detallada_html}
+                    </td>
+                </tr>
+            </table>
+            {creditos_html}
+            <p style="margin-top: 25px;">¡Te esperamos!</p>
+            <p>El equipo de CommuConnect</p>
+        </div>
+    """
+
+
+def _cancelacion_fstring(details: dict) -> str:
+    return f"""
+        <div style="font-family: Arial, sans-serif; color: #333; max-width: 600px; margin: auto; border: 1px solid #ddd; padding: 20px; border-radius: 8px;">
+            <h2 style="color: #e53e3e;">Reserva Cancelada</h2>
+            <p>Hola {details.get('nombre_cliente', '')},</p>
+            <p>Te informamos que tu reserva para el servicio <strong>{details.get('nombre_servicio', 'N/A')}</strong> el día <strong>{details.get('fecha', 'N/A')}</strong> ha sido <strong>cancelada exitosamente</strong>.</p>
+            <p>Si tienes dudas o necesitas reprogramar, contáctanos.</p>
+            <br>
+            <p>El equipo de CommuConnect</p>
+        </div>
+    """
+
+
+def _suspension_fstring(details: dict) -> str:
+    return f"""
+        <h2>¡Solicitud de suspensión aceptada!</h2>
+        <p>Hola {details.get('nombre_usuario', '')},</p>
+        <p>Tu solicitud de suspensión de membresía ha sido <strong>aceptada</strong>.</p>
+        <ul>
+            <li><strong>Motivo:</strong> {details.get('motivo', '')}</li>
+            <li><strong>Fecha de inicio:</strong> {details.get('fecha_inicio', '')}</li>
+            <li><strong>Fecha de fin:</strong> {details.get('fecha_fin', '')}</li>
+        </ul>
+        <p>Durante este periodo, tu membresía estará congelada.</p>
+        <p>Gracias por confiar en CommuConnect.</p>
+    """
+
+
+# Cada caso arma sus datos como lo hacía el llamador (dict con strftime) o con el contexto tipado
+CASOS: Dict[str, Dict[str, Callable[[], str]]] = {
+    "reserva": {
+        "fstring": lambda: _reserva_fstring({
+            "nombre_cliente": "María", "nombre_servicio": "Yoga", "fecha": date(2025, 8, 5),
+            "hora_inicio": hora(9, 0), "hora_fin": hora(10, 0), "ubicacion": "Local Miraflores",
+            "direccion_detallada": "Av. Larco 123", "topes_consumidos": 3, "topes_disponibles": 8,
+        }),
+        "plantilla": lambda: RESERVA.renderizar(RESERVA_CTX)[1],
+    },
+    "cancelacion": {
+        "fstring": lambda: _cancelacion_fstring({
+            "nombre_cliente": "María", "nombre_servicio": "Yoga", "fecha": datetime(2025, 8, 5, 9).strftime("%Y-%m-%d"),
+        }),
+        "plantilla": lambda: CANCELACION_RESERVA.renderizar(CANCELACION_CTX)[1],
+    },
+    "suspension": {
+        "fstring": lambda: _suspension_fstring({
+            "nombre_usuario": "María", "motivo": "Viaje",
+            "fecha_inicio": datetime(2025, 8, 1).strftime("%Y-%m-%d"), "fecha_fin": datetime(2025, 8, 31).strftime("%Y-%m-%d"),
+        }),
+        "plantilla": lambda: SUSPENSION_ACEPTADA.renderizar(SUSPENSION_CTX)[1],
+    },
+}
+
+
+def medir(funcion: Callable[[], str], repeticiones: int) -> float:
+    """Renders por segundo."""
+    funcion()  # calienta la caché del formateador
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def ejecutar(repeticiones: int = 20000) -> List[Dict]:
+    formatear_fecha.cache_clear()
+    resultados = []
+    for plantilla, estrategias in CASOS.items():
+        for estrategia, funcion in estrategias.items():
+            resultados.append({
+                "plantilla": plantilla,
+                "estrategia": estrategia,
+                "renders_por_segundo": medir(funcion, repeticiones),
+            })
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renders por segundo de las plantillas de correo")
+    parser.add_argument("--repeticiones", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'plantilla':>12} {'estrategia':>10} {'renders/s':>12}")
+    for r in ejecutar(args.repeticiones):
+        print(f"{r['plantilla']:>12} {r['estrategia']:>10} {r['renders_por_segundo']:>12.0f}")
+    info = formatear_fecha.cache_info()
+    print(f"caché de fechas: {info.hits} aciertos, {info.misses} fallos")
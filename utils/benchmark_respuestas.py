@@ -0,0 +1,167 @@
+"""
+Benchmark del pipeline de salida en los cinco listados más pesados: latencia p50/p99
+y bytes transferidos sin comprimir, con gzip y con brotli (si está instalado).
+También compara la serialización de FastAPI para `response_model` (dump + validación
++ jsonable + json.dumps) con a_json (serializador de pydantic directo a bytes).
+
+Usa una BD SQLite en memoria con datos sintéticos, así que mide la aplicación y no la red.
+
+Uso:
+    python -m utils.benchmark_respuestas --clientes 2000 --repeticiones 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_model_field
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.main import app
+from app.core.catalogo import limpiar_catalogo
+from app.core.compresion import brotli
+from app.core.db import get_session
+from app.core.enums import ModalidadServicio, TipoDocumento, TipoUsuario
+from app.core.respuestas import a_json
+from app.modules.billing.models import Suspension
+from app.modules.communities.models import Comunidad
+from app.modules.services.models import ComunidadXServicio, Servicio
+from app.modules.users.models import Cliente, Usuario
+from app.modules.users.schemas import UsuarioClienteFull
+
+ENDPOINTS = (
+    "/api/comunidades/comunidades-con-servicios",
+    "/api/comunidades/comunidades-con-servicios_sinImagen",
+    "/api/usuarios/clientes",
+    "/api/services/servicios",
+    "/api/billing/suspensiones/todas",
+)
+CODIFICACIONES = ("identity", "gzip") + (("br",) if brotli is not None else ())
+
+
+def poblar(engine, clientes: int, comunidades: int = 40, servicios: int = 60) -> None:
+    ahora = datetime.utcnow()
+    with Session(engine) as session:
+        for i in range(1, comunidades + 1):
+            session.add(Comunidad(id_comunidad=i, nombre=f"Comunidad {i}", slogan="Entrena con nosotros " * 8,
+                                  imagen_hash=f"{i:064x}", creado_por="bench"))
+        for i in range(1, servicios + 1):
+            session.add(Servicio(id_servicio=i, nombre=f"Servicio {i}", descripcion="Sesiones guiadas " * 5,
+                                 modalidad=ModalidadServicio.Presencial, fecha_creacion=ahora, creado_por="bench", estado=1))
+        for c in range(1, comunidades + 1):
+            for s in range(c % 7, servicios, 7):
+                session.add(ComunidadXServicio(id_comunidad=c, id_servicio=s + 1))
+        for i in range(1, clientes + 1):
+            session.add(Usuario(id_usuario=i, nombre=f"Nombre{i}", apellido=f"Apellido{i}", email=f"cliente{i}@test.com",
+                                password="x", tipo=TipoUsuario.Cliente, creado_por="bench"))
+            session.add(Cliente(id_cliente=i, id_usuario=i, tipo_documento=TipoDocumento.DNI, num_doc=str(10000000 + i),
+                                numero_telefono="999999999", id_departamento=15, id_distrito=1 + i % 40,
+                                direccion=f"Av. Siempre Viva {i}", talla=170, peso=70))
+            session.add(Suspension(id_suspension=i, id_cliente=i, id_inscripcion=i, motivo="Viaje de trabajo",
+                                   fecha_inicio=ahora, fecha_fin=ahora + timedelta(days=10), creado_por="bench", estado=2))
+        session.commit()
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir_endpoints(client: TestClient, repeticiones: int) -> List[Dict]:
+    resultados = []
+    for ruta in ENDPOINTS:
+        for codificacion in CODIFICACIONES:
+            tiempos, transferidos, sin_comprimir = [], 0, 0
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                response = client.get(ruta, headers={"Accept-Encoding": codificacion})
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                assert response.status_code == 200, (ruta, response.status_code)
+                transferidos, sin_comprimir = response.num_bytes_downloaded, len(response.content)
+            resultados.append({
+                "ruta": ruta,
+                "codificacion": codificacion,
+                "p50_ms": _percentil(tiempos, 50),
+                "p99_ms": _percentil(tiempos, 99),
+                "bytes": transferidos,
+                "bytes_sin_comprimir": sin_comprimir,
+            })
+    return resultados
+
+
+def medir_serializacion(engine, repeticiones: int) -> List[Dict]:
+    """Lista de clientes (ORM) -> bytes: camino de FastAPI para response_model vs a_json."""
+    modelo = List[UsuarioClienteFull]
+    campo = create_model_field(name="Response", type_=modelo, mode="serialization")
+    with Session(engine) as session:
+        clientes = session.exec(select(Usuario).options(selectinload(Usuario.cliente))).all()  # type: ignore[arg-type]
+
+        async def via_fastapi() -> bytes:
+            contenido = await serialize_response(field=campo, response_content=clientes, is_coroutine=False)
+            return JSONResponse(contenido).body
+
+        estrategias = {
+            "fastapi_response_model": lambda: asyncio.run(via_fastapi()),
+            "a_json": lambda: a_json(clientes, modelo, validar=True),
+        }
+        assert json.loads(estrategias["fastapi_response_model"]()) == json.loads(estrategias["a_json"]())
+
+        resultados = []
+        for nombre, funcion in estrategias.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            resultados.append({"estrategia": nombre, "filas": len(clientes),
+                               "p50_ms": _percentil(tiempos, 50), "p99_ms": _percentil(tiempos, 99)})
+    return resultados
+
+
+def ejecutar(clientes: int = 2000, repeticiones: int = 50) -> Dict[str, List[Dict]]:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    poblar(engine, clientes)
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    anterior = app.dependency_overrides.get(get_session)
+    app.dependency_overrides[get_session] = _session
+    limpiar_catalogo()
+    try:
+        return {
+            "endpoints": medir_endpoints(TestClient(app), repeticiones),
+            "serializacion": medir_serializacion(engine, max(1, repeticiones // 5)),
+        }
+    finally:
+        if anterior is None:
+            app.dependency_overrides.pop(get_session, None)
+        else:
+            app.dependency_overrides[get_session] = anterior
+        limpiar_catalogo()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia y tamaño de los listados más pesados")
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.clientes, args.repeticiones)
+    print(f"{'ruta':<55} {'codif.':>8} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>9} {'ratio':>6}")
+    for r in resultados["endpoints"]:
+        ratio = r["bytes_sin_comprimir"] / r["bytes"] if r["bytes"] else 0
+        print(f"{r['ruta']:<55} {r['codificacion']:>8} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['bytes']:>9} {ratio:>6.1f}")
+    print()
+    for r in resultados["serializacion"]:
+        print(f"{r['estrategia']:<25} {r['filas']:>6} filas  p50 {r['p50_ms']:.2f} ms  p99 {r['p99_ms']:.2f} ms")
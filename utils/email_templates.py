@@ -0,0 +1,415 @@
+"""
+Plantillas de correo precompiladas.
+
+Cada plantilla se prepara una sola vez al importar el módulo: se separan las
+secciones condicionales y cada fragmento se parte (con string.Formatter) en
+literales y campos, validando nombres y formatos. Renderizar es intercalar los
+literales con los atributos del contexto ya formateados.
+
+Sintaxis:
+    {campo}                  valor del contexto (se escapa como HTML)
+    {campo:formato}          fecha/hora con el formateador localizado ("iso", "corta", "larga", "hora")
+    {campo:formato|N/A}      texto por defecto si el valor es None o vacío
+    {#campo} ... {/campo}    sección que solo se incluye si el campo es verdadero
+
+Los contextos son dataclasses tipadas; las plantillas solo leen sus atributos.
+"""
+import html
+import os
+import re
+import textwrap
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+EMAIL_LOCALE = os.getenv("EMAIL_LOCALE", "es")
+
+# ---------------------------------------------------------------------------
+# Formateo localizado de fechas
+# ---------------------------------------------------------------------------
+
+LOCALES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "es": {
+        "dias": ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"),
+        "meses": ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+                  "agosto", "septiembre", "octubre", "noviembre", "diciembre"),
+        "larga": ("{dia} {d} de {mes} de {anio}",),
+    },
+    "en": {
+        "dias": ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"),
+        "meses": ("January", "February", "March", "April", "May", "June", "July",
+                  "August", "September", "October", "November", "December"),
+        "larga": ("{dia}, {mes} {d}, {anio}",),
+    },
+}
+
+FechaHora = Union[date, datetime, time]
+
+
+@lru_cache(maxsize=4096)
+def formatear_fecha(valor: FechaHora, formato: str = "iso", locale: str = EMAIL_LOCALE) -> str:
+    """
+    Formatea fechas y horas. Cacheado: los correos de un mismo día repiten
+    las mismas fechas y horas de sesión.
+    """
+    if formato == "hora":
+        return valor.strftime("%H:%M")
+    if isinstance(valor, time):
+        raise ValueError(f"Formato '{formato}' no aplica a una hora")
+    if formato == "iso":
+        return valor.strftime("%Y-%m-%d")
+    if formato == "corta":
+        return valor.strftime("%d/%m/%Y")
+    if formato == "larga":
+        nombres = LOCALES.get(locale, LOCALES["es"])
+        return nombres["larga"][0].format(
+            dia=nombres["dias"][valor.weekday()],
+            d=valor.day,
+            mes=nombres["meses"][valor.month - 1],
+            anio=valor.year,
+        )
+    raise ValueError(f"Formato de fecha desconocido: '{formato}'")
+
+
+@lru_cache(maxsize=4096)
+def _escapar(texto: str) -> str:
+    return html.escape(texto)
+
+
+def _texto(valor: Any, defecto: str) -> str:
+    if valor is None or valor == "":
+        return defecto
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return _escapar(valor if isinstance(valor, str) else str(valor))
+
+
+def _fecha(valor: Optional[FechaHora], formato: str, defecto: str) -> str:
+    return defecto if valor is None else formatear_fecha(valor, formato)
+
+
+# ---------------------------------------------------------------------------
+# Compilación y registro
+# ---------------------------------------------------------------------------
+
+_SECCION = re.compile(r"\{#(\w+)\}(.*?)\{/\1\}", re.S)
+_CAMPO = re.compile(r"^\w+$")
+
+Renderizador = Callable[[Any], str]
+
+
+def _campo(nombre: str, formato: str, defecto: str) -> Renderizador:
+    obtener = attrgetter(nombre)
+    if formato:
+        formatear_fecha(date(2000, 1, 1) if formato != "hora" else time(0), formato)  # valida el formato
+        return lambda c: _fecha(obtener(c), formato, defecto)
+    return lambda c: _texto(obtener(c), defecto)
+
+
+def _preparar(texto: str) -> Tuple[str, Tuple[Tuple[Renderizador, str], ...]]:
+    """
+    Valida el fragmento con string.Formatter y lo separa en literales y campos:
+    "Hola {nombre:|N/A}!" pasa a "Hola " y ((campo nombre, "!"),).
+    """
+    literales: List[str] = [""]
+    campos: List[Renderizador] = []
+    for literal, nombre, spec, conversion in Formatter().parse(texto):
+        literales[-1] += literal
+        if nombre is None:
+            continue
+        if not _CAMPO.match(nombre) or conversion:
+            raise ValueError(f"Campo de plantilla inválido: '{nombre}'")
+        formato, _, defecto = (spec or "").partition("|")
+        campos.append(_campo(nombre, formato, defecto))
+        literales.append("")
+    return literales[0], tuple(zip(campos, literales[1:]))
+
+
+def compilar(texto: str) -> Renderizador:
+    """
+    Prepara la plantilla una sola vez (secciones, literales, campos y formatos);
+    renderizar solo intercala los literales con los atributos del contexto formateados.
+    """
+    texto = textwrap.dedent(texto).strip()
+    secciones: List[Tuple[Optional[str], str]] = []
+    posicion = 0
+    for coincidencia in _SECCION.finditer(texto):
+        secciones.append((None, texto[posicion:coincidencia.start()]))
+        secciones.append((coincidencia.group(1), coincidencia.group(2)))
+        posicion = coincidencia.end()
+    secciones.append((None, texto[posicion:]))
+    fragmentos = tuple((condicion, *_preparar(parte)) for condicion, parte in secciones if parte)
+
+    def renderizar(contexto: Any) -> str:
+        salida: List[str] = []
+        for condicion, inicio, campos in fragmentos:
+            if condicion is not None and not getattr(contexto, condicion):
+                continue
+            salida.append(inicio)
+            for campo, literal in campos:
+                salida += (campo(contexto), literal)
+        return "".join(salida)
+
+    return renderizar
+
+
+@dataclass(frozen=True)
+class Plantilla:
+    nombre: str
+    contexto: type
+    asunto: Renderizador
+    html: Renderizador
+
+    def renderizar(self, contexto: Any) -> Tuple[str, str]:
+        """Devuelve (asunto, html)."""
+        if not isinstance(contexto, self.contexto):
+            raise TypeError(f"La plantilla '{self.nombre}' espera {self.contexto.__name__}, no {type(contexto).__name__}")
+        return self.asunto(contexto), self.html(contexto)
+
+
+class RegistroPlantillas:
+    def __init__(self):
+        self._plantillas: Dict[str, Plantilla] = {}
+
+    def registrar(self, nombre: str, contexto: type, asunto: str, html: str) -> Plantilla:
+        if nombre in self._plantillas:
+            raise ValueError(f"Plantilla '{nombre}' ya registrada")
+        plantilla = Plantilla(nombre, contexto, compilar(asunto), compilar(html))
+        self._plantillas[nombre] = plantilla
+        return plantilla
+
+    def obtener(self, nombre: str) -> Plantilla:
+        return self._plantillas[nombre]
+
+    def renderizar(self, nombre: str, contexto: Any) -> Tuple[str, str]:
+        return self._plantillas[nombre].renderizar(contexto)
+
+    def nombres(self) -> List[str]:
+        return list(self._plantillas)
+
+
+plantillas = RegistroPlantillas()
+
+
+# ---------------------------------------------------------------------------
+# Contextos
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ContextoConfirmacion:
+    url: str
+
+
+@dataclass(frozen=True)
+class ContextoReserva:
+    nombre_cliente: str
+    nombre_servicio: Optional[str]
+    fecha: Optional[date]
+    hora_inicio: Optional[time]
+    hora_fin: Optional[time]
+    ubicacion: Optional[str] = None
+    direccion_detallada: Optional[str] = None
+    topes_consumidos: Optional[int] = None
+    topes_disponibles: Optional[int] = None
+
+    @property
+    def con_topes(self) -> bool:
+        return self.topes_consumidos is not None and self.topes_disponibles is not None
+
+
+@dataclass(frozen=True)
+class ContextoFormulario:
+    nombre_profesional: str
+    nombre_cliente: str
+    inicio_sesion: datetime
+
+
+@dataclass(frozen=True)
+class ContextoRecuperacion:
+    nombre: str
+    url: str
+
+
+@dataclass(frozen=True)
+class ContextoCambioContrasena:
+    nombre: str
+
+
+@dataclass(frozen=True)
+class ContextoCancelacionReserva:
+    nombre_cliente: str
+    nombre_servicio: str
+    fecha: Optional[date]
+
+
+@dataclass(frozen=True)
+class ContextoSuspension:
+    nombre_usuario: str
+    motivo: Optional[str]
+    fecha_inicio: date
+    fecha_fin: date
+
+
+@dataclass(frozen=True)
+class ContextoMembresiaActiva:
+    nombre_usuario: str
+    nombre_plan: str
+    nombre_comunidad: str
+    fecha_inicio: Optional[date]
+    fecha_fin: Optional[date]
+    precio: Union[Decimal, float]
+
+
+@dataclass(frozen=True)
+class ContextoMembresiaCancelada:
+    nombre_usuario: str
+    nombre_plan: str
+    nombre_comunidad: str
+    fecha_inicio: Optional[date]
+    fecha_cancelacion: Optional[date]
+
+
+# ---------------------------------------------------------------------------
+# Plantillas
+# ---------------------------------------------------------------------------
+
+_BOTON = 'style="padding:10px 18px;background:#4f46e5;color:#fff;border-radius:6px;text-decoration:none"'
+_CAJA = 'style="font-family: Arial, sans-serif; color: #333; max-width: 600px; margin: auto; border: 1px solid #ddd; padding: 20px; border-radius: 8px;"'
+_CELDA = 'style="padding: 10px; border: 1px solid #eee;"'
+_CELDA_TITULO = 'style="padding: 10px; border: 1px solid #eee; font-weight: bold;"'
+
+CONFIRMACION = plantillas.registrar("confirmacion", ContextoConfirmacion, "Confirma tu correo", f"""
+    <h2>¡Bienvenido a CommuConnect!</h2>
+    <p>Pulsa el botón para activar tu cuenta:</p>
+    <p><a {_BOTON} href="{{url}}">Confirmar correo</a></p>
+    <p>Si el botón no funciona, copia y pega este enlace:<br>{{url}}</p>
+""")
+
+RESERVA = plantillas.registrar("reserva", ContextoReserva, "Confirmación de tu Reserva", f"""
+    <div {_CAJA}>
+        <h2 style="color: #4f46e5;">Confirmación de Reserva en CommuConnect</h2>
+        <p>Hola {{nombre_cliente}},</p>
+        <p>Tu reserva ha sido confirmada con éxito. Aquí están los detalles:</p>
+        <table style="width: 100%; border-collapse: collapse; margin-top: 20px; font-size: 14px;">
+            <tr style="background-color: #f9f9f9;">
+                <td {_CELDA_TITULO}>Servicio:</td>
+                <td {_CELDA}>{{nombre_servicio:|N/A}}</td>
+            </tr>
+            <tr>
+                <td {_CELDA_TITULO}>Fecha:</td>
+                <td {_CELDA}>{{fecha:larga|N/A}}</td>
+            </tr>
+            <tr style="background-color: #f9f9f9;">
+                <td {_CELDA_TITULO}>Hora:</td>
+                <td {_CELDA}>{{hora_inicio:hora|N/A}} - {{hora_fin:hora|N/A}}</td>
+            </tr>
+            <tr>
+                <td {_CELDA_TITULO}>Ubicación:</td>
+                <td {_CELDA}>
+                    {{ubicacion:|N/A}}
+                    {{#direccion_detallada}}<br><small style='color: #555;'>{{direccion_detallada}}</small>{{/direccion_detallada}}
+                </td>
+            </tr>
+        </table>
+        {{#con_topes}}<p style="margin-top: 20px; border-top: 1px solid #eee; padding-top: 15px; font-size: 14px;">
+            <strong>Resumen de tu plan:</strong>
+            Has utilizado {{topes_consumidos}} de {{topes_disponibles}} topes.
+        </p>{{/con_topes}}
+        <p style="margin-top: 25px;">¡Te esperamos!</p>
+        <p>El equipo de CommuConnect</p>
+    </div>
+""")
+
+FORMULARIO = plantillas.registrar(
+    "formulario", ContextoFormulario, "Nuevo Formulario Recibido de {nombre_cliente:|N/A}", f"""
+    <div {_CAJA}>
+        <h2 style="color: #4f46e5;">Nuevo Formulario Recibido</h2>
+        <p>Hola {{nombre_profesional}},</p>
+        <p>El cliente <strong>{{nombre_cliente:|N/A}}</strong> ha completado y enviado el formulario para la sesión del <strong>{{inicio_sesion:corta}}</strong> a las <strong>{{inicio_sesion:hora}}</strong>.</p>
+        <p>Puedes encontrar el documento adjunto a este correo.</p>
+        <br>
+        <p>Saludos,</p>
+        <p>El equipo de CommuConnect</p>
+    </div>
+""")
+
+RECUPERACION = plantillas.registrar("recuperacion", ContextoRecuperacion, "Recuperación de Contraseña", f"""
+    <h2>Recuperación de Contraseña</h2>
+    <p>Hola {{nombre}},</p>
+    <p>Has solicitado restablecer tu contraseña. Para continuar, haz clic en el siguiente botón:</p>
+    <p><a {_BOTON} href="{{url}}">Cambiar contraseña</a></p>
+    <p>Este enlace tiene una validez de 5 minutos.</p>
+    <p>Si el botón no funciona, también puedes copiar y pegar este enlace en tu navegador:</p>
+    <p><code>{{url}}</code></p>
+    <p>Si tú no hiciste esta solicitud, puedes ignorar este mensaje.</p>
+    <br>
+    <p>El equipo de CommuConnect</p>
+""")
+
+CAMBIO_CONTRASENA = plantillas.registrar(
+    "cambio_contrasena", ContextoCambioContrasena, "Confirmación de Cambio de Contraseña", """
+    <h2>Confirmación de Cambio de Contraseña</h2>
+    <p>Hola {nombre},</p>
+    <p>Te informamos que tu contraseña fue cambiada exitosamente.</p>
+    <p>Si tú realizaste este cambio, no necesitas hacer nada más.</p>
+    <p>Si <strong>no reconoces esta actividad</strong>, por favor comunícate inmediatamente con nuestro equipo de soporte.</p>
+    <br>
+    <p>El equipo de CommuConnect</p>
+""")
+
+CANCELACION_RESERVA = plantillas.registrar(
+    "cancelacion_reserva", ContextoCancelacionReserva, "Tu reserva ha sido cancelada", f"""
+    <div {_CAJA}>
+        <h2 style="color: #e53e3e;">Reserva Cancelada</h2>
+        <p>Hola {{nombre_cliente}},</p>
+        <p>Te informamos que tu reserva para el servicio <strong>{{nombre_servicio:|N/A}}</strong> el día <strong>{{fecha:larga|N/A}}</strong> ha sido <strong>cancelada exitosamente</strong>.</p>
+        <p>Si tienes dudas o necesitas reprogramar, contáctanos.</p>
+        <br>
+        <p>El equipo de CommuConnect</p>
+    </div>
+""")
+
+SUSPENSION_ACEPTADA = plantillas.registrar(
+    "suspension_aceptada", ContextoSuspension, "Tu suspensión de membresía ha sido aceptada", """
+    <h2>¡Solicitud de suspensión aceptada!</h2>
+    <p>Hola {nombre_usuario},</p>
+    <p>Tu solicitud de suspensión de membresía ha sido <strong>aceptada</strong>.</p>
+    <ul>
+        <li><strong>Motivo:</strong> {motivo}</li>
+        <li><strong>Fecha de inicio:</strong> {fecha_inicio:larga}</li>
+        <li><strong>Fecha de fin:</strong> {fecha_fin:larga}</li>
+    </ul>
+    <p>Durante este periodo, tu membresía estará congelada.</p>
+    <p>Gracias por confiar en CommuConnect.</p>
+""")
+
+MEMBRESIA_ACTIVA = plantillas.registrar(
+    "membresia_activa", ContextoMembresiaActiva, "¡Tu membresía está activa!", """
+    <h2>¡Membresía activada!</h2>
+    <p>Hola {nombre_usuario},</p>
+    <p>Tu membresía <strong>{nombre_plan}</strong> en la comunidad <strong>{nombre_comunidad}</strong> está <strong>activa y lista para usar</strong>.</p>
+    <ul>
+        <li><strong>Fecha de inicio:</strong> {fecha_inicio:larga}</li>
+        <li><strong>Fecha de fin:</strong> {fecha_fin:larga}</li>
+        <li><strong>Precio:</strong> S/ {precio}</li>
+    </ul>
+    <p>¡Disfruta de todos los beneficios de tu membresía!</p>
+    <p>El equipo de CommuConnect</p>
+""")
+
+MEMBRESIA_CANCELADA = plantillas.registrar(
+    "membresia_cancelada", ContextoMembresiaCancelada, "Tu membresía ha sido cancelada", """
+    <h2>Membresía cancelada</h2>
+    <p>Hola {nombre_usuario},</p>
+    <p>Te informamos que tu membresía <strong>{nombre_plan}</strong> en la comunidad <strong>{nombre_comunidad}</strong> ha sido <strong>cancelada</strong>.</p>
+    <ul>
+        <li><strong>Fecha de inicio:</strong> {fecha_inicio:larga}</li>
+        <li><strong>Fecha de cancelación:</strong> {fecha_cancelacion:larga}</li>
+    </ul>
+    <p>Si tienes dudas o deseas reactivar tu membresía, contáctanos.</p>
+    <p>El equipo de CommuConnect</p>
+""")
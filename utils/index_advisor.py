@@ -0,0 +1,176 @@
+"""
+Asesor de índices: ejecuta EXPLAIN sobre las consultas frecuentes de los módulos
+de servicios y marca las que hacen full scan. Las consultas salen de los mismos
+constructores (`_consulta_*`) que usan los servicios, no de copias.
+
+Uso:
+    python -m utils.index_advisor              # patrones registrados en PATRONES
+    python -m utils.index_advisor --min-filas 1000
+
+También se puede capturar lo que ejecuta un flujo real:
+    with capturar_consultas(engine) as consultas:
+        ...  # llamar servicios / endpoints
+    reporte = analizar_sql(engine, consultas)
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.modules.billing import services as facturacion
+from app.modules.billing.models import Inscripcion
+from app.modules.reservations import services as reservas
+from app.modules.services import services as servicios
+from app.modules.users import services as usuarios
+
+
+@dataclass
+class Hallazgo:
+    consulta: str
+    tabla: Optional[str]
+    tipo_acceso: Optional[str]
+    indice: Optional[str]
+    indices_posibles: Optional[str]
+    filas_estimadas: Optional[int]
+
+    @property
+    def sin_indice(self) -> bool:
+        # Full scan sin ningún índice utilizable: falta un índice
+        return self.tipo_acceso == "ALL" and not self.indices_posibles
+
+    @property
+    def severidad(self) -> str:
+        if self.sin_indice:
+            return "ERROR"
+        if self.tipo_acceso == "ALL":
+            return "AVISO"   # Hay índice pero el optimizador prefirió recorrer la tabla
+        return "INFO"        # type=index: recorre el índice completo
+
+
+@dataclass
+class Reporte:
+    analizadas: int = 0
+    hallazgos: List[Hallazgo] = field(default_factory=list)
+
+    @property
+    def errores(self) -> List[Hallazgo]:
+        return [h for h in self.hallazgos if h.sin_indice]
+
+
+def _ahora() -> datetime:
+    return datetime.utcnow()
+
+
+# Cada patrón llama al constructor de la consulta que usa el servicio (no una copia),
+# así el reporte sigue al código. Valores de ejemplo: EXPLAIN no depende de ellos.
+PATRONES: Dict[str, Callable] = {
+    "reservations.calcular_disponibilidad": lambda: reservas._consulta_disponibilidad([1, 2, 3]),
+    "reservations.validar_cliente_sin_conflicto": lambda: reservas._consulta_reservas_en_conflicto(
+        1, 1, _ahora(), _ahora() + timedelta(hours=1)
+    ),
+    "reservations.obtener_fechas_presenciales": lambda: reservas._consulta_fechas_presenciales(1, 1, 1),
+    "reservations.listar_reservas_usuario_comunidad_semana": lambda: reservas._consulta_reservas_comunidad_semana(
+        1, 1, _ahora().date()
+    ),
+    "reservations.reconciliar_contadores_reservas": reservas._consulta_reconciliar_contadores,
+    "services.obtener_sesiones_virtuales_por_profesional": lambda: servicios._consulta_sesiones_virtuales_profesional(1),
+    "services.obtener_sesiones_presenciales_por_local": lambda: servicios._consulta_sesiones_presenciales_local(1),
+    "billing.obtener_inscripcion_activa": lambda: facturacion._consulta_inscripcion_activa(1, 1),
+    "billing.listar_historial_membresias": lambda: (
+        facturacion._consulta_historial_membresias().where(Inscripcion.id_cliente == 1)
+    ),
+    "billing.es_plan_con_topes": lambda: facturacion._consulta_detalle_inscripcion(1),
+    "users.tiene_membresia_activa": lambda: usuarios._consulta_estado_membresia(1, 1),
+}
+
+
+def _explicar(conexion, sql: str, parametros) -> List[dict]:
+    resultado = conexion.exec_driver_sql(f"EXPLAIN {sql}", parametros)
+    columnas = list(resultado.keys())
+    return [dict(zip(columnas, fila)) for fila in resultado.fetchall()]
+
+
+def _registrar_plan(reporte: Reporte, nombre: str, plan: List[dict]) -> None:
+    reporte.analizadas += 1
+    for paso in plan:
+        if paso.get("type") not in ("ALL", "index"):
+            continue
+        reporte.hallazgos.append(Hallazgo(
+            consulta=nombre,
+            tabla=paso.get("table"),
+            tipo_acceso=paso.get("type"),
+            indice=paso.get("key"),
+            indices_posibles=paso.get("possible_keys"),
+            filas_estimadas=paso.get("rows"),
+        ))
+
+
+def analizar_patrones(engine: Engine, patrones: Optional[Dict[str, Callable]] = None) -> Reporte:
+    """Ejecuta EXPLAIN sobre cada patrón registrado."""
+    reporte = Reporte()
+    with engine.connect() as conexion:
+        for nombre, construir in (patrones or PATRONES).items():
+            compilado = construir().compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+            parametros = compilado.params
+            if compilado.positional:
+                parametros = tuple(parametros[k] for k in compilado.positiontup)  # type: ignore
+            _registrar_plan(reporte, nombre, _explicar(conexion, str(compilado), parametros))
+    return reporte
+
+
+def analizar_sql(engine: Engine, consultas: List[tuple]) -> Reporte:
+    """Ejecuta EXPLAIN sobre sentencias capturadas con `capturar_consultas`."""
+    reporte = Reporte()
+    with engine.connect() as conexion:
+        for sql, parametros in consultas:
+            _registrar_plan(reporte, " ".join(sql.split())[:120], _explicar(conexion, sql, parametros))
+    return reporte
+
+
+@contextmanager
+def capturar_consultas(engine: Engine):
+    """Registra los SELECT distintos que se ejecutan dentro del bloque."""
+    consultas: List[tuple] = []
+    vistas = set()
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and statement not in vistas:
+            vistas.add(statement)
+            consultas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, "before_cursor_execute", _registrar)
+
+
+def imprimir_reporte(reporte: Reporte, min_filas: int = 0) -> None:
+    print(f"Consultas analizadas: {reporte.analizadas}")
+    visibles = [h for h in reporte.hallazgos if (h.filas_estimadas or 0) >= min_filas or h.sin_indice]
+    if not visibles:
+        print("Sin full scans.")
+        return
+    for h in visibles:
+        print(
+            f"[{h.severidad}] {h.consulta}: tabla={h.tabla} type={h.tipo_acceso} "
+            f"key={h.indice} possible_keys={h.indices_posibles} rows={h.filas_estimadas}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas frecuentes")
+    parser.add_argument("--min-filas", type=int, default=0, help="Ocultar avisos con menos filas estimadas")
+    args = parser.parse_args()
+
+    import app.main  # noqa: F401  (registra todos los modelos)
+    from app.core.db import engine
+
+    reporte = analizar_patrones(engine)
+    imprimir_reporte(reporte, args.min_filas)
+    sys.exit(1 if reporte.errores else 0)
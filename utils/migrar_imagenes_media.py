@@ -0,0 +1,19 @@
+"""
+Copia las imágenes BLOB existentes (comunidad, servicio, distrito) al almacén de media.
+Uso: python -m utils.migrar_imagenes_media
+Requiere haber aplicado antes database/sql/migracion_media_imagenes.sql
+"""
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.modules.media.services import migrar_imagenes_legadas
+
+# Se importan todos los modelos para que SQLAlchemy resuelva las relaciones
+import app.main  # noqa: F401
+
+
+if __name__ == "__main__":
+    with Session(engine) as session:
+        resumen = migrar_imagenes_legadas(session)
+    for tabla, migradas in resumen.items():
+        print(f"{tabla}: {migradas} imágenes migradas")
@@ -0,0 +1,116 @@
+"""
+Prueba de carga: throughput y latencia de un endpoint con N clientes concurrentes.
+
+Pensada para comparar la ruta sync contra la async del mismo endpoint. Se levantan
+dos instancias de la API, una con ASYNC_DB_ROUTERS vacío y otra con los routers async:
+
+    uvicorn app.main:app --port 8000
+    ASYNC_DB_ROUTERS=reservations,communities uvicorn app.main:app --port 8001
+
+    python -m utils.prueba_carga --sync http://localhost:8000 --async http://localhost:8001 \\
+        --ruta "/api/reservations/disponibilidad?ids=1&ids=2&ids=3" --clientes 500 --duracion 20
+
+Para rutas autenticadas se pasa --token <JWT>.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import httpx
+
+
+@dataclass
+class ResultadoCarga:
+    etiqueta: str
+    duracion: float
+    latencias: List[float] = field(default_factory=list)
+    errores: int = 0
+
+    @property
+    def peticiones(self) -> int:
+        return len(self.latencias) + self.errores
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencias) / self.duracion if self.duracion else 0.0
+
+    def percentil(self, p: float) -> float:
+        if not self.latencias:
+            return 0.0
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))]
+
+
+async def _cliente(http: httpx.AsyncClient, ruta: str, fin: float, resultado: ResultadoCarga) -> None:
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            respuesta = await http.get(ruta)
+            if respuesta.status_code >= 400:
+                resultado.errores += 1
+                continue
+        except httpx.HTTPError:
+            resultado.errores += 1
+            continue
+        resultado.latencias.append(time.perf_counter() - inicio)
+
+
+async def ejecutar_carga(
+    base_url: str,
+    ruta: str,
+    clientes: int = 500,
+    duracion: float = 20.0,
+    token: Optional[str] = None,
+    etiqueta: str = "",
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> ResultadoCarga:
+    """Lanza `clientes` corrutinas que piden `ruta` en bucle durante `duracion` segundos."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limites = httpx.Limits(max_connections=clientes, max_keepalive_connections=clientes)
+    resultado = ResultadoCarga(etiqueta=etiqueta or base_url, duracion=duracion)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limites, timeout=60, transport=transport
+    ) as http:
+        inicio = time.perf_counter()
+        fin = inicio + duracion
+        await asyncio.gather(*(_cliente(http, ruta, fin, resultado) for _ in range(clientes)))
+        resultado.duracion = time.perf_counter() - inicio
+    return resultado
+
+
+def imprimir_resultado(resultado: ResultadoCarga) -> None:
+    media = statistics.mean(resultado.latencias) if resultado.latencias else 0.0
+    print(
+        f"{resultado.etiqueta:>6}: {resultado.throughput:8.1f} req/s | "
+        f"peticiones={resultado.peticiones} errores={resultado.errores} | "
+        f"media={media * 1000:.1f}ms p50={resultado.percentil(0.50) * 1000:.1f}ms "
+        f"p99={resultado.percentil(0.99) * 1000:.1f}ms"
+    )
+
+
+async def _main(args) -> None:
+    resultados = []
+    for etiqueta, url in (("sync", args.sync), ("async", args.async_)):
+        if not url:
+            continue
+        resultado = await ejecutar_carga(url, args.ruta, args.clientes, args.duracion, args.token, etiqueta)
+        imprimir_resultado(resultado)
+        resultados.append(resultado)
+
+    if len(resultados) == 2 and resultados[0].throughput:
+        print(f"Mejora async/sync: x{resultados[1].throughput / resultados[0].throughput:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga sync vs async")
+    parser.add_argument("--sync", help="URL base de la instancia con rutas sync")
+    parser.add_argument("--async", dest="async_", help="URL base de la instancia con rutas async")
+    parser.add_argument("--ruta", required=True, help="Ruta a pedir, con query string")
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--duracion", type=float, default=20.0, help="Segundos por instancia")
+    parser.add_argument("--token", help="JWT para rutas autenticadas")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Plugin de pytest: falla un test si alguna ruta llamada durante el test emite más
+sentencias SQL que su presupuesto.
+
+Presupuestos por test (marker):
+    @pytest.mark.presupuesto_consultas(3)                                   # cualquier ruta
+    @pytest.mark.presupuesto_consultas({"GET /api/billing/membresias": 2})  # por ruta
+
+Presupuestos globales en pytest.ini (se aplican a todos los tests):
+    presupuestos_consultas =
+        GET /api/comunidades/listar_comunidad 1
+
+Las rutas se escriben con su plantilla (p. ej. /api/x/{id}); el método es opcional.
+Se registra con `-p utils.pytest_presupuesto_consultas` (ver pytest.ini).
+"""
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.core.instrumentacion import MedicionPeticion, agregar_observador, quitar_observador
+
+COMODIN = "*"
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        "presupuestos_consultas",
+        type="linelist",
+        help="Presupuesto de sentencias SQL por ruta: '[METODO] /ruta limite' por línea",
+        default=[],
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "presupuesto_consultas(limite): máximo de sentencias SQL por petición (int o dict ruta -> int)",
+    )
+
+
+def _presupuestos_ini(config) -> Dict[str, int]:
+    presupuestos = {}
+    for linea in config.getini("presupuestos_consultas"):
+        *ruta, limite = linea.split()
+        presupuestos[" ".join(ruta)] = int(limite)
+    return presupuestos
+
+
+def _presupuestos(item) -> Dict[str, int]:
+    presupuestos = _presupuestos_ini(item.config)
+    for marker in reversed(list(item.iter_markers("presupuesto_consultas"))):
+        valor = marker.args[0] if marker.args else marker.kwargs.get("limite")
+        if isinstance(valor, dict):
+            presupuestos.update(valor)
+        elif valor is not None:
+            presupuestos[COMODIN] = int(valor)
+    return presupuestos
+
+
+def _limite(presupuestos: Dict[str, int], metodo: str, ruta: str) -> Optional[int]:
+    for clave in (f"{metodo} {ruta}", ruta, COMODIN):
+        if clave in presupuestos:
+            return presupuestos[clave]
+    return None
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    presupuestos = _presupuestos(item)
+    if not presupuestos:
+        return (yield)
+
+    excedidos: List[str] = []
+
+    def observar(metodo: str, ruta: str, estado: int, medicion: MedicionPeticion) -> None:
+        limite = _limite(presupuestos, metodo, ruta)
+        if limite is not None and medicion.consultas > limite:
+            excedidos.append(f"{metodo} {ruta} -> {medicion.consultas} consultas (presupuesto {limite})")
+
+    agregar_observador(observar)
+    try:
+        resultado = yield
+    finally:
+        quitar_observador(observar)
+
+    if excedidos:
+        pytest.fail("Presupuesto de consultas excedido:\n  " + "\n  ".join(excedidos), pytrace=False)
+    return resultado